@@ -0,0 +1,100 @@
+#===============================================================================
+# script eventset_benchmark
+#
+# Copyright (C) 2024 Howard Klein - All Rights Reserved
+#
+# Event set benchmark, using the classic "hold" model: the event set is
+# populated with n entries, after which each hold operation pops the first
+# entry and pushes a new one, scheduled at the popped time plus an
+# exponentially distributed increment. The hold benchmark is run with both
+# SimTime and scalar (fast time mode) keys.
+#
+# Also benchmarks event processing throughput (events/second) for a couple
+# of demo models, both with and without fast time mode. Each model run
+# executes in a separate process, since model scripts can only be loaded
+# once per process.
+#
+# Run with simprovise importable (installed, or with PYTHONPATH set to the
+# repository root); results are printed.
+#===============================================================================
+import os, sys, time, random, itertools, subprocess
+
+from simprovise.core.simtime import SimTime
+from simprovise.core.simevent import _EVENT_SET_CLASSES
+
+_PKGROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEMODIR = os.path.join(_PKGROOT, 'simprovise', 'demos')
+
+
+def hold_benchmark(eventSetClass, n, nholds, fastTime, seed=42):
+    """
+    Run nholds hold operations against an event set of n entries, and
+    return the elapsed time
+    """
+    random.seed(seed)
+    eventset = eventSetClass()
+    seq = itertools.count()
+    keyclass = float if fastTime else SimTime
+    for i in range(n):
+        eventset.push([keyclass(random.expovariate(1.0)), 1, next(seq), i])
+    start = time.perf_counter()
+    for i in range(nholds):
+        tm = eventset.pop()[0]
+        eventset.push([tm + random.expovariate(1.0), 1, next(seq), i])
+    return time.perf_counter() - start
+
+
+_MODEL_BENCHMARK_SCRIPT = """
+import sys
+import simprovise.core.simevent as simevent
+simevent._fast_time = sys.argv[2] == 'True'
+from simprovise.core.model import SimModel
+from simprovise.core.simtime import SimTime
+from simprovise.runcontrol.replication import SimReplication
+model = SimModel.load_model_from_script(sys.argv[1])
+replication = SimReplication(model, 1, SimTime(int(sys.argv[3])),
+                             SimTime(int(sys.argv[4])), 1)
+replication.execute()
+print('BENCHMARK', replication.event_count, replication.execution_time)
+"""
+
+
+def model_benchmark(modelname, warmup, batchlength, fastTime):
+    """
+    Run a demo model in a subprocess (with the demos directory as the
+    working directory, so that the demo configuration files are used)
+    and return the number of events processed and elapsed time
+    """
+    modelpath = os.path.join(_DEMODIR, modelname)
+    pythonpath = os.pathsep.join(filter(None, (_PKGROOT,
+                                               os.environ.get('PYTHONPATH'))))
+    env = dict(os.environ, SIMPROVISE_MODEL_SCRIPT=modelpath,
+               PYTHONPATH=pythonpath)
+    args = [sys.executable, '-c', _MODEL_BENCHMARK_SCRIPT, modelpath,
+            str(fastTime), str(warmup), str(batchlength)]
+    output = subprocess.run(args, cwd=_DEMODIR, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    for line in output.splitlines():
+        if line.startswith('BENCHMARK'):
+            nevents, elapsed = line.split()[1:]
+            return int(nevents), float(elapsed)
+
+
+if __name__ == '__main__':
+    nholds = 20000
+    for n in (1000, 10000, 100000):
+        for eventSetClass in _EVENT_SET_CLASSES.values():
+            for fastTime in (False, True):
+                elapsed = hold_benchmark(eventSetClass, n, nholds, fastTime)
+                print("{0:24} FastTime = {1!s:5} n = {2:8d}: {3:8.0f} holds/second".format(
+                    eventSetClass.__name__, fastTime, n, nholds / elapsed))
+
+    # bank5.py defines the bank model classes; bank5a.py is the (first)
+    # model built from them.
+    for modelname, warmup, batchlength in (('mm_1.py', 1000, 50000),
+                                           ('bank5a.py', 100, 6000)):
+        for fastTime in (False, True):
+            nevents, elapsed = model_benchmark(modelname, warmup, batchlength,
+                                               fastTime)
+            print("{0:10} FastTime = {1!s:5}: {2:8d} events, {3:8.0f} events/second".format(
+                modelname, fastTime, nevents, nevents / elapsed))
@@ -0,0 +1,387 @@
+#===============================================================================
+# script outputdb_benchmarks
+#
+# Copyright (C) 2024 Howard Klein - All Rights Reserved
+#
+# Output database benchmarks, run against temporary output databases for a
+# model with thousands of (non time-weighted) datasets:
+#
+# insert:      Insert throughput (rows/second), with and without a row buffer
+# writer:      Insert throughput with a background writer thread
+# query:       Elapsed time and peak RSS for retrieving and analyzing a single
+#              dataset with millions of values
+# storage:     File size, merge and query times for the standard and compact
+#              datasetvalue layouts
+# replication: Merging replication output into a master database versus
+#              keeping each replication's output as a shard
+#
+# Run with the names of the benchmarks to run as arguments (or with no
+# arguments to run all of them), with simprovise importable (installed, or
+# with PYTHONPATH set to the repository root); results are printed.
+#===============================================================================
+import os, sys, time, random, shutil, sqlite3, subprocess, tempfile
+import numpy as np
+
+from simprovise.core.model import SimModel
+from simprovise.core.simclock import SimClock
+from simprovise.core.datasink import NullDataSink
+from simprovise.modeling import SimLocation
+from simprovise.database.outputdb import (SimLiveOutputDatabase,
+                                          SimArchivedOutputDatabase,
+                                          SimShardedOutputDatabase,
+                                          SimShardManifest,
+                                          SimDbDatasink,
+                                          SimDatasetSummaryData,
+                                          SimTimeSeriesData,
+                                          copy_run_data,
+                                          _ENTRIES_DATASET_NAME)
+
+_NLOCATIONS = 4000
+
+_PKGROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_model():
+    """
+    Create the benchmark model's locations, returning the model and the
+    locations' Entries datasets.
+    """
+    for i in range(_NLOCATIONS):
+        SimLocation("Location{0}".format(i))
+    model = SimModel.model()
+    entriesDatasets = [dset for dset in model.datasets
+                       if dset.name == _ENTRIES_DATASET_NAME]
+    return model, entriesDatasets
+
+
+def empty_output(model, compact=False):
+    """
+    Create an initialized output database with no dataset values, returning
+    its path.
+    """
+    db = SimLiveOutputDatabase()
+    db.initialize(model, compact=compact)
+    dbpath = db.db_path
+    for dset in model.datasets:
+        dset.datasink = NullDataSink()
+    db.close_database()
+    return dbpath
+
+
+def insert_rows(model, entriesDatasets, nrows, bufferSize, commitRate,
+                backgroundWriter=False, drawsPerRow=0):
+    """
+    Write nrows values to the Entries datasets of a new temporary file
+    output database, and print the insert throughput. Each row may be
+    preceded by some pseudo-random number generation (drawsPerRow), standing
+    in for the event processing of a write-heavy model, which a background
+    writer thread can overlap with database I/O.
+    """
+    SimClock.initialize()
+    SimDbDatasink.set_commit_rate(commitRate)
+    rng = random.Random(1)
+    db = SimLiveOutputDatabase()
+    db.buffer_size = bufferSize
+    db.background_writer = backgroundWriter
+    db.initialize(model)
+    db.initialize_run(1)
+    for dset in model.datasets:
+        dset.initialize_batch(1)
+    sinks = [dset.datasink for dset in entriesDatasets]
+    nsinks = len(sinks)
+
+    start = time.perf_counter()
+    for i in range(nrows):
+        if i % 100 == 0:
+            SimClock.advance_to_scalar(i)
+        for j in range(drawsPerRow):
+            rng.expovariate(1.0)
+        sinks[i % nsinks].put(i)
+    putTime = time.perf_counter() - start
+    for dset in model.datasets:
+        dset.finalize_batch(1)
+    db.flush_output()
+    elapsed = time.perf_counter() - start
+
+    for dset in model.datasets:
+        dset.datasink = NullDataSink()
+    dbpath = db.db_path
+    db.close_database()
+    os.remove(dbpath)
+    msg = "{0} datasets, buffer size {1:>5}, commit rate {2}, writer thread {3:d}, {4:>2} draws/row: {5:>6} rows, put() {6:6.2f} secs, with batch finalization {7:6.2f} secs, {8:>7.0f} rows/sec"
+    print(msg.format(len(entriesDatasets), bufferSize, commitRate,
+                     backgroundWriter, drawsPerRow, nrows, putTime,
+                     elapsed, nrows / elapsed))
+
+
+def insert_benchmark(model, entriesDatasets):
+    """
+    Insert throughput without and with row buffers of various sizes,
+    committing once per batch and after every row.
+    """
+    insert_rows(model, entriesDatasets, 200000, 0, 0)
+    for bufferSize in (100, 1000, 10000):
+        insert_rows(model, entriesDatasets, 200000, bufferSize, 0)
+    insert_rows(model, entriesDatasets, 20000, 0, 1)
+    insert_rows(model, entriesDatasets, 20000, 1000, 1)
+
+
+def writer_benchmark(model, entriesDatasets):
+    """
+    Insert throughput with and without a background writer thread, with
+    and without other (event processing) work between rows.
+    """
+    for drawsPerRow in (0, 20):
+        insert_rows(model, entriesDatasets, 200000, 0, 0,
+                    drawsPerRow=drawsPerRow)
+        insert_rows(model, entriesDatasets, 200000, 1000, 0,
+                    drawsPerRow=drawsPerRow)
+        insert_rows(model, entriesDatasets, 200000, 1000, 0, True,
+                    drawsPerRow=drawsPerRow)
+    insert_rows(model, entriesDatasets, 20000, 1000, 1, True)
+    insert_rows(model, entriesDatasets, 20000, 1000, 1, True, drawsPerRow=20)
+
+
+_QUERY_BENCHMARK_SCRIPT = """
+import sys, time, resource
+import numpy as np
+from simprovise.database.outputdb import (SimArchivedOutputDatabase,
+                                          SimOutputHistogramData,
+                                          SimTimeSeriesData,
+                                          SimDatasetSummaryData)
+db = SimArchivedOutputDatabase(sys.argv[1], upgrade=False)
+dset = db.get_dataset(sys.argv[2], sys.argv[3])
+datasetid = db.get_dataset_id(dset)
+start = time.perf_counter()
+if sys.argv[4] == 'fetchall':
+    sqlstr = '''select value, simtimestamp, totimestamp from datasetvalue
+                where dataset = ? and run = 1 and batch = 1 order by simtimestamp'''
+    values, timestamps, totimestamps = zip(*db.runQuery(sqlstr, datasetid))
+elif sys.argv[4] == 'chunks':
+    for values, timestamps, totimestamps in db.dataset_value_chunks(datasetid, 1, 1):
+        pass
+elif sys.argv[4] == 'histogram':
+    SimOutputHistogramData(db, dset, 1, 1)
+elif sys.argv[4] == 'summary':
+    SimDatasetSummaryData(db, dset, 1, 1).count
+else:
+    SimTimeSeriesData(db, dset, 1, 1, maxPoints=1000)
+elapsed = time.perf_counter() - start
+print('BENCHMARK', elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+db.close_database()
+"""
+
+
+def query_benchmark(model, entriesDatasets):
+    """
+    Elapsed time and peak RSS for retrieving a single (non time-weighted)
+    dataset with millions of values, fetched all at once (as runQuery()
+    does) and in chunks via dataset_value_chunks(), and for the histogram
+    and (downsampled) time series data calculated from those values. Each
+    measurement runs in a separate process, so that each peak RSS is
+    independent of the others. The histogram, time series and summary
+    statistics measurements are repeated after the query (covering)
+    indexes are created.
+    """
+    nvalues = 10000000
+    element = entriesDatasets[0].element_id
+    db = SimLiveOutputDatabase()
+    db.initialize(model)
+    timeDatasetID = db.get_dataset_id(db.get_dataset(element, "Time"))
+    populationDatasetID = db.get_dataset_id(db.get_dataset(element, "Population"))
+    dbpath = db.db_path
+    for dset in model.datasets:
+        dset.datasink = NullDataSink()
+    db.close_database()
+
+    # Write the dataset values directly, plus a single time-weighted row
+    # that sets the batch time bounds
+    rng = np.random.default_rng(1)
+    connection = sqlite3.connect(dbpath)
+    for start in range(0, nvalues, 1000000):
+        values = rng.integers(0, 1000, 1000000).tolist()
+        connection.executemany("insert into datasetvalue values(?, 1, 1, ?, null, ?)",
+                               ((timeDatasetID, (start + i) // 10, values[i])
+                                for i in range(len(values))))
+    connection.execute("insert into datasetvalue values(?, 1, 1, 0, ?, 0)",
+                       (populationDatasetID, nvalues // 10))
+    connection.commit()
+    connection.close()
+
+    pythonpath = os.pathsep.join(filter(None, (_PKGROOT, os.environ.get('PYTHONPATH'))))
+    env = dict(os.environ, PYTHONPATH=pythonpath)
+
+    def run_query(mode, indexed):
+        args = [sys.executable, '-c', _QUERY_BENCHMARK_SCRIPT, dbpath, element,
+                "Time", mode]
+        output = subprocess.run(args, env=env, check=True, capture_output=True,
+                                text=True).stdout
+        for line in output.splitlines():
+            if line.startswith('BENCHMARK'):
+                elapsed, maxrss = line.split()[1:]
+                print("{0:10} indexed {1:d} {2} values: {3:6.2f} secs, peak RSS {4:8.1f} MiB".format(
+                    mode, indexed, nvalues, float(elapsed), int(maxrss) / 1024))
+
+    for mode in ('fetchall', 'chunks', 'histogram', 'timeseries', 'summary'):
+        run_query(mode, False)
+    start = time.perf_counter()
+    db = SimArchivedOutputDatabase(dbpath, upgrade=False)
+    db.create_query_indexes()
+    db.close_database()
+    print("query index creation: {0:6.2f} secs".format(time.perf_counter() - start))
+    for mode in ('histogram', 'timeseries', 'summary'):
+        run_query(mode, True)
+    os.remove(dbpath)
+
+
+def storage_benchmark(model, entriesDatasets):
+    """
+    Output database file size, and the time to merge (as SimReplicator
+    does) and query a run's dataset values, for the standard and compact
+    datasetvalue layouts. The values are written at (fractional)
+    exponentially distributed simulated times.
+    """
+    nrows = 2000000
+    nsinks = len(entriesDatasets)
+
+    def write_output(compact):
+        SimClock.initialize()
+        SimDbDatasink.set_commit_rate(0)
+        rng = random.Random(1)
+        db = SimLiveOutputDatabase()
+        db.buffer_size = 10000
+        db.initialize(model, compact=compact)
+        db.initialize_run(1)
+        for dset in model.datasets:
+            dset.initialize_batch(1)
+        sinks = [dset.datasink for dset in entriesDatasets]
+        t = 0.0
+        for i in range(nrows):
+            if i % 10 == 0:
+                t += rng.expovariate(1.0)
+                SimClock.advance_to_scalar(t)
+            sinks[i % nsinks].put(rng.randint(0, 100))
+        for dset in model.datasets:
+            dset.finalize_batch(1)
+        db.flush_output()
+        for dset in model.datasets:
+            dset.datasink = NullDataSink()
+        dbpath = db.db_path
+        db.close_database()
+        return dbpath
+
+    for compact in (False, True):
+        dbpath = write_output(compact)
+        size = os.path.getsize(dbpath)
+
+        masterpath = empty_output(model, compact)
+        connection = sqlite3.connect(masterpath)
+        start = time.perf_counter()
+        connection.execute("attach '{0}' as srcdb".format(dbpath))
+        connection.execute("insert into datasetvalue select * from srcdb.datasetvalue")
+        connection.commit()
+        mergeTime = time.perf_counter() - start
+        connection.close()
+        os.remove(masterpath)
+
+        db = SimArchivedOutputDatabase(dbpath, upgrade=False)
+        start = time.perf_counter()
+        SimDatasetSummaryData.fetch_all(db, [(1, 1)])
+        summaryTime = time.perf_counter() - start
+        start = time.perf_counter()
+        for dset in entriesDatasets[:100]:
+            SimTimeSeriesData(db, dset, 1, 1)
+        timeSeriesTime = time.perf_counter() - start
+        db.close_database()
+
+        db = SimArchivedOutputDatabase(dbpath, upgrade=False)
+        db.create_query_indexes()
+        db.close_database()
+        indexedSize = os.path.getsize(dbpath)
+        os.remove(dbpath)
+        msg = "compact {0:d}: {1} rows, file size {2:6.1f} MiB ({3:6.1f} MiB with query indexes), merge {4:5.2f} secs, summary scan {5:5.2f} secs, 100 time series {6:5.2f} secs"
+        print(msg.format(compact, nrows, size / 2**20, indexedSize / 2**20,
+                         mergeTime, summaryTime, timeSeriesTime))
+
+
+def replication_benchmark(model, entriesDatasets):
+    """
+    The time to collect the output of many replications - merging each
+    run's database into a master database (as SimReplicator does by
+    default) versus keeping each as a shard listed in a manifest - and then
+    to summarize all of the runs from the merged and sharded databases, and
+    to compact the shards.
+    """
+    nruns = 16
+    rowsPerRun = 500000
+    workdir = tempfile.mkdtemp()
+    templatepath = empty_output(model)
+    connection = sqlite3.connect(templatepath)
+    datasetIDs = [row[0] for row in
+                  connection.execute("select id from dataset where name = ?",
+                                     (_ENTRIES_DATASET_NAME,))]
+    connection.close()
+    rundbs = {}
+    for run in range(1, nruns + 1):
+        rundbs[run] = os.path.join(workdir, 'run{0}.tmp'.format(run))
+        shutil.copyfile(templatepath, rundbs[run])
+        values = np.random.default_rng(run).integers(0, 100, rowsPerRun).tolist()
+        connection = sqlite3.connect(rundbs[run])
+        connection.executemany("insert into datasetvalue values(?, ?, 1, ?, null, ?)",
+                               ((datasetIDs[i % len(datasetIDs)], run, i // 10,
+                                 values[i]) for i in range(rowsPerRun)))
+        connection.commit()
+        connection.close()
+    os.remove(templatepath)
+
+    mergedpath = os.path.join(workdir, 'merged.simoutput')
+    start = time.perf_counter()
+    shutil.copyfile(rundbs[1], mergedpath)
+    connection = sqlite3.connect(mergedpath)
+    for run in range(2, nruns + 1):
+        lastStart = time.perf_counter()
+        copy_run_data(connection, rundbs[run], run)
+        lastMergeTime = time.perf_counter() - lastStart
+    connection.close()
+    mergeTime = time.perf_counter() - start
+
+    sharddir = os.path.join(workdir, 'shards')
+    os.mkdir(sharddir)
+    manifest = SimShardManifest(os.path.join(sharddir, 'output.simshards'))
+    start = time.perf_counter()
+    for run in range(1, nruns + 1):
+        shardpath = os.path.join(sharddir, 'run{0}.simoutput'.format(run))
+        shutil.move(rundbs[run], shardpath)
+        manifest.add_shard(run, shardpath)
+        manifest.save()
+    shardTime = time.perf_counter() - start
+
+    runBatches = [(run, 1) for run in range(1, nruns + 1)]
+    for label, db in (('merged', SimArchivedOutputDatabase(mergedpath, upgrade=False)),
+                      ('sharded', SimShardedOutputDatabase(manifest.path, upgrade=False))):
+        start = time.perf_counter()
+        SimDatasetSummaryData.fetch_all(db, runBatches)
+        print("{0:7} {1} runs x {2} rows: summary of all runs {3:6.2f} secs".format(
+            label, nruns, rowsPerRun, time.perf_counter() - start))
+        db.close_database()
+
+    start = time.perf_counter()
+    manifest.compact(os.path.join(workdir, 'compacted.simoutput'))
+    compactTime = time.perf_counter() - start
+    msg = "{0} runs x {1} rows: merge {2:6.2f} secs (last run {3:5.2f} secs), shard {4:6.3f} secs, offline compaction {5:6.2f} secs"
+    print(msg.format(nruns, rowsPerRun, mergeTime, lastMergeTime, shardTime,
+                     compactTime))
+    shutil.rmtree(workdir)
+
+
+_BENCHMARKS = {'insert': insert_benchmark,
+               'writer': writer_benchmark,
+               'query': query_benchmark,
+               'storage': storage_benchmark,
+               'replication': replication_benchmark}
+
+
+if __name__ == '__main__':
+    model, entriesDatasets = create_model()
+    for name in sys.argv[1:] or _BENCHMARKS:
+        _BENCHMARKS[name](model, entriesDatasets)
@@ -0,0 +1,38 @@
+#===============================================================================
+# script simtime_benchmark
+#
+# Copyright (C) 2024 Howard Klein - All Rights Reserved
+#
+# SimTime micro-benchmarks: throughput of construction, arithmetic,
+# comparison and hashing.
+#
+# Run with simprovise importable (installed, or with PYTHONPATH set to the
+# repository root); results are printed.
+#===============================================================================
+import timeit
+
+from simprovise.core.simtime import SimTime, Unit
+
+
+if __name__ == '__main__':
+    t1 = SimTime(2, Unit.MINUTES)
+    t2 = SimTime(30, Unit.SECONDS)
+    t3 = SimTime(90, Unit.SECONDS)
+    tests = (('SimTime(2)', lambda: SimTime(2)),
+             ('SimTime(2, MINUTES)', lambda: SimTime(2, Unit.MINUTES)),
+             ('SimTime.zero()', SimTime.zero),
+             ('t1 + t1 (same units)', lambda: t1 + t1),
+             ('t1 + t2 (mixed units)', lambda: t1 + t2),
+             ('t2 + 5 (scalar)', lambda: t2 + 5),
+             ('t1 * 3', lambda: t1 * 3),
+             ('t1 < t2', lambda: t1 < t2),
+             ('t1 == t3', lambda: t1 == t3),
+             ('t1 >= 0', lambda: t1 >= 0),
+             ('hash(t1)', lambda: hash(t1)),
+             ('t1.to_scalar()', t1.to_scalar),
+             ('t1.to_units(SECONDS)', lambda: t1.to_units(Unit.SECONDS)),
+             )
+    n = 200000
+    for name, func in tests:
+        elapsed = min(timeit.repeat(func, number=n, repeat=3))
+        print("{0:24}: {1:10.0f} operations/second".format(name, n / elapsed))
@@ -29,10 +29,13 @@ _MODEL_SCRIPT_ENV_VARNAME = 'SIMPROVISE_MODEL_SCRIPT'
 
 # Configuration .ini file section names
 _SIM_TIME = 'SimTime'
+_SIM_EVENT = 'SimEvent'
 _LOGGING = 'Logging'
 _SIM_RANDOM = 'SimRandom'
 SIM_TRACE = 'SimTrace'
 _OUTPUT_REPORT = 'Output Report'
+_OUTPUT_DATABASE = 'Output Database'
+_REPLICATION = 'Replication'
 _DATA_COLLECTION = 'Data Collection'
 
 _ERROR_NAME = 'SimConfiguration Error'
@@ -274,6 +277,15 @@ def set_modelscript_path(path):
     """
     _config.set_modelscript_path(path)
 
+def modelscript_environment():
+    """
+    Return a dictionary of the environment variable settings that give a
+    newly started simprovise process (e.g. a replication worker process)
+    the same model script path - and therefore the same configuration
+    files - as this process.
+    """
+    return {_MODEL_SCRIPT_ENV_VARNAME: os.path.abspath(_config._modelscript_path)}
+
 #===============================================================================
 # SimTime setting accessors
 #===============================================================================
@@ -300,6 +312,36 @@ def get_base_timeunit():
         errmsg = "Invalid SimTime BaseTimeUnit: {0}"
         raise SimError(_ERROR_NAME, errmsg, unitstr)
 
+
+#===============================================================================
+# SimEvent setting accessors
+#===============================================================================
+def get_event_set_type():
+    """
+    Return the event set (future event list) implementation as a string -
+    either 'heap' or 'calendar'.
+    Raises if the setting is not one of those values (case-insensitive)
+    """
+    valid_values = ('heap', 'calendar')
+    return _config.getstring(_SIM_EVENT, 'EventSet', valid_values, fallback='heap')
+
+def get_event_fast_time():
+    """
+    Return a boolean indicating whether the event processor should run in
+    fast time mode - i.e., use scalar (base unit) event times rather than
+    SimTime objects in the event set.
+    """
+    return _config.getboolean(_SIM_EVENT, 'FastTime', fallback=False)
+
+def get_event_compaction_threshold():
+    """
+    Return the percentage (0-100) of deregistered (removed) entries in the
+    event set that triggers compaction of the event set. A value of zero
+    indicates that compaction is disabled.
+    """
+    return _config.getint(_SIM_EVENT, 'CompactionThreshold', minvalue=0,
+                          maxvalue=100, fallback=50)
+
    
 #===============================================================================
 # SimLogging setting accessors
@@ -368,6 +410,14 @@ def get_max_replications():
     """
     return _config.getint(_SIM_RANDOM, 'MaxReplications', minvalue=1, fallback=1)
 
+def get_PRN_buffer_size():
+    """
+    Return the number of values sampled at a time by buffered
+    SimDistribution generators. Must be non-negative; zero indicates
+    that generators are not buffered.
+    """
+    return _config.getint(_SIM_RANDOM, 'BufferSize', minvalue=0, fallback=0)
+
    
 #===============================================================================
 # SimTrace setting accessors
@@ -414,6 +464,120 @@ def get_output_report_destination():
     return _config.getstring(_OUTPUT_REPORT, 'Destination', valid_values, fallback='stdout')
 
 
+#===============================================================================
+# Output Database setting accessors
+#===============================================================================
+def get_output_summary_only():
+    """
+    Return a boolean indicating whether the output database should record
+    only per-batch summary statistics for each dataset (rather than every
+    dataset value).
+    """
+    return _config.getboolean(_OUTPUT_DATABASE, 'SummaryOnly', fallback=False)
+
+def get_output_summary_sketch_size():
+    """
+    Return the maximum number of distinct values (or value clusters) held
+    by a summary datasink in order to estimate dataset percentiles. Must be
+    at least 10.
+    """
+    return _config.getint(_OUTPUT_DATABASE, 'SummarySketchSize', minvalue=10,
+                          fallback=1000)
+
+def get_output_buffer_size():
+    """
+    Return the number of dataset value rows to buffer before they are
+    written to the output database via a single bulk insert. Must be
+    non-negative; zero indicates that rows are inserted one at a time.
+    """
+    return _config.getint(_OUTPUT_DATABASE, 'BufferSize', minvalue=0, fallback=0)
+
+def get_output_buffer_flush_interval():
+    """
+    Return the maximum (wall clock) time in seconds that dataset value rows
+    may remain in the output database buffer before being written. Must be
+    non-negative; zero indicates no time limit.
+    """
+    return _config.getint(_OUTPUT_DATABASE, 'BufferFlushInterval', minvalue=0,
+                          fallback=0)
+
+def get_output_background_writer():
+    """
+    Return a boolean indicating whether dataset value rows should be
+    written to the output database by a separate (background) writer
+    thread, rather than by the simulation thread.
+    """
+    return _config.getboolean(_OUTPUT_DATABASE, 'BackgroundWriter',
+                              fallback=False)
+
+def get_output_writer_queue_size():
+    """
+    Return the maximum number of row buffers that may be queued for the
+    background writer thread before the simulation waits for it to catch
+    up. Must be at least one.
+    """
+    return _config.getint(_OUTPUT_DATABASE, 'WriterQueueSize', minvalue=1,
+                          fallback=16)
+
+def get_output_in_memory_replications():
+    """
+    Return a boolean indicating whether each simulation run (replication)
+    should write its output to an in-memory copy of its output database,
+    which is written to disk once, at the end of the run.
+    """
+    return _config.getboolean(_OUTPUT_DATABASE, 'InMemoryReplications',
+                              fallback=False)
+
+def get_output_compact_storage():
+    """
+    Return a boolean indicating whether new output databases should store
+    dataset values in the compact (WITHOUT ROWID) datasetvalue layout.
+    """
+    return _config.getboolean(_OUTPUT_DATABASE, 'CompactStorage',
+                              fallback=False)
+
+def get_output_sharded_replications():
+    """
+    Return a boolean indicating whether replication output should be kept
+    in a separate output database for each run (read in place via a shard
+    manifest), rather than merged into a single output database.
+    """
+    return _config.getboolean(_OUTPUT_DATABASE, 'ShardedReplications',
+                              fallback=False)
+
+
+#===============================================================================
+# Replication setting accessors
+#===============================================================================
+def get_replications_per_worker():
+    """
+    Return the maximum number of replications executed by each replication
+    worker process before it is replaced by a new process. Must be
+    non-negative; zero indicates no limit (worker processes are reused for
+    all replications).
+    """
+    return _config.getint(_REPLICATION, 'ReplicationsPerWorker', minvalue=0,
+                          fallback=0)
+
+def get_fork_after_warmup():
+    """
+    Return a boolean indicating whether replications should share a single
+    simulated warmup, with each replication forked (as a child process)
+    from the warmed-up model.
+    """
+    return _config.getboolean(_REPLICATION, 'ForkAfterWarmup', fallback=False)
+
+def get_worker_start_method():
+    """
+    Return the multiprocessing start method used to start replication
+    worker processes as a string - either 'spawn' or 'forkserver'.
+    Raises if the setting is not one of those values (case-insensitive)
+    """
+    valid_values = ('spawn', 'forkserver')
+    return _config.getstring(_REPLICATION, 'WorkerStartMethod', valid_values,
+                             fallback='spawn')
+
+
 #===============================================================================
 # Data Collection setting accessors
 #===============================================================================
@@ -433,6 +597,16 @@ def get_element_data_collection_disabled(element_id):
     matches = [fnmatchcase(element_id, pattern.strip()) for pattern in patterns]
     return True in matches
 
+def get_coalesce_time_weighted_values():
+    """
+    Returns ``True`` if time-weighted data collectors should coalesce
+    values set at the same simulated time, passing only the last of them
+    on to their datasink (based on the Data Collection
+    `Coalesce Time-Weighted Values` option).
+    """
+    return _config.getboolean(_DATA_COLLECTION, 'Coalesce Time-Weighted Values',
+                              fallback=False)
+
 def get_dataset_data_collection_disabled(element_id, dataset_name):
     """
     Returns ``True`` if data collection should be disabled for the dataset
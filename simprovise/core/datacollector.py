@@ -23,6 +23,7 @@ __all__ = ['SimDataCollector',
 from abc import ABCMeta, abstractmethod
 
 from simprovise.core import simtime, SimError
+from simprovise.core.simclock import SimClock
 from simprovise.core.simlogging import SimLogging
 from simprovise.core.datasink import NullDataSink
 from simprovise.core.apidoc import apidoc, apidocskip
@@ -203,6 +204,7 @@ class Dataset(object):
         later enabled.
         """
         oldSink = self.datasink
+        self.__dataCollector.flush_pending()
         self.__dataCollector.datasink = newSink
         if self.__batchNumber is not None:
             oldSink.finalize_batch(self.__batchNumber)
@@ -210,6 +212,7 @@ class Dataset(object):
 
     @apidocskip
     def flush(self):
+        self.__dataCollector.flush_pending()
         self.__dataCollector.datasink.flush()
 
     @apidocskip
@@ -219,6 +222,7 @@ class Dataset(object):
         Updates the batch number and delegates to the datasink to perform
         sink-specific (typically database-specific) start-of-batch processing.
         """
+        self.__dataCollector.flush_pending()
         self.__batchNumber = batchnum
         self.datasink.initialize_batch(batchnum)
 
@@ -236,6 +240,7 @@ class Dataset(object):
             errstr = "finalizeBatch({0}) called on dataset when current batch is {1}"
             raise SimError(_ERROR_NAME, errstr, batchnum, self.__batchNumber)
              
+        self.__dataCollector.flush_pending()
         self.datasink.finalize_batch(batchnum)
 
 
@@ -273,7 +278,8 @@ class SimDataCollector(metaclass=ABCMeta):
     :class:`SimUnweightedDataCollector` (which are in fact different
     parameterizations of `SimDataCollector`)
     """
-    __slots__ = ('__dataset', '__datasink', '__entries')
+    # _entries is updated directly by subclasses that override add_value()
+    __slots__ = ('__dataset', '__datasink', '_entries')
     collectorList = []
 
     # Class methods
@@ -295,7 +301,7 @@ class SimDataCollector(metaclass=ABCMeta):
         Initialize the entries and datasink members. If an element is specified, also
         create a dataset.
         """
-        self.__entries = 0
+        self._entries = 0
         self.__datasink = NullDataSink()
         dset = None
         if element is not None:                
@@ -306,16 +312,24 @@ class SimDataCollector(metaclass=ABCMeta):
     @apidocskip
     def reset(self):
         "Reset the statistics and data collection, typically for a new batch"
-        self.__entries = 0
+        self._entries = 0
  
     def add_value(self, newValue):
         """
         Add a new value to the dataset if data collection is enabled.
         """
-        self.__entries += 1
+        self._entries += 1
         if self.dataset.data_collection_enabled:            
             self.datasink.put(newValue)
 
+    @apidocskip
+    def flush_pending(self):
+        """
+        Pass any value held by the collector on to its datasink. A no-op
+        for collectors that do not hold values.
+        """
+        pass
+
     @property
     def name(self):
         "The data collector's dataset name"
@@ -327,7 +341,7 @@ class SimDataCollector(metaclass=ABCMeta):
     @apidocskip
     def entries(self):
         "Number of collected data values"
-        return self.__entries
+        return self._entries
     
     @property
     def dataset(self):
@@ -398,9 +412,67 @@ class SimTimeWeightedDataCollector(SimDataCollector):
     :type datasetValueType:  `int`, `float` or :class:`~.simtime.SimTime`
                              TODO state values
 
+    If the Data Collection `Coalesce Time-Weighted Values` configuration
+    setting is True, each new value is held by the collector until the
+    simulated clock advances (or the batch ends), so that only the last
+    value added at any given simulated time is passed on to the datasink.
+    A value that is replaced at the same simulated time contributes
+    nothing to time-weighted statistics, so coalescing reduces the number
+    of values written without changing results.
+
     """
+    __slots__ = ('__coalesce', '__pendingValue', '__isPending')
+
     def __init__(self, element, datasetName, datasetValueType):
         super().__init__(element, datasetName, datasetValueType, True)
+        self.__coalesce = simconfig.get_coalesce_time_weighted_values()
+        self.__pendingValue = None
+        self.__isPending = False
+
+    @property
+    def coalesce(self):
+        """
+        True if the collector coalesces values added at the same simulated
+        time. Initialized from the Data Collection
+        `Coalesce Time-Weighted Values` configuration setting.
+        """
+        return self.__coalesce
+
+    @coalesce.setter
+    def coalesce(self, value):
+        """
+        Turn coalescing on or off; turning it off passes any held value
+        on to the datasink.
+        """
+        if not value:
+            self.flush_pending()
+        self.__coalesce = bool(value)
+
+    def add_value(self, newValue):
+        """
+        Add a new value to the dataset if data collection is enabled. If
+        coalescing, the value is held until the clock advances, replacing
+        any value already held.
+        """
+        if not self.__coalesce:
+            super().add_value(newValue)
+            return
+        self._entries += 1
+        self.__pendingValue = newValue
+        if not self.__isPending:
+            self.__isPending = True
+            SimClock.call_before_advance(self.flush_pending)
+
+    @apidocskip
+    def flush_pending(self):
+        """
+        Pass the held (most recently added) value, if any, on to the
+        datasink.
+        """
+        if self.__isPending:
+            self.__isPending = False
+            if self.dataset.data_collection_enabled:
+                self.datasink.put(self.__pendingValue)
                
 
 class NullDataCollector(SimDataCollector):
@@ -3,8 +3,8 @@
 #
 # Copyright (C) 2024 Howard Klein - All Rights Reserved
 #
-# Defines the DataSink abstract base class and the NullDataSink concrete
-# subclass.
+# Defines the DataSink abstract base class and the NullDataSink and
+# LastValueDataSink concrete subclasses.
 #
 # You should have received a copy of the GNU General Public License along with 
 # this program. If not, see <https://www.gnu.org/licenses/>.
@@ -117,4 +117,18 @@ class NullDataSink(DataSink):
         pass
 
     def finalize_batch(self, batchnum):
-        pass
\ No newline at end of file
+        pass
+
+
+class LastValueDataSink(NullDataSink):
+    """
+    A :class:`NullDataSink` that retains the most recent value put (or
+    ``None`` if no value has been put), so that the current value of a
+    time-weighted dataset is still known when the dataset is later given
+    a datasink that actually records its values.
+    """
+    def __init__(self):
+        self.last_value = None
+
+    def put(self, value):
+        self.last_value = value
@@ -19,11 +19,14 @@
 #===============================================================================
 __all__ = ['SimModel']
 
-import sys, os
+import sys, os, multiprocessing
 from simprovise.core import SimError
 from simprovise.core.simlogging import SimLogging
 from simprovise.core.utility import SimUtility
 from simprovise.core.simelement import SimElement
+from simprovise.core.simclock import SimClock
+from simprovise.core.datacollector import SimDataCollector
+from simprovise.core import simevent, simrandom
 from simprovise.core.apidoc import apidocskip
 
 logger = SimLogging.get_logger(__name__)
@@ -32,6 +35,7 @@ _ERROR_NAME = "SimModelError"
 
 _PY_EXTENSION = '.py'
 _SCRIPT_MODULE_NAME = "SimMain"
+_MAIN_MODULE_NAME = "__mp_main__"
    
 class SimModel(object):
     """
@@ -87,6 +91,7 @@ class SimModel(object):
         extension = os.path.splitext(scriptpath)[1]
         assert extension == _PY_EXTENSION, "Script path argument to SimModel.load_model_from_script() must have a .py extension"
         
+        simrandom.reset_stream_usage()
         try:           
             modelModule = SimUtility.load_module_from_file(scriptpath,
                                                            _SCRIPT_MODULE_NAME)
@@ -103,6 +108,98 @@ class SimModel(object):
         return model
         #return SimModel.model()
 
+    @staticmethod
+    def reload_model(scriptpath=None):
+        """
+        Resets the model (see :meth:`reset`) and loads its script again,
+        returning the SimModel singleton. This allows a single process
+        to execute multiple simulation runs, each with a newly loaded model.
+        
+        Modules imported from the model script's directory (e.g., modules
+        that define elements used by the model script) are removed from
+        ``sys.modules`` first, so that they are imported - and their
+        elements registered - again as well. Process and entity classes
+        defined elsewhere (e.g. the :class:`~simprovise.modeling.SimEntity`
+        base class) are not reloaded, so new elements are created and
+        registered for them.
+        
+        If the model was loaded via :meth:`load_model_from_script`, it is
+        reloaded the same way. Otherwise the model script is the main
+        program (or was imported as such by a multiprocessing worker);
+        it is reloaded as module ``__mp_main__``, so that its element IDs
+        are unchanged and its ``__main__`` guard is not executed.
+        
+        :param scriptpath: The filesystem path of the model script to load.
+                           Defaults to the current model's :attr:`filename`
+                           (or the main module's file, if the model was not
+                           loaded via :meth:`load_model_from_script`)
+        :type scriptpath:  `str` or None
+        
+        """
+        model = SimModel.model()
+        fromScript = model.loaded_from_script()
+        mpMainModule = sys.modules.get(_MAIN_MODULE_NAME)
+        if scriptpath is None:
+            if fromScript:
+                scriptpath = model.filename
+            else:
+                scriptpath = (mpMainModule or sys.modules['__main__']).__file__
+        processElements = list(model.process_elements)
+        entityElements = list(model.entity_elements)
+        model.reset()
+        unloaded = SimModel._unload_model_modules(scriptpath)
+        for e in model._recreate_elements(processElements, unloaded):
+            model._register_process_element(e)
+        for e in model._recreate_elements(entityElements, unloaded):
+            model._register_entity_element(e)
+        if fromScript:
+            return SimModel.load_model_from_script(scriptpath)
+        
+        logger.info("Reloading model script file: %s", scriptpath)
+        try:
+            module = SimUtility.load_module_from_file(scriptpath,
+                                                      _MAIN_MODULE_NAME)
+            # In a multiprocessing (spawned) worker, __main__ is the same
+            # module as __mp_main__. (Multiprocessing makes the same alias
+            # in the parent process, whose __main__ must be left alone -
+            # it is what new worker processes import as their __mp_main__.)
+            if (mpMainModule and sys.modules['__main__'] is mpMainModule
+                    and multiprocessing.parent_process() is not None):
+                sys.modules['__main__'] = module
+        except Exception as e:
+            logger.exception("Failure reloading model script %s: %s",
+                             scriptpath, e)
+            raise SimError(_ERROR_NAME, "Failure reloading model script: {0}",
+                           scriptpath)
+        return SimModel.model()
+
+    @staticmethod
+    def _unload_model_modules(scriptpath):
+        """
+        Remove the modules loaded from the model script's directory (or its
+        subdirectories) from sys.modules, returning their names. If the
+        simprovise package itself is in that directory, its modules are left
+        alone. The __main__ module is never removed, but its name is
+        returned if it was loaded from the model directory.
+        """
+        modeldir = os.path.dirname(os.path.abspath(scriptpath)) + os.sep
+        packagedir = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+        unloaded = set()
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, '__file__', None)
+            if not path:
+                continue
+            path = os.path.abspath(path)
+            if not path.startswith(modeldir):
+                continue
+            if packagedir.startswith(modeldir) and path.startswith(packagedir):
+                continue
+            unloaded.add(name)
+            if name != '__main__':
+                logger.debug("Unloading model module %s", name)
+                del sys.modules[name]
+        return unloaded
+
     def __init__(self):
         """
         """
@@ -158,6 +255,44 @@ class SimModel(object):
         #self._processElements.clear()
         #self._entityElements.clear()
         self._staticObjects.clear()
+
+    def reset(self):
+        """
+        Reset the model so that its script can be loaded again in the same
+        process: clear all registered agents, static objects, process and
+        entity elements, along with the data collector list and the root
+        location's children, re-initialize the event set and simulation
+        clock (discarding any pending events and clock callbacks left by a
+        previous run) and discard the random number stream usage recorded
+        for :func:`~simprovise.core.simrandom.shared_streams`. The model's
+        filename and module are retained.
+        
+        Typically called via :meth:`reload_model`.
+        """
+        # Imported here, since the modeling package imports this module
+        from simprovise.modeling.location import SimLocation
+        
+        self._agents.clear()
+        self._processElements.clear()
+        self._entityElements.clear()
+        self._staticObjects.clear()
+        SimDataCollector.reinitialize()
+        SimLocation.reset_root_location()
+        simevent.initialize()
+        SimClock.reset()
+        simrandom.reset_stream_usage()
+
+    @staticmethod
+    def _recreate_elements(elements, unloadedModules):
+        """
+        A generator that creates a new element for each of the passed
+        (process or entity) class elements whose class was not defined in
+        one of the passed unloaded modules; the class's existing element
+        (and its datasets) belong to the previous run.
+        """
+        for e in elements:
+            if e.element_class.__module__ not in unloadedModules:
+                yield type(e)(e.element_class)
         
                 
     @property
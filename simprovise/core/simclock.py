@@ -28,34 +28,65 @@ class SimClock(object):
     the global simulation clock. The methods that update or modify the
     clock's state should be called only by the simulation infrastructure,
     *NOT* modeling code.
+    
+    Internally, the clock time is maintained as a scalar in the base time
+    unit (see :func:`~.simtime.base_unit`); the corresponding
+    :class:`~.simtime.SimTime` is created lazily, on the first call to
+    :meth:`now` after the clock is advanced. This allows the event
+    processor to advance the clock without any SimTime allocation or unit
+    conversion (via :meth:`advance_to_scalar`).
     """
-    # _currentTime is the current simulated clock time
-    _currentTime = SimTime(0)
+    # _currentScalar is the current simulated clock time, as a scalar
+    # in the base unit. _currentTime is the same time as a SimTime, or None
+    # if it has not been created since the clock last advanced.
+    # _beforeAdvance is a list of callables to be invoked (once) before the
+    # clock next moves to a later time - see call_before_advance().
+    _currentScalar = 0
+    _currentTime = None
     _clockTimeUnit = None
+    _beforeAdvance = []
 
     @staticmethod
     @apidocskip
     def initialize():
         """
-        (Re)set the simulated clock to zero. Use the base unit.
+        (Re)set the simulated clock to zero. Use the base unit. Any
+        callables registered via :meth:`call_before_advance` are invoked
+        first, at the old clock time.
         """
-        SimClock._currentTime = SimTime(0)
+        SimClock._run_before_advance()
+        SimClock._currentScalar = 0
+        SimClock._currentTime = None
         SimClock._clockTimeUnit = simtime.base_unit()
 
     @staticmethod
     def now():
         """
-        Return a copy of (not reference to) the current simulated clock time.
+        Return the current simulated clock time.
 
-        The copy ensures that client does not accidentally modify the clock
-        by incrementing, decrementing or explicitly modifying attributes of
-        the return value of now()
+        Since SimTime objects are immutable, the client cannot accidentally
+        modify the clock by incrementing, decrementing or otherwise
+        modifying the return value of now(), so there is no need to
+        return a copy.
         
         :return: The current simulated clock time
         :rtype:  :class:`~.simtime.SimTime`
 
         """
-        return SimClock._currentTime.make_copy()
+        currentTime = SimClock._currentTime
+        if currentTime is None:
+            currentTime = SimClock._currentTime = SimTime(SimClock._currentScalar,
+                                                          SimClock._clockTimeUnit)
+        return currentTime
+
+    @staticmethod
+    @apidocskip
+    def now_scalar():
+        """
+        Return the current simulated clock time as a scalar value in the
+        base time unit.
+        """
+        return SimClock._currentScalar
 
     @staticmethod
     @apidocskip
@@ -64,12 +95,62 @@ class SimClock(object):
         Advance the simulation clock to the specified new time.  (New time
         must be greater than or equal to the current time)
         """
-        if newTime >= SimClock._currentTime:
-            # ensure that we keep currentTime's units - otherwise we could just copy
-            # newTime
-            SimClock._currentTime = newTime.to_units(SimClock._clockTimeUnit)
-        else:
+        if not isinstance(newTime, SimTime):
+            errMsg = "Attempt to advance clock to non-SimTime value {0}"
+            raise SimError('InvalidClockAdvance', errMsg, newTime)
+        SimClock.advance_to_scalar(newTime.to_scalar())
+
+    @staticmethod
+    @apidocskip
+    def advance_to_scalar(newScalarTime):
+        """
+        Advance the simulation clock to the specified new time, expressed
+        as a scalar in the base time unit. (New time must be greater than
+        or equal to the current time)
+        """
+        currentScalar = SimClock._currentScalar
+        if newScalarTime > currentScalar:
+            if SimClock._beforeAdvance:
+                SimClock._run_before_advance()
+            SimClock._currentScalar = newScalarTime
+            SimClock._currentTime = None
+        elif newScalarTime < currentScalar:
             errMsg = "Attempt to advance clock from {0} to {1}"
-            raise SimError('InvalidClockAdvance', errMsg, SimClock._currentTime, newTime)
+            raise SimError('InvalidClockAdvance', errMsg,
+                           SimClock._currentScalar, newScalarTime)
 
+    @staticmethod
+    @apidocskip
+    def call_before_advance(fn):
+        """
+        Register a callable (taking no arguments) to be invoked just before
+        the clock next advances to a later simulated time, while
+        :meth:`now` still returns the current time. Each registration is
+        invoked once; a callable that needs to be invoked again must
+        re-register.
+        """
+        SimClock._beforeAdvance.append(fn)
+
+    @staticmethod
+    @apidocskip
+    def reset():
+        """
+        Discard (without invoking) any callables registered via
+        :meth:`call_before_advance` and initialize the clock. Used when a
+        model is reset for a new run in the same process, since those
+        callables belong to the previous run's objects.
+        """
+        SimClock._beforeAdvance = []
+        SimClock.initialize()
+
+    @staticmethod
+    def _run_before_advance():
+        """
+        Invoke (and clear) the callables registered via
+        :meth:`call_before_advance`.
+        """
+        callables = SimClock._beforeAdvance
+        SimClock._beforeAdvance = []
+        for fn in callables:
+            fn()
 
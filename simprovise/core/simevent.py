@@ -43,6 +43,34 @@
 # as required, until we either reach the end time of the simulation or run out
 # of events.
 #
+# The future event set itself is pluggable. The heap described above
+# (HeapEventSet) is the default; a calendar queue (CalendarQueueEventSet,
+# after R. Brown, "Calendar Queues: A Fast O(1) Priority Queue Implementation
+# for the Simulation Event Set Problem", CACM 1988) may be selected via the
+# SimEvent EventSet configuration setting. Both implementations hold the same
+# [time, priority, sequence number, event] entries and deliver them in the
+# same time/priority/sequence number order, so deregistration (via the REMOVED
+# marker) works identically for either one. The calendar queue provides
+# (amortized) constant-time insertion and removal, which can pay off for
+# models with very large numbers of pending events.
+#
+# Since deregistered events remain in the event set (as REMOVED entries)
+# until they reach the front, models that cancel most of the events they
+# schedule (e.g. via acquire timeouts or interrupts) can accumulate large
+# numbers of dead entries. The event set therefore tracks the number of
+# REMOVED entries, and compacts itself (discarding all of them in one pass)
+# whenever they exceed a configurable fraction of the total - see the
+# SimEvent CompactionThreshold setting.
+#
+# By default, event set entries are keyed by the event's SimTime. In fast
+# time mode (the SimEvent FastTime setting), they are instead keyed by the
+# event time as a scalar in the base time unit, and the EventProcessor
+# advances the SimClock via that scalar - so the event processing loop
+# does no SimTime comparison, allocation or unit conversion. (The SimClock
+# creates a SimTime for the current time lazily, as needed.) Since
+# SimTime comparison is itself based on base unit scalar values, events
+# are processed in exactly the same order in either mode.
+#
 # This program is free software: you can redistribute it and/or modify it under 
 # the terms of the GNU General Public License as published by the Free Software 
 # Foundation, either version 3 of the License, or (at your option) any later 
@@ -53,32 +81,393 @@
 # FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
 #===============================================================================
 from abc import ABCMeta, abstractmethod
-from heapq import heappop, heappush
+from heapq import heappop, heappush, heapify, nsmallest
+from bisect import insort
 import itertools
 from greenlet import greenlet        # pylint: disable=E0611
+from simprovise.core import SimError
 from simprovise.core.simclock import SimClock
 from simprovise.core.simtime import SimTime
 from simprovise.core.simlogging import SimLogging
 from simprovise.core.apidoc import apidoc, apidocskip
+import simprovise.core.configuration as simconfig
 
 logger = SimLogging.get_logger(__name__)
 
-event_heap = []
+_ERROR_NAME = "SimEvent Error"
+
+REMOVED = '<removed-event>'
+
+
+class EventSet(metaclass=ABCMeta):
+    """
+    Abstract base class for the future event set used by the
+    :class:`EventProcessor`.
+    
+    An event set holds heap-style entries - lists of form
+    ``[time, priority, sequence number, event]`` - and returns them in
+    order of time, priority and sequence number. Entries are never
+    removed from the middle of the set; a deregistered event's entry
+    is instead marked by replacing the event with :data:`REMOVED` (via
+    :meth:`mark_removed`), and the :class:`EventProcessor` discards it
+    when it reaches the front (via :meth:`pop_removed`).
+    
+    The event set keeps count of its REMOVED entries; whenever that count
+    reaches :attr:`COMPACTION_MIN_REMOVED` and exceeds the configured
+    compaction threshold fraction of all entries, the set is compacted
+    (all REMOVED entries discarded) by :meth:`compact`.
+    """
+    __slots__ = ('_removed',)
+    
+    # Compaction is never worth its cost for small event sets
+    COMPACTION_MIN_REMOVED = 1000
+
+    def __init__(self):
+        self._removed = 0
+
+    @property
+    def removed_count(self):
+        """
+        The number of (dead) entries in the set that are marked as
+        :data:`REMOVED`.
+        """
+        return self._removed
+
+    @property
+    def live_count(self):
+        """
+        The number of entries in the set for events that are still
+        registered.
+        """
+        return max(len(self) - self._removed, 0)
+
+    def mark_removed(self, entry):
+        """
+        Mark a (registered) event entry as removed, compacting the set
+        if the removed entry threshold is reached.
+        """
+        entry[-1] = REMOVED
+        self._removed += 1
+        if (_compaction_threshold and
+                self._removed >= self.COMPACTION_MIN_REMOVED and
+                self._removed > _compaction_threshold * len(self)):
+            self.compact()
+
+    def pop_removed(self):
+        """
+        Pop the first entry in the set, which the caller has determined is
+        marked as :data:`REMOVED`.
+        """
+        self.pop()
+        if self._removed:
+            self._removed -= 1
+
+    def compact(self):
+        """
+        Discard all REMOVED entries from the set.
+        """
+        nentries = len(self)
+        self._compact()
+        logger.debug("Event set compacted from %d to %d entries",
+                     nentries, len(self))
+        self._removed = 0
+
+    @abstractmethod
+    def _compact(self):
+        """
+        Implementation of :meth:`compact`, which removes the REMOVED
+        entries from the underlying data structure.
+        """
+        pass
+
+    @abstractmethod
+    def push(self, entry):
+        """
+        Add an entry to the event set.
+        """
+        pass
+
+    @abstractmethod
+    def peek(self):
+        """
+        Return (without removing) the first entry in the set, or ``None``
+        if the set is empty.
+        """
+        pass
+
+    @abstractmethod
+    def pop(self):
+        """
+        Remove and return the first entry in the set. Should only be called
+        on a non-empty set.
+        """
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        """
+        The number of entries in the set, including entries marked as
+        :data:`REMOVED`.
+        """
+        pass
+
+
+class HeapEventSet(EventSet):
+    """
+    The default :class:`EventSet`, implemented as a binary heap (via the
+    ``heapq`` module). The heap list itself is also available as
+    module attribute ``event_heap``.
+    """
+    __slots__ = ('heap',)
+
+    def __init__(self):
+        super().__init__()
+        self.heap = []
+
+    def push(self, entry):
+        heappush(self.heap, entry)
+
+    def peek(self):
+        heap = self.heap
+        return heap[0] if heap else None
+
+    def pop(self):
+        return heappop(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def _compact(self):
+        """
+        Filter and re-heapify in place, so that the ``event_heap`` module
+        attribute continues to reference the heap.
+        """
+        heap = self.heap
+        heap[:] = [entry for entry in heap if entry[-1] is not REMOVED]
+        heapify(heap)
+
+
+class CalendarQueueEventSet(EventSet):
+    """
+    An :class:`EventSet` implemented as a calendar queue, per R. Brown's
+    CACM 1988 paper.
+    
+    Entries are distributed over an array of buckets by their scheduled
+    time, converted to a base unit scalar; each bucket covers a time
+    interval of fixed width, and the array of buckets is traversed
+    repeatedly (like the days of a calendar year) as simulated time
+    advances. Each bucket is kept sorted by (scalar time, priority,
+    sequence number), so entries are returned in the same order as the
+    heap. The number of buckets and bucket width are recalculated from
+    a sample of pending event times whenever the number of entries
+    grows or shrinks past a threshold, which keeps insertion and removal
+    close to constant time.
+    """
+    __slots__ = ('_buckets', '_nbuckets', '_width', '_size', '_lastbucket',
+                 '_vbucket', '_lastkey', '_upper_threshold',
+                 '_lower_threshold')
+    
+    _MIN_BUCKETS = 2
+    _WIDTH_SAMPLE_SIZE = 25
+
+    def __init__(self):
+        super().__init__()
+        self._size = 0
+        self._lastkey = 0
+        self._setup(self._MIN_BUCKETS, 1.0)
+
+    def _setup(self, nbuckets, width):
+        """
+        Create an empty calendar of nbuckets buckets of the passed width,
+        positioned at the last dequeued/located key.
+        """
+        self._buckets = [[] for i in range(nbuckets)]
+        self._nbuckets = nbuckets
+        self._width = width
+        self._upper_threshold = 2 * nbuckets
+        self._lower_threshold = nbuckets // 2 - 2
+        self._reposition(self._lastkey)
+
+    def _reposition(self, key):
+        """
+        Set the calendar's current bucket/year to the one containing key.
+        """
+        vbucket = int(key / self._width)
+        self._lastkey = key
+        self._vbucket = vbucket
+        self._lastbucket = vbucket % self._nbuckets
+
+    def _insert(self, item):
+        vbucket = int(item[0] / self._width)
+        insort(self._buckets[vbucket % self._nbuckets], item)
+
+    def push(self, entry):
+        """
+        Bucket items are tuples of (scalar time, priority, sequence number,
+        entry); since sequence numbers are unique, the entries themselves
+        are never compared.
+        """
+        key = entry[0]
+        if isinstance(key, SimTime):
+            key = key.to_scalar()
+        self._insert((key, entry[1], entry[2], entry))
+        self._size += 1
+        if key < self._lastkey:
+            self._reposition(key)
+        if self._size > self._upper_threshold:
+            self._resize(self._nbuckets * 2)
+
+    def _locate(self):
+        """
+        Return the bucket whose first item is the first item in the
+        calendar (or None if the calendar is empty), moving the current
+        bucket/year to that bucket.
+        
+        Starting with the current bucket, we look for the first bucket whose
+        first item falls within that bucket's interval in the current
+        "year". If a full year passes without finding one, we fall back
+        to a direct search of the first item in every bucket.
+        """
+        if not self._size:
+            return None
+        buckets = self._buckets
+        nbuckets = self._nbuckets
+        width = self._width
+        i = self._lastbucket
+        vbucket = self._vbucket
+        for _ in range(nbuckets):
+            bucket = buckets[i]
+            if bucket and int(bucket[0][0] / width) <= vbucket:
+                self._lastbucket = i
+                self._vbucket = vbucket
+                self._lastkey = bucket[0][0]
+                return bucket
+            vbucket += 1
+            i += 1
+            if i == nbuckets:
+                i = 0
+
+        firstitem = min(bucket[0] for bucket in buckets if bucket)
+        self._reposition(firstitem[0])
+        return buckets[self._lastbucket]
+
+    def peek(self):
+        bucket = self._locate()
+        return bucket[0][-1] if bucket else None
+
+    def pop(self):
+        bucket = self._locate()
+        item = bucket.pop(0)
+        self._size -= 1
+        if self._size < self._lower_threshold:
+            self._resize(self._nbuckets // 2)
+        return item[-1]
+
+    def __len__(self):
+        return self._size
+
+    def _compact(self):
+        """
+        Filtering each bucket preserves its sort order. Once done, the
+        calendar is resized if we've fallen below the shrink threshold.
+        """
+        size = 0
+        for bucket in self._buckets:
+            if bucket:
+                bucket[:] = [item for item in bucket if item[-1][-1] is not REMOVED]
+                size += len(bucket)
+        self._size = size
+        if size < self._lower_threshold:
+            self._resize(self._nbuckets // 2)
+
+    def _resize(self, nbuckets):
+        """
+        Rebuild the calendar with the passed number of buckets, and a
+        bucket width recalculated from the current entries.
+        """
+        nbuckets = max(nbuckets, self._MIN_BUCKETS)
+        items = [item for bucket in self._buckets for item in bucket]
+        self._setup(nbuckets, self._new_width(items))
+        buckets = self._buckets
+        width = self._width
+        for item in items:
+            buckets[int(item[0] / width) % nbuckets].append(item)
+        for bucket in buckets:
+            if len(bucket) > 1:
+                bucket.sort()
+
+    def _new_width(self, items):
+        """
+        Calculate a bucket width from the separation between the earliest
+        pending event times, per Brown: three times the average separation,
+        after discarding separations more than twice the initial average.
+        If there is insufficient separation to calculate a new width, the
+        current width is retained.
+        """
+        sample = [item[0] for item in nsmallest(self._WIDTH_SAMPLE_SIZE, items)]
+        separations = [b - a for a, b in zip(sample, sample[1:])]
+        if not separations:
+            return self._width
+        avg = sum(separations) / len(separations)
+        separations = [sep for sep in separations if sep <= 2 * avg]
+        if avg <= 0 or not separations:
+            return self._width
+        width = 3 * sum(separations) / len(separations)
+        return width if width > 0 else self._width
+
+
+# Event set implementations, keyed by SimEvent EventSet configuration value
+_EVENT_SET_CLASSES = {'heap': HeapEventSet,
+                      'calendar': CalendarQueueEventSet}
+
+_event_set_class = _EVENT_SET_CLASSES[simconfig.get_event_set_type()]
+logger.info("SimEvent event set implementation: %s", _event_set_class.__name__)
+
+# Fraction of REMOVED entries that triggers event set compaction (or zero
+# if compaction is disabled)
+_compaction_threshold = simconfig.get_event_compaction_threshold() / 100
+
+# Default for fast time mode (scalar event set keys)
+_fast_time = simconfig.get_event_fast_time()
+
+event_set = _event_set_class()
+event_heap = event_set.heap if isinstance(event_set, HeapEventSet) else None
 entry_finder = {}
 counter = itertools.count()
 event_processing_greenlet = greenlet.getcurrent()
-REMOVED = '<removed-event>'
+fast_time = _fast_time
 
 @apidocskip
-def initialize():
+def initialize(eventSetClass=None, fastTime=None):
     """
-    (re)initialize the entry heap data structures for a new simulation run.
+    (re)initialize the event set data structures for a new simulation run.
+    
+    :param eventSetClass: The :class:`EventSet` class to use for the run.
+                          If ``None`` (the default) the class is determined
+                          by the SimEvent EventSet configuration setting.
+    :type eventSetClass:  :class:`EventSet` subclass or ``None``
+    
+    :param fastTime:      If True, key the event set by scalar (base unit)
+                          times rather than SimTimes. If ``None`` (the
+                          default) the mode is determined by the SimEvent
+                          FastTime configuration setting.
+    :type fastTime:       ``bool`` or ``None``
+    
     """
+    global event_set
     global event_heap
     global entry_finder
     global counter
     global event_processing_greenlet
-    event_heap = []
+    global fast_time
+    fast_time = _fast_time if fastTime is None else fastTime
+    if eventSetClass is None:
+        eventSetClass = _event_set_class
+    if not (isinstance(eventSetClass, type) and issubclass(eventSetClass, EventSet)):
+        msg = "Event set class ({0}) is not an EventSet subclass"
+        raise SimError(_ERROR_NAME, msg, eventSetClass)
+    event_set = eventSetClass()
+    event_heap = event_set.heap if isinstance(event_set, HeapEventSet) else None
     entry_finder = {}
     counter = itertools.count()
     event_processing_greenlet = greenlet.getcurrent()
@@ -98,7 +487,7 @@ class SimEvent(metaclass=ABCMeta):
     def __init__(self, tm, *, priority=1):
         assert isinstance(tm, SimTime), 'SimEvent constructor parameter ' + str(tm) + ' is not a SimTime'
         assert tm >= SimClock.now(), 'SimEvent constructor parameter ' + str(tm) + ' is less than current time:' + str(SimClock.now())
-        self._time = tm.make_copy()
+        self._time = tm
         self._sequencenum = -1
         self._priority = priority
 
@@ -108,8 +497,9 @@ class SimEvent(metaclass=ABCMeta):
         """
         assert not self.is_registered(), 'SimEvent ' + str(self) + ' is already registered'
         self._sequencenum = next(counter)
-        entry = [self._time, self._priority, self._sequencenum, self]
-        heappush(event_heap, entry)
+        key = self._time.to_scalar() if fast_time else self._time
+        entry = [key, self._priority, self._sequencenum, self]
+        event_set.push(entry)
         entry_finder[self] = entry
 
     def is_registered(self):
@@ -122,10 +512,11 @@ class SimEvent(metaclass=ABCMeta):
 
     def deregister(self):
         """
-        Marks the event as removed from the event list (heapq) (if it is
-        still there), per the heapq documentation priority queue example. (We
-        can't simply remove the event entry, as that would invalidate the
-        heapq invariant. So we change the entry to mark it as removed, by
+        Marks the event as removed from the event set (if it is still there),
+        per the heapq documentation priority queue example. (We can't simply
+        remove the event entry, as that would invalidate the heapq invariant
+        - or require a search of the calendar queue's bucket. So we change
+        the entry to mark it as removed, by
         replacing the event with a REMOVED indicator string) Returns True if
         the event was removed, False if the event is not found on the event
         list (because it was either already executed or previously
@@ -138,7 +529,7 @@ class SimEvent(metaclass=ABCMeta):
             return False
 
         entry = entry_finder.pop(self)
-        entry[-1] = REMOVED
+        event_set.mark_removed(entry)
         return True
 
     @abstractmethod
@@ -173,13 +564,25 @@ class EventProcessor(object):
     The simulation event manager/processor. The simulation execution
     essentially consists of an EventProcessor processing events
     subclassed from :class:`SimEvent`.
+    
+    :param eventSetClass: The :class:`EventSet` class to use for the run.
+                          If ``None`` (the default) the class is determined
+                          by the SimEvent EventSet configuration setting.
+    :type eventSetClass:  :class:`EventSet` subclass or ``None``
+    
+    :param fastTime:      If True, run in fast time mode (scalar event set
+                          keys). If ``None`` (the default) the mode is
+                          determined by the SimEvent FastTime configuration
+                          setting.
+    :type fastTime:       ``bool`` or ``None``
+    
     """
-    def __init__(self):
+    def __init__(self, eventSetClass=None, fastTime=None):
         """
-        Initializer re-initializes the event heap and dictionary, to get rid
+        Initializer re-initializes the event set and dictionary, to get rid
         of any events leftover from a previous run.
         """
-        initialize()
+        initialize(eventSetClass, fastTime)
 
     def process_events(self, until_time=None):
         """
@@ -191,21 +594,36 @@ class EventProcessor(object):
         global event_processing_greenlet
         event_processing_greenlet = greenlet.getcurrent()
         processCount = itertools.count()
+        
+        peek = event_set.peek
+        pop = event_set.pop
+        pop_removed = event_set.pop_removed
+        
+        # In fast time mode, entry keys are base unit scalars
+        if fast_time:
+            until_key = None if until_time is None else until_time.to_scalar()
+            advance_clock = SimClock.advance_to_scalar
+        else:
+            until_key = until_time
+            advance_clock = SimClock.advance_to
 
-        while event_heap:
+        while True:
+            entry = peek()
+            if entry is None:
+                break
             # Pop and ignore if the next entry is a removed event
-            if event_heap[0][-1] is REMOVED:
-                heappop(event_heap)
+            if entry[-1] is REMOVED:
+                pop_removed()
             else:
-                next_event_time = event_heap[0][0]
-                if until_time is not None and next_event_time > until_time:
+                next_event_time = entry[0]
+                if until_key is not None and next_event_time > until_key:
                     SimClock.advance_to(until_time)
                     break
 
-                next_event = heappop(event_heap)[-1]
+                next_event = pop()[-1]
                 entry_finder.pop(next_event)
-                assert next_event.time == next_event_time, "entry time and event time do not match!"
-                SimClock.advance_to(next_event_time)
+                assert (next_event.time.to_scalar() if fast_time else next_event.time) == next_event_time, "entry time and event time do not match!"
+                advance_clock(next_event_time)
                 # We call process(), which provides debug logging before invoking
                 # process_impl(). TODO Monitor performance impact
                 next_event.process()
@@ -213,13 +631,23 @@ class EventProcessor(object):
                 next(processCount)
 
         # if we run out of events before until time, advance the clock
-        if until_time is not None and SimClock.now() < until_time:
+        if until_time is not None and SimClock.now_scalar() < until_time.to_scalar():
             SimClock.advance_to(until_time)
 
         return next(processCount)
 
+    @property
+    def live_event_count(self):
+        """
+        The number of currently registered (pending) events.
+        """
+        return event_set.live_count
 
-
-
-
-
+    @property
+    def removed_event_count(self):
+        """
+        The number of deregistered event entries still held by the event
+        set - i.e., entries that will be discarded either when they reach
+        the front of the event set or when the set is next compacted.
+        """
+        return event_set.removed_count
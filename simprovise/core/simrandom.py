@@ -40,6 +40,11 @@
 # This technique should support more than sufficient stream independence
 # for millions of streams, which should be adequate for our purposes.
 #
+# Most models use only a handful of those streams, so the per-stream
+# generators for a run are created lazily, on first use (see _RunStreams).
+# The generator for any given run and stream is always the result of the
+# same jumps, so lazy creation has no effect on the sampled values.
+#
 # SimDistribution provides static methods that return generators for a
 # variety of NumPy-implemented probablility distributions. When it makes sense,
 # distribution parameters may be specified as SimTime instances. When the
@@ -53,6 +58,38 @@
 # modeling code to ensure that different model components sample from
 # different, independent random number streams. The default streamNum is 1.
 # 
+# By default, each value yielded by a SimDistribution generator is sampled
+# via a separate (scalar) NumPy call. Since that per-call overhead is
+# significant, SimDistribution also supports a buffered mode (enabled via
+# the SimRandom BufferSize configuration setting) in which each generator
+# samples an array of BufferSize values in a single NumPy call, and then
+# yields values from that buffer. (If the generator yields SimTime values,
+# they are created when the buffer is filled.) Buffered generators remain
+# fully reproducible for any given run and stream number. A buffered
+# generator that has a stream to itself yields exactly the same values as
+# its unbuffered equivalent, since NumPy's array sampling consumes the
+# stream in the same way as repeated scalar sampling. But when two or more
+# generators share a stream, buffering changes the order in which the
+# stream's values are consumed, so buffered and unbuffered runs of the
+# same model need not produce identical results.
+# initialize() empties all buffers, so that values sampled for one run
+# are never used by another.
+#
+# Variance reduction: since every run number maps to the same set of
+# streams, replications of two different model scenarios (with the same
+# run number) use common random numbers - provided that each stream serves
+# the same purpose in both scenarios. The most reliable way to ensure that is
+# to give each source of randomness in a model its own stream;
+# shared_streams() identifies any streams used by more than one generator.
+# initialize() also supports antithetic sampling. When initialized with an
+# antithetic argument of False or True, distributions with a closed-form
+# (or readily computed) inverse CDF are sampled by inversion from a single
+# uniform variate U (False) or its complement 1-U (True). A pair of runs
+# using the same run number and antithetic False/True are therefore
+# negatively correlated. Distributions without such an inverse (beta, gamma,
+# wald, binomial) continue to be sampled by NumPy directly; they use common
+# (rather than antithetic) values within the pair.
+#
 # SimDistribution also provides static methods that enable a UI to inform the 
 # user of available distributions and their arguments, as well as facilitate 
 # the serialization of distribution specifications in a simulation model 
@@ -69,8 +106,11 @@
 #===============================================================================
 __all__ = ['SimDistribution']
 
-import os
+import os, time
 import itertools
+import weakref
+from collections import Counter
+from statistics import NormalDist
 from functools import partial
 import numpy as np
 
@@ -99,12 +139,148 @@ _MAX_REPLICATIONS = simconfig.get_max_replications()
 logger.info("Initialized maximum replications/max run number to %d based on configuration setting",
             _MAX_REPLICATIONS)
 
+# The number of values sampled at a time by buffered SimDistribution
+# generators; zero indicates that generators are unbuffered
+_BUFFER_SIZE = simconfig.get_PRN_buffer_size()
+logger.info("Initialized SimDistribution buffer size to %d based on configuration setting",
+            _BUFFER_SIZE)
+
+# Uniform variates used for inversion sampling are clipped to this open
+# interval, so that inverse CDFs never see exactly zero or one
+_U_MIN = 2.0**-53
+_U_MAX = 1.0 - 2.0**-53
+
 _RNG_INITIALIATION_ERROR = "Random Number Generator Initialization Error"
 _RAND_PARAMETER_ERROR = "Invalid Psuedo-Random Distribution Parameter(s)"
 
+class _RunStreams(dict):
+    """
+    The pseudo-random-number generators for a single run, indexed by
+    (zero-based) stream number. Generators are created on first access,
+    by jumping from the run's bit generator; as a dict subclass, lookup
+    of an already-created generator is as fast as list indexing.
+    
+    Also keeps track of the total (wall clock) time spent creating
+    the run's generators.
+    """
+    __slots__ = ('_runBitGenerator', 'creation_time')
+    
+    def __init__(self, runBitGenerator):
+        super().__init__()
+        self._runBitGenerator = runBitGenerator
+        self.creation_time = 0.0
+        
+    def __missing__(self, i):
+        if not 0 <= i < _NSTREAMS:
+            raise IndexError("PRN stream index out of range")
+        start = time.perf_counter()
+        rng = np.random.Generator(self._runBitGenerator.jumped(i))
+        self[i] = rng
+        self.creation_time += time.perf_counter() - start
+        return rng
+
 # The psuedo-random-number generators for a single run, one for each
-# substream in the run.
-_rng = []
+# substream in the run (once they are created)
+_rng = {}
+
+# The buffers of all current buffered SimDistribution generators
+_variate_buffers = weakref.WeakSet()
+
+# Sampling mode for the current run: None for standard NumPy sampling,
+# False for inversion sampling from U, True for inversion from 1-U
+_antithetic = None
+
+# The number of pseudo-random SimDistribution generators created for each
+# stream number
+_stream_usage = Counter()
+
+class _VariateBuffer(object):
+    """
+    The buffer of sampled values for a buffered SimDistribution generator.
+    The generator yields from the values list; clearing it in place (as
+    :func:`initialize` does) ends that iteration, forcing a refill.
+    """
+    __slots__ = ('values', '__weakref__')
+    
+    def __init__(self):
+        self.values = []
+
+class _AliasTable(object):
+    """
+    A precomputed alias table (built via Vose's method) for sampling from
+    a discrete distribution over indices 0 - n-1 with specified weights in
+    constant time per sample. Each sample consumes a single uniform variate
+    U: x = U*n selects column int(x), and the fractional part of x selects
+    either that column or its alias.
+    
+    The prob and alias arrays include a sentinel column n (probability zero,
+    aliased to n-1) just in case floating point rounding ever yields x == n.
+    
+    Also keeps the distribution's cumulative probabilities, so that indices
+    can be sampled by (monotone) inversion for antithetic sampling.
+    """
+    __slots__ = ('n', 'prob', 'alias', 'probList', 'aliasList', 'cdf')
+    
+    def __init__(self, weights):
+        w = np.asarray(weights, dtype=float)
+        n = len(w)
+        total = w.sum()
+        scaled = w * n / total
+        prob = np.ones(n + 1)
+        alias = np.arange(n + 1)
+        prob[n] = 0.0
+        alias[n] = n - 1
+        
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # Any remaining columns (in either list) have a probability of one,
+        # give or take rounding error
+        
+        self.n = n
+        self.prob = prob
+        self.alias = alias
+        self.probList = prob.tolist()
+        self.aliasList = alias.tolist()
+        self.cdf = np.cumsum(w) / total
+        self.cdf[-1] = 1.0
+        
+    def sample(self, rng):
+        """
+        Returns a single index sampled using the passed NumPy Generator
+        """
+        x = rng.random() * self.n
+        k = int(x)
+        if x - k < self.probList[k]:
+            return k
+        return self.aliasList[k]
+        
+    def sample_array(self, rng, size):
+        """
+        Returns an array of size indices sampled using the passed NumPy
+        Generator - the same indices that would be returned by size
+        calls to sample()
+        """
+        x = rng.random(size) * self.n
+        k = x.astype(np.intp)
+        return np.where(x - k < self.prob[k], k, self.alias[k])
+    
+    def inverse_cdf(self, u):
+        """
+        Returns the array of indices corresponding to an array of uniform
+        variates by inversion of the distribution's CDF
+        """
+        return np.minimum(np.searchsorted(self.cdf, u, side='right'),
+                          self.n - 1)
 
 @apidoc        
 def max_streams():
@@ -144,19 +320,27 @@ def min_run_number():
     return 1
 
 @apidocskip
-def initialize(run_number=1):
+def initialize(run_number=1, antithetic=None):
     """
-    Create the independent random number generators (one per substream) for a
-    specified run.  The generators are placed in module variable _rng, a
-    single-dimensional list.
+    Initialize the independent random number generators (one per substream)
+    for a specified run.  The generators are accessed via module variable
+    _rng, indexed by (zero-based) stream number; each generator is created
+    on first access.
     
     :param run_number: The run number to initialize random number streams
                        for. must be in in range 1 - :func:`max_run_number`
     :type run_number:  `int`
     
+    :param antithetic: ``None`` (the default) for standard sampling. Otherwise
+                       distributions are sampled by inversion where possible,
+                       from uniform variates U (``False``) or 1-U (``True``).
+                       Two runs with the same run number and antithetic
+                       ``False``/``True`` form an antithetic pair.
+    :type antithetic:  `bool` or ``None``
+    
     """
     nsubstreams = max_streams()
-    logger.info("Initializing %d random number generators for run %d",
+    logger.info("Initializing %d random number streams for run %d",
                 nsubstreams, run_number)
 
     if run_number <= 0:
@@ -167,7 +351,8 @@ def initialize(run_number=1):
         msg = "Requested run number {0} exceeds the configured maximum number of runs ({1})"
         raise SimError(_RNG_INITIALIATION_ERROR, msg, run_number, max_run_number())
 
-    global _rng
+    global _rng, _antithetic
+    _antithetic = antithetic
 
     # Create a new random number generator instance for each substream
     
@@ -189,11 +374,72 @@ def initialize(run_number=1):
     # for a discussion of methods for generating multiple independent
     # streams. Our choice of the jumped() technique is arbitrary
     ns = max_streams()    
+    start = time.perf_counter()
     runjumps = (run_number - 1) * ns
     run_bit_generator = _BASE_BIT_GENERATOR.jumped(runjumps)
     
-    # Create the list of generators, one for each possible stream
-    _rng = [np.random.Generator(run_bit_generator.jumped(i)) for i in range(ns)]
+    # Generators for each stream are created as needed
+    _rng = _RunStreams(run_bit_generator)
+    _rng.creation_time = time.perf_counter() - start
+    
+    # Discard any values buffered from the previous run's streams
+    for buffer in _variate_buffers:
+        buffer.values.clear()
+
+
+@apidocskip
+def stream_creation_stats():
+    """
+    Returns the number of random number streams created so far for the
+    current run, and the total time (in seconds) spent initializing and
+    creating them.
+    
+    :return: Tuple of (streams created, creation time in seconds)
+    :rtype:  (`int`, `float`)
+    """
+    return len(_rng), getattr(_rng, 'creation_time', 0.0)
+
+
+@apidoc
+def shared_streams():
+    """
+    Returns the stream numbers used by more than one pseudo-random
+    :class:`SimDistribution` generator created so far.
+    
+    Common random numbers across model scenarios (and antithetic
+    replication pairs) are best synchronized when each source of randomness
+    in a model samples from its own stream; when a stream is shared, a
+    change in the order of sampling in one scenario shifts the values seen
+    by every other user of the stream.
+    
+    :return: Sorted list of shared stream numbers (empty if none)
+    :rtype:  `list` of `int`
+    
+    """
+    return sorted(n for n, count in _stream_usage.items() if count > 1)
+
+
+@apidocskip
+def reset_stream_usage():
+    """
+    Discard the stream usage recorded for :func:`shared_streams`, so that
+    only generators created by a subsequently (re)loaded model are counted.
+    Called by :meth:`~simprovise.core.model.SimModel.reset` and
+    :meth:`~simprovise.core.model.SimModel.load_model_from_script`.
+    """
+    _stream_usage.clear()
+
+
+def _uniforms(streamNum, n):
+    """
+    Returns an array of n uniform variates sampled from the specified
+    (one-based) stream for inversion sampling - complemented (1-U) if
+    the run is antithetic, and clipped to the open interval (0, 1).
+    """
+    u = _rng[streamNum-1].random(n)
+    if _antithetic:
+        u = 1.0 - u
+    return np.clip(u, _U_MIN, _U_MAX)
 
 
 def get_random_generator(streamNum=1):
@@ -338,13 +584,27 @@ class SimDistribution(object):
     functionDict["roundRobin"] = round_robin
 
     @staticmethod
-    def choice(choices, streamNum=1):
+    def choice(choices, streamNum=1, *, weights=None):
         """
         Returns a generator that yields a pseudo-randomly chosen value from
         the passed sequence of choices. The below returns a generator that
         yields a random sequence containing only the values 2, 4 or 6::
 
             SimDistribution.choice((2,4,6))
+            
+        By default, each choice is equally likely. Alternatively, a sequence
+        of (non-negative) weights may be specified, one per choice; the
+        probability of any given choice is its weight divided by the sum of
+        all weights. The following yields 'A' 20% of the time, 'B' 30% of the
+        time and 'C' 50% of the time::
+
+            SimDistribution.choice(('A', 'B', 'C'), weights=(2, 3, 5))
+            
+        Weighted choices are sampled via a precomputed alias table, so the
+        cost of each sample is independent of the number of choices. The
+        choices can be values of any type - e.g., entity classes
+        (see :meth:`~.entitysource.SimEntitySource.add_entity_choice_generator`)
+        or the alternative destinations of a process routing decision.
 
         :param choices:  A sequence of the possible values to be returned by
                          the function/generator.
@@ -352,10 +612,38 @@ class SimDistribution(object):
 
         :param streamNum: Identifies the random stream to sample from.
         :type streamNum:  `int` in range [1 - :func:`max_streams`]
+        
+        :param weights:  The relative weight of each choice, or ``None``
+                         (the default) if all choices are equally likely.
+        :type weights:   Sequence of numeric values or ``None``
 
         """
-        f =  lambda: _rng[streamNum-1].choice(choices)
-        return SimDistribution._random_generator(f, streamNum)
+        choiceList = list(choices)
+        nchoices = len(choiceList)
+        if nchoices == 0:
+            msg = "Choice Distribution: choices ({0}) must not be empty"
+            raise SimError(_RAND_PARAMETER_ERROR, msg, choices)
+        
+        # An object array, so that choices of any type can be indexed
+        choiceArray = np.empty(nchoices, dtype=object)
+        choiceArray[:] = choiceList
+        
+        if weights is None:
+            # Generator.choice() samples an index via integers(), so this
+            # yields the same values - without converting choices to an array
+            # for every sample
+            f = lambda: choiceList[_rng[streamNum-1].integers(nchoices)]
+            fv = lambda n: choiceArray[_rng[streamNum-1].integers(nchoices, size=n)]
+            finv = lambda u: choiceArray[np.minimum((u * nchoices).astype(int),
+                                                    nchoices - 1)]
+        else:
+            table = _AliasTable(SimDistribution._valid_weights(weights, nchoices))
+            f = lambda: choiceList[table.sample(_rng[streamNum-1])]
+            fv = lambda n: choiceArray[table.sample_array(_rng[streamNum-1], n)]
+            finv = lambda u: choiceArray[table.inverse_cdf(u)]
+            
+        return SimDistribution._random_generator(f, streamNum, False, None,
+                                                 fv, finv)
     functionDict["choice"] = choice
 
     @staticmethod
@@ -382,8 +670,11 @@ class SimDistribution(object):
             msg = "Exponential Distribution: invalid (non-numeric) mean value ({0})"
             raise SimError(_RAND_PARAMETER_ERROR, msg, mean)
         
-        f =  lambda: _rng[streamNum-1].exponential(*scalarArgs)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        f = lambda: _rng[streamNum-1].exponential(*scalarArgs)
+        fv = lambda n: _rng[streamNum-1].exponential(*scalarArgs, size=n)
+        finv = lambda u: -m * np.log1p(-u)
+        return SimDistribution._random_generator(f, streamNum, isSimTime,
+                                                 timeUnit, fv, finv)
     
     functionDict["exponential"] = exponential
 
@@ -422,8 +713,11 @@ class SimDistribution(object):
             msg = "Invalid uniform distribution parameters: low ({0}) is greater than high ({1})"
             raise SimError(_RAND_PARAMETER_ERROR, msg, low, high)
         
-        f =  lambda: _rng[streamNum-1].uniform(*scalarArgs)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        f = lambda: _rng[streamNum-1].uniform(*scalarArgs)
+        fv = lambda n: _rng[streamNum-1].uniform(*scalarArgs, size=n)
+        finv = lambda u: low2 + (high2 - low2) * u
+        return SimDistribution._random_generator(f, streamNum, isSimTime,
+                                                 timeUnit, fv, finv)
     functionDict["uniform"] = uniform
 
     @staticmethod
@@ -460,8 +754,20 @@ class SimDistribution(object):
             msg = "Invalid triangular distribution parameters: must be low ({0}) <= mode ({1}) <= high ({2})"
             raise SimError(_RAND_PARAMETER_ERROR, msg, low, mode, high)
         
-        f =  lambda: _rng[streamNum-1].triangular(*scalarArgs)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        f = lambda: _rng[streamNum-1].triangular(*scalarArgs)
+        fv = lambda n: _rng[streamNum-1].triangular(*scalarArgs, size=n)
+        
+        def finv(u):
+            width = high2 - low2
+            if width == 0:
+                return np.full_like(u, low2)
+            fmode = (mode2 - low2) / width
+            return np.where(u < fmode,
+                            low2 + np.sqrt(u * width * (mode2 - low2)),
+                            high2 - np.sqrt((1 - u) * width * (high2 - mode2)))
+        
+        return SimDistribution._random_generator(f, streamNum, isSimTime,
+                                                 timeUnit, fv, finv)
     functionDict["triangular"] = triangular
 
     @staticmethod
@@ -503,12 +809,23 @@ class SimDistribution(object):
             msg = "Invalid (non-numeric) normal distribution parameter(s): mu({0}), sigma ({1}), or floor ({2})"
             raise SimError(_RAND_PARAMETER_ERROR, msg, mu, sigma, floor)        
         
+        if sigma > 0:
+            normalInvCdf = np.vectorize(NormalDist(mu, sigma).inv_cdf,
+                                        otypes=[float])
+        else:
+            normalInvCdf = lambda u: np.full_like(u, mu)
+            
         if floor is None:
             f = lambda: _rng[streamNum-1].normal(mu, sigma)
+            fv = lambda n: _rng[streamNum-1].normal(mu, sigma, size=n)
+            finv = normalInvCdf
         else:
             f = lambda: max(_rng[streamNum-1].normal(mu, sigma), floor)
+            fv = lambda n: np.maximum(_rng[streamNum-1].normal(mu, sigma, size=n), floor)
+            finv = lambda u: np.maximum(normalInvCdf(u), floor)
         
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        return SimDistribution._random_generator(f, streamNum, isSimTime,
+                                                 timeUnit, fv, finv)
     functionDict["normal"] = normal
 
     @staticmethod
@@ -526,13 +843,16 @@ class SimDistribution(object):
         """
         scalarArgs, isSimTime, timeUnit = SimDistribution._scalar_args(a)       
         try:
-            x = float(scalarArgs[0])
+            shape = float(scalarArgs[0])
         except ValueError:
             msg = "Invalid (non-numeric) weibull distribution parameter(s): a ({0})"
             raise SimError(_RAND_PARAMETER_ERROR, msg, a)        
         
         f = lambda: _rng[streamNum-1].weibull(*scalarArgs)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        fv = lambda n: _rng[streamNum-1].weibull(*scalarArgs, size=n)
+        finv = lambda u: (-np.log1p(-u)) ** (1.0 / shape)
+        return SimDistribution._random_generator(f, streamNum, isSimTime,
+                                                 timeUnit, fv, finv)
     functionDict["weibull"] = weibull
 
     @staticmethod
@@ -569,7 +889,8 @@ class SimDistribution(object):
             raise SimError(_RAND_PARAMETER_ERROR, msg, scale)
                    
         f = lambda: _rng[streamNum-1].wald(mean, scale)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        fv = lambda n: _rng[streamNum-1].wald(mean, scale, size=n)
+        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit, fv)
     functionDict["weibull"] = weibull
 
     @staticmethod
@@ -587,13 +908,17 @@ class SimDistribution(object):
         """
         scalarArgs, isSimTime, timeUnit = SimDistribution._scalar_args(alpha)       
         try:
-            x = float(scalarArgs[0])
+            shape = float(scalarArgs[0])
         except ValueError:
             msg = "Invalid (non-numeric) pareto distribution parameter(s): a ({0})"
             raise SimError(_RAND_PARAMETER_ERROR, msg, alpha)        
 
         f = lambda: _rng[streamNum-1].pareto(*scalarArgs)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        fv = lambda n: _rng[streamNum-1].pareto(*scalarArgs, size=n)
+        # NumPy samples from the Lomax (Pareto II) distribution
+        finv = lambda u: (1 - u) ** (-1.0 / shape) - 1
+        return SimDistribution._random_generator(f, streamNum, isSimTime,
+                                                 timeUnit, fv, finv)
     functionDict["pareto"] = pareto
 
     @staticmethod
@@ -626,8 +951,12 @@ class SimDistribution(object):
             msg = "Invalid Lognormal sigma ({0}); value must be greater than zero"
             raise SimError(_RAND_PARAMETER_ERROR, msg, sigma)
         
-        f =  lambda: _rng[streamNum-1].lognormal(*scalarArgs)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        f = lambda: _rng[streamNum-1].lognormal(*scalarArgs)
+        fv = lambda n: _rng[streamNum-1].lognormal(*scalarArgs, size=n)
+        normalInvCdf = np.vectorize(NormalDist(*scalarArgs).inv_cdf, otypes=[float])
+        finv = lambda u: np.exp(normalInvCdf(u))
+        return SimDistribution._random_generator(f, streamNum, isSimTime,
+                                                 timeUnit, fv, finv)
     functionDict["lognormal"] = lognormal
 
     @staticmethod
@@ -664,8 +993,9 @@ class SimDistribution(object):
             msg = "Beta Distribution: invalid beta value ({0}); alpha and beta parameters must be greater than zero"
             raise SimError(_RAND_PARAMETER_ERROR, msg, beta)
         
-        f =  lambda: _rng[streamNum-1].beta(*scalarArgs)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        f = lambda: _rng[streamNum-1].beta(*scalarArgs)
+        fv = lambda n: _rng[streamNum-1].beta(*scalarArgs, size=n)
+        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit, fv)
     functionDict["beta"] = beta
 
     @staticmethod
@@ -703,8 +1033,9 @@ class SimDistribution(object):
             msg = "Gamma Distribution: invalid beta value ({0}); alpha and beta parameters must be non-negative"
             raise SimError(_RAND_PARAMETER_ERROR, msg, beta)
 
-        f =  lambda: _rng[streamNum-1].gamma(*scalarArgs)
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        f = lambda: _rng[streamNum-1].gamma(*scalarArgs)
+        fv = lambda n: _rng[streamNum-1].gamma(*scalarArgs, size=n)
+        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit, fv)
     functionDict["gamma"] = gamma
 
     @staticmethod
@@ -732,8 +1063,16 @@ class SimDistribution(object):
             msg = "Geometric Distribution: invalid rho (probability) value ({0}); must > 0 and <= 1"
             raise SimError(_RAND_PARAMETER_ERROR, msg, rho)
                 
-        f =  lambda: _rng[streamNum-1].geometric(rho)
-        return SimDistribution._random_generator(f, streamNum)
+        f = lambda: _rng[streamNum-1].geometric(rho)
+        fv = lambda n: _rng[streamNum-1].geometric(rho, size=n)
+        
+        def finv(u):
+            if rho == 1:
+                return np.ones(len(u), dtype=np.int64)
+            return np.ceil(np.log1p(-u) / np.log1p(-rho)).astype(np.int64)
+        
+        return SimDistribution._random_generator(f, streamNum, False, None,
+                                                 fv, finv)
     functionDict["geometric"] = geometric
 
     @staticmethod
@@ -770,12 +1109,18 @@ class SimDistribution(object):
             msg = "Invalid (non-numeric) logistic distribution parameter(s): loc({0}), scale ({1}), or floor ({2})"
             raise SimError(_RAND_PARAMETER_ERROR, msg, loc, scale, floor)        
         
+        logisticInvCdf = lambda u: loc + scale * np.log(u / (1 - u))
         if floor is None:
             f = lambda: _rng[streamNum-1].logistic(loc, scale)
+            fv = lambda n: _rng[streamNum-1].logistic(loc, scale, size=n)
+            finv = logisticInvCdf
         else:
             f = lambda: max(_rng[streamNum-1].logistic(loc, scale), floor)
+            fv = lambda n: np.maximum(_rng[streamNum-1].logistic(loc, scale, size=n), floor)
+            finv = lambda u: np.maximum(logisticInvCdf(u), floor)
         
-        return SimDistribution._random_generator(f, streamNum, isSimTime, timeUnit)
+        return SimDistribution._random_generator(f, streamNum, isSimTime,
+                                                 timeUnit, fv, finv)
     functionDict["logistic"] = logistic    
 
     @staticmethod
@@ -818,12 +1163,38 @@ class SimDistribution(object):
             msg = "Binomial Distribution: invalid rho (probability) value ({0}); must >= 0 and <= 1>"
             raise SimError(_RAND_PARAMETER_ERROR, msg, rho)
         
-        f =  lambda: _rng[streamNum-1].binomial(n, rho)
-        return SimDistribution._random_generator(f, streamNum)
+        f = lambda: _rng[streamNum-1].binomial(n, rho)
+        fv = lambda size: _rng[streamNum-1].binomial(n, rho, size=size)
+        return SimDistribution._random_generator(f, streamNum, False, None, fv)
     functionDict["binomial"] = binomial
     
     # TODO Add  , poisson, power distributions from numpy
     
+    @staticmethod
+    def _valid_weights(weights, nchoices):
+        """
+        Validates a sequence of choice weights, raising if there is not
+        exactly one weight per choice, if any weight is non-numeric, negative
+        or infinite, or if the weights sum to zero. Returns the weights as
+        a NumPy array.
+        """
+        try:
+            w = np.asarray(weights, dtype=float)
+        except (TypeError, ValueError):
+            msg = "Choice Distribution: invalid (non-numeric) weights ({0})"
+            raise SimError(_RAND_PARAMETER_ERROR, msg, weights)
+        
+        if w.ndim != 1 or len(w) != nchoices:
+            msg = "Choice Distribution: weights ({0}) must be a sequence of {1} values, one per choice"
+            raise SimError(_RAND_PARAMETER_ERROR, msg, weights, nchoices)
+        if not np.all(np.isfinite(w)) or np.any(w < 0):
+            msg = "Choice Distribution: weights ({0}) must be non-negative and finite"
+            raise SimError(_RAND_PARAMETER_ERROR, msg, weights)
+        if w.sum() <= 0:
+            msg = "Choice Distribution: weights ({0}) must not sum to zero"
+            raise SimError(_RAND_PARAMETER_ERROR, msg, weights)
+        return w
+        
     @staticmethod
     def _scalar_args(*args):
         """
@@ -859,16 +1230,33 @@ class SimDistribution(object):
         return scalarArgs, isSimTime, timeUnits        
     
     @staticmethod
-    def _random_generator(f, streamNum=1, isSimTime=False, timeUnit=None):
+    def _random_generator(f, streamNum=1, isSimTime=False, timeUnit=None,
+                          fv=None, finv=None):
         """
         First validates the passed random stream number.
         
         Then creates and returns a generator wrapping the passed SimDistribution
-        parameterized function. If the passed isSimTime parameter is False, 
+        parameterized function. If the passed isSimTime parameter is True, 
         the generated values will be SimTime objects of the specified time unit.
         Otherwise, the generated values will be scalars (or whatever type
         is output from the passed function).
         
+        If the passed fv is not None, it is a function that takes a size
+        parameter n and returns a NumPy array of n values sampled from the
+        same distribution as f. If buffering is enabled (a non-zero
+        SimRandom BufferSize setting), the generator will use fv to fill
+        its buffer BufferSize values at a time, rather than calling f for
+        every value.
+        
+        If the passed finv is not None, it is the distribution's inverse
+        CDF, taking a NumPy array of uniform variates and returning an array
+        of corresponding values. When the run is initialized for
+        inversion/antithetic sampling (see :func:`initialize`), values are
+        obtained via finv rather than f or fv. (The choice is made as values
+        are sampled, since generators are typically created before
+        initialization.) Distributions without an inverse are always
+        sampled via f/fv.
+        
         Called by the SimDistribution methods above to create a sampling
         generator based on the specified distribution and parameters.
         
@@ -883,20 +1271,58 @@ class SimDistribution(object):
             msg = "Requested stream number ({0}) must be in range 1 - {1}"
             raise SimError(_RAND_PARAMETER_ERROR, msg, streamNum, max_streams())
         
+        # Track stream usage by pseudo-random distributions (those that
+        # sample in bulk), so that shared streams can be identified
+        if fv is not None:
+            _stream_usage[streamNum] += 1
+            
+        if finv is None:
+            sample = f
+            sample_values = fv
+        else:
+            def sample():
+                if _antithetic is None:
+                    return f()
+                return finv(_uniforms(streamNum, 1)).item(0)
+            
+            def sample_values(n):
+                if _antithetic is None:
+                    return fv(n)
+                return finv(_uniforms(streamNum, n))
+        
         def sim_time_generator():
             while True:
-                yield SimTime(f(), timeUnit)
+                yield SimTime(sample(), timeUnit)
         
         def scalar_generator():
             while True:
-                yield f()
+                yield sample()
+                
+        bufferSize = _BUFFER_SIZE
+        buffer = _VariateBuffer()
+        
+        def buffered_sim_time_generator():
+            while True:
+                buffer.values = [SimTime(x, timeUnit)
+                                 for x in sample_values(bufferSize).tolist()]
+                yield from buffer.values
+                
+        def buffered_scalar_generator():
+            while True:
+                buffer.values = sample_values(bufferSize).tolist()
+                yield from buffer.values
                  
-        if isSimTime:
+        if bufferSize and fv is not None:
+            _variate_buffers.add(buffer)
+            if isSimTime:
+                return buffered_sim_time_generator()
+            else:
+                return buffered_scalar_generator()
+        elif isSimTime:
             return sim_time_generator()
         else:
             return scalar_generator()
 
-
 if __name__ == '__main__':
     import time
     initialize()
@@ -1045,3 +1471,62 @@ if __name__ == '__main__':
     for i in range(1000):
         total += next(gen)
     print("SimDistribution number_generator binomial, actual mean:", total / 1000)
+
+    # Draws/second benchmark, per distribution, for unbuffered and buffered
+    # generators (with both scalar and SimTime parameters, where applicable)
+    benchmarks = (('exponential', (10,)),
+                  ('exponential', (SimTime(10),)),
+                  ('uniform', (10, 20)),
+                  ('uniform', (SimTime(10), SimTime(1, tu.MINUTES))),
+                  ('triangular', (10, 20, 60)),
+                  ('triangular', (SimTime(10), 35, SimTime(1, tu.MINUTES))),
+                  ('normal', (10, 4)),
+                  ('lognormal', (1, 0.5)),
+                  ('gamma', (10, 2.0)),
+                  ('weibull', (1.0,)),
+                  ('geometric', (0.35,)),
+                  ('binomial', (5, 0.2)),
+                  ('choice', ((2, 4, 6),)),
+                  )
+    ndraws = 200000
+    print()
+    for name, args in benchmarks:
+        rates = []
+        for bufferSize in (0, 1000):
+            _BUFFER_SIZE = bufferSize
+            initialize()
+            gen = SimDistribution.function(name)(*args)
+            cpustart = time.process_time()
+            for i in range(ndraws):
+                next(gen)
+            rates.append(ndraws / (time.process_time() - cpustart))
+        simtimeStr = "SimTime" if isinstance(args[0], SimTime) else "scalar"
+        print("{0:12} {1:8} unbuffered: {2:10.0f} draws/sec buffered: {3:10.0f} draws/sec".format(
+            name, simtimeStr, *rates))
+
+    # Weighted choice benchmark: sampling one of 50 weighted destinations
+    # per draw via Generator.choice() (which converts/validates the choices
+    # and probabilities on every call) vs. the alias table, unbuffered and
+    # buffered
+    ndestinations = 50
+    destinations = ['Destination{0}'.format(i) for i in range(ndestinations)]
+    weights = [i % 7 + 1 for i in range(ndestinations)]
+    p = np.asarray(weights) / sum(weights)
+    initialize()
+    rng = _rng[0]
+    cpustart = time.process_time()
+    for i in range(ndraws):
+        rng.choice(destinations, p=p)
+    rate = ndraws / (time.process_time() - cpustart)
+    print("{0:21} Generator.choice(p):  {1:10.0f} draws/sec".format('weighted choice', rate))
+    rates = []
+    for bufferSize in (0, 1000):
+        _BUFFER_SIZE = bufferSize
+        initialize()
+        gen = SimDistribution.choice(destinations, weights=weights)
+        cpustart = time.process_time()
+        for i in range(ndraws):
+            next(gen)
+        rates.append(ndraws / (time.process_time() - cpustart))
+    print("{0:21} unbuffered: {1:10.0f} draws/sec buffered: {2:10.0f} draws/sec".format(
+        'weighted choice alias', *rates))
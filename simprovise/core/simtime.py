@@ -29,8 +29,8 @@ logger = SimLogging.get_logger(__name__)
 # NOTE: Checking to see if a variable is a valid Enum using 'in' 
 # (e.g. ``if unit in Unit``) was introduced in Python 3.12. To maintain
 # compatability with some older versions (in particularly, 3.10.12 as
-# tested with Ubuntu), we us the following syntax instead:
-#     ``if unit in set(u.value for u in Unit)``
+# tested with Ubuntu), we check against the _VALID_UNITS frozenset
+# (defined below) instead, which is also a constant time operation.
 # When support is dropped for Python 3.11 and earlier, we can go back to
 # ``unit in Unit``
 @apidoc
@@ -45,6 +45,13 @@ class Unit(IntEnum):
     
 _UNITNAMES = ('second', 'minute', 'hour')
 
+_VALID_UNITS = frozenset(unit.value for unit in Unit)
+
+# Unit conversion factors: value in units u1 * _CONVERSION_FACTOR[u1][u2]
+# is the value in units u2 
+_CONVERSION_FACTOR = tuple(tuple(60**(u1 - u2) for u2 in range(len(Unit)))
+                           for u1 in range(len(Unit)))
+
 
 # Initialize the base time unit from the configuration setting
 _base_unit = simconfig.get_base_timeunit()
@@ -75,6 +82,16 @@ def base_unit():
     return _base_unit
 
 
+def _scalar_value(value, units):
+    """
+    Return a time value in the passed units converted to the base unit.
+    """
+    if units is None or _base_unit is None:
+        return value
+    else:
+        return value * _CONVERSION_FACTOR[units][_base_unit]
+
+
 @apidoc
 class SimTime(object):
     """
@@ -86,6 +103,12 @@ class SimTime(object):
     by a scalar, adding/subtracting scalars to/from a SimTime object. (The
     scalar is implicitly assumed to be in the units of the added-to
     SimTime)
+    
+    SimTime objects are immutable (and hashable); arithmetic operations
+    always return a new SimTime, and augmented assignment (e.g. ``+=``)
+    rebinds the target name rather than modifying the object in place.
+    Each SimTime caches its value converted to the base unit, which is
+    used for comparison, hashing and :meth:`to_scalar`.
 
     :param value: A numeric time length or another :class:`SimTime` object.
     :type value:  Numeric scalar or :class:`SimTime`
@@ -99,7 +122,7 @@ class SimTime(object):
     :type units:  `int` (range 0-2, from :class:`Unit` enum values) or `None`
                 
     """
-    __slots__ = ('_value', '_units')
+    __slots__ = ('_value', '_units', '_scalar')
     
     def __init__(self, value=0, units=None):
         if isinstance(value, (int, float)):
@@ -110,13 +133,13 @@ class SimTime(object):
                 units = _base_unit
             #if units is None or units Unit:
             # Python 3.10 compatability - see NOTE above
-            if units is None or units in set(unit.value for unit in Unit):
-                self._units = units
-            else:
+            elif units not in _VALID_UNITS:
                 # TODO Allow units as string
                 msg = "Invalid SimTime time unit passed to initializer: {0}"
                 raise SimError(_ERROR_NAME, msg, units)
+            self._units = units
             self._value = value
+            self._scalar = _scalar_value(value, units)
         elif isinstance(value, SimTime):
             # validate and raise if invalid
             self._validate_units(value)                
@@ -124,17 +147,30 @@ class SimTime(object):
             # pylint: disable=E1101
             self._value = value._value
             self._units = value._units
+            self._scalar = value._scalar
         else:
             msg = "SimTime time value ({0}) in an invalid type {1}"
             raise SimError(_ERROR_NAME, msg, value, type(value))
         
+    def _new(self, value):
+        """
+        Return a new SimTime with the passed value and the same units as
+        this SimTime, bypassing the initializer's validation.
+        """
+        units = self._units
+        tm = _new_simtime(SimTime)
+        tm._value = value
+        tm._units = units
+        tm._scalar = _scalar_value(value, units)
+        return tm
+        
     def _validate_units(self, simtime_obj):
         """
         Raise a SimError if a passed SimTime object has an invalid units member
         value. That member value must be None if the base unit is None (dimensionless)
         and a valid time unit (SECONDS, MINUTES or HOURS) otherwise.
         """
-        units = simtime_obj.units
+        units = simtime_obj._units
         if _base_unit is None:
             if units is not None:
                 msg = "Cannot user or set the units ({0}) for a SimTime when the base time unit is None (dimensionless)"
@@ -144,7 +180,7 @@ class SimTime(object):
         
         # Python 3.10 compatability - see NOTE above
         #if not units in Unit:
-        if not units in set(unit.value for unit in Unit):
+        if not units in _VALID_UNITS:
             msg = "Invalid SimTime units ({0}) specified"
             raise SimError(_ERROR_NAME, msg, units)
  
@@ -161,7 +197,7 @@ class SimTime(object):
             return ''
         # Python 3.10 compatability - see NOTE above
         #elif self._units not in Unit:
-        elif self._units not in set(unit.value for unit in Unit):
+        elif self._units not in _VALID_UNITS:
             return 'Invalid Units'
         elif self._value == 1:
             return _UNITNAMES[self._units]
@@ -183,35 +219,40 @@ class SimTime(object):
         return self._units
 
     def make_copy(self):
-        "Make a copy of a time object - cheaper than using the copy module"
-        return SimTime(self._value, self._units)
+        """
+        Return a copy of a time object. Since SimTime objects are immutable,
+        that is just the object itself.
+        """
+        return self
 
     def to_units(self, tounits):
         """
-        Returns a new SimTime instance of the specified time units
+        Returns a SimTime instance of the specified time units
         """
         if tounits is None:
             assert base_unit() == None, "cannot convert to dimensionless SimTime unless base unit is dimensionless"
-            return self.make_copy()
+            return self
         # Python 3.10 compatability - see NOTE above
         #elif tounits in Unit:
-        elif tounits in set(unit.value for unit in Unit):
-            conversionFactor = 60**(self._units - tounits)
+        elif tounits in _VALID_UNITS:
+            if tounits == self._units:
+                return self
+            conversionFactor = _CONVERSION_FACTOR[self._units][tounits]
             return SimTime(self._value * conversionFactor, tounits)
         else:
             msg = "Invalid units constant ({0}) passed to SimTime.toUnits()"
             raise SimError(_ERROR_NAME, msg, tounits)
 
     def to_seconds(self):
-        "Returns a new SimTime instance, in seconds"
+        "Returns a SimTime instance, in seconds"
         return self.to_units(Unit.SECONDS)
 
     def to_minutes(self):
-        "Returns a new SimTime instance, in minutes"
+        "Returns a SimTime instance, in minutes"
         return self.to_units(Unit.MINUTES)
 
     def to_hours(self):
-        "Returns a new SimTime instance, in hours"
+        "Returns a SimTime instance, in hours"
         return self.to_units(Unit.HOURS)
     
     def to_scalar(self):
@@ -220,26 +261,21 @@ class SimTime(object):
         e.g., if the base unit is SECONDS and this SimTime is 2 minutes,
         (value 2, units MINUTES) to_scalar() returns 120
         """
-        if _base_unit is None:
-            assert self._units is None, "SimTime units set when base unit is None/Dimensionless"
-            return self._value
-        else:
-            conversionFactor = 60**(self._units - _base_unit)
-            return self._value * conversionFactor
+        assert _base_unit is not None or self._units is None, "SimTime units set when base unit is None/Dimensionless"
+        return self._scalar
             
-
     # Internal helper function used by math operators to convert 'other' interval to same
     # units as self.  If other is NOT a SimTime, we assume the same units as self
     # and just return other (which had better be or convert to a number)
     def _converted_other_value(self, other):
-        if isinstance(other, self.__class__):
+        if isinstance(other, SimTime):
             if __debug__:
                 self._validate_units(other)
                 self._validate_units(self)
-            if other._units is None:
+            if other._units is None or other._units == self._units:
                 return other._value
             else:
-                conversionFactor = 60**(other._units - self._units)
+                conversionFactor = _CONVERSION_FACTOR[other._units][self._units]
                 return other._value * conversionFactor
         else:
             return other
@@ -247,31 +283,38 @@ class SimTime(object):
     # Methods below all support SimTime arithmetic
     
     def __add__(self, other):
-        return SimTime(self._value + self._converted_other_value(other), self._units)
+        return self._new(self._value + self._converted_other_value(other))
 
     def __radd__(self, other):
-        return SimTime(self._value + self._converted_other_value(other), self._units)
+        return self._new(self._value + self._converted_other_value(other))
 
     def __sub__(self, other):
-        return SimTime(self._value - self._converted_other_value(other), self._units)
-
-    def __iadd__(self, other):
-        self._value += self._converted_other_value(other)
-        return self
+        return self._new(self._value - self._converted_other_value(other))
 
     def __truediv__(self, other):
-        return SimTime(float(self._value) / self._converted_other_value(other), self._units)
+        return self._new(float(self._value) / self._converted_other_value(other))
 
     def __rtruediv__(self, other):
-        return SimTime(self._converted_other_value(other) / float(self._value), self._units)
+        return self._new(self._converted_other_value(other) / float(self._value))
 
     def __mul__(self, other):
-        return SimTime(self._value * self._converted_other_value(other), self._units)
+        return self._new(self._value * self._converted_other_value(other))
 
     def __rmul__(self, other):
-        return SimTime(self._value * self._converted_other_value(other), self._units)
+        return self._new(self._value * self._converted_other_value(other))
 
     def _compare(self, other):
+        """
+        Returns a value whose sign (negative, zero or positive) indicates
+        the result of comparing this SimTime to other. SimTimes are
+        compared via their base unit scalar values.
+        """
+        if isinstance(other, SimTime):
+            if __debug__:
+                self._validate_units(other)
+                self._validate_units(self)
+            return self._scalar - other._scalar
+        
         if other == 0:
             # Validate this SimTime (mostly for a change to dimensionless base unit)
             # before returning
@@ -279,13 +322,11 @@ class SimTime(object):
                 self._validate_units(self)
             return self._value
 
-        if _base_unit is not None and not isinstance(other, self.__class__):
+        if _base_unit is not None:
             msg = "Cannot compare time interval to ({0})"
             raise SimError(_ERROR_NAME, msg, other)
 
-        otherValue = self._converted_other_value(other)
-        diff = self._value - otherValue
-        return diff
+        return self._value - other
 
     def __eq__(self, other):
         return self._compare(other) == 0
@@ -306,9 +347,35 @@ class SimTime(object):
         return self._compare(other) >= 0
 
     def __hash__(self):
-        "for hashing, return the time value converted to seconds and truncated, if necessary"
-        conversionFactor = 60**(self._units - Unit.SECONDS)
-        return int(self._value * conversionFactor)
+        """
+        For hashing, use the time value converted to the base unit, so
+        that equal SimTimes (e.g. 120 seconds and 2 minutes) hash equally
+        """
+        return hash(self._scalar)
+
+    @staticmethod
+    def zero():
+        """
+        Return a (cached) zero length SimTime in the base unit.
+        
+        :return: SimTime(0)
+        :rtype:  :class:`SimTime`
+        """
+        return _cached_simtime(0, None)
+
+    @staticmethod
+    def unit_interval(units=None):
+        """
+        Return a (cached) SimTime of length 1 in the specified units,
+        which default to the base unit.
+        
+        :param units: Time unit (:class:`Unit`) or `None` (base unit)
+        :type units:  `int` (range 0-2, from :class:`Unit` enum values) or `None`
+        
+        :return: SimTime(1, units)
+        :rtype:  :class:`SimTime`
+        """
+        return _cached_simtime(1, units)
 
     @apidocskip
     def serialize(self):
@@ -332,3 +399,21 @@ class SimTime(object):
         if obj[0] != 'SimTime': return obj
         return SimTime(obj[1], obj[2])
 
+
+_new_simtime = object.__new__
+
+# Cache of commonly used SimTime values, keyed by (value, units, base unit)
+# Since the base unit is normally fixed for a process, including it in the
+# key is really only a concern for testing.
+_simtime_cache = {}
+
+def _cached_simtime(value, units):
+    """
+    Return a cached SimTime of the passed value and units, creating it if
+    required.
+    """
+    key = (value, units, _base_unit)
+    tm = _simtime_cache.get(key)
+    if tm is None:
+        tm = _simtime_cache[key] = SimTime(value, units)
+    return tm
@@ -359,7 +359,7 @@ def trace_event(obj, action, arguments=''):
     if _trace_event_count == 1:
         _header_func()
      
-    evt = Event(SimClock.now().to_scalar(), obj, action, arguments)
+    evt = Event(SimClock.now_scalar(), obj, action, arguments)
     _write_event_func(evt)
 
      
@@ -0,0 +1,22 @@
+-- Replaces the datasetvalue table created by CreateOutputDb.sql with the
+-- compact layout: a WITHOUT ROWID table clustered on a primary key that
+-- begins with run, batch and dataset, so there is neither a rowid nor a
+-- separate datasetvalue_idx index to store. The primary key also orders
+-- each dataset's values by simtimestamp, so time series queries need no
+-- index of their own. seq distinguishes values with the same dataset,
+-- run, batch and simtimestamp (it is zero for the first such value, and
+-- SQLite stores zero and one in no space at all).
+
+DROP INDEX IF EXISTS datasetvalue_idx;
+DROP TABLE IF EXISTS datasetvalue;
+
+CREATE TABLE datasetvalue(
+	  dataset INTEGER NOT NULL REFERENCES dataset(id) ON DELETE CASCADE ON UPDATE CASCADE
+	, run INTEGER NOT NULL CHECK (run > 0)
+	, batch INTEGER NOT NULL CHECK (batch >= 0)
+	, simtimestamp NUMERIC NOT NULL
+	, totimestamp NUMERIC 
+	, value NUMERIC NOT NULL 
+	, seq INTEGER NOT NULL
+	, PRIMARY KEY (run, batch, dataset, simtimestamp, seq)
+) WITHOUT ROWID;
@@ -0,0 +1,7 @@
+-- The compact layout's counterpart to CreateQueryIndexes.sql. Its primary
+-- key already serves the time series queries, so only the covering index
+-- for the summary and histogram queries (grouped or ordered by value) is
+-- needed.
+
+CREATE INDEX IF NOT EXISTS datasetvalue_value_idx
+	ON datasetvalue (dataset, run, batch, value, simtimestamp, totimestamp);
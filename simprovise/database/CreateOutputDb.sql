@@ -5,6 +5,8 @@ DROP TABLE IF EXISTS timeunit;
 DROP TABLE IF EXISTS elementtype;
 DROP TABLE IF EXISTS dataset;
 DROP TABLE IF EXISTS datasetvalue;
+DROP TABLE IF EXISTS datasetsummary;
+DROP TABLE IF EXISTS schemaversion;
 
 CREATE TABLE timeunit(
 	  id INTEGER PRIMARY KEY
@@ -63,3 +65,37 @@ CREATE TABLE datasetvalue(
 	, value NUMERIC NOT NULL 
 );
 CREATE INDEX datasetvalue_idx on datasetvalue (run, batch, dataset);
+
+-- The covering indexes used by dataset value queries (CreateQueryIndexes.sql)
+-- are not created here; they are created on request, once the dataset values
+-- are loaded, so that they need not be maintained during a simulation run.
+--
+-- Compact output databases replace this table (and datasetvalue_idx) with a
+-- WITHOUT ROWID layout - see CreateCompactDatasetValue.sql.
+
+-- One row per dataset/run/batch, written at the end of each batch - either
+-- by summary datasinks in place of datasetvalue rows, or from that batch's
+-- datasetvalue rows so that reports need not summarize them. percentiles is
+-- a JSON array of the 0th through 100th percentile values.
+CREATE TABLE datasetsummary(
+	  dataset INTEGER NOT NULL REFERENCES dataset(id) ON DELETE CASCADE ON UPDATE CASCADE
+	, run INTEGER NOT NULL CHECK (run > 0)
+	, batch INTEGER NOT NULL CHECK (batch >= 0)
+	, starttimestamp NUMERIC NOT NULL
+	, endtimestamp NUMERIC NOT NULL
+	, count INTEGER NOT NULL
+	, totalweight NUMERIC
+	, mean NUMERIC
+	, variance NUMERIC
+	, min NUMERIC
+	, max NUMERIC
+	, percentiles TEXT
+	, PRIMARY KEY (dataset, run, batch)
+) WITHOUT ROWID;
+
+-- A single row containing the schema version of the output database. Output
+-- databases without this table are version 1 (see UpgradeOutputDbV2.sql).
+CREATE TABLE schemaversion(
+	  version INTEGER NOT NULL
+);
+INSERT INTO schemaversion VALUES(2);
@@ -0,0 +1,15 @@
+-- Covering indexes for the per-dataset queries on datasetvalue: summary
+-- statistics and histograms (grouped or ordered by value) and time series
+-- (ordered by simtimestamp). Each includes every datasetvalue column used by
+-- those queries, so they can be answered from the index alone, without
+-- sorting in a temporary B-tree.
+--
+-- These indexes are not created with the database, so that they are not
+-- maintained during simulation runs; they are created on request, after the
+-- dataset values are loaded (see SimOutputDatabase.create_query_indexes()).
+
+CREATE INDEX IF NOT EXISTS datasetvalue_value_idx
+	ON datasetvalue (dataset, run, batch, value, simtimestamp, totimestamp);
+
+CREATE INDEX IF NOT EXISTS datasetvalue_time_idx
+	ON datasetvalue (dataset, run, batch, simtimestamp, value, totimestamp);
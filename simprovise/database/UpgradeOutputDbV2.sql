@@ -0,0 +1,25 @@
+-- Upgrades a version 1 output database (one created before the schemaversion
+-- table was introduced) to version 2: adds the datasetsummary table if
+-- missing, along with the schemaversion table itself.
+
+CREATE TABLE IF NOT EXISTS datasetsummary(
+	  dataset INTEGER NOT NULL REFERENCES dataset(id) ON DELETE CASCADE ON UPDATE CASCADE
+	, run INTEGER NOT NULL CHECK (run > 0)
+	, batch INTEGER NOT NULL CHECK (batch >= 0)
+	, starttimestamp NUMERIC NOT NULL
+	, endtimestamp NUMERIC NOT NULL
+	, count INTEGER NOT NULL
+	, totalweight NUMERIC
+	, mean NUMERIC
+	, variance NUMERIC
+	, min NUMERIC
+	, max NUMERIC
+	, percentiles TEXT
+	, PRIMARY KEY (dataset, run, batch)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS schemaversion(
+	  version INTEGER NOT NULL
+);
+DELETE FROM schemaversion;
+INSERT INTO schemaversion VALUES(2);
@@ -4,10 +4,14 @@
 # Copyright (C) 2024 Howard Klein - All Rights Reserved
 #
 # Defines output database-related classes:
-# - SimOutputDatabase, with subclasses SimLiveOutputDatabase and
-#   SimArchivedOutputDatabase
+# - SimOutputDatabase, with subclasses SimLiveOutputDatabase,
+#   SimArchivedOutputDatabase and SimShardedOutputDatabase
+# - SimShardManifest, which lists the per-run databases of a sharded database
 # - SimDatabaseManager
-# - SimDbDatasink and subclass SimDbTimeSeriesDatasink
+# - SimDbDatasink and subclasses SimDbTimeSeriesDatasink, SimDbBufferedDatasink,
+#   SimDbSummaryDatasink and SimDbTimeWeightedSummaryDatasink
+# - Dataset value row buffers shared by the buffered datasinks, optionally
+#   written by a background writer thread
 # - Classes that query/process an output database in order to generate
 #   data for output displays (charts and tables)
 #
@@ -25,8 +29,15 @@ ___all__ = ['SimDatabaseManager', 'SimArchivedOutputDatabase', 'SimTimeSeriesDat
 
 import sqlite3
 import os
+import json
+import time
+import queue
+import threading
+from array import array
 from collections import namedtuple
 import tempfile
+import shutil
+import numpy as np
 
 from simprovise.core.simevent import SimEvent
 from simprovise.core.simlogging import SimLogging
@@ -35,6 +46,7 @@ from simprovise.core.simclock import SimClock
 from simprovise.core.datasink import DataSink
 from simprovise.core import SimError, simtime, simelement
 from simprovise.core.apidoc import apidoc, generating_docs
+import simprovise.core.configuration as simconfig
 
 from simprovise.modeling import (SimResource, SimLocation, SimEntitySource,
                                  SimEntitySink)
@@ -55,6 +67,38 @@ _ENTRIES_DATASET_NAME = simelement.ENTRIES_DATASET_NAME
 # the table key cannot be null
 _DB_NONE_TIMEUNIT_VALUE = -1
 
+# Row buffer placeholder for a null totimestamp (SQLite binds NaN as null)
+_NAN = float('nan')
+
+# Background writer row buffer size if the BufferSize setting is zero
+_DEFAULT_WRITER_BUFFER_SIZE = 1000
+
+# Page cache size (in KiB) for scratch (single replication) databases
+_SCRATCH_CACHE_SIZE_KIB = 65536
+
+# Default number of rows in each chunk retrieved by dataset_value_chunks()
+_DEFAULT_QUERY_CHUNK_SIZE = 65536
+
+# Current output database schema version, and the script that upgrades a
+# database from the previous version to each later version
+_SCHEMA_VERSION = 2
+_SCHEMA_UPGRADE_SCRIPTS = {2: 'UpgradeOutputDbV2.sql'}
+
+# Identifies (and versions) the JSON manifest file of a sharded output database
+_SHARD_MANIFEST_FORMAT = 'simprovise-output-shards'
+_SHARD_MANIFEST_VERSION = 1
+
+
+def _set_scratch_pragmas(connection):
+    """
+    Tune a connection to a scratch database - a temporary database written
+    by a single replication, whose contents are of no use if the
+    replication fails - for write speed rather than durability.
+    """
+    connection.execute("pragma synchronous = OFF")
+    connection.execute("pragma temp_store = MEMORY")
+    connection.execute("pragma cache_size = -{0}".format(_SCRATCH_CACHE_SIZE_KIB))
+
 class SimElementType(object):
     """
     Essentially an enumeration of element types, with the types corresponding
@@ -97,7 +141,7 @@ class SimDbDatasink(DataSink):
     #sinks to create their own collectors.
     
     __slots__ = ('__dbConnection', '__datasetID', '__run', '__batch',
-                 '__valuesAreSimTime')
+                 '__valuesAreSimTime', '__isCompact', '__seqTimestamp', '__seq')
     commitRate = 1
 
     @staticmethod
@@ -128,11 +172,18 @@ class SimDbDatasink(DataSink):
         self.__run = runNumber
         self.__batch = None
         self.__valuesAreSimTime = (dataset.valuetype is SimTime)
+        self.__isCompact = database.is_compact
+        self.__seqTimestamp = None
+        self.__seq = 0
 
     @property
     def db_connection(self):
         return self.__dbConnection
 
+    @property
+    def is_compact(self):
+        return self.__isCompact
+
     @property
     def db_cursor(self):
         return self.__dbConnection.cursor()
@@ -179,11 +230,32 @@ class SimDbDatasink(DataSink):
         Insert a new dataset value into the output database (and perhaps
         committing that insertion to disk)
         """
-        rowVals = (self.dataset_id, self.run, self.batch, SimClock.now().to_scalar(), self._to_scalar(value))
-        self.db_cursor.execute('insert into datasetvalue (dataset, run, batch, simtimestamp, value) values (?, ?, ?, ?, ?)',
-                              rowVals)
+        tm = SimClock.now_scalar()
+        if self.__isCompact:
+            rowVals = (self.dataset_id, self.run, self.batch, tm,
+                       self._to_scalar(value), self._next_seq(tm))
+            self.db_cursor.execute('insert into datasetvalue (dataset, run, batch, simtimestamp, value, seq) values (?, ?, ?, ?, ?, ?)',
+                                   rowVals)
+        else:
+            rowVals = (self.dataset_id, self.run, self.batch, tm, self._to_scalar(value))
+            self.db_cursor.execute('insert into datasetvalue (dataset, run, batch, simtimestamp, value) values (?, ?, ?, ?, ?)',
+                                   rowVals)
         self.maybe_commit()
 
+    def _next_seq(self, timestamp):
+        """
+        Return the seq column value for a new row at the passed timestamp
+        in a compact output database - the number of rows this datasink has
+        already written at that timestamp - so that each row's primary key
+        is unique.
+        """
+        if timestamp == self.__seqTimestamp:
+            self.__seq += 1
+        else:
+            self.__seqTimestamp = timestamp
+            self.__seq = 0
+        return self.__seq
+
     def _to_scalar(self, value):
         """
         If the dataset values are SimTime values, return the passed value as a
@@ -202,9 +274,19 @@ class SimDbDatasink(DataSink):
 class SimDbTimeSeriesDatasink(SimDbDatasink):
     """
     A :class:`SimDbDatasink` subclass for time-weighted datasets.
+
+    Each datasetvalue row written by this datasink is an interval during
+    which the dataset had a given value - from simtimestamp to totimestamp.
+    Rows are insert-only: the current value is held in memory until it is
+    superseded by a new value at a later simulated time (or the batch ends),
+    at which point its complete row, totimestamp included, is inserted.
+    Previously written rows are never updated, and a value replaced at the
+    same simulated time that it was set is never written at all. If the
+    database has a row buffer (see :class:`SimDbBufferedDatasink`), rows are
+    added to that buffer.
     
     :param database:     Output database to write the data to.
-    :type database:      :class:`SimOutputDatabase`
+    :type database:      :class:`SimLiveOutputDatabase`
     
     :param dataset:      The dataset associated with this datasink.
     :type dataset:       :class:`simprovise.core.datacollector.Dataset`
@@ -219,7 +301,7 @@ class SimDbTimeSeriesDatasink(SimDbDatasink):
     :type initialValue:  numeric value (`int` or `float`) 
     
     """
-    __slots__ = ('__lastrowid', '__lastTimestamp', '__lastValue')
+    __slots__ = ('__lastTimestamp', '__lastValue', '__buffer', '__finalizedBatch')
     def __init__(self, database, dataset, runNumber, initialValue=0):
         """
         Initialize a new instance for a specified output database, dataset,
@@ -227,22 +309,36 @@ class SimDbTimeSeriesDatasink(SimDbDatasink):
         time-weighted dataset, there must always be a current value)
         """
         super().__init__(database, dataset, runNumber)
-        self.__lastrowid = None
         self.__lastTimestamp = None
         self.__lastValue = initialValue
-        #self.put(initialValue, batch)
+        self.__buffer = database.value_buffer
+        self.__finalizedBatch = None
 
     def initialize_batch(self, batchnum):
         """
-        Initialize a new batch. For time series data, insert the current
-        value (self.__lastvalue) so that we have a row timestamped for the
-        beginning of the batch.
+        Initialize a new batch. For time series data, the current value
+        (self.__lastvalue) starts a new interval at the beginning of
+        the batch.
         """
         super().initialize_batch(batchnum)
-        tm = self._scalar_sim_now()
-        self._insert_row(self.__lastValue, tm)
-        self.db_connection.commit()
-        self.__lastTimestamp = tm
+        self.__lastTimestamp = self._scalar_sim_now()
+
+    def finalize_batch(self, batchnum):
+        """
+        Finalize the current batch by writing the current value's interval,
+        which ends at the end of the batch, and then flushing. (If the batch
+        is finalized again - e.g., when the datasink is replaced - that
+        interval is not written again.) The current value's next interval
+        starts at the end of the batch, so a value set by an event processed
+        at that same time (after the batch is finalized) replaces it without
+        writing another row.
+        """
+        if batchnum == self.batch and batchnum != self.__finalizedBatch:
+            tm = self._scalar_sim_now()
+            self._insert_row(self.__lastValue, self.__lastTimestamp, tm)
+            self.__lastTimestamp = tm
+            self.__finalizedBatch = batchnum
+        super().finalize_batch(batchnum)
 
     def _scalar_sim_now(self):
         """
@@ -251,58 +347,638 @@ class SimDbTimeSeriesDatasink(SimDbDatasink):
 
         TODO Currently works only if that timeunit is seconds
         """
-        return SimClock.now().to_scalar()
+        return SimClock.now_scalar()
 
-    def _update_last_to_time(self, toTime):
+    def _insert_row(self, value, fromTime, toTime):
         """
-        Update/set the totimestamp column value of the most recently inserted row
+        Insert (or buffer) a complete row for the interval during which
+        the dataset had the passed value. Returns True if the row was
+        inserted (or buffered rows were flushed).
         """
-        if self.__lastrowid is not None:
-            sqlstr = "update datasetvalue set totimestamp = ? where rowid = ?"
-            self.db_cursor.execute(sqlstr, (toTime, self.__lastrowid))
-
-    def _insert_row(self, value, tm):
-        """
-        Insert a new row into dataset value (without a totimestamp) and save
-        the rowid of that row as __lastrowid
-        """
-        insertStmt = 'insert into datasetvalue (dataset, run, batch, simtimestamp, value) values (?, ?, ?, ?, ?)'
-        rowVals = (self.dataset_id, self.run, self.batch, tm, value)
-        cursor = self.db_cursor
-        cursor.execute(insertStmt, rowVals)
-        self.__lastrowid = cursor.lastrowid
+        if self.__buffer is not None:
+            return self.__buffer.append(self.dataset_id, self.run, self.batch,
+                                        fromTime, value, toTime)
+        # Each row starts at a different simulated time (the start of the
+        # current interval advances to the end of every row written), so in
+        # a compact database, seq is always zero
+        if self.is_compact:
+            insertStmt = 'insert into datasetvalue (dataset, run, batch, simtimestamp, totimestamp, value, seq) values (?, ?, ?, ?, ?, ?, 0)'
+        else:
+            insertStmt = 'insert into datasetvalue (dataset, run, batch, simtimestamp, totimestamp, value) values (?, ?, ?, ?, ?, ?)'
+        rowVals = (self.dataset_id, self.run, self.batch, fromTime, toTime, value)
+        self.db_cursor.execute(insertStmt, rowVals)
+        return True
 
     def put(self, value):
         """
-        Insert a new dataset value into the output database (and perhaps
-        committing that insertion to disk)
+        Set a new current value. If the previous value was set at an earlier
+        simulated time, its interval is now complete, so write it (and
+        perhaps commit); otherwise the previous value is simply replaced.
         """
         value = self._to_scalar(value)
         if value == self.__lastValue:
             return
 
         tm = self._scalar_sim_now()
-        cursor = self.db_cursor
+        if tm != self.__lastTimestamp:
+            if self._insert_row(self.__lastValue, self.__lastTimestamp, tm):
+                self.maybe_commit()
+            self.__lastTimestamp = tm
+        self.__lastValue = value
 
-        if tm == self.__lastTimestamp and self.__lastrowid is not None:
-            sqlstr = "update datasetvalue set value = ? where rowid = ?"
-            cursor.execute(sqlstr, (value, self.__lastrowid))
-        else:
-            self._update_last_to_time(tm)
-            self._insert_row(value, tm)
+    def flush(self):
+        """
+        Write any buffered rows and commit.
+        """
+        if self.__buffer is not None:
+            self.__buffer.flush()
+        super().flush()
 
-        self.maybe_commit()
 
-        self.__lastValue = value
-        self.__lastTimestamp = tm
+class _DatasetValueBuffer(object):
+    """
+    Accumulates datasetvalue rows for an output database connection in
+    compact arrays (one per column), and inserts them via a single
+    executemany() call when the buffer is full, when the (optional) flush
+    interval has elapsed, or when flush() is called. Rows for all of a
+    database's buffered and time series datasinks share the one buffer, so
+    the number of bulk inserts does not grow with the number of datasets.
+
+    :param connection: The output database connection
+    :type connection:  :class:`sqlite3.Connection`
+
+    :param size:       The number of rows that fill the buffer
+    :type size:        `int` > 0
+
+    :param interval:   Maximum wall clock seconds between flushes, or zero
+                       for no limit
+    :type interval:    `int` >= 0
+
+    :param compact:    If True, the rows are for a compact output database,
+                       and include the seq column
+    :type compact:     `bool`
+    """
+    _INSERT_STMT = 'insert into datasetvalue (dataset, run, batch, simtimestamp, value, totimestamp) values (?, ?, ?, ?, ?, ?)'
+    _COMPACT_INSERT_STMT = 'insert into datasetvalue (dataset, run, batch, simtimestamp, value, totimestamp, seq) values (?, ?, ?, ?, ?, ?, ?)'
+
+    def __init__(self, connection, size, interval=0, compact=False):
+        self._connection = connection
+        self._size = size
+        self._interval = interval
+        self._compact = compact
+        self._insertStmt = self._COMPACT_INSERT_STMT if compact else self._INSERT_STMT
+        self._lastFlushTime = time.monotonic()
+        self._clear()
+
+    def __len__(self):
+        return len(self._datasets)
+
+    def _clear(self):
+        """
+        Replace the column arrays with empty ones.
+        """
+        self._datasets = array('q')
+        self._runs = array('q')
+        self._batches = array('q')
+        self._timestamps = array('d')
+        self._values = array('d')
+        self._toTimestamps = array('d')
+        self._seqs = array('q')
+
+    def _columns(self):
+        """
+        Return the column arrays, in insert statement order.
+        """
+        columns = (self._datasets, self._runs, self._batches,
+                   self._timestamps, self._values, self._toTimestamps)
+        if self._compact:
+            columns += (self._seqs,)
+        return columns
+
+    def append(self, datasetID, run, batch, timestamp, value, toTimestamp=_NAN,
+               seq=0):
+        """
+        Add a row to the buffer, flushing if that fills it (or the flush
+        interval has elapsed). Returns True if the buffer was flushed.
+        A NaN toTimestamp (the default) is written as a null totimestamp.
+        seq is written only to compact output databases.
+        """
+        self._datasets.append(datasetID)
+        self._runs.append(run)
+        self._batches.append(batch)
+        self._timestamps.append(timestamp)
+        self._values.append(value)
+        self._toTimestamps.append(toTimestamp)
+        self._seqs.append(seq)
+        if len(self._datasets) >= self._size:
+            self.flush()
+            return True
+        if self._interval and time.monotonic() - self._lastFlushTime >= self._interval:
+            self.flush()
+            return True
+        return False
 
     def flush(self):
         """
-        Commit any unsaved additions/changes to disk
+        Insert all buffered rows (without committing) and empty the buffer.
         """
-        tm = self._scalar_sim_now()
-        self._update_last_to_time(tm)
-        self.db_connection.commit()
+        if self._datasets:
+            self._connection.executemany(self._insertStmt, zip(*self._columns()))
+            self._clear()
+        self._lastFlushTime = time.monotonic()
+
+
+class _DatasetValueWriter(_DatasetValueBuffer):
+    """
+    A :class:`_DatasetValueBuffer` whose rows are written by a background
+    writer thread with its own connection to the output database, so that
+    the simulation thread does not wait on SQLite inserts and commits.
+
+    When the buffer fills, its column arrays are placed on a bounded queue
+    drained by the writer thread; if the queue is full, the simulation
+    thread blocks until the writer catches up. Rows are committed by the
+    writer after each (queued) buffer if the datasink commit rate is set,
+    and otherwise only when :meth:`sync` is called - typically at the end
+    of each batch. :meth:`close` shuts the writer thread down.
+
+    A failure in the writer thread is raised (as a SimError) by the next
+    :meth:`flush`, :meth:`sync` or :meth:`close` call.
+
+    :param dbpath:    The output database file path
+    :type dbpath:     `str`
+
+    :param size:      The number of rows that fill the buffer
+    :type size:       `int` > 0
+
+    :param interval:  Maximum wall clock seconds between flushes, or zero
+                      for no limit
+    :type interval:   `int` >= 0
+
+    :param queueSize: Maximum number of buffers waiting for the writer
+    :type queueSize:  `int` > 0
+
+    :param scratch:   If True, the database is a scratch database, and the
+                      writer's connection is tuned accordingly
+    :type scratch:    `bool`
+
+    :param compact:   If True, the database is a compact output database
+    :type compact:    `bool`
+    """
+    def __init__(self, dbpath, size, interval=0, queueSize=16, scratch=False,
+                 compact=False):
+        super().__init__(None, size, interval, compact)
+        self._dbpath = dbpath
+        self._scratch = scratch
+        self._queue = queue.Queue(queueSize)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_rows,
+                                        name="SimOutputDbWriter", daemon=True)
+        self._thread.start()
+
+    def flush(self):
+        """
+        Queue all buffered rows for the writer thread and empty the buffer.
+        Blocks if the writer queue is full.
+        """
+        self._raise_if_failed()
+        if self._closed:
+            raise SimError(_ERROR_NAME, "Output database writer {0} is closed",
+                           self._dbpath)
+        if self._datasets:
+            self._queue.put((self._columns(), SimDbDatasink.commitRate))
+            self._clear()
+        self._lastFlushTime = time.monotonic()
+
+    def sync(self):
+        """
+        Flush, and then wait until the writer thread has written and
+        committed every row queued so far.
+        """
+        self.flush()
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        self._raise_if_failed()
+
+    def close(self):
+        """
+        Stop the writer thread (after it writes any already-queued rows)
+        and close its connection. As with unbuffered output, rows that were
+        not synced (committed) are discarded, as are any rows still in
+        the buffer.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._clear()
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_if_failed()
+
+    def _raise_if_failed(self):
+        """
+        Raise a SimError if the writer thread has failed.
+        """
+        if self._error is not None:
+            raise SimError(_ERROR_NAME, "Output database writer failure ({0}): {1}",
+                           self._dbpath, self._error)
+
+    def _write_rows(self):
+        """
+        The writer thread: insert queued rows, commit as requested and
+        signal sync() callers, until the close() sentinel (None) is
+        dequeued. After a failure, the queue is still drained (without
+        writing) so that the simulation thread never blocks on it.
+        """
+        connection = None
+        try:
+            connection = sqlite3.connect(self._dbpath)
+            if self._scratch:
+                _set_scratch_pragmas(connection)
+        except sqlite3.Error as e:
+            self._error = e
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                if self._error is not None:
+                    continue
+                if isinstance(item, threading.Event):
+                    connection.commit()
+                else:
+                    columns, commit = item
+                    connection.executemany(self._insertStmt, zip(*columns))
+                    if commit:
+                        connection.commit()
+            except sqlite3.Error as e:
+                logger.error("Output database writer failure (%s): %s",
+                             self._dbpath, e)
+                self._error = e
+            finally:
+                if isinstance(item, threading.Event):
+                    item.set()
+        if connection is not None:
+            connection.close()
+
+
+class SimDbBufferedDatasink(SimDbDatasink):
+    """
+    A :class:`SimDbDatasink` subclass for non time-weighted datasets that
+    adds values to the output database's shared row buffer rather than
+    inserting them one at a time. Used in place of :class:`SimDbDatasink`
+    when the Output Database BufferSize configuration setting is non-zero.
+    The rows written are the same; only the timing of the inserts changes.
+
+    :param database: Output database to write data to.
+    :type database:  :class:`SimLiveOutputDatabase`
+    
+    :param dataset:  The dataset associated with this datasink.
+    :type dataset:   :class:`simprovise.core.datacollector.Dataset`
+    
+    :param runNumber: The simulation run number associated with this datasink.
+    :type runNumber:  `int` > 0
+    
+    """
+    __slots__ = ('_buffer',)
+
+    def __init__(self, database, dataset, runNumber):
+        """
+        Initialize a new instance for a specified output database, dataset and
+        simulation run.
+        """
+        super().__init__(database, dataset, runNumber)
+        self._buffer = database.value_buffer
+
+    def put(self, value):
+        """
+        Add a new dataset value to the buffer (and if that results in a
+        buffer flush, perhaps commit).
+        """
+        tm = SimClock.now_scalar()
+        seq = self._next_seq(tm) if self.is_compact else 0
+        if self._buffer.append(self.dataset_id, self.run, self.batch,
+                               tm, self._to_scalar(value), _NAN, seq):
+            self.maybe_commit()
+
+    def flush(self):
+        """
+        Write all buffered rows and commit
+        """
+        self._buffer.flush()
+        super().flush()
+
+
+class _SummaryAccumulator(object):
+    """
+    Accumulates summary statistics for a stream of (optionally weighted)
+    values in a single pass and in bounded memory: count, total weight,
+    weighted mean and variance (via West's weighted version of Welford's
+    algorithm), min, max and a sketch from which percentiles are calculated.
+
+    The sketch maps each distinct value to its total weight. If the number
+    of distinct values exceeds maxSize, adjacent values are merged into
+    clusters of roughly equal weight, each keyed by its weighted mean value,
+    halving the size of the sketch. Percentiles are therefore exact (i.e.,
+    the same as those calculated from the full set of values) unless and
+    until that happens.
+    """
+    __slots__ = ('count', 'totalweight', 'mean', 'min', 'max', '_m2',
+                 '_sketch', '_maxSize', '_compressed')
+
+    def __init__(self, maxSize):
+        self.count = 0
+        self.totalweight = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._m2 = 0.0
+        self._sketch = {}
+        self._maxSize = maxSize
+        self._compressed = False
+
+    def add(self, value, weight=1):
+        """
+        Add a value with the specified (non-negative) weight. Zero-weight
+        values are counted and contribute to min, max and the sketch, but
+        not to the mean or variance.
+        """
+        self.count += 1
+        if self.count == 1:
+            self.min = value
+            self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+
+        if weight > 0:
+            self.totalweight += weight
+            delta = value - self.mean
+            self.mean += delta * weight / self.totalweight
+            self._m2 += weight * delta * (value - self.mean)
+
+        sketch = self._sketch
+        sketch[value] = sketch.get(value, 0) + weight
+        if len(sketch) > self._maxSize:
+            self._compress()
+
+    def variance(self, ddof=0):
+        """
+        Return the weighted variance, where the divisor is the total weight
+        less ddof (so ddof=1 yields the sample variance of unweighted
+        values). Returns None if that divisor is not positive.
+        """
+        if self.totalweight > ddof:
+            return self._m2 / (self.totalweight - ddof)
+        else:
+            return None
+
+    def weighted_mean(self):
+        """
+        Return the weighted mean, or None if there is no weight. Until the
+        sketch is compressed, it is calculated from the sketch in the same
+        way (and therefore with the same rounding) as a mean calculated
+        from the datasetvalue table; the running mean is used thereafter.
+        """
+        if not self.totalweight:
+            return None
+        if self._compressed:
+            return self.mean
+        items = sorted(self._sketch.items())
+        totalweight = sum(w for v, w in items)
+        return sum(v * w for v, w in items) / totalweight
+
+    def percentiles(self):
+        """
+        Return a list of the 0th through 100th percentile values.
+        """
+        return _weighted_percentiles(sorted(self._sketch.items()))
+
+    def _compress(self):
+        """
+        Merge adjacent sketch values into (at most) maxSize/2 + 1 clusters
+        of roughly equal weight. If there is no weight at all (e.g.
+        time-weighted values that were all zero duration), merge adjacent
+        pairs.
+        """
+        items = sorted(self._sketch.items())
+        total = sum(w for v, w in items)
+        if total > 0:
+            target = total / (self._maxSize // 2)
+        else:
+            items = [(v, 1) for v, w in items]
+            target = 2
+
+        sketch = {}
+        clusterWeight = 0
+        clusterSum = 0
+        clusterValues = []
+        for value, weight in items:
+            clusterWeight += weight
+            clusterSum += value * weight
+            clusterValues.append(value)
+            if clusterWeight >= target:
+                self._add_cluster(sketch, clusterValues, clusterWeight, clusterSum)
+                clusterWeight = clusterSum = 0
+                clusterValues = []
+        if clusterValues:
+            self._add_cluster(sketch, clusterValues, clusterWeight, clusterSum)
+
+        if total == 0:
+            sketch = dict.fromkeys(sketch, 0)
+        self._sketch = sketch
+        self._compressed = True
+
+    @staticmethod
+    def _add_cluster(sketch, values, weight, weightedSum):
+        """
+        Add a cluster of sketch values to the passed sketch dictionary.
+        """
+        if len(values) == 1:
+            value = values[0]
+        elif weight > 0:
+            value = weightedSum / weight
+        else:
+            value = sum(values) / len(values)
+        sketch[value] = sketch.get(value, 0) + weight
+
+
+def _weighted_percentiles(valueWeights):
+    """
+    Return a list of the 0th through 100th percentile values for a
+    sequence of (value, weight) pairs sorted by value. Percentile i is
+    the first value for which the cumulative weight is at least i percent
+    of the total weight. If the total weight is zero, all percentiles are
+    None.
+    """
+    percentile = [None] * 101
+    totalweight = sum(weight for value, weight in valueWeights)
+    if not totalweight:
+        return percentile
+
+    cumweight = 0
+    currPercentile = 0
+    for value, weight in valueWeights:
+        cumweight += weight
+        while currPercentile <= 100 and 100.0 * cumweight / totalweight >= currPercentile:
+            percentile[currPercentile] = value
+            currPercentile += 1
+
+    return percentile
+
+
+class SimDbSummaryDatasink(SimDbDatasink):
+    """
+    A :class:`SimDbDatasink` subclass for non time-weighted datasets that
+    does not write individual values to the output database. It instead
+    maintains summary statistics for the current batch in memory, and
+    writes a single row to the datasetsummary table when the batch is
+    finalized. Used in place of :class:`SimDbDatasink` when the
+    Output Database SummaryOnly configuration setting is true.
+    
+    :param database: Output database to write data to.
+    :type database:  :class:`SimOutputDatabase`
+    
+    :param dataset:  The dataset associated with this datasink.
+    :type dataset:   :class:`simprovise.core.datacollector.Dataset`
+    
+    :param runNumber: The simulation run number associated with this datasink.
+    :type runNumber:  `int` > 0
+    
+    """
+    __slots__ = ('_summary', '_batchStartTime', '_sketchSize')
+
+    # Divisor adjustment for the variance; values are a sample
+    _VARIANCE_DDOF = 1
+
+    def __init__(self, database, dataset, runNumber):
+        """
+        Initialize a new instance for a specified output database, dataset and
+        simulation run.
+        """
+        super().__init__(database, dataset, runNumber)
+        self._summary = None
+        self._batchStartTime = None
+        self._sketchSize = simconfig.get_output_summary_sketch_size()
+
+    def initialize_batch(self, batchnum):
+        """
+        Initialize a new batch, starting with empty summary statistics.
+        """
+        super().initialize_batch(batchnum)
+        self._summary = _SummaryAccumulator(self._sketchSize)
+        self._batchStartTime = SimClock.now_scalar()
+
+    def finalize_batch(self, batchnum):
+        """
+        Finalize the current batch by writing its summary row and flushing.
+        """
+        if batchnum == self.batch:
+            self._write_summary()
+        super().finalize_batch(batchnum)
+
+    def put(self, value):
+        """
+        Add a new dataset value to the current batch summary statistics.
+        """
+        self._summary.add(self._to_scalar(value))
+
+    def _write_summary(self):
+        """
+        Insert (or replace) the datasetsummary row for the current
+        dataset/run/batch.
+        """
+        summary = self._summary
+        mean = summary.weighted_mean()
+        if summary.count:
+            percentiles = json.dumps(summary.percentiles())
+        else:
+            percentiles = None
+
+        rowVals = (self.dataset_id, self.run, self.batch,
+                   self._batchStartTime, SimClock.now_scalar(),
+                   summary.count, summary.totalweight, mean,
+                   summary.variance(self._VARIANCE_DDOF),
+                   summary.min, summary.max, percentiles)
+        insertStmt = 'insert or replace into datasetsummary values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+        self.db_cursor.execute(insertStmt, rowVals)
+
+
+class SimDbTimeWeightedSummaryDatasink(SimDbSummaryDatasink):
+    """
+    A :class:`SimDbSummaryDatasink` subclass for time-weighted datasets;
+    each value is weighted by the simulated time that it is the current
+    value (within the batch). The count, min, max and percentiles are the
+    same as those calculated from the rows that a
+    :class:`SimDbTimeSeriesDatasink` would write for the batch.
+    
+    :param database:     Output database to write the data to.
+    :type database:      :class:`SimOutputDatabase`
+    
+    :param dataset:      The dataset associated with this datasink.
+    :type dataset:       :class:`simprovise.core.datacollector.Dataset`
+    
+    :param runNumber:    The simulation run number associated with this
+                         datasink.
+    :type runNumber:     `int` > 0
+    
+    :param initialValue: The initial dataset value. (Time-weighted datasets
+                         *always* have a current value; this is the initial
+                         current value.)
+    :type initialValue:  numeric value (`int` or `float`) 
+    
+    """
+    __slots__ = ('_lastValue', '_lastTimestamp')
+
+    # The variance is that of the value over (simulated) time
+    _VARIANCE_DDOF = 0
+
+    def __init__(self, database, dataset, runNumber, initialValue=0):
+        """
+        Initialize a new instance for a specified output database, dataset,
+        simulation run and initial dataset value.
+        """
+        super().__init__(database, dataset, runNumber)
+        self._lastValue = initialValue
+        self._lastTimestamp = None
+
+    def initialize_batch(self, batchnum):
+        """
+        Initialize a new batch. The current value carries over from the
+        previous batch, starting at the beginning of this one.
+        """
+        super().initialize_batch(batchnum)
+        self._lastTimestamp = self._batchStartTime
+
+    def finalize_batch(self, batchnum):
+        """
+        Add the current value (weighted by the time since it was set or since
+        the start of the batch) and then write the batch summary.
+        """
+        if batchnum == self.batch:
+            tm = SimClock.now_scalar()
+            self._summary.add(self._lastValue, tm - self._lastTimestamp)
+        super().finalize_batch(batchnum)
+
+    def put(self, value):
+        """
+        Set a new current value. The previous value is added to the summary
+        statistics (weighted by the time that it was the current value)
+        unless it was set at the current simulated time, in which case it
+        is simply replaced.
+        """
+        value = self._to_scalar(value)
+        if value == self._lastValue:
+            return
+
+        tm = SimClock.now_scalar()
+        if tm != self._lastTimestamp:
+            self._summary.add(self._lastValue, tm - self._lastTimestamp)
+            self._lastTimestamp = tm
+        self._lastValue = value
+
 
 class SimDatabaseManager(object):
     """
@@ -313,29 +989,39 @@ class SimDatabaseManager(object):
     def __init__(self):
         self.database = None
 
-    def create_output_database(self, model, inMemory=False):
+    def create_output_database(self, model, inMemory=False, compact=None):
         """
         Creates a new "live" output database - a database for a simulation
         that is being (or is about to be) executed - and initializes it based
         on information obtained from the passed model object. If inMemory is
-        True, that new database is an in-memory SQLite database.
+        True, that new database is an in-memory SQLite database. If compact
+        is True, dataset values are stored in the compact datasetvalue
+        layout; if None, the Output Database CompactStorage configuration
+        setting determines the layout.
 
         If an output database is already open, that database is closed first.
         Relies on called methods to raise a SimError if they fail.
         """
         self.close_output_database()
         self.database = SimLiveOutputDatabase()
-        self.database.initialize(model, inMemory)
+        self.database.initialize(model, inMemory, compact)
  
-    def open_existing_database(self, model, dbpath, *, isTemporary=False):
+    def open_existing_database(self, model, dbpath, *, isTemporary=False,
+                               inMemory=False, scratch=False):
         """
         Open an existing live output database, typically when we are about to
         start an additional run/replication. Close the currently open database
         first, if any. Either operation may raise a SimError on failure.
+
+        If inMemory is True, the database is copied into (and used in) memory,
+        and written back to dbpath when it is closed (unless it is deleted).
+        If scratch is True, the database is tuned for write speed rather
+        than durability.
         """
         self.close_output_database()
         self.database = SimLiveOutputDatabase()
-        self.database.initialize_existing(model, dbpath, isTemporary)
+        self.database.initialize_existing(model, dbpath, isTemporary,
+                                          inMemory=inMemory, scratch=scratch)
 
     def initialize_run(self, runNumber):
         """
@@ -356,14 +1042,23 @@ class SimDatabaseManager(object):
         """
         SimDbDatasink.set_commit_rate(commitRate)
 
-    def open_archived_database(self, dbpath, isTemporary=False):
+    def open_archived_database(self, dbpath, isTemporary=False, upgrade=True):
         """
         Open an archived database - a database saved by the user after one or
-        more simulation runs. Close an open database first. Either operation
-        may raise a SimError on failure.
+        more simulation runs. If dbpath is a shard manifest (as written by
+        a sharded replicator), the database is a :class:`SimShardedOutputDatabase`.
+        Unless upgrade is False, the database is upgraded to the current
+        schema (see :class:`SimArchivedOutputDatabase`).
+        Close an open database first. Either operation may raise a SimError
+        on failure.
         """
         self.close_output_database()
-        self.database = SimArchivedOutputDatabase(dbpath, isTemporary)
+        if SimShardManifest.is_manifest(dbpath):
+            self.database = SimShardedOutputDatabase(dbpath, isTemporary,
+                                                     upgrade)
+        else:
+            self.database = SimArchivedOutputDatabase(dbpath, isTemporary,
+                                                      upgrade)
 
     def has_open_database(self):
         """
@@ -396,6 +1091,23 @@ class SimDatabaseManager(object):
         if self.database:
             self.database.flush_datasets()
 
+    def flush_output(self):
+        """
+        Waits until all dataset values written so far are committed to the
+        open database, if there is one; a no-op otherwise.
+        """
+        if self.database:
+            self.database.flush_output()
+
+    def finalize_batch(self, batchNumber):
+        """
+        Completes the output for a just-finalized batch of the current run
+        (committing its dataset values and writing its summary statistics)
+        if a database is open; a no-op otherwise.
+        """
+        if self.database:
+            self.database.finalize_batch(batchNumber)
+
     def has_unsaved_database(self):
         """
         Returns True if there is an open, temporary (or in-memory) database
@@ -418,7 +1130,9 @@ class SimDatabaseManager(object):
         """
         Initiate a close for the currently-open database, if there is one.
         If the database is temporary, provides the ability to save the
-        closed database to a specified path.
+        closed database to a specified path. An in-memory copy of a
+        database file is written back to that file first, unless the file
+        is to be deleted.
         
         For temporary database files, the logic is a bit circuitous:
         
@@ -435,21 +1149,32 @@ class SimDatabaseManager(object):
         
         - savePath can only be specified if the database is temporary
         - delete can only be set True if the database is temporary
-        
+
+        A temporary sharded database is saved by compacting its shards into
+        a single database file at savePath; its shards and manifest are
+        then deleted, as they are if there is no savePath and delete is True.
+
         Raises a SimError if any of these database operations
         (close/rename/remove) fail.
         """
         if not self.database:
-            return 
+            return
 
         dbPath = self.database.db_path
         isTemporary = self.database.is_temporary
         assert not (delete and not isTemporary), "closeOutputDatabase() called with delete=True on a not-temporary database"
         assert not savePath or isTemporary, "closeOutputDatabase() attempt to save a non-temporary database"
 
+        if savePath or not delete:
+            self.database.persist()
         self.database.close_database()
-        
-        if isTemporary:
+
+        if isTemporary and isinstance(self.database, SimShardedOutputDatabase):
+            if savePath:
+                self.database.manifest.compact(savePath)
+            if savePath or delete:
+                self.database.manifest.remove()
+        elif isTemporary:
             if savePath:
                 try:
                     # os.replace() will overwrite an existing file - os.rename() will not
@@ -541,6 +1266,9 @@ class SimOutputDatabase(object):
         self.__connection = None
         self.__dbpath = None
         self.__isTemporary = False
+        self.__isInMemory = False
+        self.__hasSummaryTable = None
+        self.__isCompact = None
 
     @property
     def connection(self):
@@ -565,19 +1293,133 @@ class SimOutputDatabase(object):
         if self.__dbpath:
             return self.__isTemporary
 
+    @property
+    def is_in_memory(self):
+        """
+        Returns ``True`` if the connected database is in memory - either
+        an in-memory database or an in-memory copy of the database file
+        at :attr:`db_path`.
+        """
+        return self.__isInMemory
+
+    @property
+    def is_compact(self):
+        """
+        Returns ``True`` if the database stores dataset values in the
+        compact datasetvalue layout (see CreateCompactDatasetValue.sql),
+        which has a seq column. Queries on datasetvalue's other columns are
+        the same for either layout.
+        """
+        if self.__isCompact is None:
+            columns = self.runQuery("pragma table_info(datasetvalue)")
+            self.__isCompact = any(column[1] == 'seq' for column in columns)
+        return self.__isCompact
+
     def flush_datasets(self):
         """
         Default is a no-op - implemented for live output databases
         """
         pass
 
+    def persist(self):
+        """
+        Default is a no-op - implemented for live output databases
+        """
+        pass
+
+    def flush_output(self):
+        """
+        Default is a no-op - implemented for live output databases
+        """
+        pass
+
+    def finalize_batch(self, batchNumber):
+        """
+        Default is a no-op - implemented for live output databases
+        """
+        pass
+
     def runs(self):
         """
         Returns a sequence of run numbers present in the database
         """
-        result = self.runQuery("select distinct(run) from datasetvalue order by run")
+        sqlstr = "select distinct(run) from datasetvalue"
+        if self.has_summary_table():
+            sqlstr += " union select run from datasetsummary"
+        result = self.runQuery(sqlstr + " order by run")
         return [r[0] for r in result]
 
+    def run_database(self, run):
+        """
+        Returns the database holding the output of a specified run - this
+        database, except for a :class:`SimShardedOutputDatabase`, which has
+        a database (shard) for each run.
+        """
+        return self
+
+    def has_summary_table(self):
+        """
+        Returns True if the database has a datasetsummary table. (Output
+        databases created by earlier versions of Simprovise do not.)
+        """
+        if self.__hasSummaryTable is None:
+            sqlstr = "select name from sqlite_master where type = 'table' and name = 'datasetsummary'"
+            self.__hasSummaryTable = len(self.runQuery(sqlstr)) > 0
+        return self.__hasSummaryTable
+
+    def schema_version(self):
+        """
+        Returns the schema version of the database, as recorded in its
+        schemaversion table. (Output databases created by earlier versions
+        of Simprovise do not have that table; they are version 1.)
+        """
+        sqlstr = "select name from sqlite_master where type = 'table' and name = 'schemaversion'"
+        if not self.runQuery(sqlstr):
+            return 1
+        return self.runQueryForSingleRow("select version from schemaversion")[0]
+
+    def upgrade_schema(self):
+        """
+        Upgrades the database in place to the current schema version, by
+        running the upgrade script for each version after the database's
+        own. A database that is already the current version is not modified.
+        Raises a SimError if the database was created by a later version of
+        Simprovise or if the upgrade fails (e.g., because the database file
+        is read-only).
+        """
+        version = self.schema_version()
+        if version > _SCHEMA_VERSION:
+            raise SimError(_ERROR_NAME,
+                           "Output database {0} schema version {1} is not supported (latest is {2})",
+                           self.__dbpath, version, _SCHEMA_VERSION)
+        try:
+            for nextVersion in range(version + 1, _SCHEMA_VERSION + 1):
+                logger.info("Upgrading output database %s to schema version %d",
+                            self.__dbpath, nextVersion)
+                self._run_script(_SCHEMA_UPGRADE_SCRIPTS[nextVersion])
+            self.__hasSummaryTable = None
+        except sqlite3.Error as e:
+            raise SimError(_ERROR_NAME, "Failure upgrading output database {0}: {1}",
+                           self.__dbpath, e) from e
+
+    def create_query_indexes(self):
+        """
+        Creates the covering indexes used by dataset value queries (if they
+        do not already exist). Since maintaining those indexes would slow
+        down dataset value inserts, they are not created with the database;
+        and since building them writes to (and enlarges) the database file,
+        they are not created when it is opened either. Call this method
+        explicitly before running many histogram or time series queries
+        against an archived database. Raises a SimError on failure (e.g.,
+        because the database file is read-only).
+        """
+        script = 'CreateCompactQueryIndexes.sql' if self.is_compact else 'CreateQueryIndexes.sql'
+        try:
+            self._run_script(script)
+        except sqlite3.Error as e:
+            raise SimError(_ERROR_NAME, "Failure creating query indexes for output database {0}: {1}",
+                           self.__dbpath, e) from e
+
     @property
     def elements(self):
         """
@@ -648,8 +1490,17 @@ class SimOutputDatabase(object):
         Returns the last (highest) batch number for a specified run, or zero if
         there are none.
         """
-        sqlstr = "select max(batch) from datasetvalue where run = ?"
-        result = self.runQuery(sqlstr, run)
+        if self.has_summary_table():
+            sqlstr = """
+                     select max(batch) from
+                     (select max(batch) as batch from datasetvalue where run = ?
+                      union all
+                      select max(batch) from datasetsummary where run = ?)
+                     """
+            result = self.runQuery(sqlstr, run, run)
+        else:
+            sqlstr = "select max(batch) from datasetvalue where run = ?"
+            result = self.runQuery(sqlstr, run)
 
         # Since the query includes an aggregate, it will return a row - even if the from table
         # (datasetvalue) is empty.  If datasetvalue is empty, the resulting value will be None.
@@ -666,10 +1517,22 @@ class SimOutputDatabase(object):
         run/batch. Returns zero (or zeros) in case where there is not yet data for
         the specified batch.
 
-        Note that this depends on there being at least one time-weighted dataset
-        in the model, since totimestamps are only written (at batch boundaries) for
-        time-weighted datasets. We check for this first.
+        If the run/batch has datasetsummary rows, the bounds are instead
+        taken from the datasetsummary table.
+
+        Otherwise, note that this depends on there being at least one
+        time-weighted dataset in the model, since totimestamps are only written
+        (at batch boundaries) for time-weighted datasets. We check for this first.
         """
+        if self.has_summary_table():
+            sqlstr = """
+                     select min(starttimestamp), max(endtimestamp) from datasetsummary
+                     where run = ? and batch = ?
+                     """
+            low, high = self.runQueryForSingleRow(sqlstr, run, batch)
+            if low is not None:
+                return low, high
+
         # TODO - implement version that does not require a timeweighted dataset.
         if not self.has_time_weighted_dataset():
             msg = "batchTimeBounds() requires at least one time-weighted dataset. There are none."
@@ -686,6 +1549,65 @@ class SimOutputDatabase(object):
             raise SimError(_ERROR_NAME,
                            "batchTimeBounds() query returned {0} row(s)".format(len(result)))
 
+    def summarize_batch(self, run, batch, batchEndTime):
+        """
+        Calculate summary statistics for every dataset for a specified run
+        and batch from that run/batch's datasetvalue rows, in a single
+        grouped scan over all of the datasets (rather than one per dataset).
+        The statistics are calculated exactly as :class:`SimDatasetSummaryData`
+        calculates them for a single dataset.
+
+        batchEndTime is the end of the batch (per :meth:`batch_time_bounds`),
+        used to weight time-weighted values that have no totimestamp.
+
+        Returns a dictionary, keyed by dataset ID, of (count, totalweight,
+        mean, variance, min, max, percentiles) tuples - the statistics
+        in a datasetsummary row, with percentiles as a list (or None if
+        the count is zero).
+        """
+        sqlstr = """
+                 SELECT dataset, value,
+                        SUM(CASE WHEN totimestamp IS NULL THEN ?
+                               ELSE totimestamp END - simtimestamp),
+                        COUNT(value)
+                     FROM datasetvalue
+                     WHERE run = ? AND batch = ?
+                     GROUP BY dataset, value
+                     ORDER BY dataset, value;
+                 """
+        datasetRows = {}
+        for datasetid, value, duration, count in self.runQuery(sqlstr, batchEndTime,
+                                                               run, batch):
+            datasetRows.setdefault(datasetid, []).append((value, duration, count))
+
+        summaries = {}
+        datasets = self.runQuery("select id, istimeweighted from dataset")
+        for datasetid, istimeweighted in datasets:
+            rows = datasetRows.get(datasetid, [])
+            if istimeweighted:
+                ddof = SimDbTimeWeightedSummaryDatasink._VARIANCE_DDOF
+            else:
+                # For non time-weighted datasets, the weight is the count
+                rows = [(value, count, count) for value, _, count in rows]
+                ddof = SimDbSummaryDatasink._VARIANCE_DDOF
+
+            if rows:
+                totalweight = sum(row[1] for row in rows)
+                mean = SimDatasetSummaryData._calculate_mean(rows)
+                if mean is not None and totalweight > ddof:
+                    m2 = sum(row[1] * (row[0] - mean) ** 2 for row in rows)
+                    variance = m2 / (totalweight - ddof)
+                else:
+                    variance = None
+                summaries[datasetid] = (sum(row[2] for row in rows),
+                                        totalweight, mean, variance,
+                                        min(row[0] for row in rows),
+                                        max(row[0] for row in rows),
+                                        SimDatasetSummaryData._calculate_percentiles(rows))
+            else:
+                summaries[datasetid] = (0, 0, None, None, None, None, None)
+        return summaries
+
     def has_time_weighted_dataset(self):
         """
         Returns true if the database has had at least one time-weighted dataset.
@@ -704,8 +1626,10 @@ class SimOutputDatabase(object):
         """
         Returns true if the database has had at least one dataset value inserted.
         """
-        sqlstr = "select rowid from datasetvalue limit 1;"
+        sqlstr = "select 1 from datasetvalue limit 1;"
         result = self.runQuery(sqlstr)
+        if not result and self.has_summary_table():
+            result = self.runQuery("select run from datasetsummary limit 1;")
         return len(result) > 0
 
 
@@ -776,13 +1700,17 @@ class SimOutputDatabase(object):
             raise SimError(_ERROR_NAME, "getDatasetNames(): Element ID {0} not found or has no datasets", elementID)
         return names
 
-    def _connect(self, dbpath, isTemporary):
+    def _connect(self, dbpath, isTemporary, inMemory=False):
         """
-        Internal method - connects to a database on the specified path
+        Internal method - connects to a database on the specified path. If
+        inMemory is True, connects to a new in-memory database instead,
+        while retaining dbpath as the database path.
         """
         self.__dbpath = dbpath
-        self.__connection = sqlite3.connect(dbpath)
+        self.__isInMemory = inMemory or dbpath == ':memory:'
+        self.__connection = sqlite3.connect(':memory:' if inMemory else dbpath)
         self.__isTemporary = isTemporary
+        self.__isCompact = None
 
     def _run_script(self, scriptName, scriptDir=None):
         """
@@ -809,6 +1737,42 @@ class SimOutputDatabase(object):
                            "Failure executing query: {0}; parameters: {1}; {2}",
                            sqlstr, args, str(e))
 
+    def dataset_value_chunks(self, datasetid, run, batch, *, orderBy='simtimestamp',
+                             chunkSize=_DEFAULT_QUERY_CHUNK_SIZE):
+        """
+        Generator that retrieves the datasetvalue rows for a specified dataset
+        (ID), run and batch - ordered by simtimestamp or value, as specified
+        by orderBy - in chunks of (at most) chunkSize rows. Each chunk is
+        yielded as a tuple of three NumPy float arrays: values, timestamps and
+        totimestamps (NaN where there is no totimestamp).
+
+        Unlike :meth:`runQuery`, which fetches every row as a Python tuple,
+        memory use is bounded by the chunk size rather than the number of rows.
+        """
+        if orderBy not in ('simtimestamp', 'value'):
+            raise SimError(_ERROR_NAME, "Invalid dataset value order: {0}", orderBy)
+        sqlstr = """
+                 select value, simtimestamp, totimestamp from datasetvalue
+                 where dataset = ? and run = ? and batch = ?
+                 order by {0};
+                 """.format(orderBy)
+        args = (datasetid, run, batch)
+        cursor = self.__connection.cursor()
+        try:
+            cursor.execute(sqlstr, args)
+            while True:
+                rows = cursor.fetchmany(chunkSize)
+                if not rows:
+                    break
+                chunk = np.array(rows, dtype=float)
+                yield chunk[:, 0], chunk[:, 1], chunk[:, 2]
+        except sqlite3.Error as e:
+            raise SimError(_ERROR_NAME,
+                           "Failure executing query: {0}; parameters: {1}; {2}",
+                           sqlstr, args, str(e))
+        finally:
+            cursor.close()
+
     def runQueryForSingleRow(self, sqlstr, *args):
         """
         Runs a query that should return exactly one row; raises an error if
@@ -839,17 +1803,34 @@ class SimLiveOutputDatabase(SimOutputDatabase):
         super().__init__()
         self.__model = None
         self.__saved = False
+        self.__valueBuffer = None
+        self.__scratch = False
+        self.__runNumber = None
+        self.summary_only = simconfig.get_output_summary_only()
+        self.buffer_size = simconfig.get_output_buffer_size()
+        self.background_writer = simconfig.get_output_background_writer()
 
-    def initialize_existing(self, model, dbpath, isTemporary=False):
+    def initialize_existing(self, model, dbpath, isTemporary=False, *,
+                            inMemory=False, scratch=False):
         """
         Open an existing database.  Under the assumption that there may be concurrent
         writes, set the transaction type to IMMEDIATE.
         TODO.  I believe (but cannot confirm) that any competing connection will retry
         until the sqlite3.connect() timeout (default 5 seconds) is reached.
+
+        If inMemory is True, the database file is copied (via the SQLite
+        backup API) into an in-memory database, which is written back to
+        the file by :meth:`persist`. If scratch is True, the database
+        connection is tuned for write speed rather than durability.
         """
         self.__model = model
+        self.__scratch = scratch
         logger.info("Opening an existing output database at %s:", dbpath)
-        self._connect(dbpath, isTemporary)
+        self._connect(dbpath, isTemporary, inMemory)
+        if inMemory:
+            self._backup(dbpath, self.connection)
+        if scratch:
+            _set_scratch_pragmas(self.connection)
         self.connection.isolation_level = 'IMMEDIATE'
 
         # Make sure the existing database matches the model by finding a
@@ -862,17 +1843,23 @@ class SimLiveOutputDatabase(SimOutputDatabase):
                 msg = "Failure initializing existing output database {0} for model {1}; datasets do not match"
                 raise SimError(_ERROR_NAME, msg, dbpath, model.filename)
 
-    def initialize(self, model, inMemory=False):
+    def initialize(self, model, inMemory=False, compact=None):
         """
         Creates and initializes a new output database for based on the passed
         model and package manager (for process/entity elements).  Created
-        database may be either in-memory or a temporary file.
+        database may be either in-memory or a temporary file. If compact is
+        True (or is None and the Output Database CompactStorage setting is
+        on), the database uses the compact datasetvalue layout.
         """
         self.__model = model
+        if compact is None:
+            compact = simconfig.get_output_compact_storage()
         if inMemory:
             self._create_in_memory_database()
         else:
             self._create_database()
+        if compact:
+            self._run_script('CreateCompactDatasetValue.sql')
         self._initialize_database(model)
 
     @property
@@ -925,6 +1912,67 @@ class SimLiveOutputDatabase(SimOutputDatabase):
         Commit any database changes.
         """
         self.connection.commit()
+
+    def persist(self):
+        """
+        Write an in-memory copy of a database file back to that file (via
+        the SQLite backup API); a no-op for other databases. As when a
+        database file is closed, uncommitted changes are discarded.
+        """
+        if not self.is_in_memory or self.db_path == ':memory:':
+            return
+        self.connection.rollback()
+        try:
+            target = sqlite3.connect(self.db_path)
+            try:
+                if self.__scratch:
+                    _set_scratch_pragmas(target)
+                self.connection.backup(target)
+            finally:
+                target.close()
+        except sqlite3.Error as e:
+            logger.exception("Failure writing in-memory database to %s: %s",
+                             self.db_path, e)
+            raise SimError(_ERROR_NAME, "Failure writing in-memory database to {0}: {1}",
+                           self.db_path, e) from e
+
+    def _backup(self, srcpath, connection):
+        """
+        Copy the database file at srcpath to the passed connection's
+        database via the SQLite backup API.
+        """
+        try:
+            source = sqlite3.connect(srcpath)
+            try:
+                source.backup(connection)
+            finally:
+                source.close()
+        except sqlite3.Error as e:
+            raise SimError(_ERROR_NAME, "Failure copying database {0} into memory: {1}",
+                           srcpath, e) from e
+
+    def close_database(self):
+        """
+        Shut down the background writer thread (if any) and close the
+        database.
+        """
+        valueBuffer = self.__valueBuffer
+        self.__valueBuffer = None
+        try:
+            if isinstance(valueBuffer, _DatasetValueWriter):
+                valueBuffer.close()
+        finally:
+            super().close_database()
+
+    @property
+    def value_buffer(self):
+        """
+        The datasetvalue row buffer shared by this database's
+        :class:`SimDbBufferedDatasink` and :class:`SimDbTimeSeriesDatasink`
+        objects (a :class:`_DatasetValueWriter` if background_writer is set),
+        or None if buffering is not enabled.
+        """
+        return self.__valueBuffer
         
     def _load_elements(self):      
         """
@@ -1001,19 +2049,22 @@ class SimLiveOutputDatabase(SimOutputDatabase):
         1.  Deleting any existing data for that run
         2.  Loading the datasets for that run
         """
+        self.__runNumber = runNumber
         self._delete_run(runNumber)
         self._create_datasinks(runNumber)
         self.commit()
 
     def _delete_run(self, runNumber):
         """
-        Delete all data for the specified run.  Deletes datasetvalue rows
-        for a specified run
+        Delete all data for the specified run.  Deletes datasetvalue and
+        datasetsummary rows for a specified run
         """
-        sqlstr = "delete from datasetvalue where run = ?;"
         try:
             cursor = self.connection.cursor()
-            cursor.execute(sqlstr, (runNumber,))
+            cursor.execute("delete from datasetvalue where run = ?;", (runNumber,))
+            if self.has_summary_table():
+                cursor.execute("delete from datasetsummary where run = ?;",
+                               (runNumber,))
             self.commit()
         except Exception as e:
             raise SimError(_ERROR_NAME, "Failure executing delete for run number: {0}; {1}",
@@ -1021,27 +2072,127 @@ class SimLiveOutputDatabase(SimOutputDatabase):
 
     def _create_datasinks(self, runNumber):
         """
-        Create datasinks for each of the model's datasets
+        Create datasinks for each of the model's datasets (and the row
+        buffer for them to share, if buffer_size or background_writer is set)
         """
+        if self.__valueBuffer is None and not self.summary_only:
+            self.__valueBuffer = self._create_value_buffer()
         for dset in self.__model.datasets:
             self._create_datasink(dset, runNumber)
 
+    def _create_value_buffer(self):
+        """
+        Return a new row buffer - written by a background writer thread if
+        background_writer is set - or None if neither buffer_size nor
+        background_writer is set. In-memory databases cannot be shared
+        with a writer thread connection, so they always get a (synchronous)
+        _DatasetValueBuffer.
+        """
+        interval = simconfig.get_output_buffer_flush_interval()
+        writeInBackground = self.background_writer
+        if writeInBackground and self.is_in_memory:
+            logger.warning("Background writer is not supported for in-memory output databases")
+            writeInBackground = False
+
+        if writeInBackground:
+            size = self.buffer_size or _DEFAULT_WRITER_BUFFER_SIZE
+            queueSize = simconfig.get_output_writer_queue_size()
+            return _DatasetValueWriter(self.db_path, size, interval, queueSize,
+                                       self.__scratch, self.is_compact)
+        elif self.buffer_size:
+            return _DatasetValueBuffer(self.connection, self.buffer_size,
+                                       interval, self.is_compact)
+        else:
+            return None
+
     def _create_datasink(self, dataset, runNumber):
         """
-        Create a DB datasink for the passed dataset, and assign it to the dataset
+        Create a DB datasink for the passed dataset, and assign it to the dataset.
+        If summary_only is set, create a summary datasink that writes only
+        per-batch summary statistics; otherwise, if buffer_size is set,
+        non time-weighted datasets get a buffered datasink.
         """
-        if dataset.is_time_weighted:
+        if self.summary_only:
+            if dataset.is_time_weighted:
+                dataset.datasink = SimDbTimeWeightedSummaryDatasink(self, dataset,
+                                                                    runNumber)
+            else:
+                dataset.datasink = SimDbSummaryDatasink(self, dataset, runNumber)
+        elif dataset.is_time_weighted:
             dataset.datasink = SimDbTimeSeriesDatasink(self, dataset, runNumber)
+        elif self.__valueBuffer is not None:
+            dataset.datasink = SimDbBufferedDatasink(self, dataset, runNumber)
         else:
             dataset.datasink = SimDbDatasink(self, dataset, runNumber)
 
     def flush_datasets(self):
         """
         Flush all of the datasets in the model (NOT the database) -
-        which in turn flushes the active datasinks.
+        which in turn flushes the active datasinks - and then waits for
+        the flushed output to be committed.
         """
         for dset in self.__model.datasets:
             dset.flush()
+        self.flush_output()
+
+    def flush_output(self):
+        """
+        Wait until all dataset values written so far (including those
+        held by a row buffer) are committed to the database.
+        """
+        if isinstance(self.__valueBuffer, _DatasetValueWriter):
+            self.__valueBuffer.sync()
+        else:
+            if self.__valueBuffer is not None:
+                self.__valueBuffer.flush()
+            self.commit()
+
+    def finalize_batch(self, batchNumber):
+        """
+        Complete the output for a just-finalized batch of the current run:
+        wait for its dataset values to be committed and then, unless
+        summary_only is set (in which case the summary datasinks have
+        already done so), write its datasetsummary rows. Reports can then
+        read the batch's statistics from those rows rather than
+        summarizing its datasetvalue rows.
+        """
+        self.flush_output()
+        if not self.summary_only and self.has_summary_table():
+            self.write_batch_summaries(self.__runNumber, batchNumber)
+            self.commit()
+
+    def write_batch_summaries(self, run, batch):
+        """
+        Insert (or replace) a datasetsummary row for every dataset for the
+        specified run and batch, summarizing that run/batch's datasetvalue
+        rows via :meth:`summarize_batch` - so reports are the same whether
+        or not they read from the datasetsummary table.
+
+        Does nothing if there are no dataset values for the run/batch, or
+        if the model has no time-weighted datasets (since the batch time
+        bounds are derived from time-weighted dataset values).
+        """
+        if not self.has_time_weighted_dataset():
+            return
+        sqlstr = "select min(simtimestamp), max(totimestamp) from datasetvalue where run = ? and batch = ?"
+        low, high = self.runQueryForSingleRow(sqlstr, run, batch)
+        if low is None:
+            return
+        if high is None:
+            high = 0
+
+        rowVals = []
+        summaries = self.summarize_batch(run, batch, high)
+        for datasetid, summary in summaries.items():
+            count, totalweight, mean, variance, minval, maxval, percentiles = summary
+            if percentiles is not None:
+                percentiles = json.dumps(percentiles)
+            rowVals.append((datasetid, run, batch, low, high, count,
+                            totalweight, mean, variance, minval, maxval,
+                            percentiles))
+
+        insertStmt = 'insert or replace into datasetsummary values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+        self.connection.executemany(insertStmt, rowVals)
 
 
 class SimArchivedOutputDatabase(SimOutputDatabase):
@@ -1053,12 +2204,319 @@ class SimArchivedOutputDatabase(SimOutputDatabase):
     of :class:`Simulation` execution methods, which pass the temporary
     database path to a SimulationResult object, which in turn opens it as a
     SimArchived database.
+
+    Unless constructed with upgrade = False, a database created by an
+    earlier version of Simprovise is upgraded in place to the current schema
+    version (see :meth:`~SimOutputDatabase.upgrade_schema`). If that upgrade
+    fails (e.g., because the file is read-only), the database is opened
+    as-is. The covering indexes used by dataset value queries are not
+    created on open; see :meth:`~SimOutputDatabase.create_query_indexes`.
     """
-    def __init__(self, dbpath, isTemporary=False):
+    def __init__(self, dbpath, isTemporary=False, upgrade=True):
         """
         """
         super().__init__()
         self._connect(dbpath, isTemporary)
+        if upgrade:
+            try:
+                self.upgrade_schema()
+            except SimError as e:
+                logger.warning("Output database %s opened without upgrading: %s",
+                               dbpath, e)
+
+
+def copy_run_data(connection, srcpath, runNumber):
+    """
+    Replace the dataset values and summaries for a specified run in the
+    database open on the passed connection with those in another output
+    database (srcpath), which is attached for the copy. It is assumed that
+    the source database has data only for the passed run number, and that
+    both databases were created from the same initialized database (so that
+    their dataset IDs and datasetvalue layouts are the same). Deleting the
+    run's rows first handles the situation where a run is repeated.
+    """
+    cursor = connection.cursor()
+    cursor.execute("delete from datasetvalue where run = ?", (runNumber,))
+    cursor.execute("delete from datasetsummary where run = ?", (runNumber,))
+    cursor.execute("attach ? as srcdb", (srcpath,))
+    try:
+        cursor.execute("insert into datasetvalue select * from srcdb.datasetvalue")
+        cursor.execute("insert into datasetsummary select * from srcdb.datasetsummary")
+        connection.commit()
+    finally:
+        cursor.execute("detach srcdb")
+
+
+class SimShardManifest(object):
+    """
+    The manifest of a sharded output database - a set of output databases
+    ("shards"), each holding the output of a single run, as written by the
+    :class:`~simprovise.runcontrol.replication.SimReplicator` in sharded
+    mode. The manifest is a JSON file mapping run numbers to shard database
+    files; shard paths are stored relative to the manifest's directory, so
+    the manifest and its shards may be moved together.
+
+    A sharded output database may be read in place (as a
+    :class:`SimShardedOutputDatabase`) or compacted into a single output
+    database file via :meth:`compact`.
+
+    :param path: The path of the manifest file
+    :type path:  `str`
+
+    """
+    def __init__(self, path):
+        self.__path = os.path.abspath(path)
+        self.__shards = {}
+
+    @staticmethod
+    def is_manifest(path):
+        """
+        Returns True if the passed path is an existing shard manifest file
+        (rather than, say, an SQLite database file).
+        """
+        try:
+            with open(path, 'rb') as f:
+                return f.read(1) == b'{'
+        except OSError:
+            return False
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read and return the manifest at a passed path. Raises a SimError
+        if the file cannot be read or is not a shard manifest.
+        """
+        manifest = cls(path)
+        try:
+            with open(path) as f:
+                content = json.load(f)
+            if content.get('format') != _SHARD_MANIFEST_FORMAT:
+                raise ValueError("not a shard manifest")
+            if content.get('version') != _SHARD_MANIFEST_VERSION:
+                raise ValueError("version {0} is not supported".format(content.get('version')))
+            manifest.__shards = {int(run): shardpath
+                                 for run, shardpath in content['shards'].items()}
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            raise SimError(_ERROR_NAME, "Failure reading output shard manifest {0}: {1}",
+                           path, e) from e
+        return manifest
+
+    @property
+    def path(self):
+        """
+        The (absolute) path of the manifest file
+        """
+        return self.__path
+
+    @property
+    def directory(self):
+        """
+        The directory containing the manifest file
+        """
+        return os.path.dirname(self.__path)
+
+    def runs(self):
+        """
+        Returns the run numbers of the shards, in order
+        """
+        return sorted(self.__shards)
+
+    def shard_path(self, run):
+        """
+        Returns the (absolute) path of the shard database for a specified run
+        """
+        try:
+            return os.path.join(self.directory, self.__shards[run])
+        except KeyError:
+            raise SimError(_ERROR_NAME, "Output shard manifest {0} has no run {1}",
+                           self.__path, run)
+
+    def add_shard(self, run, shardpath):
+        """
+        Add (or replace) the shard database for a specified run. The shard
+        should be in the manifest's directory (or a subdirectory of it).
+        The manifest file is not updated until it is saved.
+        """
+        self.__shards[run] = os.path.relpath(shardpath, self.directory)
+
+    def save(self):
+        """
+        Write the manifest file, replacing any previous version atomically
+        (so that a reader never sees a partially written manifest).
+        """
+        content = {'format': _SHARD_MANIFEST_FORMAT,
+                   'version': _SHARD_MANIFEST_VERSION,
+                   'shards': {str(run): shardpath
+                              for run, shardpath in sorted(self.__shards.items())}}
+        tmppath = self.__path + '.tmp'
+        try:
+            with open(tmppath, 'w') as f:
+                json.dump(content, f, indent=2)
+            os.replace(tmppath, self.__path)
+        except OSError as e:
+            raise SimError(_ERROR_NAME, "Failure writing output shard manifest {0}: {1}",
+                           self.__path, e) from e
+
+    def remove(self):
+        """
+        Delete the shard databases and the manifest file, along with the
+        manifest's directory if that leaves it empty.
+        """
+        try:
+            for run in self.runs():
+                shardpath = self.shard_path(run)
+                if os.path.exists(shardpath):
+                    os.remove(shardpath)
+            if os.path.exists(self.__path):
+                os.remove(self.__path)
+        except OSError as e:
+            logger.exception("Failure deleting sharded output database %s: %s",
+                             self.__path, e)
+            raise SimError(_ERROR_NAME, "Failure deleting sharded output database {0}: {1}",
+                           self.__path, e) from e
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+
+    def compact(self, outputPath):
+        """
+        Compact the shards into a single output database file at outputPath,
+        replacing any existing file. The output database is a copy of the
+        first run's shard, into which the other runs' data are copied one
+        shard at a time (via :func:`copy_run_data`); it is written to a
+        temporary file in the output directory and renamed on completion.
+        The shards themselves are left in place.
+        """
+        runs = self.runs()
+        if not runs:
+            raise SimError(_ERROR_NAME, "Output shard manifest {0} has no runs", self.__path)
+
+        outputPath = os.path.abspath(outputPath)
+        f, tmppath = tempfile.mkstemp(suffix='.simoutput',
+                                      dir=os.path.dirname(outputPath))
+        os.close(f)
+        try:
+            shutil.copyfile(self.shard_path(runs[0]), tmppath)
+            connection = sqlite3.connect(tmppath)
+            try:
+                # The first shard may have been opened (and given its query
+                # indexes) already; maintaining them would slow the inserts,
+                # and they are recreated when the output database is opened.
+                connection.execute("drop index if exists datasetvalue_value_idx")
+                connection.execute("drop index if exists datasetvalue_time_idx")
+                for run in runs[1:]:
+                    copy_run_data(connection, self.shard_path(run), run)
+            finally:
+                connection.close()
+            os.replace(tmppath, outputPath)
+        except (OSError, sqlite3.Error) as e:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+            logger.exception("Failure compacting sharded output database %s to %s: %s",
+                             self.__path, outputPath, e)
+            raise SimError(_ERROR_NAME, "Failure compacting sharded output database {0} to {1}: {2}",
+                           self.__path, outputPath, e) from e
+
+
+class SimShardedOutputDatabase(SimArchivedOutputDatabase):
+    """
+    Encapsulates a sharded simulation output database - a set of archived
+    output databases ("shards"), one per run, listed by a
+    :class:`SimShardManifest` (whose path is the database path). Like a
+    :class:`SimArchivedOutputDatabase`, it is intended to be read-only.
+
+    Elements and datasets are read from the first run's shard; since all of
+    the shards were created from the same initialized database, their dataset
+    IDs are the same. Queries for a specific run are directed to that run's
+    shard, as returned by :meth:`run_database`; each shard is opened (and,
+    unless upgrade is False, upgraded) when it is first needed. Note that
+    :meth:`runQuery` queries the first run's shard only.
+
+    If constructed with isTemporary = True, the shards and manifest are
+    deleted (by the :class:`SimDatabaseManager`) after the database is
+    closed, unless they are saved - compacted into a single database file.
+    """
+    def __init__(self, manifestPath, isTemporary=False, upgrade=True):
+        """
+        """
+        self.__manifest = SimShardManifest.load(manifestPath)
+        self.__upgrade = upgrade
+        self.__shards = {}
+        runs = self.__manifest.runs()
+        if not runs:
+            raise SimError(_ERROR_NAME, "Sharded output database {0} has no runs",
+                           manifestPath)
+        super().__init__(self.__manifest.shard_path(runs[0]), isTemporary,
+                         upgrade=False)
+
+    @property
+    def db_path(self):
+        """
+        The path of the database's shard manifest
+        """
+        return self.__manifest.path
+
+    @property
+    def manifest(self):
+        """
+        The database's :class:`SimShardManifest`
+        """
+        return self.__manifest
+
+    def run_database(self, run):
+        """
+        Returns the shard (an open :class:`SimArchivedOutputDatabase`)
+        holding the output of a specified run.
+        """
+        if run not in self.__shards:
+            shardpath = self.__manifest.shard_path(run)
+            self.__shards[run] = SimArchivedOutputDatabase(shardpath,
+                                                           upgrade=self.__upgrade)
+        return self.__shards[run]
+
+    def runs(self):
+        """
+        Returns a sequence of the run numbers in the manifest
+        """
+        return self.__manifest.runs()
+
+    def last_batch(self, run):
+        return self.run_database(run).last_batch(run)
+
+    def batch_time_bounds(self, run, batch):
+        return self.run_database(run).batch_time_bounds(run, batch)
+
+    def summarize_batch(self, run, batch, batchEndTime):
+        return self.run_database(run).summarize_batch(run, batch, batchEndTime)
+
+    def dataset_value_chunks(self, datasetid, run, batch, **kwargs):
+        return self.run_database(run).dataset_value_chunks(datasetid, run, batch,
+                                                           **kwargs)
+
+    def has_dataset_values(self):
+        """
+        Returns true if any of the shards has dataset values.
+        """
+        return any(self.run_database(run).has_dataset_values()
+                   for run in self.runs())
+
+    def create_query_indexes(self):
+        """
+        Creates the query indexes in each of the shards.
+        """
+        for run in self.runs():
+            self.run_database(run).create_query_indexes()
+
+    def close_database(self):
+        """
+        Close the shard databases that have been opened, along with the
+        first run's shard.
+        """
+        shards, self.__shards = self.__shards, {}
+        for shard in shards.values():
+            shard.close_database()
+        super().close_database()
 
 
 class SimOutputHistogramData(object):
@@ -1069,6 +2527,7 @@ class SimOutputHistogramData(object):
     (or do we do that through multiple SimOutputHistogramData instances?)
     """
     def __init__(self, outputDb, dataset, run, batch=None):
+        outputDb = outputDb.run_database(run)
         self.dataset = dataset
         self.run = run
         if batch is None:
@@ -1122,31 +2581,53 @@ class SimOutputHistogramData(object):
         Get data and set nbins for an unweighted dataset histogram.
         nbins is calculated according to the Freedman-Diaconis rule, but then
         rounded up to the nearest integer value.
-        """
-        sqlstr = """
-                 select value from datasetvalue
-                 where dataset = ? and run = ? and batch = ? order by value;
-                 """
-        result = outputDb.runQuery(sqlstr, datasetid, run, batch)
-        n = len(result)
-        if n == 0:
+
+        The dataset values are retrieved in chunks (in value order) and
+        reduced to the distinct values and their counts, so values are the
+        distinct values and weights are their counts (i.e., a histogram
+        of values weighted by weights is a histogram of the dataset values).
+        """
+        distinctValues = []
+        counts = []
+        for values, _, _ in outputDb.dataset_value_chunks(datasetid, run, batch,
+                                                          orderBy='value'):
+            chunkValues, chunkCounts = np.unique(values, return_counts=True)
+            # Since the chunks are in value order, only a value at the end of
+            # one chunk can reappear (at the start of) the next
+            if distinctValues and distinctValues[-1][-1] == chunkValues[0]:
+                counts[-1][-1] += chunkCounts[0]
+                chunkValues = chunkValues[1:]
+                chunkCounts = chunkCounts[1:]
+            if len(chunkValues) > 0:
+                distinctValues.append(chunkValues)
+                counts.append(chunkCounts)
+
+        if not distinctValues:
             self.values = []
             return
 
-        self.values, = zip(*result)
+        self.values = np.concatenate(distinctValues)
+        self.weights = np.concatenate(counts)
+        cumulativeCounts = np.cumsum(self.weights)
+        n = int(cumulativeCounts[-1])
+
+        def nth_value(i):
+            "Return the ith (zero-based) dataset value, in value order"
+            return self.values[np.searchsorted(cumulativeCounts, i, side='right')]
+
         if n < 4:
-            quartile1 = self.values[0]
-            quartile3 = self.values[n-1]
+            quartile1 = nth_value(0)
+            quartile3 = nth_value(n-1)
         else:
-            quartile1 = self.values[round(n/4)]
-            quartile3 = self.values[round(n * 0.75)]
+            quartile1 = nth_value(round(n/4))
+            quartile3 = nth_value(round(n * 0.75))
 
         iqr = quartile3 - quartile1
         totalRange = self.values[-1] - self.values[0]
         h = 2 * iqr / pow(n, 1/3)
 
         if iqr == 0 or round(h) == 0:
-            self.nbins = max(totalRange, 1)
+            self.nbins = max(round(totalRange), 1)
         else:
             self.nbins = max(round(totalRange/round(h) + 0.5), 1)
 
@@ -1157,8 +2638,13 @@ class SimTimeSeriesData(object):
     histogram for a single dataset (from a specified output database).
     TODO - allow a sequence of datasets, perhaps for plotting on a single chart? (or
     do we do that through multiple SimOutputHistogramData instances?)
+
+    If maxPoints is specified, the rolling average time series for an unweighted
+    dataset is downsampled to at most that many points (for plotting).
     """
-    def __init__(self,  outputDb, dataset, run, batch=None, windowSize = None):
+    def __init__(self,  outputDb, dataset, run, batch=None, windowSize = None,
+                 maxPoints=None):
+        outputDb = outputDb.run_database(run)
         self.outputDb = outputDb
         self.dataset = dataset
         self.run = run
@@ -1166,6 +2652,7 @@ class SimTimeSeriesData(object):
             batch = outputDb.last_batch(run)
         self.batch = batch
         self.windowSize = windowSize
+        self.maxPoints = maxPoints
         self.movingAvgWindowPct = 0.05
         self.timevalues = None
         self.yvalues = None
@@ -1231,51 +2718,128 @@ class SimTimeSeriesData(object):
         """
         For unweighted data, return timestamps and corresponding y values that represent a
         rolling average of the dataset values.  That rolling average is the average of
-        all dataset values within a "moving avg time window" preceding the the corresponding
-        timestamp. As with time-weighted data, only data within the overall time window  are
-        returned.
+        all dataset values (in the batch) within a "moving avg time window" preceding the
+        corresponding timestamp. As with time-weighted data, only data within the overall
+        time window are returned.
 
         The moving average time window length is calculated as a percentage of the overall
         time window length, and the rolling average window itself ends at the corresponding
         timestamp.  For example, ifthe rolling average window is 100 seconds, then the y value
         at timestamp 900 seconds is the average value recorded between 800 and 900 seconds on
         the simulated clock.
+
+        The batch's values are retrieved in timestamp-ordered chunks, and the rolling
+        averages are calculated from their cumulative sums - so the time required is
+        linear in the number of values, and memory use is bounded by the chunk size plus
+        the number of values within a moving average window. If maxPoints is set, the
+        returned timestamps/y values are downsampled to (at most) that many evenly
+        spaced points.
         """
-        minTime, maxTime = self.outputDb.batch_time_bounds(run, batch)
+        fromTime, toTime = self.fromto_timestamps()
         if self.windowSize:
             convertedWindowSize = self.windowSize.to_units(self.dataset.timeunit).value
         else:
-            convertedWindowSize = maxTime - minTime
+            convertedWindowSize = toTime - fromTime
         movingAvgWindowSize = convertedWindowSize * self.movingAvgWindowPct
 
-        # See http://stackoverflow.com/questions/10624902/sql-moving-average
-        sqlstr = """
-                 select d1.simtimestamp, avg(d2.value) as avgvalue
-                 from datasetvalue as d1, datasetvalue as d2
-                 where d1.dataset = ? and d2.dataset = ?
-                 and d1.run = ? and d2.run = ?
-                 and d2.simtimestamp between (d1.simtimestamp - ?) and d1.simtimestamp
-                 and d1.simtimestamp > ?
-                 group by d1.simtimestamp
-                 """
-
-        result = outputDb.runQuery(sqlstr, datasetid, datasetid, run, run, movingAvgWindowSize, minTime)
-        if len(result) > 0:
-            self.timevalues, self.yvalues = zip(*result)
+        selected = None
+        if self.maxPoints:
+            sqlstr = """
+                     select count(distinct simtimestamp) from datasetvalue
+                     where dataset = ? and run = ? and batch = ? and simtimestamp > ?
+                     """
+            npoints = outputDb.runQueryForSingleRow(sqlstr, datasetid, run,
+                                                    batch, fromTime)[0]
+            selected = self._downsampled_indices(npoints)
+
+        timeChunks = []
+        yChunks = []
+        npointsDone = 0
+        nextTime = -np.inf
+        carryTimes = np.empty(0)
+        carryValues = np.empty(0)
+        chunks = outputDb.dataset_value_chunks(datasetid, run, batch)
+        chunk = next(chunks, None)
+        while chunk is not None:
+            values, timestamps, _ = chunk
+            chunk = next(chunks, None)
+            timestamps = np.concatenate((carryTimes, timestamps))
+            values = np.concatenate((carryValues, values))
+
+            # Until the last chunk, defer the last timestamp, since there may
+            # be more values at that time in the next chunk
+            timevalues = np.unique(timestamps[timestamps > fromTime])
+            timevalues = timevalues[timevalues >= nextTime]
+            if chunk is not None:
+                lastTime = timestamps[-1]
+                timevalues = timevalues[timevalues < lastTime]
+                nextTime = lastTime
+
+            # Each rolling average window [t - movingAvgWindowSize, t] spans
+            # sorted values lo through hi - 1
+            cumsums = np.concatenate(([0], np.cumsum(values)))
+            lo = np.searchsorted(timestamps, timevalues - movingAvgWindowSize, side='left')
+            hi = np.searchsorted(timestamps, timevalues, side='right')
+            yvalues = (cumsums[hi] - cumsums[lo]) / (hi - lo)
+
+            npoints = len(timevalues)
+            if selected is not None:
+                indices = np.arange(npointsDone, npointsDone + npoints)
+                keep = np.isin(indices, selected)
+                timevalues = timevalues[keep]
+                yvalues = yvalues[keep]
+            npointsDone += npoints
+            timeChunks.append(timevalues)
+            yChunks.append(yvalues)
+
+            # Carry over the values that may be in later rolling average windows
+            if chunk is not None:
+                carry = timestamps >= nextTime - movingAvgWindowSize
+                carryTimes = timestamps[carry]
+                carryValues = values[carry]
+
+        if timeChunks:
+            timevalues = np.concatenate(timeChunks)
+            if len(timevalues) > 0:
+                self.timevalues = tuple(timevalues.tolist())
+                self.yvalues = tuple(np.concatenate(yChunks).tolist())
 
     def get_cumulative_count_data(self, outputDb, datasetid, run, batch):
         """
         For Entries datasets, we just want to accumulate the number of dataset values
-        over time.
+        over time. If maxPoints is set, the returned timestamps/counts are downsampled
+        to (at most) that many evenly spaced points.
         """
-        sqlstr = """
-                 select simtimestamp from datasetvalue
-                 where dataset = ? and run = ? and batch = ?
-                 order by simtimestamp;
-                 """
-        result = outputDb.runQuery(sqlstr, datasetid, run, batch)
-        self.timevalues = [r[0] for r in result]
-        self.yvalues = list(range(1, len(result)+1))
+        selected = None
+        if self.maxPoints:
+            sqlstr = """
+                     select count(*) from datasetvalue
+                     where dataset = ? and run = ? and batch = ?
+                     """
+            n = outputDb.runQueryForSingleRow(sqlstr, datasetid, run, batch)[0]
+            selected = self._downsampled_indices(n)
+
+        self.timevalues = []
+        self.yvalues = []
+        n = 0
+        for _, timestamps, _ in outputDb.dataset_value_chunks(datasetid, run, batch):
+            counts = np.arange(n + 1, n + len(timestamps) + 1)
+            n += len(timestamps)
+            if selected is not None:
+                keep = np.isin(counts - 1, selected)
+                timestamps = timestamps[keep]
+                counts = counts[keep]
+            self.timevalues.extend(timestamps.tolist())
+            self.yvalues.extend(counts.tolist())
+
+    def _downsampled_indices(self, n):
+        """
+        Return the indices of (at most) maxPoints evenly spaced points out of
+        n, or None if there are no more than maxPoints.
+        """
+        if n <= self.maxPoints:
+            return None
+        return np.unique(np.linspace(0, n - 1, self.maxPoints).round().astype(int))
 
 
 class LastValue(object):
@@ -1480,7 +3044,10 @@ class SimDatasetSummaryData(object):
     max and percentiles - for a specified dataset, batch and run.
         
     Database retrieval and statistic calculations are performed lazily,
-    when the first client request to a statistic is made.
+    when the first client request to a statistic is made. If there is a
+    datasetsummary row for the dataset/run/batch (written either by a
+    summary datasink or when the batch was finalized), the statistics are
+    simply read from that row.
     
     :param outputdb: An open output database
     :type outputdb:  :class:`SimOutputDatabase`
@@ -1502,7 +3069,7 @@ class SimDatasetSummaryData(object):
     def __init__(self, outputDb, dataset, run, batch=None):
         """
         """
-        self.outputDb = outputDb
+        self.outputDb = outputDb.run_database(run)
         self.dataset = dataset
         self.run = run
         if batch is None:
@@ -1564,6 +3131,9 @@ class SimDatasetSummaryData(object):
         """
         if self._count is not None:
             return
+
+        if self._fetch_summary():
+            return
         
         rows = self._fetch_data(self.outputDb, self.dataset, self.run, self.batch)
         if not rows:
@@ -1576,6 +3146,101 @@ class SimDatasetSummaryData(object):
         self._max = max(row[0] for row in rows)
         self._percentiles = self._calculate_percentiles(rows)
 
+    def _fetch_summary(self):
+        """
+        If there is a datasetsummary row for the dataset/run/batch, set
+        the statistics from that row and return True.
+        Otherwise, return False.
+        """
+        if not self.outputDb.has_summary_table():
+            return False
+
+        datasetid = self.outputDb.get_dataset_id(self.dataset)
+        sqlstr = """
+                 select count, mean, min, max, percentiles from datasetsummary
+                 where dataset = ? and run = ? and batch = ?
+                 """
+        result = self.outputDb.runQuery(sqlstr, datasetid, self.run, self.batch)
+        if not result:
+            return False
+
+        count, mean, minval, maxval, percentiles = result[0]
+        if count:
+            percentiles = json.loads(percentiles)
+        self._set_statistics(count, mean, minval, maxval, percentiles)
+        return True
+
+    def _set_statistics(self, count, mean, minval, maxval, percentiles):
+        """
+        Set the statistics (all but the count are ignored if the count is
+        zero)
+        """
+        self._count = count
+        if count:
+            self._mean = mean
+            self._min = minval
+            self._max = maxval
+            self._percentiles = percentiles
+
+    @classmethod
+    def fetch_all(cls, outputDb, runBatches):
+        """
+        Return a dictionary of SimDatasetSummaryData instances, keyed by
+        (element ID, dataset name, run, batch), for every dataset in the
+        output database and every (run, batch) pair in runBatches, with
+        their statistics already retrieved.
+
+        Rather than querying for each dataset/run/batch, this reads the
+        datasetsummary table in a single query (per shard, for a sharded
+        output database), and then summarizes the datasetvalue rows for any
+        run/batch that lacks datasetsummary rows in one grouped scan (per
+        run/batch) over all of the datasets. The statistics are the same as
+        those retrieved by individually created instances.
+        """
+        runBatches = set(runBatches)
+        datasets = {(dset.element_id, dset.name): dset
+                    for dset in outputDb.datasets}
+        datasetKeys = {datasetid: (element, name) for datasetid, element, name
+                       in outputDb.runQuery("select id, element, name from dataset")}
+
+        statistics = {}
+        if outputDb.has_summary_table():
+            sqlstr = """
+                     select dataset, run, batch, count, mean, min, max, percentiles
+                     from datasetsummary
+                     """
+            # A sharded output database has a database for each run
+            runDatabases = {outputDb.run_database(run) for run, _ in runBatches}
+            rows = [row for runDb in runDatabases for row in runDb.runQuery(sqlstr)]
+            for row in rows:
+                datasetid, run, batch, count, mean, minval, maxval, percentiles = row
+                if (run, batch) in runBatches:
+                    if count:
+                        percentiles = json.loads(percentiles)
+                    statistics[(datasetid, run, batch)] = (count, mean, minval,
+                                                           maxval, percentiles)
+
+        for run, batch in sorted(runBatches):
+            if all((datasetid, run, batch) in statistics for datasetid in datasetKeys):
+                continue
+            if outputDb.has_time_weighted_dataset():
+                batchEndTm = outputDb.batch_time_bounds(run, batch)[1]
+            else:
+                batchEndTm = 0
+            summaries = outputDb.summarize_batch(run, batch, batchEndTm)
+            for datasetid, summary in summaries.items():
+                count, _, mean, _, minval, maxval, percentiles = summary
+                statistics.setdefault((datasetid, run, batch),
+                                      (count, mean, minval, maxval, percentiles))
+
+        result = {}
+        for (datasetid, run, batch), stats in statistics.items():
+            element, name = datasetKeys[datasetid]
+            sdata = cls(outputDb, datasets[(element, name)], run, batch)
+            sdata._set_statistics(*stats)
+            result[(element, name, run, batch)] = sdata
+        return result
+
     def _fetch_data(self, outputDb, dataset, run, batch):
         """
         Retrieve datasetvalue data for the dataset/run/batch
@@ -1619,25 +3284,16 @@ class SimDatasetSummaryData(object):
             result = outputDb.runQuery(sqlstr, datasetid, run, batch)
         return result
 
-    def _calculate_percentiles(self, rows):
+    @staticmethod
+    def _calculate_percentiles(rows):
         """
         Calculate and return a list of percentile values (0 through 100) based
         on the data in the passed row collection.
         """
-        totalweight = sum(row[1] for row in rows)
-        percentile = [None] * 101
-        cumweight = 0
-        currPercentile = 0
-        for row in rows:
-            value, weight, count = row
-            cumweight += weight
-            while 100.0 * cumweight / totalweight >= currPercentile:
-                percentile[currPercentile] = value
-                currPercentile += 1
-
-        return percentile
+        return _weighted_percentiles([(row[0], row[1]) for row in rows])
     
-    def _calculate_mean(self, rows):
+    @staticmethod
+    def _calculate_mean(rows):
         """
         Calculate the mean dataset value for the passed rows. We use
         the second row value (weight) to time-weight the mean for
@@ -1651,16 +3307,3 @@ class SimDatasetSummaryData(object):
             return valuesums / totalweight
         else:
             return None
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -21,6 +21,7 @@ from simprovise.core.simlogging import SimLogging
 from simprovise.core.simclock import SimClock
 from simprovise.core.simtime import SimTime
 from simprovise.core.simevent import SimEvent
+from simprovise.core.simrandom import SimDistribution
 
 from simprovise.core.apidoc import apidoc, apidocskip
 from simprovise.modeling import SimLocation
@@ -150,6 +151,56 @@ class SimEntitySource(SimLocation):
         # should not yet be initialized.
         self.__generatorPairs.append((entityGenerator(), interarrivalGenerator))
 
+    def add_entity_choice_generator(self, entityProcessClasses,
+                                    interarrivalGenerator, *, weights=None,
+                                    streamNum=1):
+        """
+        Initializes a stream of entities of pseudo-randomly chosen classes,
+        generated at intervals specified by a single interarrival generator.
+        Each generated entity's entity and process classes are chosen from a
+        passed sequence of (entity class, process class) pairs via
+        :meth:`~simprovise.core.simrandom.SimDistribution.choice`, optionally
+        weighted. For example, to generate a stream of entities that are
+        70% ``Car`` and 30% ``Truck``, each with their own process::
+
+            source.add_entity_choice_generator(((Car, CarProcess),
+                                                (Truck, TruckProcess)),
+                                               interarrivalGenerator,
+                                               weights=(7, 3), streamNum=4)
+
+        As with :meth:`add_entity_generator`, the entity class initializer
+        must take the same two arguments as :class:`.entity.SimEntity`
+        and the process class initializer must take no arguments.
+       
+        :param entityProcessClasses: Sequence of (entity class, process
+                                     class) pairs to choose from.
+        :type entityProcessClasses:  Sequence of `(class, class)`
+       
+        :param interarrivalGenerator: A generator that yields interarrival
+                                      times (class :class:`~.simtime.SimTime`)
+        :type interarrivalGenerator:  `generator`
+        
+        :param weights:              The relative weight of each pair, or
+                                     ``None`` (the default) if each pair is
+                                     equally likely.
+        :type weights:               Sequence of numeric values or ``None``
+        
+        :param streamNum:            The random number stream used to choose
+                                     entity/process classes. Defaults to 1.
+        :type streamNum:             `int`
+       
+        """
+        classGenerator = SimDistribution.choice(entityProcessClasses,
+                                                streamNum, weights=weights)
+        
+        def entityGenerator():
+            while True:
+                entityClass, processClass = next(classGenerator)
+                yield entityClass(self, processClass())
+                
+        # As with add_entity_generator(), just store the generators
+        self.__generatorPairs.append((entityGenerator(), interarrivalGenerator))
+
     def add_generator_pair(self, entityGenerator, interarrivalGenerator):
         """
         ``addGeneratorPair()`` is an alternative to :meth:`addEntityGenerator`,
@@ -290,6 +290,16 @@ class SimLocation(SimStaticObject):
         if SimLocation._rootlocation is None:
             SimLocation._rootlocation = SimRootLocation()
         return SimLocation._rootlocation
+
+    @classmethod
+    @apidocskip
+    def reset_root_location(cls):
+        """
+        Discard the root location (and with it, its child static objects),
+        so that a new one is created for a model that is reloaded via
+        :meth:`~simprovise.core.model.SimModel.reload_model`.
+        """
+        SimLocation._rootlocation = None
         
 
     def __init__(self, name, parentlocation=None, entrypointname=None,
@@ -20,8 +20,8 @@
 # ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS 
 # FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
 #===============================================================================
-import sys, os, time
-import multiprocessing, threading
+import sys, os, time, gc, signal
+import multiprocessing, multiprocessing.pool, threading
 import tempfile, shutil
 import sqlite3
 from traceback import format_tb
@@ -37,8 +37,11 @@ from simprovise.core.simlogging import SimLogging
 from simprovise.core.model import SimModel
 from simprovise.core.simclock import SimClock
 from simprovise.core import SimError, simrandom, simtrace
-from simprovise.core.simevent import EventProcessor
-from simprovise.database import SimDatabaseManager
+import simprovise.core.configuration as simconfig
+from simprovise.core.simevent import EventProcessor, SimEvent
+from simprovise.core.datasink import LastValueDataSink
+from simprovise.database import (SimDatabaseManager, SimShardManifest,
+                                 copy_run_data)
 from simprovise.runcontrol.simruncontrol import (SimRunControlParameters,
                                                  SimRunControlScheduler,
                                                  SimReplicationParameters)
@@ -52,10 +55,244 @@ _STATUS_NOT_STARTED = 'NOT_STARTED'
 _STATUS_IN_PROGRESS = 'IN_PROGRESS'
 _STATUS_COMPLETE = 'COMPLETE'
 _STATUS_CANCELLED = 'CANCELLED'
+_SHARD_MANIFEST_NAME = 'output.simshards'
+
+# The number of replications executed by this (worker) process
+_replicationCount = 0
+
+# The maximum size (in bytes) of the error message and traceback sent by
+# a failed forked replication to its parent process
+_MAX_FORKED_ERROR_SIZE = 8192
+
+# The multiprocessing start methods supported for replication worker processes
+_START_METHODS = ('spawn', 'forkserver')
+
+# The modules imported by the forkserver process before it forks any
+# replication workers. ('__main__' is the main script, which is the model
+# itself if the replications are started by the model script.)
+_FORKSERVER_PRELOAD = ['__main__', 'simprovise.simulation',
+                       'simprovise.modeling', 'simprovise.runcontrol.replication']
+
+# The preload list and environment that the running forkserver process was
+# started with (by _start_forkserver()), or None if it has not been started
+_forkserverInputs = None
+
+# The process IDs of forkserver processes replaced by one started with
+# different inputs; each exits once its last worker process exits
+_retiredForkserverPids = []
+
+# The (private) attributes of multiprocessing's forkserver object used by
+# _retire_forkserver() to detach from a running forkserver process
+_FORKSERVER_ATTRIBUTES = ('_lock', '_forkserver_pid', '_forkserver_alive_fd',
+                          '_forkserver_address')
+
+# The number of replication worker processes that may fail to start before
+# the replicator abandons its replications (see SimReplicator._check_workers)
+_MAX_WORKER_START_FAILURES = 3
+
+# The interval (in seconds) at which a replicator waiting for replications
+# to finish checks for worker processes that failed to start
+_WORKER_CHECK_INTERVAL = 1.0
+
+# The start-up latency of this (worker) process, in seconds, until it is
+# reported with the result of its first replication task
+_workerStartupTime = None
+
+
+class _TimedWorkerProcess(object):
+    """
+    Mixin for the replication pool's worker process classes, which records
+    the time at which the process is launched. The process object is
+    pickled and sent to the new process, where _initialize_worker() uses
+    that time to measure the worker's start-up latency.
+    """
+    def start(self):
+        self.launch_time = time.time()
+        super().start()
+
+
+class _WorkerContext(object):
+    """
+    Mixin for the replication pool's multiprocessing contexts, which counts
+    the worker processes launched by the pool (which creates each of them
+    via its context's Process attribute).
+    """
+    def __init__(self):
+        super().__init__()
+        self.launch_count = 0
+        
+    def Process(self, *args, **kwargs):
+        self.launch_count += 1
+        return self.WorkerProcess(*args, **kwargs)
+
+
+class _SpawnWorkerProcess(_TimedWorkerProcess, multiprocessing.context.SpawnProcess):
+    pass
+
+
+class _SpawnWorkerContext(_WorkerContext, multiprocessing.context.SpawnContext):
+    WorkerProcess = _SpawnWorkerProcess
+
+
+if hasattr(multiprocessing.context, 'ForkServerProcess'):
+    import multiprocessing.forkserver, multiprocessing.util
+    
+    class _ForkServerWorkerProcess(_TimedWorkerProcess,
+                                   multiprocessing.context.ForkServerProcess):
+        pass
+    
+    class _ForkServerWorkerContext(_WorkerContext,
+                                   multiprocessing.context.ForkServerContext):
+        WorkerProcess = _ForkServerWorkerProcess
+
+
+def _worker_context(startMethod):
+    """
+    Return the multiprocessing context for a replication pool whose worker
+    processes are started via the passed start method - starting the
+    forkserver process first, if required. If the forkserver cannot be
+    (re)started, returns a spawn context instead.
+    """
+    if startMethod == 'forkserver':
+        ctx = _ForkServerWorkerContext()
+        if _start_forkserver(ctx):
+            return ctx
+    return _SpawnWorkerContext()
+
+
+def _start_forkserver(ctx):
+    """
+    Start the forkserver process (if it is not already running), preloading
+    the main script and the simprovise packages. The forkserver imports
+    those modules before it is sent any of this process's state, so it is
+    started with this process's module search path and model script path
+    (which determines the configuration files read) in its environment.
+    
+    If the forkserver is already running, but was started with a different
+    preload list, module search path or model script path (e.g. by a
+    replicator for another model), it is replaced by a new forkserver.
+    Returns False (after logging a warning) if it cannot be replaced,
+    True otherwise.
+    """
+    global _forkserverInputs
+    env = simconfig.modelscript_environment()
+    env['PYTHONPATH'] = os.pathsep.join(os.path.abspath(p) for p in sys.path)
+    inputs = (list(_FORKSERVER_PRELOAD), env)
+    _reap_retired_forkservers()
+    if _forkserverInputs is not None and inputs != _forkserverInputs:
+        if not _retire_forkserver():
+            logger.warning("Unable to replace the running forkserver process (not supported by this version of multiprocessing); "
+                           "replication workers will be started via spawn")
+            return False
+        
+    ctx.set_forkserver_preload(_FORKSERVER_PRELOAD)
+    savedEnv = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        multiprocessing.forkserver.ensure_running()
+        _forkserverInputs = inputs
+        return True
+    finally:
+        for name, value in savedEnv.items():
+            if value is None:
+                del os.environ[name]
+            else:
+                os.environ[name] = value
+
+
+def _retire_forkserver():
+    """
+    Detach this process from the running forkserver process (if any), so
+    that the next ensure_running() call starts a new one. (multiprocessing
+    has no public means of doing so; this follows ForkServer._stop(), but
+    does not wait for the old forkserver to exit - it continues to serve
+    the worker processes it has already forked, exiting after the last of
+    them does.) Returns False if this version of multiprocessing does not
+    have the forkserver attributes that requires, True otherwise.
+    """
+    forkserver = getattr(multiprocessing.forkserver, '_forkserver', None)
+    if not all(hasattr(forkserver, name) for name in _FORKSERVER_ATTRIBUTES):
+        return False
+    with forkserver._lock:
+        pid = forkserver._forkserver_pid
+        if pid is None:
+            return True
+        logger.info("Replacing forkserver process %d", pid)
+        os.close(forkserver._forkserver_alive_fd)
+        address = forkserver._forkserver_address
+        forkserver._forkserver_alive_fd = None
+        forkserver._forkserver_address = None
+        forkserver._forkserver_pid = None
+        if not multiprocessing.util.is_abstract_socket_namespace(address):
+            try:
+                os.unlink(address)
+            except OSError:
+                pass
+        _retiredForkserverPids.append(pid)
+    return True
+
+
+def _reap_retired_forkservers():
+    """
+    Wait for (without blocking) any retired forkserver processes that have
+    exited.
+    """
+    for pid in list(_retiredForkserverPids):
+        try:
+            exitedPid, status = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            exitedPid = pid
+        if exitedPid:
+            _retiredForkserverPids.remove(pid)
+
+
+def _initialize_worker(startedCount=None):
+    """
+    Replication pool worker process initializer. Measures the worker's
+    start-up latency - the time from its launch until it is ready to
+    execute replication tasks - and increments the passed shared count
+    (if any) of successfully started workers.
+    """
+    global _workerStartupTime
+    launchTime = getattr(multiprocessing.current_process(), 'launch_time', None)
+    if launchTime is not None:
+        _workerStartupTime = time.time() - launchTime
+        logger.info("Replication worker process %s started in %.4f seconds",
+                    os.getpid(), _workerStartupTime)
+    if startedCount is not None:
+        with startedCount.get_lock():
+            startedCount.value += 1
+
+
+def _worker_startup_time():
+    """
+    Returns the start-up latency of this worker process (in seconds) if it
+    has not already been returned - i.e., for the worker's first replication
+    task. Otherwise returns None.
+    """
+    global _workerStartupTime
+    startupTime, _workerStartupTime = _workerStartupTime, None
+    return startupTime
+
+def _load_model(modelPath):
+    """
+    Load the model for a replication task, or reload it (see
+    :meth:`~simprovise.core.model.SimModel.reload_model`) if this process has
+    already executed a replication task. Returns the SimModel.
+    """
+    global _replicationCount
+    _replicationCount += 1
+    if _replicationCount > 1:
+        return SimModel.reload_model(modelPath)
+    elif modelPath:
+        return SimModel.load_model_from_script(modelPath)
+    else:
+        return SimModel.model()
 
 
 def execute_replication(modelPath, dbpath, runNumber, warmupLength,
-                       batchLength, nBatches, queue=None):
+                       batchLength, nBatches, queue=None, randomRunNumber=None,
+                       antithetic=None):
     """
     Simple function that creates and executes a replication, and captures
     any failures that occurred during that execution.  Exceptions raised
@@ -65,7 +302,15 @@ def execute_replication(modelPath, dbpath, runNumber, warmupLength,
 
     Designed as a task to be executed by a multiprocessing Pool.  Returns
     the replication run number, the path of the temporary database populated
-    by the replication, and any exception that was raised (or None)
+    by the replication, any exception that was raised (or None), its
+    traceback string (or None) and the start-up latency of the worker
+    process if this is its first replication (or None)
+    
+    A pool worker process may execute more than one replication. The model
+    is loaded for the process's first replication; before each subsequent
+    replication, it is reset and loaded again via
+    :meth:`~simprovise.core.model.SimModel.reload_model`, so that every
+    replication starts from the same (freshly loaded) model state.
     
     :param modelPath:    The model Python script path to be executed.
     :type modelPath:     ``str``
@@ -96,17 +341,25 @@ def execute_replication(modelPath, dbpath, runNumber, warmupLength,
                          be sent
     :type queue:         :class:`multiprocessing.Queue` or ``None``   
     
+    :param randomRunNumber: The run number used to initialize random number
+                         streams, if different from runNumber. (The runs of
+                         an antithetic pair share a random run number.)
+    :type randomRunNumber: `int` or ``None``
+    
+    :param antithetic:   Sampling mode passed to
+                         :func:`~simprovise.core.simrandom.initialize`
+    :type antithetic:    `bool` or ``None``
+    
     """
     tbstring = None
     try:
         logger.info("execute_replication() for run %d, model path: %s, pid: %s",
                     runNumber, modelPath, os.getpid())
-        if modelPath:
-            model = SimModel.load_model_from_script(modelPath)
-        else:
-            model = SimModel.model()
+        model = _load_model(modelPath)
         replication = SimReplication(model, runNumber, warmupLength, batchLength,
-                                     nBatches, dbpath, queue)
+                                     nBatches, dbpath, queue,
+                                     randomRunNumber=randomRunNumber,
+                                     antithetic=antithetic)
         replication.execute()
     except Exception as e:
         print("execute_replication() exception:", e)
@@ -114,7 +367,67 @@ def execute_replication(modelPath, dbpath, runNumber, warmupLength,
         lines = format_tb(e.__cause__.__traceback__)
         tbstring = "".join(lines)
 
-    return runNumber, dbpath, replication.exception, tbstring
+    return (runNumber, dbpath, replication.exception, tbstring,
+            _worker_startup_time())
+
+def execute_forked_replications(modelPath, runs, warmupLength, batchLength,
+                                nBatches, maxConcurrent, queue=None):
+    """
+    Task function (for a multiprocessing Pool) that creates and executes
+    a :class:`SimForkedReplications` - a set of replications that share a
+    single simulated warmup. Returns a list of results, one per
+    replication, each of which is a (run number, database path, exception,
+    traceback string, worker start-up latency) tuple as returned by
+    :func:`execute_replication`. (The worker start-up latency is reported
+    with the first result only.) If the shared warmup fails, every
+    replication fails.
+    
+    :param modelPath:    The model Python script path to be executed (or
+                         ``None``, as for :func:`execute_replication`)
+    :type modelPath:     ``str`` or ``None``
+    
+    :param runs:         A (run number, output database path) pair for
+                         each replication. The output databases must exist,
+                         as for :func:`execute_replication`
+    :type runs:          sequence of (`int`, `str`) tuples
+    
+    :param warmupLength: The warmup time for the simulation (before data
+                         collection begins). Must be greater than zero.
+    :type warmupLength:  :class:`~simprovise.core.simtime.SimTime`
+    
+    :param batchLength:  The time length for each batch after the warmup
+    :type batchLength:   :class:`~simprovise.core.simtime.SimTime`
+    
+    :param nBatches:     The number of batches to execute
+    :type nBatches:      `int`    
+    
+    :param maxConcurrent: The maximum number of replications (forked
+                         processes) executing at once
+    :type maxConcurrent: `int`
+    
+    :param queue:        The ``multiprocessing.Queue`` used to send status
+                         messages, as for :func:`execute_replication`
+    :type queue:         :class:`multiprocessing.Queue` or ``None``   
+    
+    """
+    startupTime = _worker_startup_time()
+    try:
+        logger.info("execute_forked_replications() for runs %s, model path: %s, pid: %s",
+                    [run for run, dbpath in runs], modelPath, os.getpid())
+        model = _load_model(modelPath)
+        forkedReplications = SimForkedReplications(model, runs, warmupLength,
+                                                   batchLength, nBatches,
+                                                   maxConcurrent, queue)
+        results = forkedReplications.execute()
+    except Exception as e:
+        print("execute_forked_replications() exception:", e)
+        if not isinstance(e, SimError):
+            e = SimError(_ERROR_NAME, "{0}", e)
+        tbstring = "".join(format_tb(sys.exc_info()[2]))
+        results = [(runNumber, dbpath, e, tbstring) for runNumber, dbpath in runs]
+        
+    return [result + (startupTime if i == 0 else None,)
+            for i, result in enumerate(results)]
 
 class SimReplication(QObject):
     """
@@ -165,12 +478,34 @@ class SimReplication(QObject):
                          it. May be ``None``, in which case not messages will
                          be sent
     :type queue:         :class:`multiprocessing.Queue` or ``None``   
+    
+    :param randomRunNumber: The run number used to initialize random number
+                         streams. Defaults to ``None``, in which case
+                         runNumber is used.
+    :type randomRunNumber: `int` or ``None``
+    
+    :param antithetic:   Sampling mode passed to
+                         :func:`~simprovise.core.simrandom.initialize`:
+                         ``None`` (the default) for standard sampling,
+                         ``False`` or ``True`` for the first and second
+                         runs of an antithetic pair.
+    :type antithetic:    `bool` or ``None``
+
+    :param inMemoryDatabase: If ``True``, the replication writes its output
+                         to an in-memory copy of its output database, which
+                         is written to disk when the run completes. If
+                         ``None`` (the default), determined by the
+                         Output Database InMemoryReplications configuration
+                         setting.
+    :type inMemoryDatabase: `bool` or ``None``
 
     """
     #TODO: Don't think this needs to be a QObject, since it doesn't emit or
     #connect to any Qt Signals
     def __init__(self, model, runNumber, warmupLength,
-                 batchLength, nBatches, dbPath=None, queue=None):
+                 batchLength, nBatches, dbPath=None, queue=None, *,
+                 randomRunNumber=None, antithetic=None,
+                 inMemoryDatabase=None):
         """
         Initialize a replication with the path to the model, an initialized
         output database, and the run control parameters.  The initializer
@@ -186,8 +521,16 @@ class SimReplication(QObject):
             SimRunControlParameters(runNumber, warmupLength, batchLength,
                                     nBatches)
         
+        self.__randomRunNumber = randomRunNumber or runNumber
+        self.__antithetic = antithetic
+        if inMemoryDatabase is None:
+            inMemoryDatabase = simconfig.get_output_in_memory_replications()
+        self.__inMemoryDatabase = inMemoryDatabase
         self.__totalRunLength = warmupLength + nBatches * batchLength
         self.__hasExecuted = False
+        self.__eventCount = 0
+        self.__executionTime = 0
+        self.__streamCreationTime = 0
         self.exception = None
         if not self.__totalRunLength > 0:
             msg = 'Total Simulation run time not greater than zero'
@@ -205,6 +548,34 @@ class SimReplication(QObject):
         """
         return self.__dbPath
 
+    @property
+    def event_count(self):
+        """
+        :return: The number of events processed by the replication (zero
+                 if it has not executed)
+        :rtype:  `int`
+        """
+        return self.__eventCount
+
+    @property
+    def execution_time(self):
+        """
+        :return: The elapsed (wall clock) time, in seconds, spent processing
+                 events during the replication (zero if it has not executed)
+        :rtype:  `float`
+        """
+        return self.__executionTime
+
+    @property
+    def stream_creation_time(self):
+        """
+        :return: The elapsed (wall clock) time, in seconds, spent
+                 initializing and (lazily) creating the replication's
+                 pseudo-random number streams (zero if it has not executed)
+        :rtype:  `float`
+        """
+        return self.__streamCreationTime
+
     def execute(self):
         """
         Actually execute the replication/simulation run.
@@ -216,7 +587,7 @@ class SimReplication(QObject):
         runNumber = self.__runControlParameters.run_number
         logger.info("starting replication for run number %d ...", runNumber)
         try:
-            simrandom.initialize(runNumber)
+            simrandom.initialize(self.__randomRunNumber, self.__antithetic)
             SimClock.initialize()
              
             # Create the event processor before loading the model, as the
@@ -239,10 +610,24 @@ class SimReplication(QObject):
             
             # Do any model initialization functions (a TODO)
                
-            # Do output database initialization
+            # Do output database initialization. The database is a scratch
+            # database for this run (merged into or copied to the final
+            # output database afterwards), so it can be tuned for speed. If
+            # it is in memory, it is written to dbPath when it is closed.
             if self.__dbPath:
                 self.__databaseManager.open_existing_database(self.__model,
-                                                              self.__dbPath)
+                                                              self.__dbPath,
+                                                              inMemory=self.__inMemoryDatabase,
+                                                              scratch=True)
+            elif self.__inMemoryDatabase:
+                self.__databaseManager.create_output_database(self.__model)
+                self.__dbPath = self.__databaseManager.current_database_path
+                self.__databaseManager.close_output_database(delete=False)
+                self.__databaseManager.open_existing_database(self.__model,
+                                                              self.__dbPath,
+                                                              isTemporary=True,
+                                                              inMemory=True,
+                                                              scratch=True)
             else:
                 self.__databaseManager.create_output_database(self.__model)
                 self.__dbPath = self.__databaseManager.current_database_path
@@ -258,7 +643,8 @@ class SimReplication(QObject):
             runControlScheduler = SimRunControlScheduler(self.__model,
                                                          self.__runControlParameters,
                                                          progressIntervalPct=10,
-                                                         msgQueue=self.__msgQueue)
+                                                         msgQueue=self.__msgQueue,
+                                                         databaseManager=self.__databaseManager)
             runControlScheduler.schedule_run_control_events()
 
             # Initialize the trace, if any (in particular, open the trace file)
@@ -267,10 +653,15 @@ class SimReplication(QObject):
             startTime = time.time()
             self._send_status_message(SimMessageQueue.STATUS_STARTED)
             nEvents = eventProcessor.process_events(self.__totalRunLength)
+            self.__eventCount = nEvents
+            self.__executionTime = time.time() - startTime
+            nstreams, self.__streamCreationTime = simrandom.stream_creation_stats()
+            logger.info("Run %d: %d random number streams created in %.6f seconds",
+                        runNumber, nstreams, self.__streamCreationTime)
             print("Run", self.__runControlParameters.run_number,
                   "execution complete:", nEvents,
                   "events processed. Process Time:",
-                  time.time()-startTime)
+                  self.__executionTime)
             self.__databaseManager.close_output_database(delete=False)
         except Exception as e:
             try:
@@ -301,6 +692,355 @@ class SimReplication(QObject):
             return 1
 
 
+class SimForkedReplications(object):
+    """
+    Executes a set of replications that share a single simulated warmup,
+    using ``os.fork()`` - and is therefore available only on platforms that
+    support it (e.g. Linux).
+
+    The model is simulated through the warmup period once, using the random
+    number streams of the first replication's run number. No output is
+    written during the warmup, since it is discarded by every replication
+    anyway; each dataset's datasink just keeps its current value. At the end
+    of the warmup (just before end-of-warmup processing), a child process is
+    forked for each replication - at most ``maxConcurrent`` at a time. Each
+    child:
+    
+    - Reinitializes the random number streams for its own run number. (The
+      first replication continues with the warmup's streams, so its output
+      is identical to that of a :class:`SimReplication` of the same run.)
+    - Opens its own output database, as a :class:`SimReplication` would,
+      and gives each dataset a datasink that writes to it, starting from
+      the dataset's current (warmed-up) value.
+    - Simulates the remaining batches, and then exits.
+    
+    The children share the warmed-up model's memory with the parent
+    process (copy-on-write) rather than each loading the model and
+    simulating the warmup themselves, which can save most of the total
+    execution time when the warmup is long relative to the batches.
+    
+    Note that these replications are not independent in the way that
+    separately executed replications are: every replication starts its
+    first batch from the same (warmed-up) model state, and their
+    trajectories diverge only after the warmup.
+    
+    :param model:        The :class:`~simprovise.core.model.SimModel`
+                         to be executed.
+    :type model:         :class:`~simprovise.core.model.SimModel`
+    
+    :param runs:         A (run number, output database path) pair for
+                         each replication. Each output database must be
+                         fully initialized, as for :class:`SimReplication`
+    :type runs:          sequence of (`int`, `str`) tuples
+    
+    :param warmupLength: The warmup time for the simulation (before data
+                         collection begins). Must be greater than zero.
+    :type warmupLength:  :class:`~simprovise.core.simtime.SimTime`
+    
+    :param batchLength:  The time length for each batch after the warmup
+    :type batchLength:   :class:`~simprovise.core.simtime.SimTime`
+    
+    :param nBatches:     The number of batches to execute
+    :type nBatches:      `int`    
+    
+    :param maxConcurrent: The maximum number of replications (forked
+                         processes) executing at once. Defaults to 1.
+    :type maxConcurrent: `int`
+    
+    :param queue:        The ``multiprocessing.Queue`` used to send status
+                         messages to the :class:`SimReplicator`, as for
+                         :class:`SimReplication`. May be ``None``.
+    :type queue:         :class:`multiprocessing.Queue` or ``None``   
+
+    :param inMemoryDatabase: If ``True``, each replication writes its output
+                         to an in-memory copy of its output database, as
+                         for :class:`SimReplication`. If ``None`` (the
+                         default), determined by the Output Database
+                         InMemoryReplications configuration setting.
+    :type inMemoryDatabase: `bool` or ``None``
+    
+    """
+    def __init__(self, model, runs, warmupLength, batchLength, nBatches,
+                 maxConcurrent=1, queue=None, *, inMemoryDatabase=None):
+        """
+        Initialize with the model, the replications' run numbers and output
+        database paths, and the run control parameters.
+        """
+        if not hasattr(os, 'fork'):
+            msg = "Fork-after-warmup replications are not supported on this platform"
+            raise SimError(_ERROR_NAME, msg)
+        if not runs:
+            raise SimError(_ERROR_NAME, "No replications specified")
+            
+        self.__model = model
+        self.__runs = list(runs)
+        self.__runControlParameters = \
+            SimRunControlParameters(self.__runs[0][0], warmupLength,
+                                    batchLength, nBatches)
+        if not warmupLength > 0:
+            msg = "Fork-after-warmup replications require a warmup period"
+            raise SimError(_ERROR_NAME, msg)
+        
+        self.__totalRunLength = warmupLength + nBatches * batchLength
+        self.__maxConcurrent = max(1, maxConcurrent)
+        self.__queue = queue
+        if inMemoryDatabase is None:
+            inMemoryDatabase = simconfig.get_output_in_memory_replications()
+        self.__inMemoryDatabase = inMemoryDatabase
+        self.__databaseManager = SimDatabaseManager()
+        self.__results = []
+        self.__hasExecuted = False
+        
+        # The (run number, database path) and error pipe file descriptor
+        # of the replication executed by a forked child process
+        self.__childRun = None
+        self.__errorFd = None
+        
+    @property
+    def warmup_run_number(self):
+        """
+        :return: The run number whose random number streams are used to
+                 simulate the warmup - the first replication's run number
+        :rtype:  `int`
+        """
+        return self.__runs[0][0]
+
+    def execute(self):
+        """
+        Simulate the warmup and then execute the replications in forked
+        child processes, returning their results once they have all
+        finished - a (run number, database path, exception, traceback
+        string) tuple for each, in the order they finished.
+        """
+        if self.__hasExecuted:
+            raise SimError(_ERROR_NAME,
+                           "Replications have already executed (and cannot be re-executed)")
+        self.__hasExecuted = True
+        
+        model = self.__model
+        logger.info("starting shared warmup (run number %d) for %d replications ...",
+                    self.warmup_run_number, len(self.__runs))
+        if simconfig.get_trace_enabled():
+            logger.warning("Event tracing is not supported for fork-after-warmup replications")
+            
+        simrandom.initialize(self.warmup_run_number)
+        SimClock.initialize()
+        eventProcessor = EventProcessor()
+        for agent in model.agents:
+            agent.final_initialize()
+        for e in model.process_elements:
+            e.final_initialize()
+        for e in model.entity_elements:
+            e.final_initialize()
+            
+        for dset in model.datasets:
+            dset.datasink = LastValueDataSink()
+            dset.initialize_batch(0)
+            
+        # The run control scheduler finalizes each batch in the database
+        # manager's database, which each child process opens for itself
+        runControlScheduler = SimRunControlScheduler(model,
+                                                     self.__runControlParameters,
+                                                     databaseManager=self.__databaseManager)
+        
+        # Registered before the run control events, so that it is processed
+        # immediately before the end-of-warmup event
+        forkEvent = _ForkReplicationsEvent(self, self.__runControlParameters.warmup_length)
+        forkEvent.register()
+        runControlScheduler.schedule_run_control_events()
+        
+        startTime = time.time()
+        try:
+            nEvents = eventProcessor.process_events(self.__totalRunLength)
+        except _WarmupForked:
+            # In this (the parent) process, with all replications finished
+            return self.__results
+        except BaseException as e:
+            if self.__childRun is None:
+                raise
+            self._exit_child(e)
+            
+        if self.__childRun is None:
+            raise SimError(_ERROR_NAME, "Replications were not forked at the end of the warmup")
+        print("Run", self.__childRun[0], "execution complete:", nEvents,
+              "events processed. Process Time:", time.time() - startTime)
+        self._exit_child()
+
+    def _fork_replications(self):
+        """
+        Fork a child process for each replication (at most maxConcurrent at
+        a time) - invoked at the end of the warmup. Returns in each child
+        process, which goes on to simulate its replication's batches. In
+        this (parent) process, waits for all of the children to finish and
+        then raises _WarmupForked to end event processing.
+        """
+        logger.info("Warmup complete at %s; forking %d replications",
+                    SimClock.now(), len(self.__runs))
+        
+        # Avoid any buffered output being written by both parent and child.
+        # Also move all (warmed-up) objects to the garbage collector's
+        # permanent generation, so that collections in the children do not
+        # write to - and therefore copy - the memory pages they share with
+        # this process.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        gc.freeze()
+        
+        # If this process is terminated (e.g. by a replicator cancel()),
+        # terminate the children too
+        inMainThread = threading.current_thread() is threading.main_thread()
+        if inMainThread:
+            sigtermHandler = signal.signal(signal.SIGTERM, _exit_on_sigterm)
+            
+        children = {}
+        try:
+            for runNumber, dbpath in self.__runs:
+                while len(children) >= self.__maxConcurrent:
+                    self._wait_for_child(children)
+                readFd, writeFd = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    self.__childRun = (runNumber, dbpath)
+                    self.__errorFd = writeFd
+                    os.close(readFd)
+                    for childRun, childPath, childFd in children.values():
+                        os.close(childFd)
+                    if inMainThread:
+                        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                    self._start_child()
+                    return
+                os.close(writeFd)
+                children[pid] = (runNumber, dbpath, readFd)
+                
+            while children:
+                self._wait_for_child(children)
+        finally:
+            if self.__childRun is None:
+                for pid, (runNumber, dbpath, readFd) in children.items():
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    os.close(readFd)
+                if inMainThread:
+                    signal.signal(signal.SIGTERM, sigtermHandler)
+                gc.unfreeze()
+                
+        raise _WarmupForked()
+
+    def _start_child(self):
+        """
+        Set up a newly forked child process to simulate its replication's
+        batches: reinitialize the random number streams for the
+        replication's run number, open its output database, and give each
+        dataset a datasink that writes to that database, starting with the
+        dataset's current (warmed-up) value.
+        """
+        runNumber, dbpath = self.__childRun
+        logger.info("Forked replication for run number %d, pid: %s",
+                    runNumber, os.getpid())
+        if runNumber != self.warmup_run_number:
+            simrandom.initialize(runNumber)
+        if self.__queue:
+            msgQueue = SimMessageQueueSender(runNumber, self.__queue)
+            msgQueue.send_status_message(SimMessageQueue.STATUS_STARTED)
+            
+        # Opening the database replaces each dataset's (warmup) datasink,
+        # passing any value held by its data collector on to the warmup
+        # datasink first
+        warmupDatasinks = [(dset, dset.datasink) for dset in self.__model.datasets]
+        databaseManager = self.__databaseManager
+        databaseManager.open_existing_database(self.__model, dbpath,
+                                               inMemory=self.__inMemoryDatabase,
+                                               scratch=True)
+        databaseManager.set_commit_rate(0)
+        databaseManager.initialize_run(runNumber)
+        for dset, warmupDatasink in warmupDatasinks:
+            value = warmupDatasink.last_value
+            if dset.is_time_weighted and value is not None:
+                dset.datasink.put(value)
+
+    def _exit_child(self, exception=None):
+        """
+        Finish the replication executed by a forked child process - closing
+        its output database, and sending any exception (and its traceback)
+        to the parent process - and exit the child process.
+        """
+        try:
+            self.__databaseManager.close_output_database(delete=False)
+        except Exception as e:
+            logger.error("Unable to close output database: %s", e)
+            exception = exception or e
+            
+        if exception is not None:
+            tbstring = "".join(format_tb(exception.__traceback__))
+            errmsg = "{0}\0{1}".format(exception, tbstring)
+            try:
+                os.write(self.__errorFd,
+                         errmsg.encode('utf-8', 'replace')[:_MAX_FORKED_ERROR_SIZE])
+            except OSError:
+                pass
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(0 if exception is None else 1)
+
+    def _wait_for_child(self, children):
+        """
+        Wait for any one of the passed forked child processes (a dictionary
+        of (run number, database path, error pipe file descriptor) keyed
+        by process ID) to exit, remove it from the dictionary, and record
+        its replication's result.
+        """
+        pid, status = os.waitpid(-1, 0)
+        if pid not in children:
+            return
+        runNumber, dbpath, readFd = children.pop(pid)
+        with os.fdopen(readFd, 'rb') as f:
+            errmsg = f.read().decode('utf-8', 'replace')
+            
+        exitcode = os.waitstatus_to_exitcode(status)
+        if exitcode == 0 and not errmsg:
+            self.__results.append((runNumber, dbpath, None, None))
+            return
+        
+        if errmsg:
+            msg, sep, tbstring = errmsg.partition('\0')
+        else:
+            msg = "Replication process exited with code {0}".format(exitcode)
+            tbstring = None
+        exception = SimError(_ERROR_NAME, "{0}", msg)
+        self.__results.append((runNumber, dbpath, exception, tbstring))
+
+
+class _ForkReplicationsEvent(SimEvent):
+    """
+    The end-of-warmup event at which a :class:`SimForkedReplications`
+    forks its replications.
+    """
+    def __init__(self, forkedReplications, warmupLength):
+        super().__init__(warmupLength)
+        self.__forkedReplications = forkedReplications
+
+    def process_impl(self):
+        self.__forkedReplications._fork_replications()
+
+
+class _WarmupForked(Exception):
+    """
+    Raised in the parent (warmup) process of a :class:`SimForkedReplications`
+    once all of its forked replications have finished, to end event
+    processing.
+    """
+    pass
+
+
+def _exit_on_sigterm(signum, frame):
+    """
+    SIGTERM handler for the parent (warmup) process of a
+    :class:`SimForkedReplications`; raises SystemExit, so that the forked
+    children are terminated as well.
+    """
+    raise SystemExit(1)
+
+
 class SimReplicator(QObject):
     """
     The ``SimReplicator`` manages/executes a set of
@@ -346,7 +1086,95 @@ class SimReplicator(QObject):
     sent to each replication.  This ensures that each replication uses
     an identical dataset table.  When the first (successful) replication
     completes, it's database becomes the master; when subsequent replications
-    complete, their dataset values are merged into the master.
+    complete, their dataset values are merged into the master. Each
+    replication's database is a scratch database, tuned for write speed
+    rather than durability. If the Output Database InMemoryReplications
+    configuration setting is on, each replication loads its copy into
+    memory and writes it back to disk only once, at the end of the run.
+    
+    Common Random Numbers and Antithetic Pairs
+    ------------------------------------------
+    
+    Each replication initializes its random number streams based on its run
+    number, so replicating two scenarios of a model over the same run range
+    uses common random numbers (as long as each stream serves the same
+    purpose in both scenarios - see
+    :func:`~simprovise.core.simrandom.shared_streams`).
+    
+    If the replicator is created with ``antithetic`` set to ``True``, the
+    replications are executed as antithetic pairs: runs ``fromRun`` and
+    ``fromRun+1`` both sample from the random number streams of run
+    ``fromRun``, the first using uniform variates U and the second 1-U;
+    runs ``fromRun+2`` and ``fromRun+3`` do the same using the streams for
+    run ``fromRun+2``, and so on. The number of runs must therefore be even.
+    The paired runs' results can be averaged via
+    :meth:`~simprovise.simulation.SimulationResult.sample`.
+    
+    Sharded Output
+    --------------
+    
+    If the replicator is created with ``sharded`` set to ``True`` (or if it
+    is ``None`` and the Output Database ShardedReplications configuration
+    setting is on), replication databases are not merged. Instead, each
+    finished replication's database is moved (as-is) into a shard directory
+    and listed in a :class:`~simprovise.database.outputdb.SimShardManifest`,
+    whose path becomes the output database path. That path may be opened
+    (e.g. by a :class:`~simprovise.simulation.SimulationResult`) as a
+    :class:`~simprovise.database.outputdb.SimShardedOutputDatabase`, which
+    reads each run's data from its shard. Saving a sharded output database
+    compacts the shards into a single output database file.
+    
+    Fork After Warmup
+    -----------------
+    
+    If the replicator is created with ``forkAfterWarmup`` set to ``True`` (or
+    if it is ``None`` and the Replication ForkAfterWarmup configuration
+    setting is on), the replications are executed by a
+    :class:`SimForkedReplications` in a single pool worker process: the
+    model is simulated through the warmup once, and each replication is
+    then forked from that warmed-up state to simulate its own batches, with
+    at most ``max_concurrent_replications`` of them executing at once. This
+    requires ``os.fork()`` (i.e., it is not available on Windows) and a
+    warmup period, and cannot be combined with antithetic replications.
+    Note that it changes the replications' statistical properties: they
+    all start their first batch from the same model state.
+    
+    Sequential Replications
+    -----------------------
+    
+    Rather than executing a fixed number of replications,
+    :meth:`execute_replications` can execute them sequentially, in waves,
+    until the confidence intervals of specified dataset statistics are
+    narrow enough - i.e., until a set of
+    :class:`~simprovise.simulation.SimPrecisionTarget` objects are met -
+    or a maximum number of replications (the replication range) have been
+    executed. This avoids executing more replications than are needed when
+    the output turns out to be less variable than expected.
+    
+    Worker Start-Up
+    ---------------
+    
+    Replication worker processes are started via the multiprocessing
+    ``'spawn'`` start method by default; each is a new Python process that
+    imports simprovise, its dependencies and the main script before it
+    executes its first replication. With the ``'forkserver'`` start method
+    (where available), workers are instead forked from a server process
+    that has already imported the main script and the simprovise packages,
+    which can reduce each worker's start-up latency from a significant
+    fraction of a second to milliseconds. The model is preloaded only if it
+    is the main script; a model loaded from a script path (which may be a
+    different model for each replicator created by a process) is loaded by
+    each worker. (The forkserver is started with the module search path and
+    model script path of the replicator that first uses it; it is replaced
+    if a subsequent replicator's differ.) The start-up latency of each worker
+    process started by :meth:`execute_replications` is available via
+    :attr:`worker_startup_times`.
+    
+    If worker processes repeatedly fail to start (e.g. because the main
+    script cannot be imported), the pool would otherwise replace them
+    indefinitely; instead, :meth:`execute_replications` terminates the pool
+    and raises a :class:`~simprovise.core.simexception.SimError` (or, if
+    executing asynchronously, cancels the replications).
     
     Context Manager Use
     -------------------
@@ -445,6 +1273,36 @@ class SimReplicator(QObject):
     :param nBatches:     The number of batches to execute
     :type nBatches:      `int`    
     
+    :param antithetic:   If ``True``, execute replications as antithetic
+                         pairs. Defaults to ``False``
+    :type antithetic:    `bool`    
+    
+    :param sharded:      If ``True``, keep each replication's output
+                         database as a shard rather than merging them. If
+                         ``None`` (the default), the Output Database
+                         ShardedReplications configuration setting applies.
+    :type sharded:       `bool` or ``None``
+    
+    :param replicationsPerWorker: The maximum number of replications
+                         executed by each pool worker process; zero for no
+                         limit. If ``None`` (the default), the Replication
+                         ReplicationsPerWorker configuration setting applies.
+    :type replicationsPerWorker: `int` or ``None``
+    
+    :param forkAfterWarmup: If ``True``, execute the replications as a
+                         :class:`SimForkedReplications`, sharing a single
+                         simulated warmup. If ``None`` (the default), the
+                         Replication ForkAfterWarmup configuration setting
+                         applies.
+    :type forkAfterWarmup: `bool` or ``None``
+    
+    :param startMethod:  The multiprocessing start method used to start
+                         replication worker processes - ``'spawn'`` or
+                         ``'forkserver'``. If ``None`` (the default), the
+                         Replication WorkerStartMethod configuration setting
+                         applies.
+    :type startMethod:   `str` or ``None``
+    
     """
     ReplicationsComplete = Signal()
     ReplicationsCancelled = Signal()
@@ -452,7 +1310,9 @@ class SimReplicator(QObject):
     ReplicationFinished = Signal(int, bool, str)
     ReplicationProgress = Signal(int, int)
 
-    def __init__(self, model, warmupLength, batchLength, nBatches):
+    def __init__(self, model, warmupLength, batchLength, nBatches, *,
+                 antithetic=False, sharded=None, replicationsPerWorker=None,
+                 forkAfterWarmup=None, startMethod=None):
         """
         Set up the replication sequence based on the model, run control
         parameters, and replication parameters.  Also create the initial
@@ -469,7 +1329,46 @@ class SimReplicator(QObject):
         self.__warmupLength = warmupLength
         self.__batchLength = batchLength
         self.__nBatches = nBatches
+        self.__antithetic = bool(antithetic)
+        if sharded is None:
+            sharded = simconfig.get_output_sharded_replications()
+        self.__sharded = bool(sharded)
+        self.__shardManifest = None
+        if replicationsPerWorker is None:
+            replicationsPerWorker = simconfig.get_replications_per_worker()
+        if replicationsPerWorker < 0:
+            msg = "Replications per worker ({0}) must be non-negative"
+            raise SimError(_ERROR_NAME, msg, replicationsPerWorker)
+        self.__replicationsPerWorker = replicationsPerWorker
+        if forkAfterWarmup is None:
+            forkAfterWarmup = simconfig.get_fork_after_warmup()
+        self.__forkAfterWarmup = bool(forkAfterWarmup)
+        if self.__forkAfterWarmup:
+            if self.__antithetic:
+                msg = "Fork-after-warmup replications cannot be antithetic"
+                raise SimError(_ERROR_NAME, msg)
+            if not hasattr(os, 'fork'):
+                msg = "Fork-after-warmup replications are not supported on this platform"
+                raise SimError(_ERROR_NAME, msg)
+            if not warmupLength > 0:
+                msg = "Fork-after-warmup replications require a warmup period"
+                raise SimError(_ERROR_NAME, msg)
+        if startMethod is None:
+            startMethod = simconfig.get_worker_start_method()
+        if startMethod not in _START_METHODS:
+            msg = "Invalid worker start method ({0}); must be one of {1}"
+            raise SimError(_ERROR_NAME, msg, startMethod, _START_METHODS)
+        if startMethod not in multiprocessing.get_all_start_methods():
+            msg = "Worker start method {0} is not supported on this platform"
+            raise SimError(_ERROR_NAME, msg, startMethod)
+        self.__startMethod = startMethod
+        self.__workerStartupTimes = []
+        self.__executingWaves = False
+        self.__precisionMet = None
         self.__pool = None
+        self.__nProcesses = None
+        self.__workerContext = None
+        self.__workersStarted = None
         self.__status = _STATUS_NOT_STARTED
         self.__nRuns = None        
         self.__nRepsStarted = 0
@@ -515,7 +1414,11 @@ class SimReplicator(QObject):
         if value is not None:
             logger.error("Replication error %s, cleaning up...", value)
             # exceptioned raised, so delete the output database
-            if self.__masterDbPath:
+            if self.__shardManifest:
+                logger.error("Replication error: removing sharded database %s...",
+                             self.__masterDbPath)
+                self.__shardManifest.remove()
+            elif self.__masterDbPath:
                 logger.error("Replication error: removing database %s...",
                              self.__masterDbPath)
                 os.remove(self.__masterDbPath)
@@ -545,6 +1448,66 @@ class SimReplicator(QObject):
         """
         return self.__nBatches
 
+    @property
+    def antithetic(self):
+        """
+        True if replications are executed as antithetic pairs
+        """
+        return self.__antithetic
+
+    @property
+    def sharded(self):
+        """
+        True if replication output databases are kept as shards (listed in
+        a shard manifest) rather than merged
+        """
+        return self.__sharded
+
+    @property
+    def replications_per_worker(self):
+        """
+        The maximum number of replications executed by each worker process
+        in the replication pool, or zero if there is no limit
+        """
+        return self.__replicationsPerWorker
+
+    @property
+    def fork_after_warmup(self):
+        """
+        True if replications share a single simulated warmup, each forked
+        from the warmed-up model (see :class:`SimForkedReplications`)
+        """
+        return self.__forkAfterWarmup
+
+    @property
+    def start_method(self):
+        """
+        The multiprocessing start method used to start replication worker
+        processes - 'spawn' or 'forkserver'
+        """
+        return self.__startMethod
+
+    @property
+    def worker_startup_times(self):
+        """
+        Returns a list of the start-up latencies (in seconds) of the worker
+        processes started by the latest :meth:`execute_replications` call
+        - the time from each worker's launch until it was ready to execute
+        replications - in the order in which their first replications
+        finished
+        """
+        return list(self.__workerStartupTimes)
+
+    @property
+    def precision_met(self):
+        """
+        True if the latest (sequential) :meth:`execute_replications` call
+        stopped because its precision targets were met, False if they were
+        not met by the maximum number of replications - or None if no
+        precision targets have been specified
+        """
+        return self.__precisionMet
+
     @property
     def status(self):
         """
@@ -594,8 +1557,9 @@ class SimReplicator(QObject):
     def output_dbpath(self):
         """
         Returns the path to the (temporary) output database, once it is created
-        (after the first replication completes).  Should generally not be called
-        during execution, and raises an exception if the path has not yet been set.
+        (after the first replication completes) - or for sharded output, the
+        path to its shard manifest.  Should generally not be called during
+        execution, and raises an exception if the path has not yet been set.
         """
         if self.__masterDbPath:
             return self.__masterDbPath
@@ -676,7 +1640,8 @@ class SimReplicator(QObject):
             os.remove(self.__initializedDbPath)
             self.__initializedDbPath =  None
 
-    def execute_replications(self, replicationParameters, asynch=False):
+    def execute_replications(self, replicationParameters, asynch=False, *,
+                             precisionTargets=None, waveSize=None):
         """
         Executes replications using a multiprocessing Pool, with the
         replication runs (and the size of the pool) sepcified via the passed
@@ -687,26 +1652,64 @@ class SimReplicator(QObject):
 
         The size (maximum number of simultaneous child processes) of the pool
         is specified by the caller, though we do ensure it doesn't exceed
-        the number of replications. We also specify maxtasksperchild
-        as 1, which starts a new process for each replication (rather than
-        reusing processes once we have more than n replications). This is
-        required because model loading (in SimModel) currently breaks if
-        the process has previously loaded the same or a different model.
-        
-        Starting a new process for each run is perhaps a bit inelegant, and
-        it does entail some performance hit, but that hit is likely negligible
-        for large/long-running models (i.e., the hit is constant relative to the
-        simulation length) and using a new process is both easier and more
-        robust. (For small models, with execution time < 1 second, the hit might be
-        ~20%)
+        the number of replications. Pool worker processes are reused for
+        up to :attr:`replications_per_worker` replications each (the pool's
+        maxtasksperchild), resetting and reloading the model before each
+        replication after the first (see :func:`execute_replication`).
+        
+        Starting a new (spawned) process for each run entails a constant
+        per-run cost - Python interpreter startup plus importing simprovise
+        and the model - which can be a significant fraction of the total
+        execution time for small models. Setting replications per worker to 1
+        does exactly that, which may be the more robust option for models
+        that hold state the model reset does not know about (e.g. module-level
+        variables of modules imported from outside the model's directory.)
+        
+        If :attr:`fork_after_warmup` is set, the pool has a single worker
+        process, which simulates the warmup once and forks the replications
+        from there (see :class:`SimForkedReplications`).
+        
+        If precision targets (a sequence of
+        :class:`~simprovise.simulation.SimPrecisionTarget`) are passed, the
+        replications are executed sequentially, in waves of ``waveSize``
+        runs (by default, the size of the pool, and at least two) in run
+        number order. After each wave, the output of all of the replications
+        executed so far is evaluated against the targets; execution stops
+        once all of them are met, or when all of the runs in the replication
+        range (which is therefore the maximum) have been executed. Whether
+        or not the targets were met is available via :attr:`precision_met`.
+        Sequential replications are always executed synchronously.
         """
         print("in SimReplicator.execute_replications")
         if self.in_progress:
             raise SimError(_ERROR_NAME, "Replications are currently in progress")
 
-        self.__status = _STATUS_IN_PROGRESS
         firstRun, lastRun = replicationParameters.replication_range
-        self.__nRuns = lastRun + 1 - firstRun
+        nRuns = lastRun + 1 - firstRun
+        if self.__antithetic:
+            if nRuns % 2:
+                msg = "Antithetic replications require an even number of runs ({0} requested)"
+                raise SimError(_ERROR_NAME, msg, nRuns)
+            shared = simrandom.shared_streams()
+            if shared:
+                logger.warning("Random number streams %s are shared by more than one distribution; antithetic/common random number synchronization may be reduced",
+                               shared)
+        if precisionTargets:
+            if asynch:
+                msg = "Sequential (precision target) replications cannot be executed asynchronously"
+                raise SimError(_ERROR_NAME, msg)
+            if waveSize is None:
+                waveSize = max(2, min(replicationParameters.max_concurrent_replications,
+                                      nRuns))
+            if waveSize < 2:
+                msg = "Sequential replication wave size ({0}) must be at least two"
+                raise SimError(_ERROR_NAME, msg, waveSize)
+            if self.__antithetic:
+                waveSize += waveSize % 2
+        
+        self.__precisionMet = None
+        self.__status = _STATUS_IN_PROGRESS
+        self.__nRuns = nRuns
         
         # The number of processes in the Pool should be the minimum of the
         # maximum current replications (which typically defaults to cpu_count)
@@ -714,45 +1717,180 @@ class SimReplicator(QObject):
         # no need for more processes than we have replications to perform.
         n = min(replicationParameters.max_concurrent_replications, self.__nRuns)
         
-        # make sure we use the 'spawn' start method; 'fork' (presumably because
-        # it carries over the SimModel object from the parent process) results
-        # in 'register element with duplicate element id' errors.
-        # As of Python 3.12, explicitly setting 'spawn' is required on Linux
-        # (where the default is 'fork)
-        ctx = multiprocessing.get_context('spawn')
+        # make sure we use the 'spawn' (or 'forkserver') start method; 'fork'
+        # (presumably because it carries over the SimModel object from the
+        # parent process) results in 'register element with duplicate element
+        # id' errors. As of Python 3.12, explicitly setting 'spawn' is
+        # required on Linux (where the default is 'fork)
+        ctx = _worker_context(self.__startMethod)
+        self.__startMethod = ctx.get_start_method()
         
-        with multiprocessing.pool.Pool(processes=n, maxtasksperchild=1,
-                                  context=ctx) as pool:
+        maxtasks = self.__replicationsPerWorker or None
+        nProcesses = 1 if self.__forkAfterWarmup else n
+        self.__nProcesses = nProcesses
+        self.__workerContext = ctx
+        self.__workersStarted = ctx.Value('i', 0)
+        with multiprocessing.pool.Pool(processes=nProcesses,
+                                       initializer=_initialize_worker,
+                                       initargs=(self.__workersStarted,),
+                                       maxtasksperchild=maxtasks,
+                                       context=ctx) as pool:
             self.__pool = pool
+            self.__workerStartupTimes = []
             self.__nRepsStarted = 0
             self.__nRepsFailed = 0
             self.__nRepsFinished = 0
             self.__msgQueue.start_listening()
-            logger.info("Replication process pool initialied with %d processes", n)
+            logger.info("Replication process pool initialied with %d processes",
+                        nProcesses)
     
-            for runNumber in range(firstRun, lastRun+1):
-                dbpath = self._clone_initialized_database(self.__tempdir.name)
-                ar = pool.apply_async(execute_replication,
-                                      self._execute_args(runNumber, dbpath),
-                                      callback=self._callback)
+            if precisionTargets:
+                asyncResults = []
+                self._execute_waves(pool, firstRun, lastRun, n,
+                                    precisionTargets, waveSize)
+            else:
+                asyncResults = self._submit_replications(pool,
+                                                         range(firstRun, lastRun+1),
+                                                         firstRun, n)
     
             pool.close()
             logger.info("Running replications on thread %d", threading.get_ident())
             if asynch:
-                self._async_join(pool)
+                self._async_join(pool, asyncResults)
             else:
+                self._wait_for_results(asyncResults)
                 pool.join()
                 self.__status = _STATUS_COMPLETE
                 self.__msgQueue.stop_listening()
                 self.ReplicationsComplete.emit()
                 logger.info("(synchronous) replications complete")
 
-    def _async_join(self, pool):
+    def _submit_replications(self, pool, runNumbers, firstRun, n):
+        """
+        Submit the passed run numbers to the passed pool for execution,
+        returning the pool's AsyncResult(s) for those replications. n is the
+        maximum number of replications to execute concurrently; firstRun is
+        the first run of the replication range (see :meth:`_execute_args`).
+        """
+        if self.__forkAfterWarmup:
+            runs = [(runNumber, self._clone_initialized_database(self.__tempdir.name))
+                    for runNumber in runNumbers]
+            args = (self._model_path(), runs, self.__warmupLength,
+                    self.__batchLength, self.__nBatches, n,
+                    self.__msgQueue.queue)
+            return [pool.apply_async(execute_forked_replications, args,
+                                     callback=self._forked_callback)]
+        
+        asyncResults = []
+        for runNumber in runNumbers:
+            dbpath = self._clone_initialized_database(self.__tempdir.name)
+            args = self._execute_args(runNumber, dbpath, firstRun)
+            asyncResults.append(pool.apply_async(execute_replication, args,
+                                                 callback=self._callback))
+        return asyncResults
+
+    def _execute_waves(self, pool, firstRun, lastRun, n, precisionTargets,
+                       waveSize):
+        """
+        Execute sequential replications in waves (of waveSize run numbers)
+        on the passed pool, waiting for each wave to finish before
+        evaluating the passed precision targets and either stopping (if
+        they are all met) or submitting the next wave. Stops after run
+        number lastRun regardless.
+        """
+        self.__precisionMet = False
+        self.__nRuns = 0
+        self.__executingWaves = True
+        try:
+            waveStart = firstRun
+            while waveStart <= lastRun and not self.cancelled:
+                waveEnd = min(waveStart + waveSize, lastRun + 1)
+                self.__nRuns += waveEnd - waveStart
+                asyncResults = self._submit_replications(pool,
+                                                         range(waveStart, waveEnd),
+                                                         firstRun, n)
+                self._wait_for_results(asyncResults)
+                waveStart = waveEnd
+                if self._precision_met(precisionTargets):
+                    self.__precisionMet = True
+                    break
+        finally:
+            self.__executingWaves = False
+            self.cleanup()
+            
+        if self.__precisionMet:
+            logger.info("Precision targets met after %d replications", self.__nRuns)
+        else:
+            logger.warning("Precision targets not met after %d replications (the maximum)",
+                           self.__nRuns)
+
+    def _precision_met(self, precisionTargets):
+        """
+        Returns True if the output of the replications executed so far meets
+        all of the passed precision targets.
+        
+        The master database is opened without upgrading it; it was created
+        by this version of Simprovise, and it is still being written to as
+        subsequent waves' run data are merged.
+        """
+        from simprovise.simulation import SimulationResult
+        if not self.__masterDbPath:
+            return False
+        
+        result = SimulationResult(self.__model.filename, self.__masterDbPath,
+                                  upgrade=False)
+        try:
+            return all(target.is_met(result, antithetic=self.__antithetic)
+                       for target in precisionTargets)
+        except SimError as e:
+            logger.warning("Unable to evaluate precision targets: %s", e)
+            return False
+        finally:
+            result.dbMgr.close_output_database(delete=False)
+
+    def _wait_for_results(self, asyncResults):
+        """
+        Wait for the passed pool AsyncResults to be ready, checking
+        periodically for worker processes that failed to start (see
+        :meth:`_check_workers`).
+        """
+        for asyncResult in asyncResults:
+            while not (asyncResult.ready() or self.cancelled):
+                asyncResult.wait(_WORKER_CHECK_INTERVAL)
+                self._check_workers()
+
+    def _check_workers(self):
+        """
+        Raise a SimError (after terminating the pool) if more than
+        _MAX_WORKER_START_FAILURES pool worker processes have failed to
+        start. A failed worker is replaced by the pool, so left unchecked,
+        the replications would never finish.
+        
+        Every worker process launched by the pool either increments the
+        shared started count (via _initialize_worker()), is still starting
+        - at most one per pool process - or failed to start.
+        """
+        launched = self.__workerContext.launch_count
+        failed = launched - self.__workersStarted.value - self.__nProcesses
+        if failed <= _MAX_WORKER_START_FAILURES or self.cancelled:
+            return
+        
+        logger.error("%d of %d replication worker processes failed to start; terminating replications",
+                     failed, launched)
+        self.__status = _STATUS_CANCELLED
+        self.__pool.terminate()
+        self.__msgQueue.stop_listening()
+        msg = "{0} replication worker processes failed to start"
+        raise SimError(_ERROR_NAME, msg, failed)
+
+    def _async_join(self, pool, asyncResults):
         """
         An asynchronous join the to the passed multiprocessing pool, allowing
         a UI to be responsive during replication execution.  Emits a
         ReplicationsComplete after the join - unless the replication tasks were
-        cancelled by the client (via a cancel() call)
+        cancelled by the client (via a cancel() call), or because worker
+        processes failed to start (see :meth:`_check_workers`), in which case
+        a ReplicationsCancelled is emitted.
 
         The pool.join() is executed on a separate thread, emitting a
         ReplicationsComplete signal once that completes.  Connecting that
@@ -763,6 +1901,12 @@ class SimReplicator(QObject):
         """
         def joinAndSignal(pool):
             startTime = time.time()
+            try:
+                self._wait_for_results(asyncResults)
+            except SimError as e:
+                logger.error("Replications cancelled: %s", e)
+                self.ReplicationsCancelled.emit()
+                return
             pool.join()
             self.__msgQueue.stop_listening()
             if self.cancelled:
@@ -809,27 +1953,53 @@ class SimReplicator(QObject):
         shutil.copyfile(self.__initializedDbPath, clonepath)
         return clonepath
 
-    def _execute_args(self, runNumber, dbpath):
+    def _model_path(self):
+        """
+        Returns the model path to be passed to a replication task function.
+        
+        If ther replicator is being invoked directly from the model script
+        itself (and the model script therefore was not loaded via 
+        model.load_model_from_script()) then the path is None, so that the
+        task won't do a load_model_from_script() either.
+        """
+        if self.__model.loaded_from_script():
+            return self.__model.filename
+        else:
+            return None
+
+    def _execute_args(self, runNumber, dbpath, firstRun=1):
         """
         Returns the arguments to an execute_replication() call for the
         specified run number as a sequence, so that they may be passed
         in as part of a pool.apply_async() call.
-        """
         
-        # If ther replicator is being invoked directly from the model script
-        # itself (and the model script therefore was not loaded via 
-        # model.load_model_from_script()) then tell execute_replication() 
-        # by passing a None modelpath parameter, so it won't do a
-        # load_model_from_script() either. 
-        modelPath = None
-        if self.__model.loaded_from_script():
-            modelPath = self.__model.filename
+        For antithetic replications, the passed firstRun identifies the
+        first run of the first pair; each pair uses the random run number
+        of its first run.
+        """
+        modelPath = self._model_path()
+        if self.__antithetic:
+            pairOffset = (runNumber - firstRun) % 2
+            randomRunNumber = runNumber - pairOffset
+            antithetic = bool(pairOffset)
+        else:
+            randomRunNumber = runNumber
+            antithetic = None
         
         args = (modelPath, dbpath, runNumber,
                 self.__warmupLength, self.__batchLength, self.__nBatches,
-                self.__msgQueue.queue)
+                self.__msgQueue.queue, randomRunNumber, antithetic)
         return args
 
+    def _forked_callback(self, results):
+        """
+        Callback invoked after an execute_forked_replications() task
+        finishes, with a result tuple (as passed to :meth:`_callback`) for
+        each of its replications.
+        """
+        for result in results:
+            self._callback(result)
+
     def _callback(self, result):
         """
         Callback invoked after a replication finishes. Result is a tuple
@@ -839,6 +2009,8 @@ class SimReplicator(QObject):
         - An exception if the run failed, or None if it completed successfully
         - A string containing the traceback if the run failed, or None if it
           completed successfully
+        - The start-up latency of the worker process that executed the
+          replication, if it was that worker's first replication (or None)
 
         By making all runs "succeed" (by not letting exceptions leak out of
         the task function executeReplication()), we can more easily get the
@@ -862,7 +2034,11 @@ class SimReplicator(QObject):
         for the run.  (each __results value is an exception or None if the
         run completed successfully)
         """
-        runNumber, dbpath, exception, tbstring = result
+        runNumber, dbpath, exception, tbstring, startupTime = result
+        if startupTime is not None:
+            self.__workerStartupTimes.append(startupTime)
+            logger.info("Replication worker start-up time (%s): %.4f seconds",
+                        self.__startMethod, startupTime)
         self.__nRepsFinished += 1
         if exception:
             logger.error("Run %d failed: %s", runNumber, exception)
@@ -871,7 +2047,10 @@ class SimReplicator(QObject):
         else:
             print("Replication Run", runNumber, "complete")
             try:
-                self._merge_run(dbpath, runNumber)
+                if self.__sharded:
+                    self._add_shard(dbpath, runNumber)
+                else:
+                    self._merge_run(dbpath, runNumber)
             except Exception as e:
                 print("Run", runNumber, "Data merge from ", dbpath,
                       "to", self.__masterDbPath, "failed:", e)
@@ -894,7 +2073,8 @@ class SimReplicator(QObject):
             if self.__masterDbConnection:
                 self.__masterDbConnection.close()
                 self.__masterDbConnection = None
-            self.cleanup()
+            if not self.__executingWaves:
+                self.cleanup()
 
     def _merge_run(self, dbpath, runNumber):
         """
@@ -939,25 +2119,41 @@ class SimReplicator(QObject):
         Delete any dataset values for the passed run number from the master
         database.  (This handles the situation where the caller repeats a run
         in successive calls to executeReplications().) Then copy all rows
-        from the passed srcpath database's datasetvalue table to the
-        datasetvalue table in the passed master database connection (conn)
-        It is assumed that the source database has datasetvalue data only for
-        the passed runNumber.
+        from the passed srcpath database's datasetvalue and datasetsummary
+        tables to the corresponding tables in the passed master database
+        connection (conn). It is assumed that the source database has data
+        only for the passed runNumber.
         """
         startTime = time.time()
-        cursor = conn.cursor()
-        cursor.execute("delete from datasetvalue where run = ?", (runNumber,))
-        attachsql = "attach '{0}' as srcdb".format(srcpath)
-        cursor.execute(attachsql)
-        sqlstr = """
-                 insert into datasetvalue
-                 select * from srcdb.datasetvalue
-                 """
-        cursor.execute(sqlstr)
-        conn.commit()
-        cursor.execute("detach srcdb")
+        copy_run_data(conn, srcpath, runNumber)
         #print("copydatavalues for run", runNumber, srcpath, "time", time.time()-startTime)
 
+    def _add_shard(self, dbpath, runNumber):
+        """
+        The sharded output counterpart to _merge_run(): move a passed
+        database (created by a single replication) into the shard directory
+        and add it to the shard manifest, replacing the shard of a repeated
+        run. On the very first call, the shard directory and manifest are
+        created, and masterDbPath is set to the manifest path.
+        
+        Unlike a merge, this takes (roughly) constant time regardless of
+        the size of the run's output.
+        """
+        if not self.__shardManifest:
+            sharddir = tempfile.mkdtemp(suffix='.simshards')
+            self.__shardManifest = SimShardManifest(os.path.join(sharddir,
+                                                                 _SHARD_MANIFEST_NAME))
+            self.__masterDbPath = self.__shardManifest.path
+        elif not os.path.isfile(self.__masterDbPath):
+            raise SimError(_ERROR_NAME,
+                           "Replicator Output Database has been removed")
+        
+        shardpath = os.path.join(self.__shardManifest.directory,
+                                 'run{0}.simoutput'.format(runNumber))
+        shutil.move(dbpath, shardpath)
+        self.__shardManifest.add_shard(runNumber, shardpath)
+        self.__shardManifest.save()
+
     def _replication_started(self, runNumber):
         """
         Invoked when an asynchronous replication starts.
@@ -265,18 +265,25 @@ class SimRunControlScheduler(QObject):
                                  progress messages will be sent)
     :type msgQueue:              :class:`~.messagequeue.SimMessageQueue` or ``None`` 
 
+    :param databaseManager:      The database manager for the run's output
+                                 database; if specified, output is
+                                 committed and summarized in that database
+                                 at the end of each batch. (if ``None``, the
+                                 datasets' datasinks are just finalized)
+    :type databaseManager:       :class:`~simprovise.database.outputdb.SimDatabaseManager` or ``None``
         
     """
     RunControlMessage = Signal(str)
 
     def __init__(self, model, runControlParameters, progressIntervalPct=None,
-                 *, msgQueue=None):
+                 *, msgQueue=None, databaseManager=None):
         super().__init__()
         assert not progressIntervalPct or (0 < progressIntervalPct and progressIntervalPct < 100), "Invalid progressInterval percentage"
         self.__model = model
         self.__runControlParameters = runControlParameters
         self.__progressIntervalPct = progressIntervalPct
         self.__msgQueue = msgQueue
+        self.__databaseManager = databaseManager
 
     @property
     def model(self):
@@ -353,7 +360,10 @@ class SimRunControlScheduler(QObject):
     def finalize_batch(self, batchNumber):
         """
         Finalizes all of the model datasets for a batch when the simulation
-        of that batch is complete.
+        of that batch is complete, and then finalizes the batch's output
+        in the output database (if any) - waiting for its values to be
+        committed (by the background writer thread, if there is one) and
+        writing its summary statistics.
         
         :param batchNumber: The batch to finalize.
         :type batchNumber:  ``int`` > 0 and <= :meth:`nbatches`
@@ -361,6 +371,8 @@ class SimRunControlScheduler(QObject):
         """
         for dset in self.model.datasets:
             dset.finalize_batch(batchNumber)
+        if self.__databaseManager:
+            self.__databaseManager.finalize_batch(batchNumber)
 
     def warmup_complete(self):
         """
@@ -18,8 +18,9 @@
 # ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS 
 # FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
 #===============================================================================
-import os, sys, shutil, types
+import os, sys, shutil, types, math
 from contextlib import redirect_stdout
+from statistics import NormalDist
 import numpy as np
 
 #SCRIPTPATH = "models\\mm1.py"
@@ -29,7 +30,8 @@ import numpy as np
 from simprovise.core.model import SimModel
 from simprovise.runcontrol.replication import (SimReplication, SimReplicator)
 from simprovise.runcontrol.simruncontrol import (SimReplicationParameters)
-from simprovise.database import (SimDatabaseManager, SimDatasetSummaryData)
+from simprovise.database import (SimDatabaseManager, SimDatasetSummaryData,
+                                 SimShardManifest)
 from simprovise.core import SimError
 from simprovise.core.simlogging import SimLogging
 from simprovise.core.simtime import SimTime
@@ -44,6 +46,14 @@ _NAN = float('nan')
 _REPORT_SUFFIX = '_report'
 _REPORT_EXT = '.txt'
 
+# Maps the statistic names accepted by SimulationResult.sample() and
+# paired_difference() to SimDatasetStatistics attributes
+_STATISTIC_ATTRIBUTES = {'count': 'counts', 'mean': 'means', 'min': 'mins',
+                         'max': 'maxs', 'median': 'medians',
+                         'pct05': 'pct05s', 'pct10': 'pct10s',
+                         'pct25': 'pct25s', 'pct75': 'pct75s',
+                         'pct90': 'pct90s', 'pct95': 'pct95s'}
+
 logger = SimLogging.get_logger(__name__)
 
 @apidoc
@@ -203,7 +213,9 @@ class Simulation(object):
 
     @staticmethod
     def replicate(modelpath, warmupLength=None, batchLength=None, nBatches=1,
-                  *, fromRun=1, toRun=8, outputpath=None, overwrite=False):
+                  *, fromRun=1, toRun=8, outputpath=None, overwrite=False,
+                  antithetic=False, sharded=None, forkAfterWarmup=None,
+                  startMethod=None, precisionTargets=None, waveSize=None):
         """
         Start one or more simulation replications (with different random
         number streams), each in their own process. Replications can run in
@@ -255,6 +267,53 @@ class Simulation(object):
                              Should only be True if outputpath is not None
         :type overwrite:     bool
         
+        :param antithetic:   If True, execute the replications as antithetic
+                             pairs (see
+                             :class:`~simprovise.runcontrol.replication.SimReplicator`);
+                             the number of runs must be even. Defaults to
+                             False.
+        :type antithetic:    bool
+        
+        :param sharded:      If True, keep each replication's output database
+                             as a separate shard rather than merging them (see
+                             :class:`~simprovise.runcontrol.replication.SimReplicator`);
+                             a saved output database is compacted into a
+                             single file. Defaults to None, in which case the
+                             Output Database ShardedReplications configuration
+                             setting applies.
+        :type sharded:       bool or None
+        
+        :param forkAfterWarmup: If True, simulate the warmup once and fork
+                             each replication from the warmed-up model (see
+                             :class:`~simprovise.runcontrol.replication.SimReplicator`);
+                             requires a warmup period and os.fork(). Defaults
+                             to None, in which case the Replication
+                             ForkAfterWarmup configuration setting applies.
+        :type forkAfterWarmup: bool or None
+        
+        :param startMethod:  The multiprocessing start method used to start
+                             replication worker processes, 'spawn' or
+                             'forkserver' (see
+                             :class:`~simprovise.runcontrol.replication.SimReplicator`).
+                             Defaults to None, in which case the Replication
+                             WorkerStartMethod configuration setting applies.
+        :type startMethod:   str or None
+        
+        :param precisionTargets: If specified, execute the replications
+                             sequentially, in waves, stopping once all of
+                             these targets are met; runs fromRun through
+                             toRun are then the maximum range of replications
+                             (see
+                             :class:`~simprovise.runcontrol.replication.SimReplicator`).
+                             Defaults to None (execute all of the runs).
+        :type precisionTargets: sequence of :class:`SimPrecisionTarget` or None
+        
+        :param waveSize:     The number of replications in each wave of
+                             sequential replications. Defaults to None, in
+                             which case it is the number of replications
+                             executed concurrently (but at least two).
+        :type waveSize:      int or None
+        
         :raises:             :class:`~.simexception.SimError`
                              Raised if parameters are invalid or an error
                              occurs during the simulation.
@@ -273,12 +332,17 @@ class Simulation(object):
 
         replicationParameters = SimReplicationParameters()
         replicationParameters.set_replication_range(fromRun, toRun)
-        replicator = SimReplicator(model, warmupLength, batchLength, nBatches)
+        replicator = SimReplicator(model, warmupLength, batchLength, nBatches,
+                                   antithetic=antithetic, sharded=sharded,
+                                   forkAfterWarmup=forkAfterWarmup,
+                                   startMethod=startMethod)
         
         # Use the replicator as a context manager to best ensure temporary
         # database files are cleaned up.
         with replicator:            
-            replicator.execute_replications(replicationParameters, asynch=False)
+            replicator.execute_replications(replicationParameters, asynch=False,
+                                            precisionTargets=precisionTargets,
+                                            waveSize=waveSize)
             if outputpath:
                 Simulation._save_output(replicator.output_dbpath, outputpath)
             return SimulationResult(model.filename, replicator.output_dbpath,
@@ -331,10 +395,15 @@ class Simulation(object):
     @staticmethod
     def _save_output(dbpath, outputhpath):
         """
-        Copies dbpath to outputpath, catching and re-raising any exceptions
+        Copies dbpath to outputpath, catching and re-raising any exceptions.
+        If dbpath is a shard manifest, the shards are compacted into a single
+        output database at outputpath instead.
         """
-        try:        
-            shutil.copy(dbpath, outputhpath)
+        try:
+            if SimShardManifest.is_manifest(dbpath):
+                SimShardManifest.load(dbpath).compact(outputhpath)
+            else:
+                shutil.copy(dbpath, outputhpath)
             print("copy of output database saved to:", outputhpath)
         except Exception as e:
             msg = "Failure saving output database: failure copying {0} to {1}: {2}"
@@ -366,6 +435,12 @@ class SimulationResult(object):
                             :meth:`save_database_as`, the database is deleted
                             on exit. Defaults to False.
         :type isTemporary:  bool
+    
+        :param upgrade:     Flag indicating whether the database is upgraded
+                            to the current schema (see
+                            :class:`~simprovise.database.outputdb.SimArchivedOutputDatabase`)
+                            when opened. Defaults to True.
+        :type upgrade:      bool
         
     """
     # NOTE on directing output to a file (7/26/24)
@@ -380,7 +455,7 @@ class SimulationResult(object):
     #    model name, so SimModel.filename or modelpath should be passed
     #    to the SimulationResult initializer
     
-    def __init__(self, modelpath, dbpath, isTemporary=False):
+    def __init__(self, modelpath, dbpath, isTemporary=False, *, upgrade=True):
         """
         Open the database (specified by dbpath) via SimDatabaseManager.
         If a model is specified, we assume the database is temporary; if no
@@ -394,7 +469,7 @@ class SimulationResult(object):
                     dbpath, isTemporary)
         self.modelpath = modelpath
         self.dbMgr = SimDatabaseManager()
-        self.dbMgr.open_archived_database(dbpath, isTemporary)
+        self.dbMgr.open_archived_database(dbpath, isTemporary, upgrade)
         self.datasetStatistics = None
 
     @apidocskip
@@ -423,7 +498,8 @@ class SimulationResult(object):
         Lazily initializes the datasetStatistics member dictionary, which
         when initialized contains a SimDatasetStatistics instance for each
         dataset in the current database; the dictionary is keyed by dataset
-        element_id and dataset name.
+        element_id and dataset name. The summary data for all of the
+        datasets is retrieved in bulk, rather than dataset by dataset.
         """
         if self.datasetStatistics is None:
             self.datasetStatistics = {}
@@ -433,17 +509,201 @@ class SimulationResult(object):
                 raise SimError(_RESULT_ERROR,
                                "SimResult database has no simulation runs")
 
+            runBatches = SimDatasetStatistics.run_batches(database)
+            summaries = SimDatasetSummaryData.fetch_all(database, runBatches)
             datasets = database.datasets
             dsetstats = self.datasetStatistics
             for dset in datasets:
+                summaryData = [summaries[(dset.element_id, dset.name, run, batch)]
+                               for run, batch in runBatches]
                 dsetstats.setdefault(dset.element_id, {})[dset.name] = \
-                    SimDatasetStatistics(database, dset)
+                    SimDatasetStatistics(database, dset, summaryData)
 
         assert dataset.element_id in self.datasetStatistics, "Element ID not found"
         assert dataset.name in self.datasetStatistics[dataset.element_id], "Dataset name not found"
 
         return self.datasetStatistics[dataset.element_id][dataset.name]
 
+    def _get_dataset(self, elementID, datasetName):
+        """
+        Internal method returns the dataset with the passed element ID and
+        dataset name, raising if there is no such dataset.
+        """
+        database = self.dbMgr.database
+        assert database, "SimResult database not open"
+        for dset in database.datasets:
+            if dset.element_id == elementID and dset.name == datasetName:
+                return dset
+            
+        msg = "No dataset {0} found for element {1}"
+        raise SimError(_RESULT_ERROR, msg, datasetName, elementID)
+
+    def sample(self, elementID, datasetName, statistic='mean', *,
+               antithetic=False):
+        """
+        Returns the values of a summary statistic for a specified dataset
+        as a :class:`SimSample` - one value per run if the output contains
+        multiple runs, or per batch if it contains a single run.
+        
+        If antithetic is True, the runs are assumed to be antithetic pairs
+        (as executed by ``Simulation.replicate(..., antithetic=True)``), and
+        the sample contains the average of each pair's values; the average
+        of a pair is a single observation for the purpose of calculating
+        standard errors and confidence intervals.
+
+        :param elementID:   The element ID of the dataset's element
+        :type elementID:    str
+        
+        :param datasetName: The dataset name (e.g. 'Size' or 'Time')
+        :type datasetName:  str
+        
+        :param statistic:   The summary statistic: 'count', 'mean', 'min',
+                            'max', 'median', or percentile 'pct05', 'pct10',
+                            'pct25', 'pct75', 'pct90' or 'pct95'. Defaults to
+                            'mean'.
+        :type statistic:    str
+        
+        :param antithetic:  If True, average the values of antithetic run
+                            pairs. Defaults to False.
+        :type antithetic:   bool
+        
+        :raises:            :class:`~.simexception.SimError`
+                            Raised if the dataset or statistic is invalid,
+                            or if antithetic is True and the output does not
+                            contain a value for each of an even number of runs.
+        
+        :return:            Statistic values
+        :rtype:             :class:`SimSample`
+
+        """
+        try:
+            attrname = _STATISTIC_ATTRIBUTES[statistic]
+        except KeyError:
+            raise SimError(_RESULT_ERROR, "Invalid statistic specified: {0}", statistic)
+        
+        dset = self._get_dataset(elementID, datasetName)
+        dsetstats = self._get_sim_dataset_statistics(dset)
+        statsample = getattr(dsetstats, attrname)
+        if not antithetic:
+            return statsample
+        
+        nruns = len(self.dbMgr.database.runs())
+        if nruns % 2 or statsample.n != nruns:
+            msg = "Antithetic sample of {0} {1} requires a value for each of an even number of runs"
+            raise SimError(_RESULT_ERROR, msg, elementID, datasetName)
+        
+        pairsample = SimSample(dset)
+        values = statsample.values
+        for i in range(0, nruns, 2):
+            pairsample.append((values[i] + values[i+1]) / 2)
+        return pairsample
+
+    def paired_difference(self, other, elementID, datasetName,
+                          statistic='mean', *, antithetic=False):
+        """
+        Returns the paired differences between the values of a summary
+        statistic in this result and another result (typically of another
+        scenario of the same model), as a :class:`SimSample` whose mean,
+        standard error and :meth:`~SimSample.confidence_interval` estimate
+        the difference between the two scenarios.
+        
+        Values are paired by run (or batch, for single-run results), so both
+        results must cover the same runs. When both scenarios are replicated
+        over the same run range, paired runs use common random numbers, which
+        (by inducing positive correlation between the pairs) typically yields
+        a much narrower confidence interval than comparing independent
+        samples. If antithetic is True, antithetic run pairs are averaged
+        (see :meth:`sample`) in each result before differencing.
+        
+        :param other:       The result to compare against
+        :type other:        :class:`SimulationResult`
+        
+        :param elementID:   The element ID of the dataset's element
+        :type elementID:    str
+        
+        :param datasetName: The dataset name (e.g. 'Size' or 'Time')
+        :type datasetName:  str
+        
+        :param statistic:   The summary statistic (see :meth:`sample`).
+                            Defaults to 'mean'.
+        :type statistic:    str
+        
+        :param antithetic:  If True, average the values of antithetic run
+                            pairs. Defaults to False.
+        :type antithetic:   bool
+        
+        :raises:            :class:`~.simexception.SimError`
+                            Raised if the results do not contain the same
+                            runs, or if the dataset has a differing number of
+                            values in the two results.
+        
+        :return:            This result's values minus the other's
+        :rtype:             :class:`SimSample`
+
+        """
+        if self.dbMgr.database.runs() != other.dbMgr.database.runs():
+            msg = "Paired difference requires results with the same runs"
+            raise SimError(_RESULT_ERROR, msg)
+        
+        sample1 = self.sample(elementID, datasetName, statistic,
+                              antithetic=antithetic)
+        sample2 = other.sample(elementID, datasetName, statistic,
+                               antithetic=antithetic)
+        if sample1.n != sample2.n:
+            msg = "Paired difference of {0} {1}: sample sizes ({2}, {3}) differ"
+            raise SimError(_RESULT_ERROR, msg, elementID, datasetName,
+                           sample1.n, sample2.n)
+        
+        diffsample = SimSample(sample1.dataset)
+        for value1, value2 in zip(sample1.values, sample2.values):
+            diffsample.append(value1 - value2)
+        return diffsample
+
+    def print_paired_differences(self, other, statistic='mean', *,
+                                 antithetic=False, confidence=0.95):
+        """
+        Print the paired difference (see :meth:`paired_difference`) between
+        this result and another for every dataset with values in both:
+        the mean difference, its standard error, and the half-width of
+        its confidence interval.
+        
+        :param other:       The result to compare against
+        :type other:        :class:`SimulationResult`
+        
+        :param statistic:   The summary statistic (see :meth:`sample`).
+                            Defaults to 'mean'.
+        :type statistic:    str
+        
+        :param antithetic:  If True, average the values of antithetic run
+                            pairs. Defaults to False.
+        :type antithetic:   bool
+        
+        :param confidence:  The confidence level. Defaults to 0.95
+        :type confidence:   float
+        
+        """
+        eidwidth, namewidth, numwidth, numcolwidth = self._getFormatWidths()
+        headerfmt = '{:{ew}} {:{nw}} {:^{cw}} {:^{nmw}} {:^{cw}}'
+        header = headerfmt.format('Element ID', 'Dataset', 'Mean Difference',
+                                  'SEM', '{:.0%} CI Half-Width'.format(confidence),
+                                  ew=eidwidth, nw=namewidth, cw=numcolwidth,
+                                  nmw=numwidth)
+        print('-' * len(header))
+        print(header)
+        print('-' * len(header))
+        
+        for dset in self.dbMgr.database.datasets:
+            diffs = self.paired_difference(other, dset.element_id, dset.name,
+                                           statistic, antithetic=antithetic)
+            if diffs.n == 0:
+                continue
+            print("{:{ew}} {:{nw}}".format(dset.element_id, dset.name,
+                                          ew=eidwidth, nw=namewidth),
+                  _value_to_string(diffs.mean, numwidth),
+                  _value_to_string(diffs.stderr, numwidth, False),
+                  _value_to_string(diffs.confidence_halfwidth(confidence),
+                                   numwidth))
+
     def save_database_as(self, filename):
         """
         Save the temporary output database to a caller-specified location -
@@ -807,6 +1067,63 @@ def _range_to_string(values, numwidth, showunits=True):
     return '{:{w}}'.format(rangestr, w=totalwidth)
 
 
+def _t_cdf(t, df):
+    """
+    Internal helper returns the cumulative distribution function of
+    Student's t distribution with (integer) df degrees of freedom at t,
+    using the finite series for A(t|df) in Abramowitz and Stegun 26.7.3
+    and 26.7.4.
+    """
+    theta = math.atan(abs(t) / math.sqrt(df))
+    sin, cos2 = math.sin(theta), math.cos(theta) ** 2
+    if df % 2:
+        term, total = math.cos(theta), 0.0
+        for k in range(3, df + 1, 2):
+            total += term
+            term *= cos2 * (k - 1) / k
+        a = 2 * (theta + sin * total) / math.pi
+    else:
+        term, total = 1.0, 0.0
+        for k in range(2, df + 1, 2):
+            total += term
+            term *= cos2 * (k - 1) / k
+        a = sin * total
+    return 0.5 + math.copysign(a, t) / 2
+
+
+def _t_quantile(p, df):
+    """
+    Internal helper returns the p quantile of Student's t distribution
+    with (integer) df degrees of freedom. Exact for one and two degrees of
+    freedom; otherwise the Cornish-Fisher expansion about the normal
+    quantile provides a starting point that is refined by Newton's method
+    on the exact t distribution function, so the result is accurate to
+    (close to) floating point precision for any df.
+    """
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    
+    z = NormalDist().inv_cdf(p)
+    z2 = z * z
+    g1 = (z2 + 1) * z / 4
+    g2 = ((5 * z2 + 16) * z2 + 3) * z / 96
+    g3 = (((3 * z2 + 19) * z2 + 17) * z2 - 15) * z / 384
+    g4 = ((((79 * z2 + 776) * z2 + 1482) * z2 - 1920) * z2 - 945) * z / 92160
+    t = z + g1 / df + g2 / df**2 + g3 / df**3 + g4 / df**4
+    
+    logc = (math.lgamma((df + 1) / 2) - math.lgamma(df / 2)
+            - math.log(df * math.pi) / 2)
+    for i in range(50):
+        pdf = math.exp(logc - (df + 1) / 2 * math.log1p(t * t / df))
+        delta = (_t_cdf(t, df) - p) / pdf
+        t -= delta
+        if abs(delta) <= 1e-12 * max(1.0, abs(t)):
+            break
+    return t
+
+
 class SimDatasetStatistics(object):
     """
     Class that collects batch sample summary statistics from a specified
@@ -820,8 +1137,13 @@ class SimDatasetStatistics(object):
     When the passed output database contains a single run with multiple
     batches, summary statistic values are collected for each batch in
     that run.
+
+    The summary data for those runs/batches may be passed as a list of
+    :class:`~simprovise.database.outputdb.SimDatasetSummaryData` (in
+    :meth:`run_batches` order), typically retrieved in bulk for all
+    datasets; otherwise it is retrieved for this dataset alone.
     """
-    def __init__(self, database, dataset):
+    def __init__(self, database, dataset, summaryData=None):
         """
         """
         self.database = database
@@ -840,54 +1162,55 @@ class SimDatasetStatistics(object):
         self.pct75s = SimSample(dataset)
         self.pct90s = SimSample(dataset)
         self.pct95s = SimSample(dataset)
-        runs = database.runs()
-        self.nruns = len(runs)
-
-        # If there is just a single run and multiple batches, collect
-        # summary statistics from each batch
-        if self.nruns == 1:
-            nbatches = database.last_batch(runs[0])
-            batches = range(1, nbatches+1)
-        else:
-            batches = [None,]
+        if summaryData is None:
+            runBatches = SimDatasetStatistics.run_batches(database)
+            summaryData = [SimDatasetSummaryData(database, dataset, run, batch)
+                           for run, batch in runBatches]
+        self.nruns = len(set(sdata.run for sdata in summaryData))
 
         if dataset.name == 'Entries':
             # For Entries datasets, all values are  the count
-            for run in runs:
-                for batch in batches:
-                    sdata = SimDatasetSummaryData(database, dataset, run, batch)
-                    count = sdata.count
-                    self.counts.append(count)
-                    self.means.append(count)
-                    self.mins.append(count)
-                    self.maxs.append(count)
-                    self.medians.append(count)
-                    self.pct05s.append(count)
-                    self.pct10s.append(count)
-                    self.pct25s.append(count)
-                    self.pct75s.append(count)
-                    self.pct90s.append(count)
-                    self.pct95s.append(count)
+            for sdata in summaryData:
+                count = sdata.count
+                self.counts.append(count)
+                self.means.append(count)
+                self.mins.append(count)
+                self.maxs.append(count)
+                self.medians.append(count)
+                self.pct05s.append(count)
+                self.pct10s.append(count)
+                self.pct25s.append(count)
+                self.pct75s.append(count)
+                self.pct90s.append(count)
+                self.pct95s.append(count)
+        else:
+            for sdata in summaryData:
+                self.counts.append(sdata.count)
+                self.means.append(sdata.mean)
+                self.mins.append(sdata.min)
+                self.maxs.append(sdata.max)
+                percentiles = sdata.percentiles
+                self.medians.append(percentiles[50])
+                self.pct05s.append(percentiles[5])
+                self.pct10s.append(percentiles[10])
+                self.pct25s.append(percentiles[25])
+                self.pct75s.append(percentiles[75])
+                self.pct90s.append(percentiles[90])
+                self.pct95s.append(percentiles[95])
+
+    @staticmethod
+    def run_batches(database):
+        """
+        Return the (run, batch) pairs from which summary statistic values
+        are collected: the last batch of each run if there are multiple
+        runs, or each batch of the run if there is just a single run.
+        """
+        runs = database.runs()
+        if len(runs) == 1:
+            nbatches = database.last_batch(runs[0])
+            return [(runs[0], batch) for batch in range(1, nbatches+1)]
         else:
-            #pctileData = SimPercentileData(database)
-            for run in runs:
-                for batch in batches:
-                    #sdata = SimSummaryData(database, run,
-                                           #dataset.element_id, batch)
-                    #dsdata = sdata.get_raw_data(dataset)
-                    sdata = SimDatasetSummaryData(database, dataset, run, batch)
-                    self.counts.append(sdata.count)
-                    self.means.append(sdata.mean)
-                    self.mins.append(sdata.min)
-                    self.maxs.append(sdata.max)
-                    percentiles = sdata.percentiles
-                    self.medians.append(percentiles[50])
-                    self.pct05s.append(percentiles[5])
-                    self.pct10s.append(percentiles[10])
-                    self.pct25s.append(percentiles[25])
-                    self.pct75s.append(percentiles[75])
-                    self.pct90s.append(percentiles[90])
-                    self.pct95s.append(percentiles[95])
+            return [(run, database.last_batch(run)) for run in runs]
 
     @property
     def nsamples(self):
@@ -979,6 +1302,34 @@ class SimSample(object):
         else:
             return _NAN
 
+    def confidence_halfwidth(self, confidence=0.95):
+        """
+        Return the half-width of a (Student t) confidence interval for the
+        sample mean at the specified confidence level, converted to SimTime
+        as required. If n <= 1, returns NaN
+        """
+        if self.n > 1:
+            se =  np.std(self.values, ddof=1) / np.sqrt(self.n)
+            t = _t_quantile(0.5 + confidence / 2, self.n - 1)
+            return self._convertSimTime(t * se)
+        else:
+            return _NAN
+
+    def confidence_interval(self, confidence=0.95):
+        """
+        Return the (low, high) confidence interval for the sample mean at
+        the specified confidence level, converted to SimTimes as required.
+        If n <= 1, returns (NaN, NaN)
+        """
+        if self.n > 1:
+            mean = np.mean(self.values)
+            se =  np.std(self.values, ddof=1) / np.sqrt(self.n)
+            hw = _t_quantile(0.5 + confidence / 2, self.n - 1) * se
+            return (self._convertSimTime(mean - hw),
+                    self._convertSimTime(mean + hw))
+        else:
+            return (_NAN, _NAN)
+
     @property
     def iqr(self):
         """
@@ -1014,6 +1365,133 @@ class SimSample(object):
             return value
 
 
+@apidoc
+class SimPrecisionTarget(object):
+    """
+    A precision target for sequential (adaptive) replications - see
+    :meth:`Simulation.replicate`. The target is met when the half-width of
+    the confidence interval for the mean of a dataset summary statistic
+    (as returned by :meth:`SimulationResult.sample`) over the replications
+    executed so far is no more than a specified absolute half-width, and/or
+    no more than a specified fraction of the (absolute value of the) mean.
+    
+    :param elementID:   The element ID of the dataset's element
+    :type elementID:    str
+    
+    :param datasetName: The dataset name (e.g. 'Size' or 'Time')
+    :type datasetName:  str
+    
+    :param statistic:   The summary statistic (see
+                        :meth:`SimulationResult.sample`). Defaults to 'mean'.
+    :type statistic:    str
+    
+    :param halfwidth:   The maximum absolute confidence interval half-width,
+                        if any. A number for a SimTime dataset is in the
+                        dataset's time unit.
+    :type halfwidth:    int, float, :class:`~.simtime.SimTime` or None
+    
+    :param relativeHalfwidth: The maximum confidence interval half-width as
+                        a fraction of the mean (e.g. 0.05 for five percent),
+                        if any.
+    :type relativeHalfwidth: float or None
+    
+    :param confidence:  The confidence level. Defaults to 0.95.
+    :type confidence:   float
+    
+    :raises:            :class:`~.simexception.SimError`
+                        Raised if the statistic is invalid, if neither (or
+                        a non-positive) halfwidth or relativeHalfwidth is
+                        specified, or if the confidence level is not between
+                        zero and one.
+
+    """
+    def __init__(self, elementID, datasetName, statistic='mean', *,
+                 halfwidth=None, relativeHalfwidth=None, confidence=0.95):
+        """
+        """
+        if statistic not in _STATISTIC_ATTRIBUTES:
+            raise SimError(_RESULT_ERROR, "Invalid statistic specified: {0}", statistic)
+        if halfwidth is None and relativeHalfwidth is None:
+            msg = "Precision target for {0} {1} requires a halfwidth and/or relativeHalfwidth"
+            raise SimError(_RESULT_ERROR, msg, elementID, datasetName)
+        if halfwidth is not None and not halfwidth > 0:
+            msg = "Precision target halfwidth ({0}) must be greater than zero"
+            raise SimError(_RESULT_ERROR, msg, halfwidth)
+        if relativeHalfwidth is not None and not relativeHalfwidth > 0:
+            msg = "Precision target relativeHalfwidth ({0}) must be greater than zero"
+            raise SimError(_RESULT_ERROR, msg, relativeHalfwidth)
+        if not 0 < confidence < 1:
+            msg = "Precision target confidence ({0}) must be between zero and one"
+            raise SimError(_RESULT_ERROR, msg, confidence)
+        
+        self.element_id = elementID
+        self.dataset_name = datasetName
+        self.statistic = statistic
+        self.halfwidth = halfwidth
+        self.relative_halfwidth = relativeHalfwidth
+        self.confidence = confidence
+
+    def is_met(self, result, *, antithetic=False):
+        """
+        Returns True if the passed result meets this precision target. The
+        target cannot be met by a sample of less than two values.
+        
+        :param result:      The (replication) result to be evaluated
+        :type result:       :class:`SimulationResult`
+        
+        :param antithetic:  If True, the result's runs are antithetic pairs
+                            (see :meth:`SimulationResult.sample`). Defaults
+                            to False.
+        :type antithetic:   bool
+        
+        :return:            True if the target is met
+        :rtype:             bool
+
+        """
+        sample = result.sample(self.element_id, self.dataset_name,
+                               self.statistic, antithetic=antithetic)
+        mean = sample.mean
+        halfwidth = sample.confidence_halfwidth(self.confidence)
+        logger.info("Precision target %s %s %s: n: %d, mean: %s, halfwidth: %s",
+                    self.element_id, self.dataset_name, self.statistic,
+                    sample.n, mean, halfwidth)
+        
+        rawMean, rawHalfwidth = _scalar(mean), _scalar(halfwidth)
+        if math.isnan(rawHalfwidth):
+            return False
+        if self.halfwidth is not None:
+            target = self.halfwidth
+            if isinstance(halfwidth, SimTime) and not isinstance(target, SimTime):
+                target = SimTime(target, sample.timeunit)
+            if rawHalfwidth > _scalar(target):
+                return False
+        if self.relative_halfwidth is not None:
+            if rawHalfwidth > self.relative_halfwidth * abs(rawMean):
+                return False
+        return True
+
+    def __str__(self):
+        targets = []
+        if self.halfwidth is not None:
+            targets.append("halfwidth <= {0}".format(self.halfwidth))
+        if self.relative_halfwidth is not None:
+            targets.append("relative halfwidth <= {0}".format(self.relative_halfwidth))
+        return "{0} {1} {2}: {3} ({4:.0%} confidence)".format(
+            self.element_id, self.dataset_name, self.statistic,
+            " and ".join(targets), self.confidence)
+
+
+def _scalar(value):
+    """
+    Returns the passed summary statistic value as a scalar (converting
+    SimTime values to the base time unit)
+    """
+    if isinstance(value, SimTime):
+        return value.to_scalar()
+    else:
+        return value
+
+
 if __name__ == '__main__':
     warmupLength = SimTime(1000)
     batchLength = SimTime(10000)
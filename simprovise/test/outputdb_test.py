@@ -0,0 +1,1112 @@
+#===============================================================================
+# MODULE outputdb_test
+#
+# Copyright (C) 2024 Howard Klein - All Rights Reserved
+#
+# Unit tests for output database datasinks
+#===============================================================================
+import os
+import random
+import shutil
+import tempfile
+import functools
+from collections import Counter
+import sqlite3
+from simprovise.core import SimError
+from simprovise.core.simclock import SimClock
+from simprovise.core import datacollector
+from simprovise.core.datasink import NullDataSink
+from simprovise.core.simtime import SimTime
+from simprovise.core.model import SimModel
+from simprovise.modeling.location import SimLocation
+from simprovise.database.outputdb import (SimLiveOutputDatabase,
+                                          SimArchivedOutputDatabase,
+                                          SimShardedOutputDatabase,
+                                          SimShardManifest,
+                                          SimDatabaseManager,
+                                          SimDatasetSummaryData,
+                                          SimTimeSeriesData,
+                                          SimOutputHistogramData,
+                                          SimDbSummaryDatasink,
+                                          SimDbBufferedDatasink,
+                                          SimDbTimeSeriesDatasink,
+                                          SimDbTimeWeightedSummaryDatasink,
+                                          _SummaryAccumulator,
+                                          _DatasetValueBuffer,
+                                          _DatasetValueWriter,
+                                          copy_run_data)
+import unittest
+
+
+class OutputDbTestCase(unittest.TestCase):
+    """
+    Base class for tests that write the same (reproducibly random) dataset
+    values to in-memory output databases configured in different ways.
+    """
+    def setUp(self):
+        self.databases = []
+
+    def tearDown(self):
+        self._detach_datasinks()
+        for db in self.databases:
+            dbpath = db.db_path
+            isTemporary = db.is_temporary
+            db.close_database()
+            if isTemporary:
+                os.remove(dbpath)
+        # Hack to allow recreation of static objects for each test case
+        SimModel.model().clear_registry_partial()
+
+    def _detach_datasinks(self):
+        "Detach every dataset from the (soon to be closed) test databases"
+        for dset in SimModel.model().datasets:
+            dset.datasink = NullDataSink()
+
+    def _run(self, summaryOnly=False, bufferSize=0, coalesce=False,
+             backgroundWriter=False, inMemory=True, inMemoryCopy=False,
+             finalizeBatches=False, compact=False, runNumber=1):
+        """
+        Create an output database (by default, in-memory) and write two
+        batches of (reproducibly) random values to it, including multiple
+        values at the same simulated time. The model elements and datasets
+        are recreated for each run. If inMemoryCopy is True, the output
+        database is an in-memory copy of a newly initialized temporary
+        database file. If finalizeBatches is True, the database finalizes
+        each batch (writing its summary rows) rather than just flushing it.
+        If compact is True, the database uses the compact datasetvalue layout.
+        The values are written for run runNumber (and seeded by it).
+        """
+        SimModel.model().clear_registry_partial()
+        self.loc = SimLocation("TestLoc")
+        self.dc = datacollector.SimUnweightedDataCollector(self.loc, "Unweighted", int)
+        self.dcTW = datacollector.SimTimeWeightedDataCollector(self.loc, "Weighted", int)
+        self.dcTW.coalesce = coalesce
+
+        SimClock.initialize()
+        model = SimModel.model()
+        db = SimLiveOutputDatabase()
+        db.summary_only = summaryOnly
+        db.buffer_size = bufferSize
+        db.background_writer = backgroundWriter
+        if inMemoryCopy:
+            template = SimLiveOutputDatabase()
+            template.initialize(model, compact=compact)
+            template.close_database()
+            db.initialize_existing(model, template.db_path, isTemporary=True,
+                                   inMemory=True, scratch=True)
+        else:
+            db.initialize(model, inMemory=inMemory, compact=compact)
+        self.databases.append(db)
+        db.initialize_run(runNumber)
+
+        datasets = (self.dc.dataset, self.dcTW.dataset)
+        rng = random.Random(9999 * runNumber)
+        t = 0
+        for batch in (1, 2):
+            for dset in datasets:
+                dset.initialize_batch(batch)
+            for i in range(500):
+                self.dc.add_value(rng.randint(0, 20))
+                self.dcTW.add_value(rng.randint(0, 10))
+                if rng.random() < 0.7:
+                    t += rng.randint(1, 5)
+                    SimClock.advance_to(SimTime(t))
+            for dset in datasets:
+                dset.finalize_batch(batch)
+            if finalizeBatches:
+                db.finalize_batch(batch)
+            else:
+                db.flush_output()
+        return db
+
+    def _put_after_finalize(self, db, batch=3):
+        """
+        Write another batch (after _run()) in which the time-weighted value
+        is set once, ten time units before the batch ends; then set it again
+        at the end time, after the batch is finalized (as an event processed
+        at the end of a run would). Returns the batch's start time.
+        """
+        start = SimClock.now().to_scalar()
+        dataset = self.dcTW.dataset
+        dataset.initialize_batch(batch)
+        self.dcTW.add_value(98)
+        SimClock.advance_to(SimTime(start + 10))
+        dataset.finalize_batch(batch)
+        db.flush_output()
+        self.dcTW.add_value(99)
+        db.flush_output()
+        return start
+
+    def _summaries(self, db, datasetName, batch):
+        dset = db.get_dataset("TestLoc", datasetName)
+        return SimDatasetSummaryData(db, dset, 1, batch)
+
+    def _datasetvalues(self, db):
+        sqlstr = """
+                 select dataset, run, batch, simtimestamp, totimestamp, value
+                 from datasetvalue order by dataset, run, batch, simtimestamp, value
+                 """
+        return db.runQuery(sqlstr)
+
+
+class SummaryDatasinkTests(OutputDbTestCase):
+    """
+    Tests for the summary datasinks - summary statistics should match those
+    calculated from the values written by the standard datasinks.
+    """
+    def testDatasinkClasses(self):
+        "Test: a summary-only database assigns summary datasinks to datasets"
+        self._run(summaryOnly=True)
+        self.assertIsInstance(self.dc.datasink, SimDbSummaryDatasink)
+        self.assertIsInstance(self.dcTW.datasink, SimDbTimeWeightedSummaryDatasink)
+
+    def testNoDatasetValues(self):
+        "Test: a summary-only database writes no datasetvalue rows"
+        db = self._run(summaryOnly=True)
+        result = db.runQuery("select count(*) from datasetvalue")
+        self.assertEqual(result[0][0], 0)
+
+    def testRunsAndBatches(self):
+        "Test: runs(), last_batch() and batch_time_bounds() match for summary-only output"
+        db1 = self._run()
+        db2 = self._run(summaryOnly=True)
+        self.assertEqual(db2.runs(), db1.runs())
+        self.assertEqual(db2.last_batch(1), db1.last_batch(1))
+        self.assertEqual(db2.batch_time_bounds(1, 2), db1.batch_time_bounds(1, 2))
+
+    def testUnweightedStatistics(self):
+        "Test: unweighted count, mean, min, max and percentiles match standard datasink output"
+        db1 = self._run()
+        db2 = self._run(summaryOnly=True)
+        for batch in (1, 2):
+            s1 = self._summaries(db1, "Unweighted", batch)
+            s2 = self._summaries(db2, "Unweighted", batch)
+            self.assertEqual(s2.count, s1.count)
+            self.assertEqual(s2.mean, s1.mean)
+            self.assertEqual((s2.min, s2.max), (s1.min, s1.max))
+            self.assertEqual(s2.percentiles, s1.percentiles)
+
+    def testTimeWeightedStatistics(self):
+        "Test: time-weighted count, mean, min, max and percentiles match standard datasink output"
+        db1 = self._run()
+        db2 = self._run(summaryOnly=True)
+        for batch in (1, 2):
+            s1 = self._summaries(db1, "Weighted", batch)
+            s2 = self._summaries(db2, "Weighted", batch)
+            self.assertEqual(s2.count, s1.count)
+            self.assertEqual(s2.mean, s1.mean)
+            self.assertEqual((s2.min, s2.max), (s1.min, s1.max))
+            self.assertEqual(s2.percentiles, s1.percentiles)
+
+
+class BatchSummaryTests(OutputDbTestCase):
+    """
+    Tests for the datasetsummary rows written from datasetvalue rows when a
+    batch is finalized - statistics should match those calculated from the
+    datasetvalue rows.
+    """
+    def _summary_count(self, db):
+        return db.runQuery("select count(*) from datasetsummary")[0][0]
+
+    def testSummaryRows(self):
+        "Test: finalizing each batch writes a summary row per dataset per batch"
+        db1 = self._run()
+        db2 = self._run(finalizeBatches=True)
+        self.assertEqual(self._summary_count(db1), 0)
+        self.assertEqual(self._summary_count(db2), 2 * len(db2.datasets))
+
+    def testDatasetValues(self):
+        "Test: finalizing each batch does not change the datasetvalue rows"
+        db1 = self._run()
+        db2 = self._run(finalizeBatches=True)
+        self.assertEqual(self._datasetvalues(db2), self._datasetvalues(db1))
+
+    def testSummaryOnly(self):
+        "Test: finalizing summary-only batches leaves the summary datasink rows"
+        db1 = self._run(summaryOnly=True)
+        db2 = self._run(summaryOnly=True, finalizeBatches=True)
+        self.assertEqual(db2.runQuery("select * from datasetsummary"),
+                         db1.runQuery("select * from datasetsummary"))
+
+    def testBatchTimeBounds(self):
+        "Test: batch_time_bounds() is unchanged by the summary rows"
+        db1 = self._run()
+        db2 = self._run(finalizeBatches=True)
+        for batch in (1, 2):
+            self.assertEqual(db2.batch_time_bounds(1, batch),
+                             db1.batch_time_bounds(1, batch))
+
+    def testStatistics(self):
+        "Test: count, mean, min, max and percentiles match those from datasetvalue rows"
+        db1 = self._run()
+        db2 = self._run(finalizeBatches=True)
+        for datasetName in ("Unweighted", "Weighted"):
+            for batch in (1, 2):
+                s1 = self._summaries(db1, datasetName, batch)
+                s2 = self._summaries(db2, datasetName, batch)
+                self.assertEqual(s2.count, s1.count)
+                self.assertEqual(s2.mean, s1.mean)
+                self.assertEqual((s2.min, s2.max), (s1.min, s1.max))
+                self.assertEqual(s2.percentiles, s1.percentiles)
+
+    def testVariance(self):
+        "Test: summary row variance matches the summary datasink variance"
+        db1 = self._run(summaryOnly=True)
+        db2 = self._run(finalizeBatches=True)
+        sqlstr = "select variance from datasetsummary where dataset = ? order by batch"
+        for datasetName in ("Unweighted", "Weighted"):
+            dsetid = db1.get_dataset_id(db1.get_dataset("TestLoc", datasetName))
+            v1 = [row[0] for row in db1.runQuery(sqlstr, dsetid)]
+            v2 = [row[0] for row in db2.runQuery(sqlstr, dsetid)]
+            for x1, x2 in zip(v1, v2):
+                self.assertAlmostEqual(x2, x1)
+
+
+class BulkSummaryTests(OutputDbTestCase):
+    """
+    Tests for SimDatasetSummaryData.fetch_all() - statistics should match
+    those of individually created SimDatasetSummaryData instances.
+    """
+    def _assert_matching(self, db):
+        runBatches = [(1, 1), (1, 2)]
+        summaries = SimDatasetSummaryData.fetch_all(db, runBatches)
+        self.assertEqual(len(summaries), len(db.datasets) * len(runBatches))
+        for dset in db.datasets:
+            for run, batch in runBatches:
+                s1 = SimDatasetSummaryData(db, dset, run, batch)
+                s2 = summaries[(dset.element_id, dset.name, run, batch)]
+                self.assertEqual((s2.run, s2.batch), (run, batch))
+                self.assertEqual(s2.count, s1.count)
+                self.assertEqual(s2.mean, s1.mean)
+                self.assertEqual((s2.min, s2.max), (s1.min, s1.max))
+                self.assertEqual(s2.percentiles, s1.percentiles)
+
+    def testDatasetValues(self):
+        "Test: bulk statistics match for output with no datasetsummary rows"
+        self._assert_matching(self._run())
+
+    def testBatchSummaries(self):
+        "Test: bulk statistics match for output with finalized batch summary rows"
+        self._assert_matching(self._run(finalizeBatches=True))
+
+    def testSummaryOnly(self):
+        "Test: bulk statistics match for summary-only output"
+        self._assert_matching(self._run(summaryOnly=True))
+
+    def testPartialSummaries(self):
+        "Test: bulk statistics match when only some datasets have summary rows"
+        db = self._run(finalizeBatches=True)
+        dsetid = db.get_dataset_id(self.dcTW.dataset)
+        db.connection.execute("delete from datasetsummary where dataset = ? or batch = 2",
+                              (dsetid,))
+        self._assert_matching(db)
+
+    def testRunBatchSubset(self):
+        "Test: bulk statistics are returned only for the requested runs/batches"
+        db = self._run(finalizeBatches=True)
+        summaries = SimDatasetSummaryData.fetch_all(db, [(1, 2)])
+        self.assertEqual(set(key[2:] for key in summaries), {(1, 2)})
+
+
+class TimeSeriesDatasinkTests(OutputDbTestCase):
+    "Tests for the (insert-only) time-weighted dataset datasink"
+    def _intervals(self, db, batch):
+        sqlstr = """
+                 select simtimestamp, totimestamp, value from datasetvalue
+                 where dataset = ? and batch = ? order by simtimestamp
+                 """
+        return db.runQuery(sqlstr, db.get_dataset_id(self.dcTW.dataset), batch)
+
+    def testContiguousIntervals(self):
+        "Test: each time-weighted row ends when the next begins, and the last at the batch end"
+        db = self._run()
+        for batch in (1, 2):
+            rows = self._intervals(db, batch)
+            starts = [row[0] for row in rows]
+            ends = [row[1] for row in rows]
+            self.assertEqual(starts[1:], ends[:-1])
+            self.assertEqual(ends[-1], db.batch_time_bounds(1, batch)[1])
+
+    def testNoZeroLengthIntervals(self):
+        "Test: values replaced at the same simulated time are not written"
+        db = self._run()
+        rows = self._intervals(db, 1)
+        self.assertTrue(all(row[1] > row[0] for row in rows))
+
+    def testBufferedIntervals(self):
+        "Test: buffered time-weighted rows are the same as unbuffered rows"
+        db1 = self._run()
+        db2 = self._run(bufferSize=50)
+        for batch in (1, 2):
+            self.assertEqual(self._intervals(db2, batch), self._intervals(db1, batch))
+
+    def testValueAfterFinalize(self):
+        "Test: a value set at the end time after the last batch is finalized writes no row"
+        db = self._run()
+        start = self._put_after_finalize(db)
+        self.assertEqual(self._intervals(db, 3), [(start, start + 10, 98)])
+
+
+class TimeSeriesDataTests(OutputDbTestCase):
+    "Tests for the rolling average time series of unweighted datasets"
+    def _values(self, db, batch):
+        sqlstr = """
+                 select simtimestamp, value from datasetvalue
+                 where dataset = ? and batch = ?
+                 """
+        return db.runQuery(sqlstr, db.get_dataset_id(self.dc.dataset), batch)
+
+    def _moving_averages(self, db, batch, windowSize):
+        "Brute force rolling averages of the batch's values"
+        rows = self._values(db, batch)
+        minTime = db.batch_time_bounds(1, batch)[0]
+        averages = []
+        for t in sorted(set(row[0] for row in rows if row[0] > minTime)):
+            window = [v for tm, v in rows if t - windowSize <= tm <= t]
+            averages.append((t, sum(window) / len(window)))
+        return averages
+
+    def testMovingAverage(self):
+        "Test: the rolling averages match those calculated by brute force"
+        db = self._run()
+        dset = db.get_dataset("TestLoc", "Unweighted")
+        for batch in (1, 2):
+            tsdata = SimTimeSeriesData(db, dset, 1, batch)
+            minTime, maxTime = db.batch_time_bounds(1, batch)
+            expected = self._moving_averages(db, batch, (maxTime - minTime) * 0.05)
+            self.assertEqual(tsdata.timevalues, tuple(t for t, _ in expected))
+            for y, (_, avg) in zip(tsdata.yvalues, expected):
+                self.assertAlmostEqual(y, avg)
+
+    def testBatch(self):
+        "Test: the time series includes only the specified batch"
+        db = self._run()
+        dset = db.get_dataset("TestLoc", "Unweighted")
+        tsdata = SimTimeSeriesData(db, dset, 1, 1)
+        minTime, maxTime = db.batch_time_bounds(1, 1)
+        self.assertGreater(tsdata.timevalues[0], minTime)
+        self.assertLessEqual(tsdata.timevalues[-1], maxTime)
+
+    def testDownsampling(self):
+        "Test: maxPoints downsamples the time series, keeping the first and last points"
+        db = self._run()
+        dset = db.get_dataset("TestLoc", "Unweighted")
+        tsdata = SimTimeSeriesData(db, dset, 1, 2)
+        sampled = SimTimeSeriesData(db, dset, 1, 2, maxPoints=50)
+        self.assertEqual(len(sampled.timevalues), 50)
+        self.assertEqual(len(sampled.yvalues), 50)
+        self.assertEqual(sampled.timevalues[0], tsdata.timevalues[0])
+        self.assertEqual(sampled.yvalues[-1], tsdata.yvalues[-1])
+        self.assertTrue(set(sampled.timevalues) <= set(tsdata.timevalues))
+
+    def testChunked(self):
+        "Test: the (downsampled) time series is the same when retrieved in small chunks"
+        db = self._run()
+        dset = db.get_dataset("TestLoc", "Unweighted")
+        tsdata1 = SimTimeSeriesData(db, dset, 1, 2)
+        sampled1 = SimTimeSeriesData(db, dset, 1, 2, maxPoints=50)
+        db.dataset_value_chunks = functools.partial(db.dataset_value_chunks,
+                                                    chunkSize=7)
+        tsdata2 = SimTimeSeriesData(db, dset, 1, 2)
+        sampled2 = SimTimeSeriesData(db, dset, 1, 2, maxPoints=50)
+        self.assertEqual(tsdata2.timevalues, tsdata1.timevalues)
+        for y2, y1 in zip(tsdata2.yvalues, tsdata1.yvalues):
+            self.assertAlmostEqual(y2, y1)
+        self.assertEqual(sampled2.timevalues, sampled1.timevalues)
+
+    def testCumulativeCounts(self):
+        "Test: cumulative counts (as for Entries datasets) count values, and can be downsampled"
+        db = self._run()
+        dset = db.get_dataset("TestLoc", "Unweighted")
+        dsetID = db.get_dataset_id(dset)
+        sqlstr = "select simtimestamp from datasetvalue where dataset = ? and batch = 2 order by simtimestamp"
+        timestamps = [row[0] for row in db.runQuery(sqlstr, dsetID)]
+        tsdata = SimTimeSeriesData(db, dset, 1, 2)
+        tsdata.get_cumulative_count_data(db, dsetID, 1, 2)
+        self.assertEqual(tsdata.timevalues, timestamps)
+        self.assertEqual(tsdata.yvalues, list(range(1, len(timestamps) + 1)))
+        sampled = SimTimeSeriesData(db, dset, 1, 2, maxPoints=5)
+        sampled.get_cumulative_count_data(db, dsetID, 1, 2)
+        self.assertLessEqual(len(sampled.yvalues), 5)
+        self.assertEqual(sampled.yvalues[-1], len(timestamps))
+
+
+class ValueChunkTests(OutputDbTestCase):
+    "Tests for SimOutputDatabase.dataset_value_chunks()"
+    def _rows(self, db, dset, orderBy):
+        sqlstr = """
+                 select value, simtimestamp, totimestamp from datasetvalue
+                 where dataset = ? and run = 1 and batch = 2 order by {0}
+                 """.format(orderBy)
+        return db.runQuery(sqlstr, db.get_dataset_id(dset))
+
+    def _chunks(self, db, dset, orderBy):
+        return list(db.dataset_value_chunks(db.get_dataset_id(dset), 1, 2,
+                                            orderBy=orderBy, chunkSize=64))
+
+    def testChunkSize(self):
+        "Test: chunks are no larger than the chunk size, and include every row"
+        db = self._run()
+        chunks = self._chunks(db, self.dc.dataset, 'simtimestamp')
+        self.assertTrue(all(len(chunk[0]) <= 64 for chunk in chunks))
+        self.assertEqual(sum(len(chunk[0]) for chunk in chunks),
+                         len(self._rows(db, self.dc.dataset, 'simtimestamp')))
+
+    def testValueOrder(self):
+        "Test: chunked values ordered by value match the queried values"
+        db = self._run()
+        chunks = self._chunks(db, self.dc.dataset, 'value')
+        values = [v for chunk in chunks for v in chunk[0].tolist()]
+        self.assertEqual(values, [row[0] for row in self._rows(db, self.dc.dataset, 'value')])
+
+    def testTimestampOrder(self):
+        "Test: chunked time-weighted timestamps match the queried timestamps"
+        db = self._run()
+        chunks = self._chunks(db, self.dcTW.dataset, 'simtimestamp')
+        rows = self._rows(db, self.dcTW.dataset, 'simtimestamp')
+        timestamps = [t for chunk in chunks for t in chunk[1].tolist()]
+        totimestamps = [t for chunk in chunks for t in chunk[2].tolist()]
+        self.assertEqual(timestamps, [row[1] for row in rows])
+        self.assertEqual(totimestamps, [row[2] for row in rows])
+
+    def testNullToTimestamps(self):
+        "Test: null totimestamps are returned as NaN"
+        db = self._run()
+        chunks = self._chunks(db, self.dc.dataset, 'simtimestamp')
+        self.assertTrue(all(all(t != t for t in chunk[2]) for chunk in chunks))
+
+    def testInvalidOrder(self):
+        "Test: an invalid orderBy raises a SimError"
+        db = self._run()
+        chunks = db.dataset_value_chunks(1, 1, 2, orderBy='run')
+        self.assertRaises(SimError, next, chunks)
+
+
+class HistogramDataTests(OutputDbTestCase):
+    "Tests for histogram data of unweighted datasets"
+    def _expected_nbins(self, values):
+        "The Freedman-Diaconis number of bins, calculated from sorted values"
+        n = len(values)
+        quartile1 = values[round(n/4)]
+        quartile3 = values[round(n * 0.75)]
+        iqr = quartile3 - quartile1
+        totalRange = values[-1] - values[0]
+        h = 2 * iqr / pow(n, 1/3)
+        if iqr == 0 or round(h) == 0:
+            return max(round(totalRange), 1)
+        else:
+            return max(round(totalRange/round(h) + 0.5), 1)
+
+    def testValueCounts(self):
+        "Test: histogram values and weights are the distinct values and their counts"
+        db = self._run()
+        dset = db.get_dataset("TestLoc", "Unweighted")
+        sqlstr = "select value from datasetvalue where dataset = ? and batch = 2"
+        counts = Counter(row[0] for row in db.runQuery(sqlstr, db.get_dataset_id(dset)))
+        hdata = SimOutputHistogramData(db, dset, 1, 2)
+        self.assertEqual(dict(zip(hdata.values.tolist(), hdata.weights.tolist())),
+                         counts)
+
+    def testNumberOfBins(self):
+        "Test: nbins is calculated from the (sorted) dataset values"
+        db = self._run()
+        dset = db.get_dataset("TestLoc", "Unweighted")
+        sqlstr = "select value from datasetvalue where dataset = ? and batch = 2 order by value"
+        values = [row[0] for row in db.runQuery(sqlstr, db.get_dataset_id(dset))]
+        hdata = SimOutputHistogramData(db, dset, 1, 2)
+        self.assertEqual(hdata.nbins, self._expected_nbins(values))
+
+    def testChunked(self):
+        "Test: histogram data is the same when retrieved in small chunks"
+        db = self._run()
+        dset = db.get_dataset("TestLoc", "Unweighted")
+        hdata1 = SimOutputHistogramData(db, dset, 1, 2)
+        db.dataset_value_chunks = functools.partial(db.dataset_value_chunks,
+                                                    chunkSize=10)
+        hdata2 = SimOutputHistogramData(db, dset, 1, 2)
+        self.assertEqual(hdata2.values.tolist(), hdata1.values.tolist())
+        self.assertEqual(hdata2.weights.tolist(), hdata1.weights.tolist())
+        self.assertEqual(hdata2.nbins, hdata1.nbins)
+
+
+class CoalescingTests(OutputDbTestCase):
+    """
+    Tests for time-weighted data collectors that coalesce values added at
+    the same simulated time - output should be unchanged.
+    """
+    def _value_durations(self, db):
+        sqlstr = """
+                 select batch, value, sum(totimestamp - simtimestamp)
+                 from datasetvalue where dataset = ?
+                 group by batch, value order by batch, value
+                 """
+        return db.runQuery(sqlstr, db.get_dataset_id(self.dcTW.dataset))
+
+    def testValueDurations(self):
+        "Test: coalescing writes the same total time at each value as not coalescing"
+        db1 = self._run()
+        db2 = self._run(coalesce=True)
+        self.assertEqual(self._value_durations(db2), self._value_durations(db1))
+
+    def testFewerRows(self):
+        "Test: coalescing writes fewer rows than not coalescing"
+        db1 = self._run()
+        db2 = self._run(coalesce=True)
+        self.assertLess(len(self._datasetvalues(db2)), len(self._datasetvalues(db1)))
+
+    def testTimeWeightedStatistics(self):
+        "Test: coalesced time-weighted mean, min, max and percentiles match uncoalesced"
+        db1 = self._run()
+        db2 = self._run(coalesce=True)
+        for batch in (1, 2):
+            s1 = self._summaries(db1, "Weighted", batch)
+            s2 = self._summaries(db2, "Weighted", batch)
+            self.assertEqual(s2.mean, s1.mean)
+            self.assertEqual((s2.min, s2.max), (s1.min, s1.max))
+            self.assertEqual(s2.percentiles, s1.percentiles)
+
+    def testSummaryStatistics(self):
+        "Test: coalesced time-weighted summary-only statistics match uncoalesced"
+        db1 = self._run(summaryOnly=True)
+        db2 = self._run(summaryOnly=True, coalesce=True)
+        for batch in (1, 2):
+            s1 = self._summaries(db1, "Weighted", batch)
+            s2 = self._summaries(db2, "Weighted", batch)
+            self.assertEqual(s2.mean, s1.mean)
+            self.assertEqual(s2.percentiles, s1.percentiles)
+
+
+class BufferedDatasinkTests(OutputDbTestCase):
+    "Tests for buffered (bulk insert) datasinks"
+    def testDatasinkClasses(self):
+        "Test: a buffered database assigns buffered datasinks to non time-weighted datasets"
+        self._run(bufferSize=100)
+        self.assertIsInstance(self.dc.datasink, SimDbBufferedDatasink)
+        self.assertIsInstance(self.dcTW.datasink, SimDbTimeSeriesDatasink)
+
+    def testDatasetValues(self):
+        "Test: buffered datasinks write the same rows as unbuffered datasinks"
+        db1 = self._run()
+        db2 = self._run(bufferSize=64)
+        self.assertEqual(self._datasetvalues(db2), self._datasetvalues(db1))
+
+    def testBufferedRows(self):
+        "Test: rows are held in the buffer until it fills"
+        db = self._run(bufferSize=1000)
+        buffer = db.value_buffer
+        buffer.append(db.get_dataset_id(self.dc.dataset), 1, 2, 0, 42)
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(len(self._datasetvalues(db)), 1000 + self._tw_rows(db))
+
+    def testFlush(self):
+        "Test: flush() writes buffered rows and empties the buffer"
+        db = self._run(bufferSize=1000)
+        buffer = db.value_buffer
+        buffer.append(db.get_dataset_id(self.dc.dataset), 1, 2, 0, 42)
+        buffer.flush()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(len(self._datasetvalues(db)), 1001 + self._tw_rows(db))
+
+    def _tw_rows(self, db):
+        sqlstr = "select count(*) from datasetvalue where dataset = ?"
+        return db.runQuery(sqlstr, db.get_dataset_id(self.dcTW.dataset))[0][0]
+
+
+class BackgroundWriterTests(OutputDbTestCase):
+    "Tests for output written by a background writer thread"
+    def testValueBuffer(self):
+        "Test: a file database with background_writer set has a writer and buffered datasinks"
+        db = self._run(backgroundWriter=True, inMemory=False)
+        self.assertIsInstance(db.value_buffer, _DatasetValueWriter)
+        self.assertIsInstance(self.dc.datasink, SimDbBufferedDatasink)
+        self.assertIsInstance(self.dcTW.datasink, SimDbTimeSeriesDatasink)
+
+    def testInMemoryDatabase(self):
+        "Test: an in-memory database with background_writer set writes synchronously"
+        db = self._run(backgroundWriter=True, bufferSize=100)
+        self.assertIsInstance(db.value_buffer, _DatasetValueBuffer)
+        self.assertNotIsInstance(db.value_buffer, _DatasetValueWriter)
+
+    def testDatasetValues(self):
+        "Test: the background writer writes the same rows as unbuffered datasinks"
+        db1 = self._run()
+        db2 = self._run(backgroundWriter=True, bufferSize=64, inMemory=False)
+        self.assertEqual(self._datasetvalues(db2), self._datasetvalues(db1))
+
+    def testSync(self):
+        "Test: rows are visible to the database connection after flush_output()"
+        db = self._run(backgroundWriter=True, inMemory=False)
+        nrows = len(self._datasetvalues(db))
+        db.value_buffer.append(db.get_dataset_id(self.dc.dataset), 1, 2, 0, 42)
+        db.flush_output()
+        self.assertEqual(len(self._datasetvalues(db)), nrows + 1)
+
+    def testClose(self):
+        "Test: closing the database stops the writer thread"
+        db = self._run(backgroundWriter=True, inMemory=False)
+        writer = db.value_buffer
+        self._detach_datasinks()
+        db.close_database()
+        self.assertFalse(writer._thread.is_alive())
+
+    def testFlushAfterClose(self):
+        "Test: flushing a closed writer raises a SimError"
+        db = self._run(backgroundWriter=True, inMemory=False)
+        writer = db.value_buffer
+        self._detach_datasinks()
+        db.close_database()
+        self.assertRaises(SimError, writer.flush)
+
+    def testWriterFailure(self):
+        "Test: a writer thread failure is raised by sync()"
+        writer = _DatasetValueWriter(os.path.join("nonexistent", "dir", "x.simoutput"), 10)
+        self.assertRaises(SimError, writer.sync)
+        self.assertRaises(SimError, writer.close)
+
+
+class InMemoryCopyTests(OutputDbTestCase):
+    "Tests for in-memory copies of output database files"
+    def _file_datasetvalues(self, dbpath):
+        connection = sqlite3.connect(dbpath)
+        try:
+            sqlstr = "select * from datasetvalue order by dataset, run, batch, simtimestamp, value"
+            return connection.execute(sqlstr).fetchall()
+        finally:
+            connection.close()
+
+    def testInMemory(self):
+        "Test: an in-memory copy is in memory, with the file's path"
+        db = self._run(inMemoryCopy=True)
+        self.assertTrue(db.is_in_memory)
+        self.assertTrue(os.path.isfile(db.db_path))
+
+    def testDatasetValues(self):
+        "Test: an in-memory copy gets the same rows as an in-memory database"
+        db1 = self._run()
+        db2 = self._run(inMemoryCopy=True)
+        self.assertEqual(self._datasetvalues(db2), self._datasetvalues(db1))
+
+    def testFileNotWritten(self):
+        "Test: the database file is not written before persist()"
+        db = self._run(inMemoryCopy=True)
+        self.assertEqual(self._file_datasetvalues(db.db_path), [])
+
+    def testPersist(self):
+        "Test: persist() writes the in-memory copy's rows to the database file"
+        db = self._run(inMemoryCopy=True)
+        db.persist()
+        self.assertEqual(self._file_datasetvalues(db.db_path),
+                         self._datasetvalues(db))
+
+    def testCloseOutputDatabase(self):
+        "Test: the database manager persists an in-memory copy when it is closed without deletion"
+        db = self._run(inMemoryCopy=True)
+        self._detach_datasinks()
+        rows = self._datasetvalues(db)
+        dbMgr = SimDatabaseManager()
+        dbMgr.database = db
+        dbMgr.close_output_database(delete=False)
+        self.assertEqual(self._file_datasetvalues(db.db_path), rows)
+
+    def testScratchPragmas(self):
+        "Test: scratch database connections do not sync to disk"
+        db = self._run(inMemoryCopy=True)
+        self.assertEqual(db.runQuery("pragma synchronous")[0][0], 0)
+
+
+class SchemaTests(OutputDbTestCase):
+    "Tests for output database schema versions and query indexes"
+    def _archived(self, dbpath, upgrade=True):
+        db = SimArchivedOutputDatabase(dbpath, upgrade=upgrade)
+        self.addCleanup(db.close_database)
+        return db
+
+    def _indexes(self, db):
+        sqlstr = "select name from sqlite_master where type = 'index' and tbl_name = 'datasetvalue'"
+        return {row[0] for row in db.runQuery(sqlstr)}
+
+    def _query_plan(self, db, sqlstr):
+        return " ".join(row[-1] for row in db.runQuery("explain query plan " + sqlstr, 1, 1, 2))
+
+    def _downgrade(self, dbpath):
+        "Make the database file look like one created by Simprovise 1.0"
+        connection = sqlite3.connect(dbpath)
+        connection.executescript("""
+            drop table schemaversion;
+            drop table datasetsummary;
+            """)
+        connection.close()
+
+    def testVersion(self):
+        "Test: a new output database is the current schema version"
+        db = self._run()
+        self.assertEqual(db.schema_version(), 2)
+
+    def testNoQueryIndexes(self):
+        "Test: a live output database does not have the query indexes"
+        db = self._run()
+        self.assertEqual(self._indexes(db), {'datasetvalue_idx'})
+
+    def testArchivedUnchanged(self):
+        "Test: opening a current-version archived output database does not modify it"
+        db = self._run(inMemory=False)
+        with open(db.db_path, 'rb') as f:
+            contents = f.read()
+        archived = self._archived(db.db_path)
+        self.assertEqual(self._indexes(archived), {'datasetvalue_idx'})
+        archived.close_database()
+        with open(db.db_path, 'rb') as f:
+            self.assertEqual(f.read(), contents)
+
+    def testArchivedQueryIndexes(self):
+        "Test: create_query_indexes() creates the query indexes in an archived output database"
+        db = self._run(inMemory=False)
+        archived = self._archived(db.db_path)
+        archived.create_query_indexes()
+        self.assertEqual(self._indexes(archived),
+                         {'datasetvalue_idx', 'datasetvalue_value_idx',
+                          'datasetvalue_time_idx'})
+
+    def testArchivedNoUpgrade(self):
+        "Test: an archived output database opened with upgrade = False is unchanged"
+        db = self._run(inMemory=False)
+        archived = self._archived(db.db_path, upgrade=False)
+        self.assertEqual(self._indexes(archived), {'datasetvalue_idx'})
+
+    def testManagerArchivedNoUpgrade(self):
+        "Test: a database manager opening an archived database with upgrade = False leaves it unchanged"
+        db = self._run(inMemory=False)
+        dbMgr = SimDatabaseManager()
+        dbMgr.open_archived_database(db.db_path, upgrade=False)
+        self.addCleanup(dbMgr.close_output_database, delete=False)
+        self.assertEqual(self._indexes(dbMgr.database), {'datasetvalue_idx'})
+
+    def testCoveringIndexes(self):
+        "Test: summary and time series queries are answered from the covering indexes"
+        db = self._run()
+        db.create_query_indexes()
+        sqlstr = """
+                 select value, count(value) from datasetvalue
+                 where dataset = ? and run = ? and batch = ? group by value
+                 """
+        self.assertIn("COVERING INDEX datasetvalue_value_idx", self._query_plan(db, sqlstr))
+        sqlstr = """
+                 select value, simtimestamp, totimestamp from datasetvalue
+                 where dataset = ? and run = ? and batch = ? order by simtimestamp
+                 """
+        self.assertIn("COVERING INDEX datasetvalue_time_idx", self._query_plan(db, sqlstr))
+
+    def testUpgradeVersion1(self):
+        "Test: a version 1 output database is upgraded in place when archived"
+        db = self._run(inMemory=False)
+        self._downgrade(db.db_path)
+        archived = self._archived(db.db_path, upgrade=False)
+        self.assertEqual(archived.schema_version(), 1)
+        self.assertFalse(archived.has_summary_table())
+        archived.close_database()
+        archived = self._archived(db.db_path)
+        self.assertEqual(archived.schema_version(), 2)
+        self.assertTrue(archived.has_summary_table())
+
+    def testUpgradedSummaries(self):
+        "Test: summary statistics are the same after an upgrade"
+        db = self._run(inMemory=False)
+        before = self._summaries(db, "Unweighted", 2)
+        self._downgrade(db.db_path)
+        archived = self._archived(db.db_path)
+        after = self._summaries(archived, "Unweighted", 2)
+        self.assertEqual(after.count, before.count)
+        self.assertAlmostEqual(after.mean, before.mean)
+        self.assertEqual(after.percentiles, before.percentiles)
+
+    def testLaterVersion(self):
+        "Test: upgrading a database with a later schema version raises a SimError"
+        db = self._run()
+        db.connection.execute("update schemaversion set version = 99")
+        self.assertRaises(SimError, db.upgrade_schema)
+
+
+class CompactStorageTests(OutputDbTestCase):
+    """
+    Tests for the compact datasetvalue layout - the values written, and the
+    data retrieved from them, should be the same as for the standard layout.
+    """
+    def testIsCompact(self):
+        "Test: is_compact is True only for a compact output database"
+        self.assertFalse(self._run().is_compact)
+        self.assertTrue(self._run(compact=True).is_compact)
+
+    def testWithoutRowid(self):
+        "Test: the compact datasetvalue table has no rowid or datasetvalue_idx"
+        db = self._run(compact=True)
+        self.assertRaises(SimError, db.runQuery, "select rowid from datasetvalue")
+        sqlstr = "select name from sqlite_master where name = 'datasetvalue_idx'"
+        self.assertEqual(db.runQuery(sqlstr), [])
+
+    def testDatasetValues(self):
+        "Test: a compact database gets the same rows as a standard database"
+        db1 = self._run()
+        db2 = self._run(compact=True)
+        self.assertEqual(self._datasetvalues(db2), self._datasetvalues(db1))
+
+    def testBufferedDatasetValues(self):
+        "Test: a buffered compact database gets the same rows as a standard database"
+        db1 = self._run()
+        db2 = self._run(compact=True, bufferSize=50)
+        self.assertEqual(self._datasetvalues(db2), self._datasetvalues(db1))
+
+    def testBackgroundWriterDatasetValues(self):
+        "Test: a compact database written by a background writer gets the same rows"
+        db1 = self._run()
+        db2 = self._run(compact=True, backgroundWriter=True, inMemory=False)
+        self.assertEqual(self._datasetvalues(db2), self._datasetvalues(db1))
+
+    def testValueAfterFinalize(self):
+        "Test: a time-weighted value set at the end time after the last batch is finalized writes no row"
+        for bufferSize in (0, 50):
+            db = self._run(compact=True, bufferSize=bufferSize)
+            start = self._put_after_finalize(db)
+            sqlstr = "select simtimestamp, totimestamp, value, seq from datasetvalue where batch = 3"
+            self.assertEqual(db.runQuery(sqlstr), [(start, start + 10, 98, 0)])
+
+    def testSeq(self):
+        "Test: seq numbers the values written at the same simulated time"
+        db = self._run(compact=True)
+        sqlstr = """
+                 select count(*), max(seq) from datasetvalue
+                 where dataset = ? group by run, batch, simtimestamp
+                 """
+        result = db.runQuery(sqlstr, db.get_dataset_id(self.dc.dataset))
+        self.assertTrue(any(count > 1 for count, maxseq in result))
+        self.assertTrue(all(maxseq == count - 1 for count, maxseq in result))
+
+    def testSummaries(self):
+        "Test: summary statistics are the same for a compact database"
+        db1 = self._run()
+        db2 = self._run(compact=True)
+        for datasetName in ("Unweighted", "Weighted"):
+            summary1 = self._summaries(db1, datasetName, 2)
+            summary2 = self._summaries(db2, datasetName, 2)
+            self.assertEqual(summary2.count, summary1.count)
+            self.assertAlmostEqual(summary2.mean, summary1.mean)
+            self.assertEqual(summary2.percentiles, summary1.percentiles)
+
+    def testTimeSeries(self):
+        "Test: time series data is the same for a compact database"
+        db1 = self._run()
+        db2 = self._run(compact=True)
+        for datasetName in ("Unweighted", "Weighted"):
+            tsdata1 = SimTimeSeriesData(db1, db1.get_dataset("TestLoc", datasetName), 1, 2)
+            tsdata2 = SimTimeSeriesData(db2, db2.get_dataset("TestLoc", datasetName), 1, 2)
+            self.assertEqual(tsdata2.timevalues, tsdata1.timevalues)
+            self.assertEqual(tsdata2.yvalues, tsdata1.yvalues)
+
+    def testArchived(self):
+        "Test: an archived compact database is compact, with its query index created on request"
+        db = self._run(compact=True, inMemory=False)
+        archived = SimArchivedOutputDatabase(db.db_path)
+        self.addCleanup(archived.close_database)
+        self.assertTrue(archived.is_compact)
+        sqlstr = "select name from sqlite_master where type = 'index' and tbl_name = 'datasetvalue'"
+        self.assertEqual(archived.runQuery(sqlstr), [])
+        archived.create_query_indexes()
+        self.assertEqual(archived.runQuery(sqlstr), [('datasetvalue_value_idx',)])
+        self.assertEqual(self._datasetvalues(archived), self._datasetvalues(db))
+
+    def testInitializeRun(self):
+        "Test: re-initializing a run deletes its compact rows"
+        db = self._run(compact=True)
+        self._detach_datasinks()
+        db.initialize_run(1)
+        self.assertFalse(db.has_dataset_values())
+
+
+class ShardedDatabaseTests(OutputDbTestCase):
+    """
+    Tests for sharded output databases - one database per run, listed in a
+    shard manifest - which should provide the same data as a single database
+    into which the runs are merged.
+    """
+    def setUp(self):
+        super().setUp()
+        self.sharddir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sharddir, ignore_errors=True)
+        self.manifestPath = os.path.join(self.sharddir, 'output.simshards')
+        manifest = SimShardManifest(self.manifestPath)
+        for run in (1, 2):
+            db = self._run(inMemory=False, runNumber=run)
+            shardpath = os.path.join(self.sharddir, 'run{0}.simoutput'.format(run))
+            shutil.copyfile(db.db_path, shardpath)
+            manifest.add_shard(run, shardpath)
+        manifest.save()
+
+        self.mergedPath = os.path.join(self.sharddir, 'merged.simoutput')
+        shutil.copyfile(manifest.shard_path(1), self.mergedPath)
+        connection = sqlite3.connect(self.mergedPath)
+        copy_run_data(connection, manifest.shard_path(2), 2)
+        connection.close()
+
+    def _open(self, dbpath, dbclass=SimArchivedOutputDatabase):
+        db = dbclass(dbpath)
+        self.addCleanup(db.close_database)
+        return db
+
+    def _summary_values(self, db):
+        runBatches = [(run, batch) for run in (1, 2) for batch in (1, 2)]
+        summaries = SimDatasetSummaryData.fetch_all(db, runBatches)
+        return {key: (sdata.count, sdata.mean, sdata.percentiles)
+                for key, sdata in summaries.items()}
+
+    def testManifest(self):
+        "Test: a saved manifest is loaded with the same runs and (absolute) shard paths"
+        manifest = SimShardManifest.load(self.manifestPath)
+        self.assertEqual(manifest.runs(), [1, 2])
+        self.assertEqual(manifest.shard_path(2),
+                         os.path.join(self.sharddir, 'run2.simoutput'))
+
+    def testMovedManifest(self):
+        "Test: shard paths are relative to the manifest, so shards may be moved with it"
+        moveddir = self.sharddir + '_moved'
+        shutil.move(self.sharddir, moveddir)
+        self.addCleanup(shutil.rmtree, moveddir, ignore_errors=True)
+        manifest = SimShardManifest.load(os.path.join(moveddir, 'output.simshards'))
+        self.assertTrue(os.path.isfile(manifest.shard_path(1)))
+
+    def testIsManifest(self):
+        "Test: is_manifest() is True for a manifest, but not an output database"
+        self.assertTrue(SimShardManifest.is_manifest(self.manifestPath))
+        self.assertFalse(SimShardManifest.is_manifest(self.mergedPath))
+
+    def testInvalidManifest(self):
+        "Test: loading a file that is not a shard manifest raises a SimError"
+        self.assertRaises(SimError, SimShardManifest.load, self.mergedPath)
+        self.assertRaises(SimError, SimShardManifest.load,
+                          os.path.join(self.sharddir, 'missing.simshards'))
+
+    def testRuns(self):
+        "Test: a sharded database has the runs and batches of the merged database"
+        merged = self._open(self.mergedPath)
+        sharded = self._open(self.manifestPath, SimShardedOutputDatabase)
+        self.assertEqual(sharded.runs(), merged.runs())
+        self.assertEqual(sharded.db_path, os.path.abspath(self.manifestPath))
+        for run in (1, 2):
+            self.assertEqual(sharded.last_batch(run), merged.last_batch(run))
+            self.assertEqual(sharded.batch_time_bounds(run, 2),
+                             merged.batch_time_bounds(run, 2))
+
+    def testSummaries(self):
+        "Test: bulk summary statistics are the same for sharded and merged databases"
+        merged = self._open(self.mergedPath)
+        sharded = self._open(self.manifestPath, SimShardedOutputDatabase)
+        self.assertEqual(self._summary_values(sharded), self._summary_values(merged))
+
+    def testTimeSeriesAndHistogram(self):
+        "Test: time series and histogram data are the same for sharded and merged databases"
+        merged = self._open(self.mergedPath)
+        sharded = self._open(self.manifestPath, SimShardedOutputDatabase)
+        dset = merged.get_dataset("TestLoc", "Unweighted")
+        tsdata1 = SimTimeSeriesData(merged, dset, 2, 1)
+        tsdata2 = SimTimeSeriesData(sharded, dset, 2, 1)
+        self.assertEqual(tsdata2.yvalues, tsdata1.yvalues)
+        hdata1 = SimOutputHistogramData(merged, dset, 2, 1)
+        hdata2 = SimOutputHistogramData(sharded, dset, 2, 1)
+        self.assertEqual(list(hdata2.values), list(hdata1.values))
+        self.assertEqual(list(hdata2.weights), list(hdata1.weights))
+
+    def testQueryIndexes(self):
+        "Test: create_query_indexes() creates the query indexes in every shard"
+        sharded = self._open(self.manifestPath, SimShardedOutputDatabase)
+        sharded.create_query_indexes()
+        sqlstr = "select name from sqlite_master where name = 'datasetvalue_value_idx'"
+        for run in (1, 2):
+            self.assertEqual(len(sharded.run_database(run).runQuery(sqlstr)), 1)
+
+    def testCompact(self):
+        "Test: a compacted sharded database has the merged database's values"
+        compactPath = os.path.join(self.sharddir, 'compact.simoutput')
+        SimShardManifest.load(self.manifestPath).compact(compactPath)
+        merged = self._open(self.mergedPath)
+        compacted = self._open(compactPath)
+        self.assertEqual(self._datasetvalues(compacted), self._datasetvalues(merged))
+        self.assertEqual(self._summary_values(compacted), self._summary_values(merged))
+
+    def testOpenArchived(self):
+        "Test: the database manager opens a manifest as a sharded database"
+        dbMgr = SimDatabaseManager()
+        dbMgr.open_archived_database(self.manifestPath)
+        self.addCleanup(dbMgr.close_output_database, delete=False)
+        self.assertIsInstance(dbMgr.database, SimShardedOutputDatabase)
+
+    def testCloseTemporary(self):
+        "Test: closing a temporary sharded database deletes its shards and manifest"
+        os.remove(self.mergedPath)
+        dbMgr = SimDatabaseManager()
+        dbMgr.open_archived_database(self.manifestPath, isTemporary=True)
+        dbMgr.close_output_database(delete=True)
+        self.assertFalse(os.path.exists(self.sharddir))
+
+    def testSaveTemporary(self):
+        "Test: saving a temporary sharded database compacts it, then deletes the shards"
+        savePath = self.sharddir + '.simoutput'
+        self.addCleanup(os.remove, savePath)
+        dbMgr = SimDatabaseManager()
+        dbMgr.open_archived_database(self.manifestPath, isTemporary=True)
+        dbMgr.close_output_database(savePath=savePath)
+        self.assertFalse(os.path.exists(self.manifestPath))
+        saved = self._open(savePath)
+        self.assertEqual(saved.runs(), [1, 2])
+
+
+class SummaryAccumulatorTests(unittest.TestCase):
+    "Tests for the online summary statistics used by summary datasinks"
+    def setUp(self):
+        rng = random.Random(1234)
+        self.values = [rng.uniform(0, 100) for i in range(5000)]
+        self.summary = _SummaryAccumulator(20)
+        for value in self.values:
+            self.summary.add(value)
+
+    def testSketchSize(self):
+        "Test: the percentile sketch never exceeds its maximum size"
+        self.assertLessEqual(len(self.summary._sketch), 20)
+
+    def testMinMax(self):
+        "Test: min and max are exact after sketch compression"
+        self.assertEqual(self.summary.min, min(self.values))
+        self.assertEqual(self.summary.max, max(self.values))
+
+    def testMeanVariance(self):
+        "Test: mean and sample variance match two-pass calculations"
+        n = len(self.values)
+        mean = sum(self.values) / n
+        variance = sum((v - mean)**2 for v in self.values) / (n - 1)
+        self.assertAlmostEqual(self.summary.mean, mean)
+        self.assertAlmostEqual(self.summary.variance(1), variance)
+
+    def testMedianEstimate(self):
+        "Test: estimated median of 5000 uniform(0, 100) values is within 10 of 50"
+        self.assertAlmostEqual(self.summary.percentiles()[50], 50, delta=10)
+
+
+def makeTestSuite():
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    suite.addTest(loader.loadTestsFromTestCase(SummaryDatasinkTests))
+    suite.addTest(loader.loadTestsFromTestCase(BatchSummaryTests))
+    suite.addTest(loader.loadTestsFromTestCase(BulkSummaryTests))
+    suite.addTest(loader.loadTestsFromTestCase(TimeSeriesDatasinkTests))
+    suite.addTest(loader.loadTestsFromTestCase(TimeSeriesDataTests))
+    suite.addTest(loader.loadTestsFromTestCase(ValueChunkTests))
+    suite.addTest(loader.loadTestsFromTestCase(HistogramDataTests))
+    suite.addTest(loader.loadTestsFromTestCase(CoalescingTests))
+    suite.addTest(loader.loadTestsFromTestCase(BufferedDatasinkTests))
+    suite.addTest(loader.loadTestsFromTestCase(BackgroundWriterTests))
+    suite.addTest(loader.loadTestsFromTestCase(InMemoryCopyTests))
+    suite.addTest(loader.loadTestsFromTestCase(SchemaTests))
+    suite.addTest(loader.loadTestsFromTestCase(CompactStorageTests))
+    suite.addTest(loader.loadTestsFromTestCase(ShardedDatabaseTests))
+    suite.addTest(loader.loadTestsFromTestCase(SummaryAccumulatorTests))
+    return suite
+
+if __name__ == '__main__':
+    unittest.main()
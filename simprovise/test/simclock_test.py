@@ -50,6 +50,28 @@ class simclockTests( unittest.TestCase ):
         t1 += 1       
         self.assertNotEqual( t1, SimClock.now() )
         
+    def testClockProtect2( self ):
+        "Test: Modifying the return value of now() after an advance does not modify the clock"
+        SimClock.advance_to( self.ti_2mins )
+        t1 = SimClock.now()
+        t1 += 1       
+        self.assertEqual( SimClock.now(), self.ti_2mins )
+        
+    def testNowScalar( self ):
+        "Test: advance to two minutes - now_scalar() is in base units (minutes, per test ini)"
+        SimClock.advance_to( self.ti_2mins )
+        self.assertEqual( SimClock.now_scalar(), 2 )
+        
+    def testAdvanceScalar1( self ):
+        "Test: advance_to_scalar(2) advances the clock to two minutes (base unit)"
+        SimClock.advance_to_scalar( 2 )
+        self.assertEqual( SimClock.now(), self.ti_120secs )
+        
+    def testAdvanceScalar2( self ):
+        "Test: advance_to_scalar() backwards raises a SimError"
+        SimClock.advance_to_scalar( 2 )
+        self.assertRaises( SimError, SimClock.advance_to_scalar, 1 )
+        
 def makeTestSuite():
     loader = unittest.TestLoader()
     suite = unittest.TestSuite()
@@ -8,6 +8,7 @@
 from simprovise.core.simclock import SimClock
 from simprovise.core import simtime, datacollector
 from simprovise.core.simtime import Unit as tu
+from simprovise.core.datasink import NullDataSink
 from simprovise.core.model import SimModel
 from simprovise.modeling.location import SimLocation
 import unittest
@@ -136,12 +137,69 @@ class SimTimeDataCollectionTests(unittest.TestCase):
         self.assertEqual(self.dc1.entries(), 3)
 
 
+class MockDataSink(NullDataSink):
+    "Datasink that records the values and times passed to put()"
+    def __init__(self):
+        self.values = []
+
+    def put(self, value):
+        self.values.append((SimClock.now(), value))
+
+
+class SimTimeWeightedCoalescingTests(unittest.TestCase):
+    "Tests for a time-weighted data collector that coalesces same-time values"
+    def setUp(self):
+        SimClock.initialize()
+        loc = SimLocation("Test")
+        self.dcTW = datacollector.SimTimeWeightedDataCollector(loc, "Test2", int)
+        self.dcTW.coalesce = True
+        self.sink = MockDataSink()
+        self.dcTW.datasink = self.sink
+        self.dcTW.add_value(1)
+        self.dcTW.add_value(2)
+        self.dcTW.add_value(3)
+        
+    def tearDown(self):
+        # Hack to allow recreation of static objects for each test case
+        SimModel.model().clear_registry_partial()
+
+    def testEntries(self):
+        "Test: every coalesced value is counted as an entry"
+        self.assertEqual(self.dcTW.entries(), 3)
+
+    def testValueHeld(self):
+        "Test: values are not passed to the datasink before the clock advances"
+        self.assertEqual(self.sink.values, [])
+
+    def testLastValuePut(self):
+        "Test: after the clock advances, only the last value is put, at the time it was added"
+        SimClock.advance_to(simtime.SimTime(2))
+        self.dcTW.add_value(4)
+        SimClock.advance_to(simtime.SimTime(3))
+        self.assertEqual(self.sink.values, [(simtime.SimTime(0), 3),
+                                            (simtime.SimTime(2), 4)])
+
+    def testFlushPending(self):
+        "Test: flush_pending() puts the held value; a clock advance after that puts nothing more"
+        self.dcTW.flush_pending()
+        SimClock.advance_to(simtime.SimTime(2))
+        self.assertEqual(self.sink.values, [(simtime.SimTime(0), 3)])
+
+    def testCoalesceOff(self):
+        "Test: turning coalescing off puts the held value, and subsequent values immediately"
+        self.dcTW.coalesce = False
+        self.dcTW.add_value(4)
+        self.assertEqual(self.sink.values, [(simtime.SimTime(0), 3),
+                                            (simtime.SimTime(0), 4)])
+
+
 def makeTestSuite():
     loader = unittest.TestLoader()
     suite = unittest.TestSuite()
     suite.addTest(loader.loadTestsFromTestCase(SimDataCollectorTests))
     suite.addTest(loader.loadTestsFromTestCase(SimDataCollectionClassMethodTests))
     suite.addTest(loader.loadTestsFromTestCase(SimTimeDataCollectionTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimTimeWeightedCoalescingTests))
     return suite        
 
         
@@ -15,6 +15,7 @@ from simprovise.core.simclock import SimClock
 from simprovise.core.datacollector import SimDataCollector
 from simprovise.core.simevent import EventProcessor
 from simprovise.core.model import SimModel
+from simprovise.core import simrandom
 from simprovise.core.simrandom import SimDistribution
 from simprovise.modeling.agent import SimAgent
 #from simprovise.modeling.location import SimStaticObject
@@ -32,6 +33,16 @@ class MockProcess(SimProcess):
         MockProcess.processStarts.append(SimClock.now())
         self.wait_for(MockProcess.processTime)
         
+
+class TestEntity2(SimEntity):
+    ""
+    
+class MockProcess2(MockProcess):
+    ""
+    processStarts = []
+    def run(self):
+        MockProcess2.processStarts.append(SimClock.now())
+        
         
 class MockSource(SimEntitySource):
     def __init__(self):
@@ -42,6 +53,7 @@ def reinitialize():
     SimDataCollector.reinitialize()
     SimClock.initialize()
     MockProcess.processStarts.clear()
+    MockProcess2.processStarts.clear()
     # Hack to allow recreation of static objects for each test case
     #SimModel.model()._staticObjects.clear()
     #SimModel.model()._agents.clear()
@@ -176,6 +188,21 @@ class SimEntitySourceTests(unittest.TestCase):
         SimAgent.final_initialize_all()              
         eventsProcessed = self.eventProcessor.process_events(SimTime(10))
         self.assertEqual(eventsProcessed, 6)
+     
+    def testEntityChoiceGenerator(self):
+        """
+        Entity choice generator creating an entity every 10 seconds, always
+        choosing TestEntity2 (other choice weight zero)
+        Running for 20 seconds results in two TestEntity2 process starts
+        """
+        self.source.add_entity_choice_generator(((TestEntity, MockProcess),
+                                                 (TestEntity2, MockProcess2)),
+                                                SimDistribution.constant(SimTime(10)),
+                                                weights=(0, 1))
+        simrandom.initialize(1)
+        self.source.final_initialize()              
+        eventsProcessed = self.eventProcessor.process_events(SimTime(20))
+        self.assertEqual(len(MockProcess2.processStarts), 2)
 
 def makeTestSuite():
     loader = unittest.TestLoader()
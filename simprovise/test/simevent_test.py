@@ -10,6 +10,7 @@ from simprovise.core.simclock import SimClock
 from simprovise.core.simtime import SimTime, Unit as tu
 import unittest
 import copy
+import random
 from heapq import heappop
 
 class TestEvent(simevent.SimEvent):
@@ -276,7 +277,7 @@ class SimEventProcessorTests( unittest.TestCase ):
         eventList = self.addTestEvents(SimClock.now(), 2)
         eventList.extend(self.addTestEvents(self.twoMins, 1))
         self.eventProcessor.process_events(simtime.SimTime(120, tu.SECONDS))                       
-        self.assertEqual(len(simevent.event_heap), 0)
+        self.assertEqual(len(simevent.event_set), 0)
 
     def testAdvanceClock4(self):
         "Test:  events at time zero, two minutes.  Process events for 1 minute, and repeat.  All events processed"
@@ -292,7 +293,7 @@ class SimEventProcessorTests( unittest.TestCase ):
         eventList.extend(self.addTestEvents(self.twoMins, 1))
         self.eventProcessor.process_events(simtime.SimTime(60, tu.SECONDS))                       
         self.eventProcessor.process_events(simtime.SimTime(120, tu.SECONDS))                       
-        self.assertEqual(len(simevent.event_heap), 0)
+        self.assertEqual(len(simevent.event_set), 0)
 
     def testAdvanceClock5(self):
         "Test:  events at time zero, two minutes.  Process events for 3 minutes - test that current time is 3 minutes (even though last event is at two minutes"
@@ -317,7 +318,187 @@ class SimEventProcessorTests( unittest.TestCase ):
         deregisteredEvent.deregister()
         eventList.remove(deregisteredEvent)
         self.eventProcessor.process_events()                       
-        self.assertEqual(len(simevent.event_heap), 0)
+        self.assertEqual(len(simevent.event_set), 0)
+        
+        
+
+class CalendarQueueEventProcessorTests(SimEventProcessorTests): 
+    "Runs the SimEventProcessor tests using a calendar queue event set"
+    def setUp( self ):
+        super().setUp()
+        self.eventProcessor = simevent.EventProcessor(simevent.CalendarQueueEventSet)
+        
+    def testEventSetClass(self):
+        "Test: EventProcessor initializes a calendar queue event set"
+        self.assertIsInstance(simevent.event_set, simevent.CalendarQueueEventSet)
+        
+    def testEventHeapIsNone(self):
+        "Test: EventProcessor with a calendar queue sets event_heap to None"
+        self.assertIsNone(simevent.event_heap)
+        
+
+class FastTimeEventProcessorTests(SimEventProcessorTests): 
+    "Runs the SimEventProcessor tests in fast time (scalar event key) mode"
+    def setUp( self ):
+        super().setUp()
+        self.eventProcessor = simevent.EventProcessor(fastTime=True)
+        
+    def testEventKey(self):
+        "Test: in fast time mode, the event set key is a scalar in base units"
+        TestEvent(self.twoMins).register()
+        self.assertEqual(simevent.event_set.peek()[0], 2)
+        
+
+class FastTimeCalendarQueueEventProcessorTests(SimEventProcessorTests): 
+    "Runs the SimEventProcessor tests with a fast time mode calendar queue"
+    def setUp( self ):
+        super().setUp()
+        self.eventProcessor = simevent.EventProcessor(simevent.CalendarQueueEventSet,
+                                                      fastTime=True)
+        
+
+class CalendarQueueEventSetTests(unittest.TestCase):
+    "Tests for class CalendarQueueEventSet, using the heap as a reference"
+    def setUp( self ):
+        self.heap = simevent.HeapEventSet()
+        self.calendar = simevent.CalendarQueueEventSet()
+        self.rng = random.Random(1234)
+        self.seq = 0
+        
+    def push(self, time, priority=1):
+        self.seq += 1
+        entry = [time, priority, self.seq, self.seq]
+        self.heap.push(entry)
+        self.calendar.push(list(entry))
+        
+    def popBoth(self, n):
+        heapEntries = [self.heap.pop() for i in range(n)]
+        calendarEntries = [self.calendar.pop() for i in range(n)]
+        return heapEntries, calendarEntries
+        
+    def testEmpty(self):
+        "Test: peek on an empty calendar queue returns None"
+        self.assertIsNone(self.calendar.peek())
+        
+    def testLength(self):
+        "Test: calendar queue length reflects pushes and pops"
+        for i in range(10):
+            self.push(SimTime(i))
+        self.calendar.pop()
+        self.assertEqual(len(self.calendar), 9)
+        
+    def testOrder1(self):
+        "Test: random times and priorities are popped in heap order (with resizing)"
+        for i in range(2000):
+            self.push(SimTime(self.rng.expovariate(0.1)), self.rng.randint(1, 3))
+        self.assertEqual(*self.popBoth(2000))
+        
+    def testOrder2(self):
+        "Test: many identical times are popped in heap (sequence number) order"
+        for i in range(500):
+            self.push(SimTime(5))
+        self.assertEqual(*self.popBoth(500))
+        
+    def testHold(self):
+        "Test: interleaved pops and pushes (including earlier times) match the heap"
+        for i in range(500):
+            self.push(SimTime(self.rng.uniform(0, 100)))
+        for i in range(5000):
+            tm = self.heap.peek()[0]
+            self.assertEqual(self.heap.pop(), self.calendar.pop())
+            if i % 7 == 0:
+                self.push(tm + self.rng.uniform(0, 1000))
+            else:
+                self.push(tm + self.rng.expovariate(1.0))
+        self.assertEqual(*self.popBoth(len(self.heap)))
+        
+    def testPeek(self):
+        "Test: peek returns the entry that is subsequently popped"
+        for i in range(100):
+            self.push(SimTime(self.rng.uniform(0, 100)))
+        for i in range(100):
+            entry = self.calendar.peek()
+            self.assertIs(entry, self.calendar.pop())
+        
+        
+
+class EventSetCompactionTests(unittest.TestCase):
+    "Tests for removed entry counts and compaction in the heap event set"
+    eventSetClass = simevent.HeapEventSet
+    
+    def setUp( self ):
+        SimClock.initialize()
+        TestEvent.eventCount = 0
+        TestEvent.processedCount = 0
+        TestEvent.processedEvents = []
+        self.eventProcessor = simevent.EventProcessor(self.eventSetClass)
+        self.nevents = 2 * simevent.EventSet.COMPACTION_MIN_REMOVED
+        self.eventList = [TestEvent(SimTime(i % 100, tu.MINUTES))
+                          for i in range(self.nevents)]
+        for e in self.eventList:
+            e.register()
+        
+    def deregister(self, n):
+        removed = self.eventList[:n]
+        for e in removed:
+            e.deregister()
+        return removed
+            
+    def testRemovedCount(self):
+        "Test: deregistering below the compaction minimum leaves removed entries in place"
+        self.deregister(10)
+        self.assertEqual(self.eventProcessor.removed_event_count, 10)
+        
+    def testLiveCount(self):
+        "Test: deregistering below the compaction minimum reduces the live count"
+        self.deregister(10)
+        self.assertEqual(self.eventProcessor.live_event_count, self.nevents - 10)
+        
+    def testEventSetLength(self):
+        "Test: deregistering below the compaction minimum does not reduce the event set length"
+        self.deregister(10)
+        self.assertEqual(len(simevent.event_set), self.nevents)
+        
+    def testCompaction1(self):
+        "Test: deregistering past the threshold compacts the event set"
+        n = simevent.EventSet.COMPACTION_MIN_REMOVED + 10
+        self.deregister(n)
+        ncompacted = simevent.EventSet.COMPACTION_MIN_REMOVED + 1
+        self.assertEqual(len(simevent.event_set), self.nevents - ncompacted)
+        
+    def testCompaction2(self):
+        "Test: after compaction, removed count reflects subsequent deregistrations"
+        n = simevent.EventSet.COMPACTION_MIN_REMOVED + 10
+        self.deregister(n)
+        self.assertEqual(self.eventProcessor.removed_event_count, 9)
+        
+    def testCompaction3(self):
+        "Test: after compaction, live count is correct"
+        n = simevent.EventSet.COMPACTION_MIN_REMOVED + 10
+        self.deregister(n)
+        self.assertEqual(self.eventProcessor.live_event_count, self.nevents - n)
+        
+    def testCompactionProcessing(self):
+        "Test: after compaction, remaining events are processed in time/sequence order"
+        n = simevent.EventSet.COMPACTION_MIN_REMOVED + 10
+        removed = self.deregister(n)
+        remaining = self.eventList[n:]
+        remaining.sort(key=lambda e: e.time)
+        self.eventProcessor.process_events()
+        self.assertEqual(TestEvent.processedEvents, remaining)
+        
+    def testCountsAfterProcessing(self):
+        "Test: after processing all events, live and removed counts are zero"
+        self.deregister(10)
+        self.eventProcessor.process_events()
+        counts = (self.eventProcessor.live_event_count,
+                  self.eventProcessor.removed_event_count)
+        self.assertEqual(counts, (0, 0))
+        
+
+class CalendarQueueCompactionTests(EventSetCompactionTests):
+    "Tests for removed entry counts and compaction in the calendar queue"
+    eventSetClass = simevent.CalendarQueueEventSet
         
         
 def makeTestSuite():
@@ -327,6 +508,12 @@ def makeTestSuite():
     suite.addTest(loader.loadTestsFromTestCase(SimEventTests2))
     suite.addTest(loader.loadTestsFromTestCase(SimEventPriorityTests))
     suite.addTest(loader.loadTestsFromTestCase(SimEventProcessorTests))
+    suite.addTest(loader.loadTestsFromTestCase(CalendarQueueEventProcessorTests))
+    suite.addTest(loader.loadTestsFromTestCase(FastTimeEventProcessorTests))
+    suite.addTest(loader.loadTestsFromTestCase(FastTimeCalendarQueueEventProcessorTests))
+    suite.addTest(loader.loadTestsFromTestCase(CalendarQueueEventSetTests))
+    suite.addTest(loader.loadTestsFromTestCase(EventSetCompactionTests))
+    suite.addTest(loader.loadTestsFromTestCase(CalendarQueueCompactionTests))
     return suite
         
 if __name__ == '__main__':
@@ -11,6 +11,7 @@ from simprovise.core.simlogging import SimLogging
 from simprovise.core.simtime import SimTime, Unit as tu
 
 import unittest, logging
+import numpy as np
 
 class RandomInitializationTests(unittest.TestCase):
     "simrandom Initialize Tests"
@@ -63,6 +64,30 @@ class RandomInitializationTests(unittest.TestCase):
                 
         self.assertEqual(len(stateset), nruns * nstreams)
         
+    def testLazyStreamCreation1(self):
+        "Test: initialize() does not create any stream generators"
+        simrandom.initialize(2)
+        self.assertEqual(simrandom.stream_creation_stats()[0], 0)
+        
+    def testLazyStreamCreation2(self):
+        "Test: streams are created (once) on first access"
+        simrandom.initialize(2)
+        simrandom.get_random_generator(5)
+        simrandom.get_random_generator(12)
+        simrandom.get_random_generator(5)
+        self.assertEqual(simrandom.stream_creation_stats()[0], 2)
+        
+    def testLazyStreamIdentity(self):
+        "Test: lazily created streams are identical to eagerly jumped streams"
+        run = 3
+        ns = simrandom.max_streams()
+        runBitGenerator = simrandom._BASE_BIT_GENERATOR.jumped((run - 1) * ns)
+        simrandom.initialize(run)
+        for streamNum in (ns, 7, 1):
+            expected = runBitGenerator.jumped(streamNum - 1).state
+            rng = simrandom.get_random_generator(streamNum)
+            self.assertEqual(rng.bit_generator.state, expected)
+        
         
 class SimDistributionTestsBase(unittest.TestCase):
     "Base class for SimDistribution Test Case"
@@ -320,6 +345,272 @@ class SimDistributionSimTimeTests2(SimDistributionTestsBase):
         self.assertAlmostEqual(mean.value, 1, delta=0.1)
         
         
+
+class SimDistributionBufferedTests(SimDistributionTestsBase):
+    "SimDistribution Tests with buffered generators"
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.saved_buffer_size = simrandom._BUFFER_SIZE
+        simrandom._BUFFER_SIZE = 100
+        
+    @classmethod
+    def tearDownClass(cls):
+        simrandom._BUFFER_SIZE = cls.saved_buffer_size
+        
+    def _unbuffered(self, distfunc, *args, **kwargs):
+        simrandom._BUFFER_SIZE = 0
+        try:
+            return distfunc(*args, **kwargs)
+        finally:
+            simrandom._BUFFER_SIZE = 100
+        
+    def _sample(self, gen, n=250):
+        return [next(gen) for i in range(n)]
+        
+    def testExponentialSequence(self):
+        "Test: buffered exponential yields the same values as unbuffered"
+        values = self._sample(SimDistribution.exponential(42, streamNum=3))
+        simrandom.initialize(1)
+        gen = self._unbuffered(SimDistribution.exponential, 42, streamNum=3)
+        self.assertEqual(values, self._sample(gen))
+        
+    def testTriangularSimTimeSequence(self):
+        "Test: buffered triangular SimTime generator yields the same values as unbuffered"
+        args = (SimTime(10, tu.SECONDS), SimTime(30, tu.SECONDS), SimTime(2, tu.MINUTES))
+        values = self._sample(SimDistribution.triangular(*args, streamNum=4))
+        simrandom.initialize(1)
+        gen = self._unbuffered(SimDistribution.triangular, *args, streamNum=4)
+        self.assertEqual(values, self._sample(gen))
+        
+    def testBinomialSequence(self):
+        "Test: buffered binomial yields the same values as unbuffered"
+        values = self._sample(SimDistribution.binomial(5, 0.3, streamNum=6))
+        simrandom.initialize(1)
+        gen = self._unbuffered(SimDistribution.binomial, 5, 0.3, streamNum=6)
+        self.assertEqual(values, self._sample(gen))
+        
+    def testBinomialRange(self):
+        "Test: buffered binomial values are in the range [0, n]"
+        values = self._sample(SimDistribution.binomial(3, 0.5), 1000)
+        self.assertEqual(set(values), {0, 1, 2, 3})
+        
+    def testBinomialMean(self):
+        "Test: buffered binomial generator mean is n * rho"
+        gen = SimDistribution.binomial(4, 0.25, streamNum=8)
+        mean = self._run_gen(gen)
+        self.assertAlmostEqual(mean, 1.0, delta=0.02)
+        
+    def testSimTimeType(self):
+        "Test: buffered generator with SimTime parameters yields SimTime values in the parameter units"
+        gen = SimDistribution.uniform(SimTime(10, tu.SECONDS), SimTime(1, tu.MINUTES))
+        value = next(gen)
+        self.assertEqual((type(value), value.units), (SimTime, tu.SECONDS))
+        
+    def testNormalFloor(self):
+        "Test: buffered normal generator with default floor of zero - min value is zero"
+        gen = SimDistribution.normal(1.0, 5.0)
+        self.assertEqual(min(self._sample(gen, 1000)), 0)
+        
+    def testChoice(self):
+        "Test: buffered choice generator yields only the passed choices"
+        gen = SimDistribution.choice((2, 4, 6))
+        self.assertEqual(set(self._sample(gen)), {2, 4, 6})
+        
+    def testMean(self):
+        "Test: buffered gamma generator mean"
+        gen = SimDistribution.gamma(10, 2.0, streamNum=7)
+        mean = self._run_gen(gen)
+        self.assertAlmostEqual(mean, 20, delta=0.2)
+        
+    def testInitializeClearsBuffer(self):
+        "Test: initialize() discards buffered values, so that a generator restarts the new run's stream"
+        gen = SimDistribution.exponential(42, streamNum=5)
+        values = self._sample(gen, 10)
+        simrandom.initialize(1)
+        self.assertEqual(values, self._sample(gen, 10))
+        
+    
+class SimDistributionAntitheticTests(SimDistributionTestsBase):
+    "SimDistribution Tests with inversion/antithetic sampling"
+    
+    def tearDown(self):
+        simrandom.initialize(1)
+        
+    def _sample(self, distfunc, *args, antithetic, n=1000, **kwargs):
+        simrandom.initialize(1, antithetic)
+        gen = distfunc(*args, **kwargs)
+        return [next(gen) for i in range(n)]
+    
+    def testUniformComplement(self):
+        "Test: antithetic uniform(0, 1) values are the complements of the first run's values"
+        values1 = self._sample(SimDistribution.uniform, 0, 1, antithetic=False)
+        values2 = self._sample(SimDistribution.uniform, 0, 1, antithetic=True)
+        for x, y in zip(values1, values2):
+            self.assertAlmostEqual(x + y, 1.0)
+            
+    def testExponentialNegativeCorrelation(self):
+        "Test: antithetic exponential values are negatively correlated with the first run's values"
+        values1 = self._sample(SimDistribution.exponential, 10, antithetic=False)
+        values2 = self._sample(SimDistribution.exponential, 10, antithetic=True)
+        self.assertLess(np.corrcoef(values1, values2)[0, 1], -0.5)
+        
+    def testNormalPairMean(self):
+        "Test: antithetic normal pair values average to mu"
+        values1 = self._sample(SimDistribution.normal, 10, 2, None, antithetic=False)
+        values2 = self._sample(SimDistribution.normal, 10, 2, None, antithetic=True)
+        for x, y in zip(values1, values2):
+            self.assertAlmostEqual((x + y) / 2, 10.0)
+            
+    def testInversionMean(self):
+        "Test: weibull mean using inversion sampling"
+        simrandom.initialize(1, False)
+        gen = SimDistribution.weibull(1.0, streamNum=3)
+        self.assertAlmostEqual(self._run_gen(gen), 1.0, delta=0.05)
+            
+    def testGeometricType(self):
+        "Test: geometric inversion sampling yields positive ints"
+        values = self._sample(SimDistribution.geometric, 0.25, antithetic=True)
+        self.assertTrue(all(type(x) is int and x >= 1 for x in values))
+        
+    def testSimTimeType(self):
+        "Test: inversion sampling with SimTime parameters yields SimTime values in the parameter units"
+        value = self._sample(SimDistribution.triangular, SimTime(10, tu.SECONDS),
+                             SimTime(30, tu.SECONDS), SimTime(1, tu.MINUTES),
+                             antithetic=True, n=1)[0]
+        self.assertEqual((type(value), value.units), (SimTime, tu.SECONDS))
+        
+    def testChoice(self):
+        "Test: choice inversion sampling yields only the passed choices"
+        values = self._sample(SimDistribution.choice, ('a', 'b', 'c'), antithetic=True)
+        self.assertEqual(set(values), {'a', 'b', 'c'})
+        
+    def testNoInverseCommonValues(self):
+        "Test: gamma (no inverse) antithetic run values are the same as the first run's values"
+        values1 = self._sample(SimDistribution.gamma, 2, 3, antithetic=False)
+        values2 = self._sample(SimDistribution.gamma, 2, 3, antithetic=True)
+        self.assertEqual(values1, values2)
+        
+    def testBufferedSequence(self):
+        "Test: buffered antithetic generator yields the same values as unbuffered"
+        values = self._sample(SimDistribution.exponential, 10, antithetic=True)
+        saved_buffer_size = simrandom._BUFFER_SIZE
+        simrandom._BUFFER_SIZE = 100
+        try:
+            buffered = self._sample(SimDistribution.exponential, 10, antithetic=True)
+        finally:
+            simrandom._BUFFER_SIZE = saved_buffer_size
+        self.assertEqual(values, buffered)
+        
+    def testSharedStreams(self):
+        "Test: shared_streams() includes a stream used by two generators"
+        SimDistribution.exponential(10, streamNum=11)
+        SimDistribution.uniform(0, 1, streamNum=11)
+        self.assertIn(11, simrandom.shared_streams())
+        
+    def testResetStreamUsage(self):
+        "Test: reset_stream_usage() clears shared_streams()"
+        SimDistribution.exponential(10, streamNum=12)
+        SimDistribution.uniform(0, 1, streamNum=12)
+        simrandom.reset_stream_usage()
+        self.assertEqual(simrandom.shared_streams(), [])
+        
+    
+class SimDistributionWeightedChoiceTests(SimDistributionTestsBase):
+    "SimDistribution.choice() Tests with weights (alias table sampling)"
+    
+    def tearDown(self):
+        simrandom.initialize(1)
+        
+    def _frequencies(self, gen, choices, n=100000):
+        counts = dict.fromkeys(choices, 0)
+        for i in range(n):
+            counts[next(gen)] += 1
+        return [counts[c] / n for c in choices]
+    
+    def testAliasTableProbabilities(self):
+        "Test: the alias table's implied probabilities equal the normalized weights"
+        weights = [1, 0, 3, 7, 2.5, 0.5, 6]
+        table = simrandom._AliasTable(weights)
+        n = len(weights)
+        implied = [0.0] * n
+        for k in range(n):
+            implied[k] += table.prob[k] / n
+            implied[table.alias[k]] += (1 - table.prob[k]) / n
+        for p, w in zip(implied, weights):
+            self.assertAlmostEqual(p, w / sum(weights))
+        
+    def testFrequencies(self):
+        "Test: weighted choice sample frequencies are within 0.01 of the weighted probabilities"
+        choices = ('a', 'b', 'c', 'd')
+        weights = (1, 2, 3, 4)
+        gen = SimDistribution.choice(choices, 2, weights=weights)
+        for freq, w in zip(self._frequencies(gen, choices), weights):
+            self.assertAlmostEqual(freq, w / 10, delta=0.01)
+                
+    def testZeroWeight(self):
+        "Test: a choice with weight zero is never chosen"
+        gen = SimDistribution.choice((1, 2, 3), weights=(5, 0, 5))
+        self.assertNotIn(2, [next(gen) for i in range(10000)])
+        
+    def testTupleChoices(self):
+        "Test: tuple choices are yielded intact"
+        choices = (('x', 1), ('y', 2))
+        gen = SimDistribution.choice(choices, weights=(1, 1))
+        self.assertIn(next(gen), choices)
+        
+    def testBufferedSequence(self):
+        "Test: buffered weighted choice yields the same values as unbuffered"
+        choices = list(range(20))
+        weights = [i % 3 + 1 for i in choices]
+        gen = SimDistribution.choice(choices, 3, weights=weights)
+        values = [next(gen) for i in range(500)]
+        saved_buffer_size = simrandom._BUFFER_SIZE
+        simrandom._BUFFER_SIZE = 100
+        try:
+            simrandom.initialize(1)
+            gen = SimDistribution.choice(choices, 3, weights=weights)
+            self.assertEqual(values, [next(gen) for i in range(500)])
+        finally:
+            simrandom._BUFFER_SIZE = saved_buffer_size
+            
+    def testAntitheticFrequencies(self):
+        "Test: weighted choice frequencies using antithetic (inversion) sampling"
+        choices = ('a', 'b', 'c')
+        simrandom.initialize(1, True)
+        gen = SimDistribution.choice(choices, weights=(1, 1, 2))
+        freqs = self._frequencies(gen, choices, 20000)
+        self.assertAlmostEqual(freqs[2], 0.5, delta=0.02)
+        
+    def testUnweightedSequence(self):
+        "Test: unweighted choice yields the same values as Generator.choice()"
+        choices = (2, 4, 6, 8, 10)
+        gen = SimDistribution.choice(choices, 5)
+        values = [next(gen) for i in range(100)]
+        simrandom.initialize(1)
+        rng = simrandom.get_random_generator(5)
+        self.assertEqual(values, [rng.choice(choices) for i in range(100)])
+        
+    def testWeightCountMismatch(self):
+        "Test: weighted choice with too few weights raises"
+        self.assertRaises(SimError, SimDistribution.choice, (1, 2, 3), weights=(1, 2))
+        
+    def testNegativeWeight(self):
+        "Test: weighted choice with a negative weight raises"
+        self.assertRaises(SimError, SimDistribution.choice, (1, 2), weights=(1, -2))
+        
+    def testZeroWeights(self):
+        "Test: weighted choice with weights that sum to zero raises"
+        self.assertRaises(SimError, SimDistribution.choice, (1, 2), weights=(0, 0))
+        
+    def testNonNumericWeight(self):
+        "Test: weighted choice with a non-numeric weight raises"
+        self.assertRaises(SimError, SimDistribution.choice, (1, 2), weights=(1, 'a'))
+        
+    def testEmptyChoices(self):
+        "Test: choice with no choices raises"
+        self.assertRaises(SimError, SimDistribution.choice, ())
+        
     
 class SimDistributionInvalidParameterTests(SimDistributionTestsBase):
     "SimDistribution Tests: invalid parameter values"
@@ -510,6 +801,9 @@ def makeTestSuite():
     suite.addTest(loader.loadTestsFromTestCase(RandomInitializationTests))
     suite.addTest(loader.loadTestsFromTestCase(SimDistributionSmokeTests))
     suite.addTest(loader.loadTestsFromTestCase(SimDistributionSimTimeTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimDistributionBufferedTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimDistributionAntitheticTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimDistributionWeightedChoiceTests))
     suite.addTest(loader.loadTestsFromTestCase(SimDistributionInvalidParameterTests))
     return suite
 
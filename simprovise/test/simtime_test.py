@@ -213,6 +213,40 @@ class SimTimeTests(unittest.TestCase):
         testDict[ ti5 ] = 5
         self.assertEqual(len(testDict), 5)
         
+    def testImmutable1(self):
+        "Test: augmented addition does not modify the original SimTime"
+        t1 = self.ti_2mins
+        t1 += self.ti_30secs
+        self.assertEqual(self.ti_2mins, simtime.SimTime(120, tu.SECONDS))
+        
+    def testImmutable2(self):
+        "Test: augmented addition rebinds to the sum"
+        t1 = self.ti_2mins
+        t1 += self.ti_30secs
+        self.assertEqual(t1, simtime.SimTime(150, tu.SECONDS))
+        
+    def testMakeCopy(self):
+        "Test: make_copy() of an immutable SimTime returns an equal SimTime"
+        self.assertEqual(self.ti_1hr.make_copy(), self.ti_3600secs)
+        
+    def testZero(self):
+        "Test: SimTime.zero() equals SimTime(0)"
+        self.assertEqual(simtime.SimTime.zero(), simtime.SimTime(0))
+        
+    def testZeroCached(self):
+        "Test: SimTime.zero() returns the same (cached) object"
+        self.assertIs(simtime.SimTime.zero(), simtime.SimTime.zero())
+        
+    def testUnitInterval1(self):
+        "Test: SimTime.unit_interval(MINUTES) equals 60 seconds"
+        self.assertEqual(simtime.SimTime.unit_interval(tu.MINUTES),
+                         simtime.SimTime(60, tu.SECONDS))
+        
+    def testUnitInterval2(self):
+        "Test: SimTime.unit_interval() is in the base unit"
+        self.assertEqual(simtime.SimTime.unit_interval().units,
+                         simtime.base_unit())
+        
     def testScalarComparison(self):
         "Test: comparing SimTime to scalar value raises when base time unit is not None"
         t1 = SimTime(2, tu.MINUTES)
@@ -348,6 +382,12 @@ class SimDimensionlessBaseTimeTests(unittest.TestCase):
         t1 = SimTime(22)
         self.assertRaises(SimError, lambda: self._ti_3mins == t1)
         
+    def testDimensionlessHash(self):
+        "Test: dimensionless SimTimes of equal value hash to the same value"
+        testDict = {}
+        testDict[self._ti_3_none] = 42
+        self.assertEqual(testDict[SimTime(3)], 42)
+        
     def testToScalar(self):
         "Test to_scalar for dimensionless SimTime"
         self.assertEqual(self._ti_3_none.to_scalar(), 3)
@@ -1,15 +1,28 @@
-import os
+import os, sys, io, shutil, math, multiprocessing.pool, multiprocessing.forkserver
+from contextlib import redirect_stdout
 from simprovise.runcontrol.replication import (SimReplication,
+                                               SimReplicator,
+                                               SimForkedReplications,
+                                               _worker_context,
+                                               _initialize_worker,
+                                               _worker_startup_time,
                                                SimReplicationParameters,
                                                SimRunControlParameters)
 from simprovise.core.model import SimModel
 from simprovise.modeling.location import SimStaticObject
+from simprovise.modeling.entity import SimEntity
 from simprovise.database import *
 #from simprovise.simulation import Simulation
 from simprovise.database import SimDatasetSummaryData
+from simprovise.core import SimError, simrandom
+from simprovise.core.simrandom import SimDistribution
+from simprovise.core.simtime import SimTime, Unit as tu
+from simprovise.simulation import (SimSample, SimPrecisionTarget,
+                                  SimulationResult, _t_quantile)
 
 import logging
 import unittest
+import unittest.mock
 
 
 TEST_MODELSCRIPT1_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
@@ -601,6 +614,604 @@ class ReplicatorTests(unittest.TestCase):
         self.assertEqual(minMaxCurrent, (0, 2))
 
 
+class SimModelReloadTests(unittest.TestCase):
+    """
+    Tests SimModel.reload_model(), which is used to execute multiple
+    replications in one process; a reloaded model should reproduce the
+    results of the model as originally loaded.
+    """
+    _warmupLength = SimTime(40)
+    _batchLength = SimTime(300)
+    _nBatches = 2
+
+    @classmethod
+    def execute(cls, model):
+        """
+        Execute run 1 of the passed model, returning the summary statistics
+        (count, mean, min and max) for every dataset and batch in a dict
+        keyed by (element ID, dataset name, batch).
+        """
+        replication = SimReplication(model, 1, cls._warmupLength,
+                                     cls._batchLength, cls._nBatches)
+        replication.execute()
+        dbMgr = SimDatabaseManager()
+        dbMgr.open_archived_database(replication.dbPath, isTemporary=True)
+        results = {}
+        try:
+            for dset in dbMgr.current_datasets():
+                for batch in range(1, cls._nBatches+1):
+                    sdata = SimDatasetSummaryData(dbMgr.database, dset, 1, batch)
+                    key = (dset.element_id, dset.name, batch)
+                    results[key] = (sdata.count, sdata.mean, sdata.min, sdata.max)
+        finally:
+            dbMgr.close_output_database(delete=True)
+        return results
+
+    @classmethod
+    def setUpClass(cls):
+        # (Re)load the model, whether or not it has already been loaded by
+        # a previous test case
+        cls.mainModule = sys.modules['__main__']
+        model = SimModel.reload_model(TEST_MODELSCRIPT1_PATH)
+        cls.processClass1 = type(next(model.process_elements).element_class)
+        cls.entityElement1 = SimEntity.element
+        cls.results1 = cls.execute(model)
+        
+        model = SimModel.reload_model()
+        cls.processClass2 = type(next(model.process_elements).element_class)
+        cls.results2 = cls.execute(model)
+        cls.model = model
+
+    def testDatasets(self):
+        "Test: a reloaded model has the same datasets"
+        self.assertEqual(self.results1.keys(), self.results2.keys())
+
+    def testResults(self):
+        "Test: a reloaded model's results are the same"
+        self.assertEqual(self.results1, self.results2)
+
+    def testResultCount(self):
+        "Test: the results include values for the base SimEntity element"
+        key = ('simprovise.modeling.entity.SimEntity', 'Process-Time', 1)
+        self.assertGreater(self.results2[key][0], 0)
+
+    def testEntityElementRecreated(self):
+        "Test: the SimEntity base class element is replaced on reload"
+        self.assertIsNot(SimEntity.element, self.entityElement1)
+
+    def testEntityElementRegistered(self):
+        "Test: the replacement SimEntity base class element is registered"
+        self.assertIs(self.model.get_entity_element(SimEntity), SimEntity.element)
+
+    def testMainModuleUnchanged(self):
+        "Test: reloading the model in the parent process leaves __main__ alone"
+        self.assertIs(sys.modules['__main__'], self.mainModule)
+
+    def testPooledTaskAfterReload(self):
+        "Test: a (spawned) pool worker starts after the model is reloaded"
+        SimModel.reload_model()
+        with multiprocessing.pool.Pool(processes=1, initializer=_initialize_worker,
+                                       context=_worker_context('spawn')) as pool:
+            startupTime = pool.apply_async(_worker_startup_time).get(timeout=60)
+        self.assertGreater(startupTime, 0)
+
+    def testSharedStreamsAfterReload(self):
+        "Test: stream usage by a previously loaded model is discarded on reload"
+        SimDistribution.exponential(10, streamNum=99)
+        SimDistribution.exponential(10, streamNum=99)
+        SimModel.reload_model()
+        self.assertEqual(simrandom.shared_streams(), [])
+
+    def testStaticObjectCount(self):
+        "Test: a reloaded model has one of each static object"
+        elementIDs = [e.element_id for e in self.model.static_objects]
+        self.assertEqual(len(elementIDs), len(set(elementIDs)))
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), "requires os.fork()")
+class SimForkedReplicationsTests(unittest.TestCase):
+    """
+    Tests SimForkedReplications, which forks each replication from a single
+    simulated warmup. (The test model is deterministic, so every forked
+    replication should produce the same results as a normal replication.)
+    """
+    _warmupLength = SimTime(40)
+    _batchLength = SimTime(300)
+    _nBatches = 2
+    _runNumbers = (1, 2, 3)
+
+    @classmethod
+    def summary(cls, dbpath, run):
+        """
+        Return the summary statistics for every dataset and batch of the
+        specified run in the passed database, as for
+        SimModelReloadTests.execute()
+        """
+        dbMgr = SimDatabaseManager()
+        dbMgr.open_archived_database(dbpath)
+        results = {}
+        try:
+            for dset in dbMgr.current_datasets():
+                for batch in range(1, cls._nBatches+1):
+                    sdata = SimDatasetSummaryData(dbMgr.database, dset, run, batch)
+                    key = (dset.element_id, dset.name, batch)
+                    results[key] = (sdata.count, sdata.mean, sdata.min, sdata.max)
+        finally:
+            dbMgr.close_output_database(delete=False)
+        return results
+
+    @classmethod
+    def setUpClass(cls):
+        model = SimModel.reload_model(TEST_MODELSCRIPT1_PATH)
+        cls.replicationResults = SimModelReloadTests.execute(model)
+        
+        model = SimModel.reload_model()
+        dbMgr = SimDatabaseManager()
+        dbMgr.create_output_database(model)
+        templatePath = dbMgr.current_database_path
+        dbMgr.close_output_database(delete=False)
+        cls.runs = []
+        for runNumber in cls._runNumbers:
+            dbpath = "{0}.run{1}".format(templatePath, runNumber)
+            shutil.copyfile(templatePath, dbpath)
+            cls.runs.append((runNumber, dbpath))
+        os.remove(templatePath)
+            
+        forkedReplications = SimForkedReplications(model, cls.runs,
+                                                   cls._warmupLength,
+                                                   cls._batchLength,
+                                                   cls._nBatches, 2)
+        cls.results = forkedReplications.execute()
+        cls.summaries = {runNumber: cls.summary(dbpath, runNumber)
+                         for runNumber, dbpath in cls.runs}
+        cls.model = model
+
+    @classmethod
+    def tearDownClass(cls):
+        for runNumber, dbpath in cls.runs:
+            os.remove(dbpath)
+
+    def testResultRuns(self):
+        "Test: there is a result for every forked replication"
+        self.assertEqual(sorted(r[0] for r in self.results), list(self._runNumbers))
+
+    def testResultsSucceeded(self):
+        "Test: every forked replication succeeded"
+        self.assertEqual([r[2] for r in self.results], [None] * len(self._runNumbers))
+
+    def testFirstRunResults(self):
+        "Test: the first forked replication's results match a normal replication"
+        self.assertEqual(self.summaries[1], self.replicationResults)
+
+    def testOtherRunResults(self):
+        "Test: the other forked replications' results (for a deterministic model) match as well"
+        self.assertEqual(self.summaries[3], self.replicationResults)
+
+    def testNoWarmup(self):
+        "Test: forked replications without a warmup raise a SimError"
+        self.assertRaises(SimError, SimForkedReplications, self.model,
+                          self.runs, SimTime(0), self._batchLength, 1)
+
+    def testNoRuns(self):
+        "Test: forked replications with no runs raise a SimError"
+        self.assertRaises(SimError, SimForkedReplications, self.model, [],
+                          self._warmupLength, self._batchLength, 1)
+
+
+class WorkerStartupTests(unittest.TestCase):
+    """
+    Tests the measurement of replication worker process start-up latency,
+    for each supported start method.
+    """
+    def startupTimes(self, startMethod):
+        """
+        Return the start-up times reported by two tasks executed by a
+        single-process replication pool
+        """
+        ctx = _worker_context(startMethod)
+        with multiprocessing.pool.Pool(processes=1, initializer=_initialize_worker,
+                                       context=ctx) as pool:
+            return pool.apply(_worker_startup_time), pool.apply(_worker_startup_time)
+
+    def testSpawnStartupTime(self):
+        "Test: a spawned worker reports its start-up time with its first task"
+        firstTime, secondTime = self.startupTimes('spawn')
+        self.assertGreater(firstTime, 0)
+        self.assertIsNone(secondTime)
+
+    @unittest.skipUnless('forkserver' in multiprocessing.get_all_start_methods(),
+                         "requires the forkserver start method")
+    def testForkserverStartupTime(self):
+        "Test: a forkserver worker reports its start-up time with its first task"
+        firstTime, secondTime = self.startupTimes('forkserver')
+        self.assertGreater(firstTime, 0)
+        self.assertIsNone(secondTime)
+
+    @unittest.skipUnless('forkserver' in multiprocessing.get_all_start_methods(),
+                         "requires the forkserver start method")
+    def testForkserverReused(self):
+        "Test: the forkserver is reused by a replicator with the same module search path"
+        _worker_context('forkserver')
+        pid = multiprocessing.forkserver._forkserver._forkserver_pid
+        _worker_context('forkserver')
+        self.assertEqual(multiprocessing.forkserver._forkserver._forkserver_pid, pid)
+
+    @unittest.skipUnless('forkserver' in multiprocessing.get_all_start_methods(),
+                         "requires the forkserver start method")
+    def testForkserverReplaced(self):
+        "Test: the forkserver is replaced for a replicator with a different module search path"
+        _worker_context('forkserver')
+        pid = multiprocessing.forkserver._forkserver._forkserver_pid
+        sys.path.append(os.path.dirname(TEST_MODELSCRIPT1_PATH))
+        try:
+            firstTime, secondTime = self.startupTimes('forkserver')
+            newPid = multiprocessing.forkserver._forkserver._forkserver_pid
+        finally:
+            sys.path.pop()
+        self.assertNotEqual(newPid, pid)
+        self.assertGreater(firstTime, 0)
+
+    @unittest.skipUnless('forkserver' in multiprocessing.get_all_start_methods(),
+                         "requires the forkserver start method")
+    def testForkserverNotReplaceable(self):
+        "Test: spawn is used if the forkserver cannot be replaced by this version of multiprocessing"
+        _worker_context('forkserver')
+        sys.path.append(os.path.dirname(TEST_MODELSCRIPT1_PATH))
+        try:
+            with unittest.mock.patch('multiprocessing.forkserver._forkserver', object()):
+                with self.assertLogs('simprovise.runcontrol.replication', 'WARNING'):
+                    ctx = _worker_context('forkserver')
+        finally:
+            sys.path.pop()
+        self.assertEqual(ctx.get_start_method(), 'spawn')
+
+    def testWorkerStartFailure(self):
+        "Test: replications whose worker processes fail to start raise a SimError"
+        model = SimModel.reload_model(TEST_MODELSCRIPT1_PATH)
+        replicationParameters = SimReplicationParameters()
+        replicationParameters.set_replication_range(1, 2)
+        replicationParameters.set_max_concurrent_replications(1)
+        # Each worker process exits in its initializer (sys.exit), as if
+        # it failed to start
+        with unittest.mock.patch('simprovise.runcontrol.replication._initialize_worker',
+                                 sys.exit):
+            with SimReplicator(model, SimTime(40), SimTime(300), 2) as replicator:
+                self.assertRaises(SimError, replicator.execute_replications,
+                                  replicationParameters)
+                self.assertTrue(replicator.cancelled)
+
+
+class SimPrecisionTargetTests(unittest.TestCase):
+    """
+    Tests SimPrecisionTarget evaluation against a (stub) result sample.
+    """
+    class Dataset(object):
+        valuetype = 'int'
+        timeunit = None
+
+    class Result(object):
+        def __init__(self, values):
+            self.values = values
+
+        def sample(self, elementID, datasetName, statistic, *, antithetic=False):
+            sample = SimSample(SimPrecisionTargetTests.Dataset())
+            for value in self.values:
+                sample.append(value)
+            return sample
+
+    # mean 10, 95% confidence interval halfwidth 1.08 (approximately)
+    values = [10, 8, 12] * 4
+    
+    def testHalfwidthMet(self):
+        "Test: a sample meets a target halfwidth greater than its own"
+        target = SimPrecisionTarget('Elem', 'Size', halfwidth=1.2)
+        self.assertTrue(target.is_met(self.Result(self.values)))
+
+    def testHalfwidthNotMet(self):
+        "Test: a sample does not meet a target halfwidth less than its own"
+        target = SimPrecisionTarget('Elem', 'Size', halfwidth=1.0)
+        self.assertFalse(target.is_met(self.Result(self.values)))
+
+    def testRelativeHalfwidthMet(self):
+        "Test: a sample meets a relative target greater than its own"
+        target = SimPrecisionTarget('Elem', 'Size', relativeHalfwidth=0.12)
+        self.assertTrue(target.is_met(self.Result(self.values)))
+
+    def testRelativeHalfwidthNotMet(self):
+        "Test: a sample does not meet a relative target less than its own"
+        target = SimPrecisionTarget('Elem', 'Size', relativeHalfwidth=0.1)
+        self.assertFalse(target.is_met(self.Result(self.values)))
+
+    def testBothTargets(self):
+        "Test: when both targets are specified, both must be met"
+        target = SimPrecisionTarget('Elem', 'Size', halfwidth=1.2,
+                                    relativeHalfwidth=0.1)
+        self.assertFalse(target.is_met(self.Result(self.values)))
+
+    def testSingleValue(self):
+        "Test: a sample of one value does not meet a target"
+        target = SimPrecisionTarget('Elem', 'Size', halfwidth=100)
+        self.assertFalse(target.is_met(self.Result([10])))
+
+    def testNoTarget(self):
+        "Test: a target without a halfwidth or relative halfwidth raises"
+        self.assertRaises(SimError, SimPrecisionTarget, 'Elem', 'Size')
+
+    def testInvalidStatistic(self):
+        "Test: a target with an invalid statistic raises"
+        self.assertRaises(SimError, SimPrecisionTarget, 'Elem', 'Size',
+                          'average', halfwidth=1)
+
+    def testInvalidConfidence(self):
+        "Test: a target with a confidence level of one raises"
+        self.assertRaises(SimError, SimPrecisionTarget, 'Elem', 'Size',
+                          halfwidth=1, confidence=1)
+
+
+class TQuantileTests(unittest.TestCase):
+    """
+    Tests the Student's t quantile function against t-table values.
+    """
+    def testOneDegreeOfFreedom(self):
+        "Test: t quantile(0.975) with df 1 is 12.706"
+        self.assertAlmostEqual(_t_quantile(0.975, 1), 12.706, places=3)
+
+    def testTwoDegreesOfFreedom(self):
+        "Test: t quantile(0.975) with df 2 is 4.303"
+        self.assertAlmostEqual(_t_quantile(0.975, 2), 4.303, places=3)
+
+    def testThreeDegreesOfFreedom(self):
+        "Test: t quantile(0.975) with df 3 is 3.182"
+        self.assertAlmostEqual(_t_quantile(0.975, 3), 3.182, places=3)
+
+    def testThreeDegreesOfFreedom995(self):
+        "Test: t quantile(0.995) with df 3 is 5.841"
+        self.assertAlmostEqual(_t_quantile(0.995, 3), 5.841, places=3)
+
+    def testFourDegreesOfFreedom995(self):
+        "Test: t quantile(0.995) with df 4 is 4.604"
+        self.assertAlmostEqual(_t_quantile(0.995, 4), 4.604, places=3)
+
+    def testFiveDegreesOfFreedom95(self):
+        "Test: t quantile(0.95) with df 5 is 2.015"
+        self.assertAlmostEqual(_t_quantile(0.95, 5), 2.015, places=3)
+
+    def testTenDegreesOfFreedom(self):
+        "Test: t quantile(0.975) with df 10 is 2.228"
+        self.assertAlmostEqual(_t_quantile(0.975, 10), 2.228, places=3)
+
+    def testThirtyDegreesOfFreedom995(self):
+        "Test: t quantile(0.995) with df 30 is 2.750"
+        self.assertAlmostEqual(_t_quantile(0.995, 30), 2.750, places=3)
+
+    def testLargeDegreesOfFreedom(self):
+        "Test: t quantile(0.975) with df 120 is 1.980"
+        self.assertAlmostEqual(_t_quantile(0.975, 120), 1.980, places=3)
+
+    def testLowerQuantile(self):
+        "Test: t quantile(0.025) with df 5 is -2.571"
+        self.assertAlmostEqual(_t_quantile(0.025, 5), -2.571, places=3)
+
+    def testMedian(self):
+        "Test: t quantile(0.5) is zero"
+        self.assertAlmostEqual(_t_quantile(0.5, 7), 0)
+
+
+class SimSampleConfidenceTests(unittest.TestCase):
+    """
+    Tests SimSample confidence intervals.
+    """
+    class Dataset(object):
+        def __init__(self, valuetype='int', timeunit=None):
+            self.valuetype = valuetype
+            self.timeunit = timeunit
+
+    @staticmethod
+    def sample(values, dataset=None):
+        sample = SimSample(dataset or SimSampleConfidenceTests.Dataset())
+        for value in values:
+            sample.append(value)
+        return sample
+
+    def testConfidenceInterval(self):
+        "Test: 95% confidence interval of mean 10, standard error 0.4924, df 11"
+        low, high = self.sample([10, 8, 12] * 4).confidence_interval()
+        self.assertAlmostEqual(low, 10 - 1.0837, places=4)
+        self.assertAlmostEqual(high, 10 + 1.0837, places=4)
+
+    def testConfidenceIntervalHalfwidth(self):
+        "Test: the confidence interval is the mean +/- the confidence halfwidth"
+        sample = self.sample([3, 7, 4, 9, 5])
+        low, high = sample.confidence_interval(0.9)
+        hw = sample.confidence_halfwidth(0.9)
+        self.assertAlmostEqual(low, sample.mean - hw)
+        self.assertAlmostEqual(high, sample.mean + hw)
+
+    def testConfidenceIntervalSmallSample(self):
+        "Test: 95% confidence interval for a sample of two uses t(0.975, 1) = 12.706"
+        low, high = self.sample([9, 11]).confidence_interval()
+        self.assertAlmostEqual(high - 10, 12.706, places=3)
+
+    def testConfidenceIntervalSimTime(self):
+        "Test: the confidence interval of a SimTime dataset sample is a pair of SimTimes"
+        dataset = self.Dataset('SimTime', tu.MINUTES)
+        low, high = self.sample([10, 8, 12] * 4, dataset).confidence_interval()
+        self.assertEqual((type(low), low.units), (SimTime, tu.MINUTES))
+        self.assertAlmostEqual(high.value, 10 + 1.0837, places=4)
+
+    def testConfidenceIntervalSingleValue(self):
+        "Test: the confidence interval of a single value sample is (NaN, NaN)"
+        low, high = self.sample([10]).confidence_interval()
+        self.assertTrue(math.isnan(low) and math.isnan(high))
+
+
+class SimulationResultSampleTests(unittest.TestCase):
+    """
+    Tests SimulationResult sample(), paired_difference() and
+    print_paired_differences() using results with stub databases.
+    """
+    class Dataset(object):
+        valuetype = 'int'
+        timeunit = None
+        def __init__(self, elementID, name):
+            self.element_id = elementID
+            self.name = name
+
+    class Database(object):
+        def __init__(self, runs, datasets):
+            self._runs = runs
+            self.datasets = datasets
+
+        def runs(self):
+            return list(self._runs)
+
+    class DatabaseManager(object):
+        def __init__(self, database):
+            self.database = database
+
+        def current_datasets(self):
+            return self.database.datasets
+
+    class Statistics(object):
+        def __init__(self, means):
+            self.means = means
+
+    dataset1 = Dataset('Queue1', 'Size')
+    dataset2 = Dataset('Queue1', 'Time')
+
+    @classmethod
+    def result(cls, values1, values2=(), runs=None):
+        """
+        Return a SimulationResult (bypassing its initializer) with a mean
+        per run of the passed values for datasets 1 and 2.
+        """
+        datasets = [cls.dataset1, cls.dataset2]
+        runs = runs or range(1, len(values1)+1)
+        result = SimulationResult.__new__(SimulationResult)
+        result.dbMgr = cls.DatabaseManager(cls.Database(runs, datasets))
+        result.datasetStatistics = {}
+        for dset, values in zip(datasets, (values1, values2)):
+            means = SimSample(dset)
+            for value in values:
+                means.append(value)
+            result.datasetStatistics.setdefault(dset.element_id, {})[dset.name] = \
+                cls.Statistics(means)
+        return result
+
+    def setUp(self):
+        self.result1 = self.result([10, 12, 11, 15])
+        self.result2 = self.result([8, 11, 10, 12])
+
+    def testSample(self):
+        "Test: sample() returns the statistic value for each run"
+        sample = self.result1.sample('Queue1', 'Size')
+        self.assertEqual(sample.values, [10, 12, 11, 15])
+
+    def testSampleAntithetic(self):
+        "Test: an antithetic sample() returns the average of each run pair"
+        sample = self.result1.sample('Queue1', 'Size', antithetic=True)
+        self.assertEqual(sample.values, [11, 13])
+
+    def testSampleAntitheticOddRuns(self):
+        "Test: an antithetic sample() of an odd number of runs raises"
+        result = self.result([10, 12, 11])
+        self.assertRaises(SimError, result.sample, 'Queue1', 'Size',
+                          antithetic=True)
+
+    def testSampleAntitheticMissingValues(self):
+        "Test: an antithetic sample() without a value for every run raises"
+        result = self.result([10, 12, 11], runs=[1, 2, 3, 4])
+        self.assertRaises(SimError, result.sample, 'Queue1', 'Size',
+                          antithetic=True)
+
+    def testSampleInvalidStatistic(self):
+        "Test: sample() of an invalid statistic raises"
+        self.assertRaises(SimError, self.result1.sample, 'Queue1', 'Size',
+                          'average')
+
+    def testSampleInvalidDataset(self):
+        "Test: sample() of a nonexistent dataset raises"
+        self.assertRaises(SimError, self.result1.sample, 'Queue1', 'Entries')
+
+    def testPairedDifference(self):
+        "Test: paired_difference() returns the difference for each run"
+        diffs = self.result1.paired_difference(self.result2, 'Queue1', 'Size')
+        self.assertEqual((diffs.values, diffs.mean), ([2, 1, 1, 3], 1.75))
+
+    def testPairedDifferenceAntithetic(self):
+        "Test: an antithetic paired_difference() differences the run pair averages"
+        diffs = self.result1.paired_difference(self.result2, 'Queue1', 'Size',
+                                               antithetic=True)
+        self.assertEqual(diffs.values, [1.5, 2])
+
+    def testPairedDifferenceDifferentRuns(self):
+        "Test: paired_difference() of results with different runs raises"
+        result3 = self.result([8, 11, 10, 12], runs=[5, 6, 7, 8])
+        self.assertRaises(SimError, self.result1.paired_difference, result3,
+                          'Queue1', 'Size')
+
+    def testPairedDifferenceSampleSizes(self):
+        "Test: paired_difference() of samples with different sizes raises"
+        result3 = self.result([8, 11, 10], runs=[1, 2, 3, 4])
+        self.assertRaises(SimError, self.result1.paired_difference, result3,
+                          'Queue1', 'Size')
+
+    def testPrintPairedDifferences(self):
+        "Test: print_paired_differences() prints the mean difference of each dataset with values"
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.result1.print_paired_differences(self.result2)
+        lines = [line.split() for line in output.getvalue().splitlines()]
+        datasetLines = [line for line in lines if line[0] == 'Queue1']
+        self.assertEqual(datasetLines, [['Queue1', 'Size', '1.75', '0.48', '1.52']])
+
+
+class SimReplicatorAntitheticTests(unittest.TestCase):
+    """
+    Tests the pairing of runs by an antithetic SimReplicator.
+    """
+    @classmethod
+    def setUpClass(cls):
+        model = SimModel.reload_model(TEST_MODELSCRIPT1_PATH)
+        cls.replicator = SimReplicator(model, SimTime(40), SimTime(300), 2,
+                                       antithetic=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.replicator.cleanup()
+
+    def pairing(self, runNumber, firstRun=1):
+        "Return the random run number and antithetic flag for a run"
+        args = self.replicator._execute_args(runNumber, None, firstRun)
+        return args[-2:]
+
+    def testFirstRunOfPair(self):
+        "Test: the first run of a pair uses its own run number, sampling from U"
+        self.assertEqual(self.pairing(3), (3, False))
+
+    def testSecondRunOfPair(self):
+        "Test: the second run of a pair uses the first run's number, sampling from 1-U"
+        self.assertEqual(self.pairing(4), (3, True))
+
+    def testPairOffsetFromFirstRun(self):
+        "Test: pairs are formed relative to the first run of the replication range"
+        self.assertEqual([self.pairing(n, 2) for n in (2, 3, 4, 5)],
+                         [(2, False), (2, True), (4, False), (4, True)])
+
+    def testOddRunCount(self):
+        "Test: antithetic replications of an odd number of runs raise"
+        replicationParameters = SimReplicationParameters()
+        replicationParameters.set_replication_range(1, 3)
+        self.assertRaises(SimError, self.replicator.execute_replications,
+                          replicationParameters)
+
+    def testForkAfterWarmup(self):
+        "Test: antithetic fork-after-warmup replications raise"
+        self.assertRaises(SimError, SimReplicator, SimModel.model(),
+                          SimTime(40), SimTime(300), 2, antithetic=True,
+                          forkAfterWarmup=True)
+
+
 #class SimulationTests(ReplicatorTests):
     #"""
     #"""
@@ -621,6 +1232,14 @@ def makeTestSuite():
     loader = unittest.TestLoader()
     suite = unittest.TestSuite()
     suite.addTest(loader.loadTestsFromTestCase(ReplicatorTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimModelReloadTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimForkedReplicationsTests))
+    suite.addTest(loader.loadTestsFromTestCase(WorkerStartupTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimPrecisionTargetTests))
+    suite.addTest(loader.loadTestsFromTestCase(TQuantileTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimSampleConfidenceTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimulationResultSampleTests))
+    suite.addTest(loader.loadTestsFromTestCase(SimReplicatorAntitheticTests))
     #suite.addTest(loader.loadTestsFromTestCase(SimulationTests))
     return suite
 